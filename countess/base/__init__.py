@@ -7,4 +7,20 @@ other Enrich2 classes and methods.
 """
 
 
-__all__ = ["config_constants", "constants", "dataframe", "storemanager", "utils"]
+__all__ = [
+    "chunk_sizer",
+    "config_constants",
+    "constants",
+    "count_shard",
+    "counts_cache",
+    "dataframe",
+    "element_index",
+    "filtered_sink",
+    "read_progress",
+    "run_report",
+    "spilling_counter",
+    "stage_profiler",
+    "storemanager",
+    "table_cache",
+    "utils",
+]
@@ -0,0 +1,133 @@
+"""
+Enrich2 base chunk_sizer module
+===============================
+
+Contains the ``ChunkSizer`` class, which chooses how many rows to process at
+a time in chunked table operations so that each chunk fits in a memory
+budget, and adjusts the number of rows when a chunk uses more or less memory
+than was estimated.
+"""
+
+
+__all__ = ["ChunkSizer"]
+
+
+class ChunkSizer(object):
+    """
+    Number of rows per chunk for a chunked table operation.
+
+    The memory used by one row of a chunk is first estimated from the width
+    of a row and the number of tables held in memory at once. Each chunk is
+    given a fixed share of the memory budget, :py:attr:`working_fraction`,
+    which leaves room for the copies made by pandas while the chunk is
+    combined and written. After each chunk, :py:meth:`update` replaces the
+    estimate with the memory the chunk actually used, so the following
+    chunks shrink if a chunk ran over its share and grow if it used less.
+
+    Without a memory budget, every chunk has *default* rows.
+
+    Parameters
+    ----------
+    budget_bytes : `int` or None
+        Memory budget in bytes, or ``None`` to use *default* rows.
+    row_bytes : `int`
+        Estimated memory in bytes of one row of one table.
+    tables : `int`
+        Number of tables with one row per chunk row held in memory at once.
+    default : `int`
+        Number of rows per chunk without a memory budget.
+
+    Attributes
+    ----------
+    budget_bytes : `int` or None
+        Memory budget in bytes.
+    chunk_row_bytes : `float`
+        Estimated memory in bytes used by each row of a chunk, over all
+        tables.
+    overruns : `int`
+        Number of chunks that used more than their share of the budget.
+
+    Methods
+    -------
+    string_bytes
+        Returns the estimated memory used by a string of a given length.
+    update
+        Updates the estimate from the memory used by a chunk.
+    """
+
+    working_fraction = 0.25
+    min_rows = 1000
+    max_rows = 10000000
+    string_overhead = 49
+
+    def __init__(self, budget_bytes, row_bytes, tables=1, default=100000):
+        if budget_bytes is not None and budget_bytes <= 0:
+            raise ValueError("budget_bytes must be positive [{}]".format(budget_bytes))
+        if row_bytes <= 0 or tables <= 0:
+            raise ValueError("row_bytes and tables must be positive")
+        self.budget_bytes = budget_bytes
+        self.chunk_row_bytes = float(row_bytes * tables)
+        self.default = default
+        self.overruns = 0
+
+    @classmethod
+    def string_bytes(cls, length):
+        """
+        Returns the estimated memory in bytes used by an ASCII string of
+        *length* characters, including the object overhead.
+
+        Parameters
+        ----------
+        length : `int`
+            Number of characters.
+
+        Returns
+        -------
+        `int`
+        """
+        return cls.string_overhead + int(length)
+
+    @property
+    def target_bytes(self):
+        """
+        Share of the memory budget in bytes for the data of one chunk, or
+        ``None`` without a memory budget.
+        """
+        if self.budget_bytes is None:
+            return None
+        return self.budget_bytes * self.working_fraction
+
+    @property
+    def rows(self):
+        """
+        Number of rows in the next chunk.
+        """
+        if self.budget_bytes is None:
+            return self.default
+        rows = int(self.target_bytes // self.chunk_row_bytes)
+        return max(self.min_rows, min(self.max_rows, rows))
+
+    def update(self, nbytes, rows):
+        """
+        Updates the estimated memory used per row from a chunk of *rows* rows
+        that used *nbytes* bytes.
+
+        Parameters
+        ----------
+        nbytes : `int`
+            Memory in bytes used by the chunk's tables.
+        rows : `int`
+            Number of rows in the chunk.
+
+        Returns
+        -------
+        `bool`
+            ``True`` if the chunk used more than its share of the budget.
+        """
+        if self.budget_bytes is None or rows <= 0 or nbytes <= 0:
+            return False
+        self.chunk_row_bytes = float(nbytes) / rows
+        if nbytes > self.target_bytes:
+            self.overruns += 1
+            return True
+        return False
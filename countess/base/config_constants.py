@@ -14,19 +14,43 @@ TIMEPOINT = "timepoint"
 OUTPUT_DIR = "output directory"
 REPORT_FILTERED_READS = "report filtered reads"
 STORE = "store"
+STORE_OPTIONS = "store options"
+STORE_BACKEND = "backend"
+STORE_COMPRESSION = "compression"
+STORE_COMPLEVEL = "compression level"
+STORE_EXPECTED_ROWS = "expected rows"
+STORE_CHUNKSHAPE = "chunk shape"
+STORE_COMPACT_THRESHOLD = "compact threshold"
+EXECUTION = "execution"
+EXECUTION_SCHEDULER = "scheduler"
+EXECUTION_WORKERS = "workers"
+EXECUTION_MEMORY_LIMIT = "memory limit"
+EXECUTION_MEMORY_BUDGET = "memory budget"
 OVERLAP = "overlap"
+OVERLAP_FWD_START = "forward start"
+OVERLAP_REV_START = "reverse start"
+OVERLAP_LENGTH = "length"
+OVERLAP_MAX_MISMATCHES = "max mismatches"
+OVERLAP_ONLY = "overlap only"
 
 FASTQ = "fastq"
 READS = "reads"
 REVERSE = "reverse"
+FORWARD_READS = "forward reads"
+REVERSE_READS = "reverse reads"
 FILTERS = "filters"
 FILTERS_MAX_N = "max N"
 FILTERS_MIN_COUNT = "min count"
 FILTERS_AVG_Q = "avg quality"
 FILTERS_MIN_Q = "min quality"
 FILTERS_CHASTITY = "chastity"
+FILTERS_REMOVE_UNRESOLVABLE = "remove unresolvable"
 TRIM_START = "start"
 TRIM_LENGTH = "length"
+DEMULTIPLEX = "demultiplex"
+DEMUX_INDEX = "index"
+DEMUX_INDEX_READS = "index reads"
+DEMUX_MISMATCHES = "mismatches"
 SCORER = "scorer"
 SCORER_PATH = "scorer path"
 SCORER_OPTIONS = "scorer options"
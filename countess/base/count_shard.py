@@ -0,0 +1,162 @@
+"""
+Enrich2 base count_shard module
+===============================
+
+Contains functions for reading and writing count shards. A count shard holds
+the raw counts of one part of a sequencing library's reads, so that the reads
+can be counted in many separate processes and the shards merged afterwards.
+
+A shard is a Parquet file with an ``'index'`` column of elements and a
+``'count'`` column, sorted by element with each element appearing once. The
+file's key-value metadata holds a JSON header under :py:data:`HEADER_KEY`
+describing how the counts were made: the library type and settings, the
+reads that were counted, and the filter statistics.
+"""
+
+
+import os
+import json
+import heapq
+import itertools
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+__all__ = [
+    "SHARD_VERSION",
+    "write_count_shard",
+    "read_count_shard_header",
+    "iter_count_shard",
+    "merge_count_shards",
+]
+
+
+#: Version of the count shard format written by :py:func:`write_count_shard`.
+SHARD_VERSION = 1
+
+#: Key of the JSON header in the Parquet key-value metadata.
+HEADER_KEY = b"enrich2.count_shard"
+
+#: Number of rows in each row group of a shard.
+ROW_GROUP_SIZE = 100000
+
+
+def write_count_shard(path, counts, header):
+    """
+    Write the counts in *counts* to a count shard at *path*, sorted by
+    element.
+
+    The shard is written to a temporary file that replaces *path* when it is
+    complete, so an interrupted write never leaves a partial shard.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the shard file.
+    counts : :py:class:`pandas.DataFrame`
+        Data frame indexed by element with a ``'count'`` column.
+    header : `dict`
+        JSON serializable description of the counts. The ``'version'``,
+        ``'elements'``, ``'total'`` and ``'max_key_length'`` entries are
+        set by this function.
+
+    Returns
+    -------
+    `dict`
+        The header written to the shard.
+    """
+    counts = counts.sort_index()
+    keys = [str(k) for k in counts.index]
+    header = dict(header)
+    header.update(
+        {
+            "version": SHARD_VERSION,
+            "elements": len(keys),
+            "total": int(counts["count"].sum()),
+            "max_key_length": max((len(k) for k in keys), default=0),
+        }
+    )
+    table = pa.table(
+        {
+            "index": pa.array(keys, type=pa.string()),
+            "count": pa.array(counts["count"].astype(int), type=pa.int64()),
+        }
+    )
+    table = table.replace_schema_metadata(
+        {HEADER_KEY: json.dumps(header, sort_keys=True).encode("utf-8")}
+    )
+    tmp_path = "{}.tmp".format(path)
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_count_shard_header(path):
+    """
+    Return the header of the count shard at *path*.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the shard file.
+
+    Returns
+    -------
+    `dict`
+        The header passed to :py:func:`write_count_shard`.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a count shard or was written by an unsupported
+        version.
+    """
+    if not os.path.isfile(path):
+        raise IOError("Count shard '{}' not found".format(path))
+    metadata = pq.read_schema(path).metadata or {}
+    if HEADER_KEY not in metadata:
+        raise ValueError("'{}' is not a count shard".format(path))
+    header = json.loads(metadata[HEADER_KEY].decode("utf-8"))
+    if header.get("version") != SHARD_VERSION:
+        raise ValueError(
+            "Unsupported count shard version '{}' in '{}'".format(
+                header.get("version"), path
+            )
+        )
+    return header
+
+
+def iter_count_shard(path):
+    """
+    Yields the ``(element, count)`` pairs of the count shard at *path* in
+    element order, reading one row group at a time.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the shard file.
+    """
+    shard = pq.ParquetFile(path)
+    for batch in shard.iter_batches(batch_size=ROW_GROUP_SIZE):
+        keys = batch.column(0).to_pylist()
+        counts = batch.column(1).to_pylist()
+        yield from zip(keys, counts)
+
+
+def merge_count_shards(paths):
+    """
+    Yields the ``(element, count)`` pairs of all count shards in *paths* in
+    element order, with the counts of each element added up.
+
+    The shards are merged with a streaming k-way merge, so only one row group
+    of each shard is held in memory.
+
+    Parameters
+    ----------
+    paths : `list` of `str`
+        Paths of the shard files.
+    """
+    sources = [iter_count_shard(path) for path in paths]
+    merged = heapq.merge(*sources, key=lambda pair: pair[0])
+    for key, group in itertools.groupby(merged, key=lambda pair: pair[0]):
+        yield key, sum(count for _, count in group)
@@ -0,0 +1,206 @@
+"""
+Enrich2 base counts_cache module
+================================
+
+Contains the ``CountsCache`` class, a content-addressed directory of raw count
+tables that can be shared between analyses of the same sequencing data.
+"""
+
+
+import os
+import json
+import hashlib
+import logging
+import dask.dataframe as dd
+
+from countess.store.hdf import HdfStore
+from ..base.utils import log_message
+
+
+__all__ = ["CountsCache"]
+
+
+class CountsCache(object):
+    """
+    Directory of raw count tables keyed by a hash of the settings that
+    produced them.
+
+    Each entry is a single HDF5 file named ``<hash>.h5`` containing the
+    ``'/raw'`` tables written by a
+    :py:class:`~enrich2.libraries.seqlib.SeqLib` when counting reads. The
+    filter statistics for the run are kept in the metadata of each table so
+    that they can be restored along with the counts.
+
+    Entries are written to a temporary file and moved into place once
+    complete, so concurrent analyses sharing a cache directory never read a
+    partially written entry.
+
+    Parameters
+    ----------
+    path : `str`
+        Path to a new or existing cache directory.
+
+    Attributes
+    ----------
+    path : `str`
+        Path to the cache directory.
+    hits : `int`
+        Number of successful lookups made through this instance.
+    misses : `int`
+        Number of failed lookups made through this instance.
+
+    Methods
+    -------
+    cache_key
+        Returns the hash used to identify the counts for a configuration.
+    entry_path
+        Returns the path to the cache entry for a hash.
+    contains
+        Returns ``True`` if an entry exists for a hash.
+    load
+        Returns the tables and filter statistics stored for a hash.
+    save
+        Stores tables and filter statistics for a hash.
+    """
+
+    entry_suffix = ".h5"
+    filter_stats_key = "filter_stats"
+
+    def __init__(self, path):
+        try:
+            path = os.path.expanduser(path)
+        except AttributeError as e:
+            raise AttributeError("Invalid input for counts cache: {}".format(e))
+        try:
+            if not os.path.exists(path):
+                os.makedirs(path)
+        except OSError as e:
+            raise OSError("Failed to create counts cache directory: {}".format(e))
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(cfg):
+        """
+        Returns the hash used to identify the counts produced by the
+        configuration *cfg*.
+
+        The configuration is serialized with sorted keys, so the hash does not
+        depend on the order in which options were set.
+
+        Parameters
+        ----------
+        cfg : `dict`
+            JSON-serializable description of everything that determines the
+            raw counts, such as the reads md5 and the trimming, filtering and
+            wild type options.
+
+        Returns
+        -------
+        `str`
+            Hexadecimal SHA-256 digest.
+        """
+        encoded = json.dumps(cfg, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def entry_path(self, key):
+        """
+        Returns the path to the cache entry for *key*.
+
+        Parameters
+        ----------
+        key : `str`
+            Hash returned by :py:meth:`cache_key`.
+
+        Returns
+        -------
+        `str`
+        """
+        return os.path.join(self.path, key + self.entry_suffix)
+
+    def contains(self, key):
+        """
+        Returns ``True`` if the cache has an entry for *key*.
+
+        Parameters
+        ----------
+        key : `str`
+            Hash returned by :py:meth:`cache_key`.
+
+        Returns
+        -------
+        `bool`
+        """
+        return os.path.isfile(self.entry_path(key))
+
+    def load(self, key):
+        """
+        Returns the tables and filter statistics stored under *key*, or
+        ``None`` if there is no such entry.
+
+        Parameters
+        ----------
+        key : `str`
+            Hash returned by :py:meth:`cache_key`.
+
+        Returns
+        -------
+        `tuple` or None
+            A `dict` mapping table keys to :py:class:`pandas.DataFrame`
+            objects and a `dict` of filter statistics.
+        """
+        if not self.contains(key):
+            self.misses += 1
+            return None
+
+        store = HdfStore(self.entry_path(key))
+        tables = dict()
+        filter_stats = dict()
+        for k in store.keys():
+            tables["/" + k] = store.get(k).compute()
+            filter_stats = store.get_metadata(k).get(self.filter_stats_key, {})
+        self.hits += 1
+        log_message(
+            logging_callback=logging.info,
+            msg="Loaded cached counts '{}'".format(self.entry_path(key)),
+            extra={"oname": self.__class__.__name__},
+        )
+        return tables, filter_stats
+
+    def save(self, key, tables, filter_stats):
+        """
+        Stores *tables* and *filter_stats* under *key*, replacing any existing
+        entry.
+
+        Parameters
+        ----------
+        key : `str`
+            Hash returned by :py:meth:`cache_key`.
+        tables : `dict`
+            Mapping of table keys to :py:class:`pandas.DataFrame` objects.
+        filter_stats : `dict`
+            Filter statistics from counting the reads.
+        """
+        if len(tables) == 0:
+            raise ValueError("No tables to add to counts cache")
+
+        path = self.entry_path(key)
+        temp_path = "{}.{}.tmp{}".format(
+            os.path.splitext(path)[0], os.getpid(), self.entry_suffix
+        )
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        store = HdfStore(temp_path)
+        for k, df in tables.items():
+            k = k.lstrip("/")
+            store.put(k, dd.from_pandas(df, npartitions=1))
+            store.set_metadata(k, {self.filter_stats_key: dict(filter_stats)})
+        os.replace(temp_path, path)
+
+        log_message(
+            logging_callback=logging.info,
+            msg="Added counts to cache '{}'".format(path),
+            extra={"oname": self.__class__.__name__},
+        )
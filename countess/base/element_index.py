@@ -0,0 +1,227 @@
+"""
+Enrich2 base element_index module
+=================================
+
+Contains the ``ElementIndex`` class, a dictionary that maps element strings
+(variants, barcodes and identifiers) to dense integer ids so that tables can
+be stored and joined on integers instead of long HGVS strings.
+"""
+
+
+import re
+import ast
+import numpy as np
+import pandas as pd
+
+
+__all__ = ["ElementIndex"]
+
+
+class ElementIndex(object):
+    """
+    Dictionary of the element strings used to index the tables in one store.
+
+    Each new string is given the next id, starting from ``0``, so ids are
+    dense and stable for the lifetime of the store. The dictionary is kept in
+    the store under :py:attr:`table_key` as a table with the ids as the index
+    and the strings in the ``'element'`` column.
+
+    Parameters
+    ----------
+    elements : `Iterable` of `str`
+        Existing elements, in id order.
+
+    Attributes
+    ----------
+    saved : `int`
+        Number of elements already written to the store.
+    width : `int`
+        Width of the element column of the table in the store. Longer
+        elements cannot be appended to the table.
+
+    Methods
+    -------
+    encode
+        Returns the ids for some elements, adding new elements.
+    decode
+        Returns the elements for some ids.
+    translate_where
+        Rewrites a query on element strings as a query on ids.
+    to_frame
+        Returns the dictionary as a table.
+    from_frame
+        Creates a dictionary from a table.
+    """
+
+    table_key = "/elements"
+    column = "element"
+
+    # queries of the form "index=value", "index!='value'" or "index=[...]"
+    _where_pattern = re.compile(r"^\s*index\s*(==|=|!=)\s*(.+?)\s*$")
+    _index_pattern = re.compile(r"\bindex\b")
+
+    def __init__(self, elements=None):
+        if elements is None:
+            elements = []
+        self._elements = pd.Index(list(elements), dtype=object)
+        if not self._elements.is_unique:
+            raise ValueError("Duplicate elements in element index")
+        self.saved = len(self._elements)
+        self.width = max((len(e) for e in self._elements), default=0)
+
+    def __len__(self):
+        return len(self._elements)
+
+    def encode(self, values, add=True):
+        """
+        Returns the ids of *values*.
+
+        Parameters
+        ----------
+        values : `Iterable` of `str`
+            Elements to encode.
+        add : `bool`
+            Add elements that are not in the dictionary. If ``False``, unknown
+            elements are given the id ``-1``.
+
+        Returns
+        -------
+        :py:class:`numpy.ndarray`
+            Array of ``int64`` ids.
+        """
+        values = pd.Index(values, dtype=object)
+        ids = self._elements.get_indexer(values)
+        if add:
+            missing = ids == -1
+            if missing.any():
+                new = values[missing].unique()
+                self._elements = self._elements.append(new)
+                ids[missing] = self._elements.get_indexer(values[missing])
+        return ids.astype(np.int64)
+
+    def decode(self, ids):
+        """
+        Returns the elements for *ids*.
+
+        Parameters
+        ----------
+        ids : `Iterable` of `int`
+            Ids returned by :py:meth:`encode`.
+
+        Returns
+        -------
+        :py:class:`pandas.Index`
+
+        Raises
+        ------
+        IndexError
+            If an id is not in the dictionary.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) > 0 and (ids.min() < 0 or ids.max() >= len(self._elements)):
+            raise IndexError("Unknown id in element index")
+        return pd.Index(self._elements.take(ids), dtype=object)
+
+    def translate_where(self, where):
+        """
+        Rewrites a query on the element strings of a table as a query on its
+        ids.
+
+        Queries comparing ``index`` with a single element or a list of
+        elements using ``=``, ``==`` or ``!=`` are translated. Queries that
+        do not use the index are returned unchanged.
+
+        Parameters
+        ----------
+        where : `str`
+            Query such as ``"index='_wt'"`` or ``"index=['_wt', 'c.1A>G']"``.
+
+        Returns
+        -------
+        `str`
+
+        Raises
+        ------
+        ValueError
+            If the query uses the index in any other way, such as ranges,
+            ``in`` or a combination with other conditions, which cannot be
+            rewritten as a query on ids.
+        """
+        match = self._where_pattern.match(where)
+        if match is None:
+            if self._index_pattern.search(where) is not None:
+                raise ValueError(
+                    "Cannot translate query '{}' on the element index".format(where)
+                )
+            return where
+        op, value = match.groups()
+        values = self._where_values(value)
+        if values is None:
+            raise ValueError(
+                "Cannot translate query '{}' on the element index".format(where)
+            )
+        ids = self.encode(values, add=False)
+        if len(ids) == 1:
+            return "index{}{}".format(op, ids[0])
+        else:
+            return "index{}{}".format(op, list(ids))
+
+    @staticmethod
+    def _where_values(value):
+        """
+        Returns the elements compared with the index in a query, from a
+        quoted or unquoted element or a list of elements, or ``None`` if
+        *value* is not one of these.
+        """
+        if value.startswith("["):
+            try:
+                values = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                return None
+            if not isinstance(values, list):
+                return None
+            return [str(v) for v in values]
+        elif value[0] in "'\"":
+            if len(value) < 2 or value[-1] != value[0] or value[0] in value[1:-1]:
+                return None
+            return [value[1:-1]]
+        elif re.search(r"[&|~()\s]", value) is not None:
+            return None
+        else:
+            return [value]
+
+    def to_frame(self, start=0):
+        """
+        Returns the elements from id *start* onwards as a table.
+
+        Parameters
+        ----------
+        start : `int`
+            First id to include.
+
+        Returns
+        -------
+        :py:class:`pandas.DataFrame`
+        """
+        return pd.DataFrame(
+            {self.column: self._elements[start:]},
+            index=pd.RangeIndex(start, len(self._elements)),
+        )
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Creates a dictionary from a table returned by :py:meth:`to_frame`.
+
+        Parameters
+        ----------
+        df : :py:class:`pandas.DataFrame`
+
+        Returns
+        -------
+        :py:class:`ElementIndex`
+        """
+        df = df.sort_index()
+        if not np.array_equal(df.index.values, np.arange(len(df))):
+            raise ValueError("Element index ids are not dense")
+        return cls(df[cls.column].values)
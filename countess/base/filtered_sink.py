@@ -0,0 +1,165 @@
+"""
+Enrich2 base filtered_sink module
+=================================
+
+Contains the ``FilteredReadSink`` class, which writes the reads removed by
+the read filters of a :py:class:`~enrich2.libraries.seqlib.SeqLib` to a
+compressed tab-separated file in bulk.
+"""
+
+
+import os
+import gzip
+from collections import Counter
+
+
+__all__ = ["FilteredReadSink"]
+
+
+class FilteredReadSink(object):
+    """
+    Buffered writer of filtered reads.
+
+    Rows are kept in memory and appended to a gzip-compressed tab-separated
+    file *buffer_size* rows at a time. The file has a ``read``,
+    ``sequence``, ``quality`` and ``count`` column, followed by one column
+    per filter in *reasons* that is ``1`` if the filter removed the read and
+    ``0`` otherwise. Rows are appended to an existing file, so that the
+    reads filtered before a counting checkpoint are kept when counting
+    resumes.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the output file.
+    reasons : `list`
+        Names of the filters, in column order.
+    buffer_size : `int`
+        Number of rows kept in memory before they are written.
+
+    Attributes
+    ----------
+    path : `str`
+        Path of the output file.
+    reasons : `list`
+        Names of the filters, in column order.
+    rows : `int`
+        Number of rows added.
+    reason_counts : :py:class:`collections.Counter`
+        Number of rows removed by each filter.
+
+    Methods
+    -------
+    add
+        Adds a filtered read or sequence.
+    flush
+        Writes the buffered rows to the file.
+    close
+        Writes the buffered rows and closes the file.
+    checkpoint
+        Writes the buffered rows and returns the size of the file.
+    truncate
+        Removes the rows written after a checkpoint.
+    """
+
+    columns = ["read", "sequence", "quality", "count"]
+
+    def __init__(self, path, reasons, buffer_size=10000):
+        self.path = path
+        self.reasons = list(reasons)
+        self.buffer_size = buffer_size
+        self.rows = 0
+        self.reason_counts = Counter()
+        self._buffer = list()
+        self._handle = None
+
+    def add(self, sequence, reasons, read="", quality="", count=1):
+        """
+        Adds a row for the filtered *sequence*.
+
+        Parameters
+        ----------
+        sequence : `str`
+            Sequence of the read or variant.
+        reasons : `iterable`
+            Names of the filters that removed it.
+        read : `str`
+            FASTQ_ header of the read, if any.
+        quality : `str`
+            FASTQ_ quality string of the read, if any.
+        count : `int`
+            Number of reads with this row.
+        """
+        reasons = set(reasons)
+        unknown = reasons.difference(self.reasons)
+        if len(unknown) > 0:
+            raise ValueError("Unknown filter [{}]".format(", ".join(sorted(unknown))))
+        self.reason_counts.update(reasons)
+        flags = ["1" if r in reasons else "0" for r in self.reasons]
+        self._buffer.append(
+            "\t".join([read, sequence, quality, str(count)] + flags) + "\n"
+        )
+        self.rows += 1
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows to the file, writing the header first if the
+        file is new.
+        """
+        if len(self._buffer) == 0:
+            return
+        if self._handle is None:
+            new = not os.path.exists(self.path)
+            self._handle = gzip.open(self.path, "at")
+            if new:
+                self._handle.write("\t".join(self.columns + self.reasons) + "\n")
+        self._handle.writelines(self._buffer)
+        self._handle.flush()
+        self._buffer = list()
+
+    def close(self):
+        """
+        Writes the buffered rows and closes the file.
+        """
+        self.flush()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def checkpoint(self):
+        """
+        Writes the buffered rows and closes the file, which ends its current
+        gzip member, so that the file can be cut back to the returned size
+        with :py:meth:`truncate` and still be read.
+
+        Returns
+        -------
+        `int`
+            Size of the file in bytes, ``0`` if it has not been written.
+        """
+        self.close()
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path)
+
+    def truncate(self, size):
+        """
+        Removes the rows written after the :py:meth:`checkpoint` that
+        returned *size*, removing the file if *size* is ``0``.
+
+        Parameters
+        ----------
+        size : `int`
+            Size of the file in bytes at the checkpoint.
+        """
+        self._buffer = list()
+        self.close()
+        if not os.path.exists(self.path):
+            return
+        if size == 0:
+            os.remove(self.path)
+        elif os.path.getsize(self.path) > size:
+            with open(self.path, "r+b") as handle:
+                handle.truncate(size)
@@ -0,0 +1,154 @@
+"""
+Enrich2 base read_progress module
+=================================
+
+Contains the ``ReadProgress`` class, which reports the progress of counting
+the reads in a FASTQ_ file at a limited rate.
+"""
+
+
+import time
+import logging
+from collections import OrderedDict
+
+from .utils import log_message
+
+
+__all__ = ["ReadProgress", "PROGRESS"]
+
+
+#: Key of the progress event in the ``extra`` dictionary of progress log
+#: messages.
+PROGRESS = "progress"
+
+
+class ReadProgress(object):
+    """
+    Progress of counting the reads in a FASTQ_ file.
+
+    :py:meth:`update` is called as the file is read, and at most once every
+    *interval* seconds it reports a progress event with the number of reads
+    processed, the reads per second, the bytes of the file read out of its
+    size, the estimated time remaining and the fraction of reads that
+    passed the read filters. Events are logged through
+    :py:func:`~enrich2.base.utils.log_message` with the event under the
+    :py:data:`PROGRESS` key of the message's ``extra`` dictionary, so the
+    GUI can show them as they arrive through the logging queue, and are
+    passed to *callback* if one is given.
+
+    For compressed files, bytes are compressed bytes.
+
+    Parameters
+    ----------
+    name : `str`
+        Name of the object counting the reads.
+    total_bytes : `int`
+        Size of the file in bytes.
+    interval : `float`
+        Minimum number of seconds between events.
+    callback : `Callable`
+        Function called with each event, or ``None``.
+
+    Attributes
+    ----------
+    events : `int`
+        Number of events reported.
+
+    Methods
+    -------
+    update
+        Reports an event if one is due.
+    finish
+        Reports the final event.
+    """
+
+    def __init__(self, name, total_bytes, interval=5.0, callback=None):
+        self.name = name
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.callback = callback
+        self.events = 0
+        self._start = time.monotonic()
+        self._last = self._start
+
+    def update(self, nbytes, reads, filtered):
+        """
+        Reports a progress event if *interval* seconds have passed since the
+        last one.
+
+        Parameters
+        ----------
+        nbytes : `int`
+            Bytes of the file read so far.
+        reads : `int`
+            Number of reads processed so far.
+        filtered : `int`
+            Number of reads removed by the read filters so far.
+
+        Returns
+        -------
+        `bool`
+            ``True`` if an event was reported.
+        """
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return False
+        self._last = now
+        self.report(self.event(nbytes, reads, filtered, now))
+        return True
+
+    def finish(self, nbytes, reads, filtered):
+        """
+        Reports the final progress event, with the same arguments as
+        :py:meth:`update`.
+        """
+        self.report(self.event(nbytes, reads, filtered, time.monotonic(), True))
+
+    def event(self, nbytes, reads, filtered, now, done=False):
+        """
+        Returns the progress event as an ordered dictionary.
+        """
+        elapsed = now - self._start
+        event = OrderedDict(
+            [
+                ("name", self.name),
+                ("reads", reads),
+                ("reads_per_second", reads / elapsed if elapsed > 0 else None),
+                ("bytes", nbytes),
+                ("total_bytes", self.total_bytes),
+                ("fraction", None),
+                ("eta_seconds", None),
+                ("pass_rate", 1.0 - filtered / reads if reads > 0 else None),
+                ("elapsed_seconds", elapsed),
+                ("done", done),
+            ]
+        )
+        if self.total_bytes:
+            event["fraction"] = min(1.0, nbytes / self.total_bytes)
+        if done:
+            event["eta_seconds"] = 0.0
+        elif nbytes > 0 and event["fraction"] is not None:
+            event["eta_seconds"] = elapsed * (self.total_bytes - nbytes) / nbytes
+        return event
+
+    def report(self, event):
+        """
+        Logs *event* and passes it to the callback.
+        """
+        self.events += 1
+        parts = ["{:,} reads".format(event["reads"])]
+        if event["reads_per_second"] is not None:
+            parts.append("{:,.0f} reads/s".format(event["reads_per_second"]))
+        if event["fraction"] is not None:
+            parts.append("{:.1%} of file".format(event["fraction"]))
+        if event["eta_seconds"] is not None and not event["done"]:
+            parts.append("ETA {:.0f}s".format(event["eta_seconds"]))
+        if event["pass_rate"] is not None:
+            parts.append("{:.1%} passed filters".format(event["pass_rate"]))
+        log_message(
+            logging_callback=logging.info,
+            msg="Counting progress: {}".format(", ".join(parts)),
+            extra={"oname": self.name, PROGRESS: event},
+        )
+        if self.callback is not None:
+            self.callback(event)
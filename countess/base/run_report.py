@@ -0,0 +1,386 @@
+"""
+Enrich2 base run_report module
+==============================
+
+Contains the ``RunReport`` class, which records the time, memory, rows and
+bytes used by each stage of an analysis, and the ``timed_stage`` decorator
+used to record the stages of
+:py:class:`~enrich2.base.storemanager.StoreManager` methods.
+"""
+
+
+import os
+import sys
+import json
+import time
+import functools
+import contextlib
+import tracemalloc
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+__all__ = ["RunReport", "Span", "timed_stage"]
+
+
+#: Columns of the TSV run report, in order.
+REPORT_COLUMNS = [
+    "stage",
+    "name",
+    "detail",
+    "depth",
+    "parent",
+    "wall_seconds",
+    "cpu_seconds",
+    "peak_rss_mb",
+    "traced_peak_mb",
+    "rows_in",
+    "rows_out",
+    "bytes_read",
+    "bytes_written",
+]
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in megabytes, or
+    ``None`` if it is not available on this platform.
+    """
+    if resource is None:  # pragma: no cover
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    if sys.platform == "darwin":  # pragma: no cover
+        return peak / 1024.0 ** 2
+    return peak / 1024.0
+
+
+def io_counters():
+    """
+    Returns the number of bytes this process has read and written so far, as
+    a tuple, or ``(None, None)`` if they are not available on this platform.
+
+    The counters include reads and writes served from the page cache.
+    """
+    try:
+        with open("/proc/self/io") as handle:
+            fields = dict(line.split(":", 1) for line in handle if ":" in line)
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (IOError, OSError, KeyError, ValueError):
+        return None, None
+
+
+class Span(object):
+    """
+    Measurements of one stage of an analysis.
+
+    Times, memory and bytes include the nested stages. Rows are the rows
+    selected from and written to the stores while the stage was running,
+    also including nested stages, or the counts given to
+    :py:meth:`RunReport.add`.
+
+    Parameters
+    ----------
+    stage : `str`
+        Name of the stage, usually the method being measured.
+    name : `str`
+        Name of the object running the stage.
+    detail : `str`
+        Label or other detail distinguishing calls of the same stage, or
+        ``None``.
+    depth : `int`
+        Number of stages this stage is nested in.
+    parent : `int`
+        Position of the enclosing stage in the report, or ``None``.
+    """
+
+    def __init__(self, stage, name, detail=None, depth=0, parent=None):
+        self.stage = stage
+        self.name = name
+        self.detail = detail
+        self.depth = depth
+        self.parent = parent
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_mb = None
+        self.traced_peak_mb = None
+        self.rows_in = 0
+        self.rows_out = 0
+        self.bytes_read = None
+        self.bytes_written = None
+        self._start = None
+        self._traced_peak = 0
+
+    def start(self):
+        self._start = (time.perf_counter(), time.process_time(), io_counters())
+
+    def stop(self):
+        wall, cpu, (read, written) = self._start
+        self.wall_seconds = time.perf_counter() - wall
+        self.cpu_seconds = time.process_time() - cpu
+        self.peak_rss_mb = peak_rss_mb()
+        end_read, end_written = io_counters()
+        if read is not None and end_read is not None:
+            self.bytes_read = end_read - read
+            self.bytes_written = end_written - written
+
+    def to_dict(self):
+        """
+        Returns the measurements as an ordered dictionary with the keys in
+        :py:data:`REPORT_COLUMNS`.
+        """
+        return OrderedDict((c, getattr(self, c)) for c in REPORT_COLUMNS)
+
+
+class RunReport(object):
+    """
+    Timing and memory report of the stages of an analysis.
+
+    Stages are recorded with the :py:meth:`span` context manager, or the
+    :py:func:`timed_stage` decorator, and may be nested. Each stage records
+    its wall and CPU time, the peak resident set size of the process at the
+    end of the stage, and the bytes read and written by the process while
+    it ran. If *trace_memory* is set, :py:mod:`tracemalloc` is also used to
+    record the peak memory allocated by Python during each stage, which is
+    more precise than the resident set size but slows the analysis.
+
+    Stages can also be profiled by setting :py:attr:`profiler` to a
+    :py:class:`~enrich2.base.stage_profiler.StageProfiler`.
+
+    Parameters
+    ----------
+    trace_memory : `bool`
+        Record the peak memory allocated during each stage with
+        :py:mod:`tracemalloc`.
+
+    Attributes
+    ----------
+    spans : `list`
+        The :py:class:`Span` objects of the recorded stages, in the order they
+        started.
+    trace_memory : `bool`
+        Record the peak memory allocated during each stage.
+    profiler : :py:class:`~enrich2.base.stage_profiler.StageProfiler`
+        Profiler run around each stage, or ``None``.
+
+    Methods
+    -------
+    span
+        Context manager that records a stage.
+    add
+        Adds rows to the running stages.
+    clear
+        Removes all recorded stages.
+    summary
+        Returns the total time and rows of each stage.
+    write
+        Writes the report to a directory.
+    """
+
+    json_name = "run_report.json"
+    tsv_name = "run_report.tsv"
+
+    def __init__(self, trace_memory=False):
+        self.spans = list()
+        self.trace_memory = trace_memory
+        self.profiler = None
+        self._stack = list()
+
+    @property
+    def current(self):
+        """
+        The innermost running :py:class:`Span`, or ``None``.
+        """
+        if len(self._stack) == 0:
+            return None
+        return self._stack[-1]
+
+    @contextlib.contextmanager
+    def span(self, stage, name, detail=None):
+        """
+        Context manager that records the stage *stage* run by the object
+        *name*.
+
+        Parameters
+        ----------
+        stage : `str`
+            Name of the stage.
+        name : `str`
+            Name of the object running the stage.
+        detail : `str`
+            Label or other detail distinguishing calls of the same stage.
+
+        Yields
+        ------
+        :py:class:`Span`
+        """
+        parent = None
+        if self.current is not None:
+            parent = self.spans.index(self.current)
+        span = Span(stage, name, detail, depth=len(self._stack), parent=parent)
+        self.spans.append(span)
+        self._start_trace(span)
+        self._stack.append(span)
+        span.start()
+        try:
+            if self.profiler is None:
+                yield span
+            else:
+                with self.profiler.profile(stage, name, detail):
+                    yield span
+        finally:
+            span.stop()
+            self._stack.pop()
+            self._stop_trace(span)
+
+    def _start_trace(self, span):
+        if not self.trace_memory:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # the peak is reset for each stage, so fold the peak so far into
+        # the running stages first
+        current, peak = tracemalloc.get_traced_memory()
+        for running in self._stack:
+            running._traced_peak = max(running._traced_peak, peak)
+        tracemalloc.reset_peak()
+        span._traced_peak = current
+
+    def _stop_trace(self, span):
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return
+        span._traced_peak = max(span._traced_peak, tracemalloc.get_traced_memory()[1])
+        span.traced_peak_mb = span._traced_peak / 1024.0 ** 2
+        if self.current is not None:
+            self.current._traced_peak = max(
+                self.current._traced_peak, span._traced_peak
+            )
+        elif tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def add(self, rows_in=0, rows_out=0):
+        """
+        Adds *rows_in* and *rows_out* to every running stage. Does nothing
+        if no stage is running.
+        """
+        for span in self._stack:
+            span.rows_in += rows_in
+            span.rows_out += rows_out
+
+    def clear(self):
+        """
+        Removes all recorded stages.
+        """
+        self.spans = list()
+        self._stack = list()
+
+    def summary(self):
+        """
+        Returns the number of calls, total wall and CPU time, and total rows
+        of each stage, in the order the stages were first run.
+
+        Nested calls of the same stage are only counted once.
+
+        Returns
+        -------
+        `list`
+            List of ordered dictionaries, one per stage.
+        """
+        stages = OrderedDict()
+        for span in self.spans:
+            if span.wall_seconds is None:
+                continue
+            entry = stages.setdefault(
+                span.stage,
+                OrderedDict(
+                    [
+                        ("stage", span.stage),
+                        ("calls", 0),
+                        ("wall_seconds", 0.0),
+                        ("cpu_seconds", 0.0),
+                        ("rows_in", 0),
+                        ("rows_out", 0),
+                    ]
+                ),
+            )
+            entry["calls"] += 1
+            if self._nested_in_stage(span):
+                continue
+            for key in ("wall_seconds", "cpu_seconds", "rows_in", "rows_out"):
+                entry[key] += getattr(span, key)
+        return list(stages.values())
+
+    def _nested_in_stage(self, span):
+        parent = span.parent
+        while parent is not None:
+            if self.spans[parent].stage == span.stage:
+                return True
+            parent = self.spans[parent].parent
+        return False
+
+    def write(self, directory):
+        """
+        Writes the report to :py:attr:`json_name` and :py:attr:`tsv_name`
+        in *directory*.
+
+        Parameters
+        ----------
+        directory : `str`
+            Output directory, created if it does not exist.
+
+        Returns
+        -------
+        `tuple`
+            Paths of the JSON and TSV files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        rows = [span.to_dict() for span in self.spans]
+        json_path = os.path.join(directory, self.json_name)
+        with open(json_path, "w") as handle:
+            json.dump(
+                {"stages": rows, "summary": self.summary()}, handle, indent=2
+            )
+        tsv_path = os.path.join(directory, self.tsv_name)
+        with open(tsv_path, "w") as handle:
+            print("\t".join(REPORT_COLUMNS), file=handle)
+            for row in rows:
+                print(
+                    "\t".join(
+                        "" if v is None else "{}".format(v) for v in row.values()
+                    ),
+                    file=handle,
+                )
+        return json_path, tsv_path
+
+
+def timed_stage(stage, label_arg=False):
+    """
+    Decorator that records each call of a
+    :py:class:`~enrich2.base.storemanager.StoreManager` method in the
+    object's :py:attr:`run_report` as the stage *stage*.
+
+    Parameters
+    ----------
+    stage : `str`
+        Name of the stage.
+    label_arg : `bool`
+        Record the first positional argument of the method, usually a label,
+        as the detail of the stage.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            detail = None
+            if label_arg and len(args) > 0:
+                detail = args[0]
+            with self.run_report.span(stage, self.name, detail):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
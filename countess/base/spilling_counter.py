@@ -0,0 +1,301 @@
+"""
+Enrich2 base spilling_counter module
+====================================
+
+Contains the ``SpillingCounter`` class, a counter for sequences and variants
+that spills partial counts to sorted Parquet runs on disk when it grows past
+a memory budget, and merges the runs back together with a streaming k-way
+reduce.
+"""
+
+
+import os
+import heapq
+import shutil
+import tempfile
+import itertools
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+__all__ = ["SpillingCounter"]
+
+
+class SpillingCounter(object):
+    """
+    Counter of string elements with a bounded memory footprint.
+
+    Counts are kept in a `dict` until its estimated size passes *max_bytes*.
+    The counts are then sorted by element and written to a Parquet run in a
+    temporary directory, and counting continues with an empty `dict`. When
+    counting is complete, :py:meth:`iter_chunks` merges the runs and the
+    remaining in-memory counts in element order, adding up the counts of
+    elements found in several runs.
+
+    The size of the `dict` is estimated from the length of each element plus
+    a fixed per-entry overhead, which is close to the memory used by CPython
+    for short ASCII strings.
+
+    The runs are read in batches that share the memory budget, so the more
+    runs there are, the fewer rows are read from each at a time. Once there
+    are :py:attr:`max_runs` runs, they are merged into a single run, which
+    limits the number of runs read at once by a merge.
+
+    Parameters
+    ----------
+    max_bytes : `int` or None
+        Memory budget in bytes for the in-memory counts. ``None`` never
+        spills.
+    spill_dir : `str` or None
+        Directory in which to create the temporary run directory. ``None``
+        uses the system default.
+
+    Attributes
+    ----------
+    counts : `dict`
+        In-memory counts since the last spill.
+    runs : `list` of `str`
+        Paths to the spilled Parquet runs.
+    nbytes : `int`
+        Estimated memory in bytes used by :py:attr:`counts`.
+    max_key_length : `int`
+        Length of the longest element counted.
+
+    Methods
+    -------
+    add
+        Adds to the count of an element.
+    spill
+        Writes the in-memory counts to a new run.
+    batch_rows
+        Returns the number of rows read at a time from each run.
+    iter_chunks
+        Iterates over the merged counts as data frames.
+    close
+        Removes the spilled runs.
+    """
+
+    entry_overhead = 120
+    run_row_group_size = 100000
+    max_runs = 64
+    column = "count"
+
+    def __init__(self, max_bytes=None, spill_dir=None):
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be positive [{}]".format(max_bytes))
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.counts = dict()
+        self.runs = list()
+        self.nbytes = 0
+        self.max_key_length = 0
+        self._run_dir = None
+        self._run_number = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """
+        Returns the number of elements in memory. Elements in spilled runs
+        are not included.
+        """
+        return len(self.counts)
+
+    @property
+    def spilled(self):
+        """
+        ``True`` if any counts have been written to disk.
+        """
+        return len(self.runs) > 0
+
+    def add(self, key, count=1):
+        """
+        Adds *count* to the count of *key*, spilling the in-memory counts to
+        disk if they pass the memory budget.
+
+        Parameters
+        ----------
+        key : `str`
+            Element to count.
+        count : `int`
+            Amount to add.
+        """
+        try:
+            self.counts[key] += count
+        except KeyError:
+            self.counts[key] = count
+            self.nbytes += len(key) + self.entry_overhead
+            if len(key) > self.max_key_length:
+                self.max_key_length = len(key)
+            if self.max_bytes is not None and self.nbytes > self.max_bytes:
+                self.spill()
+
+    def spill(self):
+        """
+        Sorts the in-memory counts by element, writes them to a new Parquet
+        run and clears them.
+        """
+        if len(self.counts) == 0:
+            return
+        keys = sorted(self.counts)
+        path = self._new_run_path()
+        pq.write_table(
+            self._run_table(keys, [self.counts[k] for k in keys]),
+            path,
+            row_group_size=self.run_row_group_size,
+        )
+        self.runs.append(path)
+        self.counts = dict()
+        self.nbytes = 0
+        if len(self.runs) >= self.max_runs:
+            self._merge_runs()
+
+    def _new_run_path(self):
+        """
+        Returns the path of a new run in the temporary run directory,
+        creating the directory if needed.
+        """
+        if self._run_dir is None:
+            self._run_dir = tempfile.mkdtemp(prefix="counts_", dir=self.spill_dir)
+        path = os.path.join(self._run_dir, "run_{}.parquet".format(self._run_number))
+        self._run_number += 1
+        return path
+
+    def _run_table(self, keys, counts):
+        """
+        Returns a :py:class:`pyarrow.Table` of a run from the sorted *keys*
+        and their *counts*.
+        """
+        return pa.table(
+            {
+                "index": pa.array(keys, type=pa.string()),
+                self.column: pa.array(counts, type=pa.int64()),
+            }
+        )
+
+    def _merge_runs(self):
+        """
+        Merges the spilled runs into a single run, one row group at a time.
+        """
+        path = self._new_run_path()
+        merged = self._merge(self._iter_runs())
+        writer = None
+        while True:
+            chunk = list(itertools.islice(merged, self.run_row_group_size))
+            if len(chunk) == 0:
+                break
+            keys, counts = zip(*chunk)
+            table = self._run_table(keys, counts)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+        for run in self.runs:
+            os.remove(run)
+        self.runs = [path] if writer is not None else list()
+
+    def batch_rows(self):
+        """
+        Returns the number of rows read at a time from each run while the
+        runs are merged, which divides the memory budget between the runs.
+
+        Returns
+        -------
+        `int`
+        """
+        if self.max_bytes is None or len(self.runs) == 0:
+            return self.run_row_group_size
+        row_bytes = self.max_key_length + self.entry_overhead
+        rows = self.max_bytes // (len(self.runs) * row_bytes)
+        return int(min(self.run_row_group_size, max(1, rows)))
+
+    def _iter_run(self, path, batch_rows):
+        """
+        Yields the ``(element, count)`` pairs of a run in element order,
+        reading *batch_rows* rows at a time.
+        """
+        run = pq.ParquetFile(path)
+        for batch in run.iter_batches(batch_size=batch_rows):
+            keys = batch.column(0).to_pylist()
+            counts = batch.column(1).to_pylist()
+            yield from zip(keys, counts)
+
+    def _iter_runs(self):
+        """
+        Returns a list of iterators over the ``(element, count)`` pairs of
+        each run.
+        """
+        batch_rows = self.batch_rows()
+        return [self._iter_run(path, batch_rows) for path in self.runs]
+
+    @staticmethod
+    def _merge(sources):
+        """
+        Yields the ``(element, count)`` pairs of the sorted *sources* in
+        element order, with the counts of each element added up.
+        """
+        merged = heapq.merge(*sources, key=lambda pair: pair[0])
+        for key, group in itertools.groupby(merged, key=lambda pair: pair[0]):
+            yield key, sum(count for _, count in group)
+
+    def _iter_merged(self):
+        """
+        Yields the ``(element, count)`` pairs of all runs and the in-memory
+        counts in element order, with the counts of each element added up.
+        """
+        if not self.spilled:
+            for key in sorted(self.counts):
+                yield key, self.counts[key]
+            return
+
+        in_memory = ((k, self.counts[k]) for k in sorted(self.counts))
+        yield from self._merge(self._iter_runs() + [in_memory])
+
+    def iter_chunks(self, chunksize, dtype=np.int32):
+        """
+        Iterates over the merged counts in element order.
+
+        Parameters
+        ----------
+        chunksize : `int`
+            Number of elements in each chunk. Only the last chunk may be
+            shorter.
+        dtype : `type`
+            Type of the ``'count'`` column.
+
+        Returns
+        -------
+        `Iterator` of :py:class:`pandas.DataFrame`
+            Data frames indexed by element with a single ``'count'`` column.
+        """
+        if chunksize <= 0:
+            raise ValueError("chunksize must be positive [{}]".format(chunksize))
+        merged = self._iter_merged()
+        while True:
+            chunk = list(itertools.islice(merged, chunksize))
+            if len(chunk) == 0:
+                return
+            keys, counts = zip(*chunk)
+            yield pd.DataFrame(
+                {self.column: np.array(counts, dtype=dtype)},
+                index=pd.Index(keys, dtype=object),
+            )
+
+    def close(self):
+        """
+        Removes the spilled runs and clears the in-memory counts.
+        """
+        if self._run_dir is not None:
+            shutil.rmtree(self._run_dir, ignore_errors=True)
+            self._run_dir = None
+            self._run_number = 0
+        self.runs = list()
+        self.counts = dict()
+        self.nbytes = 0
@@ -0,0 +1,228 @@
+"""
+Enrich2 base stage_profiler module
+==================================
+
+Contains the ``StageProfiler`` class, which runs the stages of an analysis
+recorded in a :py:class:`~enrich2.base.run_report.RunReport` under
+:py:mod:`cProfile`, and the ``collapsed_stacks`` function, which converts
+profile statistics to the collapsed stack format read by flame graph tools.
+"""
+
+
+import os
+import re
+import cProfile
+import pstats
+import contextlib
+from collections import defaultdict
+
+
+__all__ = ["StageProfiler", "collapsed_stacks"]
+
+
+def frame_label(func):
+    """
+    Returns a readable label for the :py:mod:`pstats` function key *func*,
+    which is a tuple of the file name, line number and function name.
+    """
+    filename, line, name = func
+    if filename == "~":
+        # built-in functions have no file
+        return name
+    return "{}:{}({})".format(os.path.basename(filename), line, name)
+
+
+def collapsed_stacks(stats, prefix=None, max_depth=64):
+    """
+    Returns the call stacks in *stats* in the collapsed stack format read by
+    flame graph tools, one ``"frame;frame;frame count"`` line per stack with
+    the time spent in the last frame in microseconds.
+
+    :py:mod:`cProfile` only records which function called which, so the
+    stacks are rebuilt from the roots of the call graph, and the time of a
+    function called from several places is divided between its callers in
+    proportion to the time spent in each call.
+
+    Parameters
+    ----------
+    stats : :py:class:`pstats.Stats`
+        Profile statistics.
+    prefix : `str`
+        Frame added to the bottom of every stack, or ``None``.
+    max_depth : `int`
+        Stacks are cut off after this many frames.
+
+    Returns
+    -------
+    `list`
+        Lines of the collapsed stack file.
+    """
+    entries = stats.stats
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            if caller in entries:
+                callees[caller].append((func, edge[3]))
+    roots = [
+        func
+        for func, (_, _, _, _, callers) in entries.items()
+        if not any(caller in entries for caller in callers)
+    ]
+
+    totals = defaultdict(float)
+
+    def visit(path, seen, fraction):
+        func = path[-1]
+        totals[path] += entries[func][2] * fraction
+        if len(path) >= max_depth:
+            return
+        for callee, edge_time in callees[func]:
+            cumulative = entries[callee][3]
+            if callee in seen or cumulative <= 0:
+                continue
+            share = fraction * min(1.0, edge_time / cumulative)
+            # skip calls that add less than a microsecond
+            if cumulative * share >= 1e-6:
+                visit(path + (callee,), seen | {callee}, share)
+
+    for root in roots:
+        visit((root,), frozenset([root]), 1.0)
+
+    lines = list()
+    for path, seconds in totals.items():
+        micros = int(round(seconds * 1e6))
+        if micros <= 0:
+            continue
+        frames = [frame_label(func) for func in path]
+        if prefix is not None:
+            frames.insert(0, prefix)
+        lines.append("{} {}".format(";".join(frames), micros))
+    return lines
+
+
+class StageProfiler(object):
+    """
+    Profiles the stages of an analysis with :py:mod:`cProfile`.
+
+    Set as the :py:attr:`~enrich2.base.run_report.RunReport.profiler` of a
+    run report, each stage in :py:attr:`stages` is profiled and its
+    statistics are written to a ``.pstats`` file in *directory* as soon as
+    it finishes. The stacks of all profiled stages are also added to
+    :py:attr:`collapsed_name`, which flame graph tools such as
+    ``flamegraph.pl`` and speedscope can read.
+
+    Stages run inside a profiled stage are part of that stage's profile.
+    Only the thread running the analysis is profiled, so work done by Dask
+    worker threads or processes is not included.
+
+    Parameters
+    ----------
+    directory : `str`
+        Output directory for the profiles, created if it does not exist.
+    stages : `iterable`
+        Names of the stages to profile, or ``None`` for
+        :py:attr:`default_stages`.
+
+    Attributes
+    ----------
+    directory : `str`
+        Output directory for the profiles.
+    stages : `set`
+        Names of the profiled stages.
+    paths : `list`
+        Paths of the ``.pstats`` files written so far.
+
+    Methods
+    -------
+    profile
+        Context manager that profiles a stage.
+    """
+
+    default_stages = (
+        "counts_from_reads",
+        "merge_counts_unfiltered",
+        "run",
+        "calc_shared_full",
+        "calc_scores",
+    )
+    collapsed_name = "profile.collapsed"
+
+    def __init__(self, directory, stages=None):
+        if stages is None:
+            stages = self.default_stages
+        self.directory = directory
+        self.stages = set(stages)
+        self.paths = list()
+        self._active = False
+
+    @property
+    def collapsed_path(self):
+        """
+        Path of the collapsed stack file.
+        """
+        return os.path.join(self.directory, self.collapsed_name)
+
+    def stage_path(self, stage, name, detail=None):
+        """
+        Returns the path of the ``.pstats`` file for a stage. Files are
+        numbered in the order the stages finish.
+        """
+        parts = [stage, name] if detail is None else [stage, name, detail]
+        label = re.sub(r"[^\w.-]+", "_", "_".join(str(x) for x in parts))
+        filename = "{:03d}_{}.pstats".format(len(self.paths) + 1, label)
+        return os.path.join(self.directory, filename)
+
+    @contextlib.contextmanager
+    def profile(self, stage, name, detail=None):
+        """
+        Context manager that profiles the stage *stage* run by the object
+        *name*, if it is one of :py:attr:`stages` and no other stage is being
+        profiled.
+
+        Parameters
+        ----------
+        stage : `str`
+            Name of the stage.
+        name : `str`
+            Name of the object running the stage.
+        detail : `str`
+            Label or other detail distinguishing calls of the same stage.
+        """
+        if self._active or stage not in self.stages:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        self._active = True
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._active = False
+            self.save(profiler, stage, name, detail)
+
+    def save(self, profiler, stage, name, detail=None):
+        """
+        Writes the statistics of *profiler* for a stage to its ``.pstats``
+        file and adds its stacks to the collapsed stack file.
+
+        Returns
+        -------
+        `str`
+            Path of the ``.pstats`` file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.stage_path(stage, name, detail)
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(path)
+        prefix = "{}:{}".format(stage, name)
+        if detail is not None:
+            prefix = "{}:{}".format(prefix, detail)
+        # start a new collapsed stack file with the first stage
+        mode = "w" if len(self.paths) == 0 else "a"
+        with open(self.collapsed_path, mode) as handle:
+            for line in collapsed_stacks(stats, prefix=prefix.replace(";", "_")):
+                print(line, file=handle)
+        self.paths.append(path)
+        return path
@@ -8,15 +8,25 @@ Contains the abstract data-containing class StoreManager
 
 import os
 import time
+import shutil
 import getpass
 import collections
 import pandas as pd
 
 from .utils import nested_format
 from ..base.utils import fix_filename
-from .config_constants import SCORER, SCORER_PATH
+from .config_constants import SCORER, SCORER_PATH, STORE_OPTIONS, STORE_BACKEND
+from .config_constants import STORE_COMPRESSION, STORE_COMPLEVEL
+from .config_constants import STORE_EXPECTED_ROWS, STORE_CHUNKSHAPE
+from .config_constants import STORE_COMPACT_THRESHOLD
 from ..base.constants import ELEMENT_LABELS
-from countess.store.hdf import HdfStore
+from .counts_cache import CountsCache
+from .table_cache import TableCache
+from .chunk_sizer import ChunkSizer
+from .run_report import RunReport, timed_stage
+from .element_index import ElementIndex
+from countess.store.managed import open_store, path_backend, store_class
+from countess.store.execution import Execution
 
 import logging
 from ..base.utils import log_message
@@ -25,6 +35,33 @@ from ..base.utils import log_message
 __all__ = ["StoreManager"]
 
 
+def _without_store_options(cfg):
+    """
+    Strip the ``store options`` sections from a serialized configuration.
+
+    Compression, chunk shape and the other store options change only how
+    tables are laid out on disk, not their contents, so they are left out
+    of the metadata that :py:meth:`StoreManager.check_metadata` compares.
+
+    Parameters
+    ----------
+    cfg : `dict` or `list`
+        Serialized configuration, possibly with nested children.
+
+    Returns
+    -------
+    `dict` or `list`
+        A copy of ``cfg`` without any ``store options`` keys.
+    """
+    if isinstance(cfg, dict):
+        return {
+            k: _without_store_options(v) for k, v in cfg.items() if k != STORE_OPTIONS
+        }
+    if isinstance(cfg, list):
+        return [_without_store_options(v) for v in cfg]
+    return cfg
+
+
 class StoreManager(object):
     """
     Abstract class for all data-containing classes
@@ -40,6 +77,11 @@ class StoreManager(object):
         Indicates if the object is currently managing a store.
     treeview_class_name : str
         Class name used by the GUI treeview to render a readable name.
+    table_cache : :py:class:`~enrich2.base.table_cache.TableCache`
+        Cache of selected tables shared by all instances.
+    run_report : :py:class:`~enrich2.base.run_report.RunReport`
+        Timing and memory report of the analysis stages, shared by all
+        instances.
     
     Attributes
     ----------
@@ -108,6 +150,51 @@ class StoreManager(object):
     tsv_dir 
         Property for ``_tsv_dir`` private attribute. Sets/gets 
         the tsv output directory.
+    counts_cache
+        Property for ``_counts_cache`` private attribute. Sets/gets the
+        shared raw counts cache, or ``None`` if no cache is used.
+    intern_index
+        Property for ``_intern_index`` private attribute. Sets/gets whether
+        tables under ``'/main'`` are stored indexed by integer element ids.
+    element_index
+        Returns the element dictionary of the current store.
+    store_options
+        Property for ``_store_options`` private attribute. Sets/gets the
+        compression and chunking options used to open HDF5 stores.
+    compact_stores
+        Property for ``_compact_stores`` private attribute. Sets/gets the
+        boolean indicating if stores will be repacked when they are closed.
+    link_counts
+        Property for ``_link_counts`` private attribute. Sets/gets the
+        boolean indicating if raw counts in existing HDF5 files will be
+        linked instead of copied.
+    exact_filter_stats
+        Property for ``_exact_filter_stats`` private attribute. Sets/gets the
+        boolean indicating if every read filter is checked for each read,
+        so that the filter statistics count every filter a read fails.
+    append_reads
+        Property for ``_append_reads`` private attribute. Sets/gets the
+        boolean indicating if reads added to growing FASTQ files are counted
+        and added to the existing raw counts.
+    counts_memory_limit
+        Property for ``_counts_memory_limit`` private attribute. Sets/gets
+        the memory budget in megabytes for counting reads, or ``None`` to
+        count in memory.
+    checkpoint_interval
+        Property for ``_checkpoint_interval`` private attribute. Sets/gets
+        the number of reads between counting checkpoints, or ``None`` to
+        disable checkpoints.
+    memory_budget
+        Property for ``_memory_budget`` private attribute. Sets/gets the
+        memory budget in megabytes used to size chunks, or ``None`` to use
+        :py:attr:`chunksize` rows.
+    chunk_sizer
+        Returns a :py:class:`~enrich2.base.chunk_sizer.ChunkSizer` for a
+        chunked table operation.
+    execution
+        Property for ``_execution`` private attribute. Sets/gets the
+        :py:class:`~enrich2.store.execution.Execution` that selects the Dask
+        scheduler used by the stores and scorers.
     logr_method
         Property for ``_logr_method`` private attribute. Sets/gets the name
         of the current normalization method if it has been defined in the 
@@ -136,6 +223,18 @@ class StoreManager(object):
         Opens the currently owned store.
     store_close
         Closes the currently owned store.
+    store_select
+        Selects a table from the current store through the table cache.
+    store_select_rows
+        Selects rows of a table in the current store by their position.
+    store_put
+        Puts a table into the current store.
+    store_append
+        Appends to a table in the current store.
+    store_remove
+        Removes a table from the current store.
+    store_index
+        Returns the index of a table in the current store.
     get_metadata
         Returns the metadata of this instance.
     set_metadata
@@ -169,6 +268,8 @@ class StoreManager(object):
     store_suffix = None
     has_store = True
     treeview_class_name = None
+    table_cache = TableCache()
+    run_report = RunReport()
 
     def __init__(self):
         # general data members
@@ -201,6 +302,18 @@ class StoreManager(object):
         self._component_outliers = None
         self._tsv_requested = None
         self._ignore_metadata = None
+        self._counts_cache = None
+        self._intern_index = None
+        self._element_index = None
+        self._store_options = None
+        self._compact_stores = None
+        self._link_counts = None
+        self._exact_filter_stats = None
+        self._append_reads = None
+        self._counts_memory_limit = None
+        self._checkpoint_interval = None
+        self._execution = None
+        self._memory_budget = None
         self.override_filter_stats = True
 
         # GUI variables
@@ -427,6 +540,368 @@ class StoreManager(object):
             self._tsv_dir = dirname
         return self._tsv_dir
 
+    @property
+    def counts_cache(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        Unlike the other analysis options, the counts cache is optional and
+        ``None`` is returned if it was not set at the root.
+        """
+        if self._counts_cache is None and self.parent is not None:
+            return self.parent.counts_cache
+        else:
+            return self._counts_cache
+
+    @counts_cache.setter
+    def counts_cache(self, dirname):
+        """
+        Sets the shared raw counts cache to the directory *dirname*, creating
+        it if it doesn't exist. Setting ``None`` disables the cache.
+        """
+        if dirname is None:
+            self._counts_cache = None
+        else:
+            self._counts_cache = CountsCache(dirname)
+
+    @property
+    def intern_index(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        Defaults to ``True`` if it was not set at the root.
+        """
+        if self._intern_index is None:
+            if self.parent is not None:
+                return self.parent.intern_index
+            else:
+                return True
+        else:
+            return self._intern_index
+
+    @intern_index.setter
+    def intern_index(self, value):
+        """
+        Sets whether tables under ``'/main'`` are stored indexed by integer
+        element ids.
+        """
+        if value is not None and not isinstance(value, bool):
+            raise TypeError("intern_index must be a bool [{}]".format(self.name))
+        self._intern_index = value
+
+    @property
+    def element_index(self):
+        """
+        The :py:class:`~enrich2.base.element_index.ElementIndex` that maps the
+        element strings of the current store to integer ids, loaded from the
+        store the first time it is used.
+        """
+        if self._element_index is None:
+            if ElementIndex.table_key in self.store:
+                self._element_index = ElementIndex.from_frame(
+                    self.store[ElementIndex.table_key]
+                )
+            else:
+                self._element_index = ElementIndex()
+        return self._element_index
+
+    @property
+    def store_options(self):
+        """
+        This property should only be set for the root element unless an
+        element needs different storage options from the rest of the
+        analysis.
+
+        Recursively traverses up the config tree to find the nearest element
+        with options set. Defaults to an empty `dict`, which uses the
+        :py:class:`~enrich2.store.hdf.HdfStore` defaults.
+        """
+        if self._store_options is None:
+            if self.parent is not None:
+                return self.parent.store_options
+            else:
+                return dict()
+        else:
+            return self._store_options
+
+    @store_options.setter
+    def store_options(self, value):
+        """
+        Sets the keyword arguments passed to
+        :py:class:`~enrich2.store.hdf.HdfStore` when the store is opened. The
+        ``'backend'`` key chooses another store class, which is wrapped in a
+        :py:class:`~enrich2.store.managed.ManagedStore`.
+        """
+        if value is not None and not isinstance(value, dict):
+            raise TypeError("store_options must be a dict [{}]".format(self.name))
+        self._store_options = value
+
+    @property
+    def compact_stores(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        If ``True``, stores are repacked after they are closed. Defaults to
+        ``False`` if it was not set at the root, in which case stores are
+        only repacked when their free space passes the ``compact_threshold``
+        of the store.
+        """
+        if self._compact_stores is None:
+            if self.parent is not None:
+                return self.parent.compact_stores
+            else:
+                return False
+        else:
+            return self._compact_stores
+
+    @compact_stores.setter
+    def compact_stores(self, value):
+        """
+        Make sure the *value* is valid and set it.
+        """
+        if value in (True, False, None):
+            self._compact_stores = value
+        else:
+            raise ValueError(
+                "Invalid setting '{}' for compact_stores "
+                "[{}]".format(value, self.name)
+            )
+
+    @property
+    def link_counts(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        Defaults to ``False`` if it was not set at the root.
+        """
+        if self._link_counts is None:
+            if self.parent is not None:
+                return self.parent.link_counts
+            else:
+                return False
+        else:
+            return self._link_counts
+
+    @link_counts.setter
+    def link_counts(self, value):
+        """
+        Make sure the *value* is valid and set it.
+        """
+        if value in (True, False, None):
+            self._link_counts = value
+        else:
+            raise ValueError(
+                "Invalid setting '{}' for link_counts [{}]".format(value, self.name)
+            )
+
+    @property
+    def exact_filter_stats(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        Defaults to ``False`` if it was not set at the root.
+        """
+        if self._exact_filter_stats is None:
+            if self.parent is not None:
+                return self.parent.exact_filter_stats
+            else:
+                return False
+        else:
+            return self._exact_filter_stats
+
+    @exact_filter_stats.setter
+    def exact_filter_stats(self, value):
+        """
+        Make sure the *value* is valid and set it.
+        """
+        if value in (True, False, None):
+            self._exact_filter_stats = value
+        else:
+            raise ValueError(
+                "Invalid setting '{}' for exact_filter_stats [{}]".format(
+                    value, self.name
+                )
+            )
+
+    @property
+    def append_reads(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        Defaults to ``False`` if it was not set at the root.
+        """
+        if self._append_reads is None:
+            if self.parent is not None:
+                return self.parent.append_reads
+            else:
+                return False
+        else:
+            return self._append_reads
+
+    @append_reads.setter
+    def append_reads(self, value):
+        """
+        Make sure the *value* is valid and set it.
+        """
+        if value in (True, False, None):
+            self._append_reads = value
+        else:
+            raise ValueError(
+                "Invalid setting '{}' for append_reads [{}]".format(value, self.name)
+            )
+
+    @property
+    def counts_memory_limit(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        Like the counts cache, the memory limit is optional and ``None`` is
+        returned if it was not set at the root.
+        """
+        if self._counts_memory_limit is None and self.parent is not None:
+            return self.parent.counts_memory_limit
+        else:
+            return self._counts_memory_limit
+
+    @counts_memory_limit.setter
+    def counts_memory_limit(self, value):
+        """
+        Make sure the *value* is a positive number of megabytes or ``None``
+        and set it.
+        """
+        if value is not None and (not isinstance(value, int) or value <= 0):
+            raise ValueError(
+                "Invalid setting '{}' for counts_memory_limit "
+                "[{}]".format(value, self.name)
+            )
+        self._counts_memory_limit = value
+
+    @property
+    def checkpoint_interval(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        Checkpoints are optional and ``None`` is returned if the interval
+        was not set at the root.
+        """
+        if self._checkpoint_interval is None and self.parent is not None:
+            return self.parent.checkpoint_interval
+        else:
+            return self._checkpoint_interval
+
+    @checkpoint_interval.setter
+    def checkpoint_interval(self, value):
+        """
+        Make sure the *value* is a positive number of reads or ``None`` and
+        set it.
+        """
+        if value is not None and (not isinstance(value, int) or value <= 0):
+            raise ValueError(
+                "Invalid setting '{}' for checkpoint_interval "
+                "[{}]".format(value, self.name)
+            )
+        self._checkpoint_interval = value
+
+    @property
+    def memory_budget(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        The memory budget is optional and ``None`` is returned if it was not
+        set at the root.
+        """
+        if self._memory_budget is None and self.parent is not None:
+            return self.parent.memory_budget
+        else:
+            return self._memory_budget
+
+    @memory_budget.setter
+    def memory_budget(self, value):
+        """
+        Make sure the *value* is a positive number of megabytes or ``None``
+        and set it.
+        """
+        if value is not None and (not isinstance(value, int) or value <= 0):
+            raise ValueError(
+                "Invalid setting '{}' for memory_budget "
+                "[{}]".format(value, self.name)
+            )
+        self._memory_budget = value
+
+    def chunk_sizer(self, row_bytes, tables=1):
+        """
+        Returns a :py:class:`~enrich2.base.chunk_sizer.ChunkSizer` that
+        sizes the chunks of an operation to fit in :py:attr:`memory_budget`,
+        or that always gives :py:attr:`chunksize` rows if there is no
+        budget.
+
+        Parameters
+        ----------
+        row_bytes : `int`
+            Estimated memory in bytes of one row of one table.
+        tables : `int`
+            Number of tables held in memory at once.
+
+        Returns
+        -------
+        :py:class:`~enrich2.base.chunk_sizer.ChunkSizer`
+        """
+        budget = self.memory_budget
+        if budget is not None:
+            budget *= 1024 ** 2
+        return ChunkSizer(budget, row_bytes, tables=tables, default=self.chunksize)
+
+    @property
+    def execution(self):
+        """
+        This property should only be set for the root element. All other
+        elements in the analysis should have ``None``.
+
+        Recursively traverses up the config tree to find the root element.
+        Defaults to the threaded scheduler if it was not set at the root.
+
+        The scheduler does not change the results, so it is not part of the
+        serialized configuration and changing it does not clear the stores.
+        """
+        if self._execution is None:
+            if self.parent is not None:
+                return self.parent.execution
+            else:
+                return Execution()
+        else:
+            return self._execution
+
+    @execution.setter
+    def execution(self, value):
+        """
+        Make sure the *value* is an
+        :py:class:`~enrich2.store.execution.Execution` or ``None`` and set
+        it.
+        """
+        if value is not None and not isinstance(value, Execution):
+            raise ValueError(
+                "Invalid setting '{}' for execution [{}]".format(value, self.name)
+            )
+        self._execution = value
+
     @property
     def children(self):
         """
@@ -550,13 +1025,21 @@ class StoreManager(object):
             self.store_path = cfg.store_path
             log_message(
                 logging_callback=logging.info,
-                msg='Using specified HDF5 data store "{}"'.format(self.store_path),
+                msg='Using specified data store "{}"'.format(self.store_path),
                 extra={"oname": self.name},
             )
         else:
             self.store_cfg = False
             self.store_path = None
 
+        if cfg.has_store_options:
+            self.store_options = cfg.store_options_cfg.store_kwargs()
+
+        if cfg.has_execution and self._execution is None:
+            self.execution = cfg.execution_cfg.execution()
+        if cfg.has_execution and self._memory_budget is None:
+            self.memory_budget = cfg.execution_cfg.memory_budget
+
         if cfg.has_scorer:
             self.scorer_path = cfg.scorer_cfg.scorer_path
             self.scorer_class = cfg.scorer_cfg.scorer_class
@@ -598,6 +1081,17 @@ class StoreManager(object):
                     cfg["output directory"] = self.output_dir
             else:
                 cfg["output directory"] = self.output_dir
+        if self._store_options is not None:
+            cfg[STORE_OPTIONS] = {
+                STORE_BACKEND: self._store_options.get("backend", "hdf5"),
+                STORE_COMPRESSION: self._store_options.get("complib"),
+                STORE_COMPLEVEL: self._store_options.get("complevel", 0),
+                STORE_EXPECTED_ROWS: self._store_options.get("expectedrows"),
+                STORE_CHUNKSHAPE: self._store_options.get("chunkshape"),
+                STORE_COMPACT_THRESHOLD: self._store_options.get(
+                    "compact_threshold", 0.5
+                ),
+            }
         return cfg
 
     def validate(self):
@@ -635,10 +1129,19 @@ class StoreManager(object):
             if self.store is not None and self.store.is_open():
                 raise ValueError("Store is still open.")
 
-            if not self.store_cfg:
+            options = dict(self.store_options)
+            backend = options.pop("backend", "hdf5")
+            if self.store_cfg:
+                backend = path_backend(self.store_path)
+            else:
                 fname = fix_filename(self.name)
                 self.store_path = os.path.join(
-                    self.output_dir, "{}_{}.h5".format(fname, self.store_suffix)
+                    self.output_dir,
+                    "{}_{}{}".format(
+                        fname,
+                        self.store_suffix,
+                        store_class(backend).file_extensions[0],
+                    ),
                 )
             log_message(
                 logging_callback=logging.info,
@@ -646,12 +1149,12 @@ class StoreManager(object):
                 extra={"oname": self.name},
             )
             if os.path.exists(self.store_path):
-                store = HdfStore(self.store_path, mode="a")
+                store = open_store(backend, self.store_path, **options)
                 for key in store.keys():
                     clear |= not self.check_metadata(key, store)
                 if clear:
                     msg = (
-                        'Found existing HDF5 data store "{}", but '
+                        'Found existing data store "{}", but '
                         "metadata did not match with this "
                         "instance.".format(self.store_path)
                     )
@@ -662,18 +1165,20 @@ class StoreManager(object):
                     )
                     if not store.is_empty():
                         try:
-                            store.clear()
-                        except ValueError:
+                            if os.path.isdir(self.store_path):
+                                shutil.rmtree(self.store_path)
+                            else:
+                                os.remove(self.store_path)
+                        except OSError:
                             raise IOError(
-                                "Store '{}' currently has an open"
-                                "file handle not owned by Enrich2. "
+                                "Store '{}' could not be removed. "
                                 "Cannot overwrite existing "
                                 "data.".format(self.store_path)
                             )
                 else:
                     log_message(
                         logging_callback=logging.info,
-                        msg='Found existing HDF5 data store "{}" with matching'
+                        msg='Found existing data store "{}" with matching'
                         " metadata.".format(self.store_path),
                         extra={"oname": self.name},
                     )
@@ -683,11 +1188,14 @@ class StoreManager(object):
             else:
                 log_message(
                     logging_callback=logging.info,
-                    msg='Creating new HDF5 data store "{}"'.format(self.store_path),
+                    msg='Creating new data store "{}"'.format(self.store_path),
                     extra={"oname": self.name},
                 )
 
-            self.store = HdfStore(self.store_path, mode="a")
+            # the file may have been cleared or changed since it was last open
+            self.table_cache.invalidate(self.store_path)
+            self._element_index = None
+            self.store = open_store(backend, self.store_path, **options)
 
             if self.force_recalculate or force_delete:
                 if "/main" in self.store:
@@ -696,7 +1204,7 @@ class StoreManager(object):
                         msg="Deleting existing calculated values",
                         extra={"oname": self.name},
                     )
-                    self.store.remove("/main")
+                    self.store_remove("/main")
                 else:
                     log_message(
                         logging_callback=logging.warning,
@@ -728,7 +1236,436 @@ class StoreManager(object):
             for key in self.store.keys():
                 self.set_metadata(key, self.metadata(), update=False)
             self.store.close()
+            if self.compact_stores:
+                self.store_compact(force=True)
             self.store = None
+            self._element_index = None
+
+        if self.parent is None:
+            log_message(
+                logging_callback=logging.info,
+                msg="Table cache: {} hits, {} misses ({:.1%} hit rate)".format(
+                    self.table_cache.hits,
+                    self.table_cache.misses,
+                    self.table_cache.hit_rate(),
+                ),
+                extra={"oname": self.name},
+            )
+
+    def store_select(self, key, columns=None, where=None, chunksize=None, **kwargs):
+        """
+        Returns the table at *key* in the current store, optionally limited
+        to some *columns* and to the rows matching *where*.
+
+        Selections are read through :py:attr:`table_cache`, so repeated
+        selections of the same table are not read from disk again. Other
+        keyword arguments, such as *start* and *stop*, are passed to the
+        store and bypass the cache.
+
+        Parameters
+        ----------
+        key : `str`
+            Table key in the store.
+        columns : `list`
+            Columns to select, or ``None`` for all columns.
+        where : `str` or `list`
+            Query used to select rows, or ``None`` for all rows.
+        chunksize : `int`
+            If given, the selection is returned as an iterator over
+            :py:class:`pandas.DataFrame` chunks of *chunksize* rows, which
+            bypass the cache.
+
+        Returns
+        -------
+        :py:class:`pandas.DataFrame`
+        """
+        if chunksize is not None:
+            if len(kwargs) > 0:
+                raise ValueError(
+                    "chunksize cannot be combined with {} [{}]".format(
+                        ", ".join(sorted(kwargs)), self.name
+                    )
+                )
+            return self._select_chunks(key, columns, where, chunksize)
+
+        if len(kwargs) > 0:
+            df = self._decode_index(
+                key,
+                self.store.select(
+                    key, columns=columns, where=self._encode_where(key, where), **kwargs
+                ),
+            )
+            self.run_report.add(rows_in=len(df))
+            return df
+
+        entry_key = self.table_cache.entry_key(self.store_path, key, columns, where)
+        df = self.table_cache.get(entry_key)
+        if df is None:
+            df = self.store.select(
+                key, columns=columns, where=self._encode_where(key, where)
+            )
+            df = self._decode_index(key, df)
+            self.table_cache.put(entry_key, df)
+        self.run_report.add(rows_in=len(df))
+        return df
+
+    def _select_chunks(self, key, columns, where, chunksize):
+        """
+        Yields the rows of the table at *key* selected by *columns* and
+        *where* in chunks of *chunksize* rows for :py:meth:`store_select`.
+        """
+        chunks = self.store.iter_chunks(
+            key, chunksize, columns=columns, where=self._encode_where(key, where)
+        )
+        for df in chunks:
+            df = self._decode_index(key, df)
+            self.run_report.add(rows_in=len(df))
+            yield df
+
+    def store_select_rows(self, key, rows, columns=None):
+        """
+        Returns the rows at the positions *rows* of the table at *key* in the
+        current store, optionally limited to some *columns*. The rows are
+        read directly and bypass the cache.
+
+        Parameters
+        ----------
+        key : `str`
+            Table key in the store.
+        rows : `numpy.ndarray`
+            Positions of the rows to select, in increasing order.
+        columns : `list`
+            Columns to select, or ``None`` for all columns.
+
+        Returns
+        -------
+        :py:class:`pandas.DataFrame`
+        """
+        if len(rows) == 0:
+            df = self.store.select(key, columns=columns, start=0, stop=0)
+        else:
+            df = self.store.select(key, columns=columns, where=rows)
+        df = self._decode_index(key, df)
+        self.run_report.add(rows_in=len(df))
+        return df
+
+    def store_select_as_multiple(self, keys, where=None, selector=None, chunk=False):
+        """
+        Returns the columns of the tables at *keys*, which must have the same
+        rows, as a single table limited to the rows of the *selector* table
+        that match *where*.
+
+        The element ids of interned tables are decoded as in
+        :py:meth:`store_select`. The selections bypass the cache.
+
+        Parameters
+        ----------
+        keys : `list`
+            Table keys in the store.
+        where : `str` or `list`
+            Query on the *selector* table, or ``None`` for all rows.
+        selector : `str`
+            Table key that *where* applies to, or ``None`` for the first of
+            *keys*.
+        chunk : `bool`
+            If ``True``, the selection is returned as an iterator over chunks
+            of up to :py:attr:`chunksize` rows of the tables.
+
+        Returns
+        -------
+        :py:class:`pandas.DataFrame`
+        """
+        if selector is None:
+            selector = keys[0]
+        where = self._encode_where(selector, where)
+        if chunk:
+            return self._select_multiple_chunks(keys, where, selector)
+        return self._select_multiple(keys, where, selector)
+
+    def _select_multiple(self, keys, where, selector, start=None, stop=None):
+        """
+        Returns the decoded selection of :py:meth:`store_select_as_multiple`
+        from the rows *start* to *stop* of the tables.
+        """
+        df = self.store.select_as_multiple(
+            keys, where=where, selector=selector, start=start, stop=stop
+        )
+        df = self._decode_index(selector, df)
+        self.run_report.add(rows_in=len(df))
+        return df
+
+    def _select_multiple_chunks(self, keys, where, selector):
+        """
+        Yields the non-empty selections of :py:meth:`store_select_as_multiple`
+        from consecutive ranges of :py:attr:`chunksize` rows of the tables.
+        """
+        nrows = self.store.nrows(selector)
+        for start in range(0, nrows, self.chunksize):
+            df = self._select_multiple(
+                keys, where, selector, start=start, stop=start + self.chunksize
+            )
+            if len(df) > 0:
+                yield df
+
+    def store_index(self, key):
+        """
+        Returns the index of the table at *key* in the current store, without
+        reading the rest of the table.
+
+        Parameters
+        ----------
+        key : `str`
+            Table key in the store.
+
+        Returns
+        -------
+        :py:class:`pandas.Index`
+        """
+        index = pd.Index(self.store.get_column(key, "index"))
+        if self._is_interned(key) and pd.api.types.is_integer_dtype(index):
+            index = self.element_index.decode(index)
+        return index
+
+    def store_column_sums(self, key, columns=None):
+        """
+        Returns the sum of each column of the table at *key* in the current
+        store, skipping missing values. Stores that can sum a table, such as
+        DuckDB stores, compute the sums without returning the rows.
+
+        Parameters
+        ----------
+        key : `str`
+            Table key in the store.
+        columns : `list`
+            Columns to sum, or ``None`` for all columns.
+
+        Returns
+        -------
+        :py:class:`pandas.Series`
+        """
+        column_sums = getattr(self.store, "column_sums", None)
+        if column_sums is None:
+            return self.store_select(key, columns=columns).sum(axis="index")
+        return column_sums(key, columns)
+
+    def store_sum_by_index(self, keys, columns=None):
+        """
+        Returns the sums of the *columns* of the tables at *keys* in the
+        current store for each element. Elements missing from a table add
+        nothing to the sum.
+
+        Stores that can sum tables by index, such as DuckDB stores, compute
+        the sums without returning the tables. Otherwise the tables are
+        selected and added together.
+
+        Parameters
+        ----------
+        keys : `list`
+            Table keys in the store.
+        columns : `list`
+            Columns to sum, or ``None`` for the columns of the first table.
+
+        Returns
+        -------
+        :py:class:`pandas.DataFrame`
+            The sums, sorted by index.
+        """
+        sum_by_index = getattr(self.store, "sum_by_index", None)
+        if sum_by_index is not None:
+            df = self._decode_index(keys[0], sum_by_index(keys, columns))
+            self.run_report.add(rows_in=len(df))
+            return df
+
+        df = None
+        for key in keys:
+            selected = self.store_select(key)
+            if columns is None:
+                columns = list(selected.columns)
+            if df is None:
+                df = selected[columns]
+            else:
+                df = df.add(selected[columns], fill_value=0)
+        return df.sort_index()
+
+    def store_put(self, key, value, **kwargs):
+        """
+        Puts *value* into the current store at *key*, replacing any existing
+        table, and removes the cached selections of that table.
+
+        Keyword arguments are passed to the store. Tables are always stored
+        in the ``'table'`` format, so a *format* argument is only checked.
+        """
+        self._check_format(kwargs)
+        self.table_cache.invalidate(self.store_path, key)
+        value = self._encode_index(key, value, kwargs)
+        self.store.put(key, value, **kwargs)
+        self.run_report.add(rows_out=len(value))
+
+    def store_append(self, key, value, **kwargs):
+        """
+        Appends *value* to the table at *key* in the current store and removes
+        the cached selections of that table.
+
+        Keyword arguments are passed to the store, as in :py:meth:`store_put`.
+        """
+        self._check_format(kwargs)
+        self.table_cache.invalidate(self.store_path, key)
+        value = self._encode_index(key, value, kwargs)
+        self.store.append(key, value, **kwargs)
+        self.run_report.add(rows_out=len(value))
+
+    def _check_format(self, kwargs):
+        """
+        Removes the pandas *format* argument from *kwargs*, raising a
+        ``ValueError`` if it is not ``'table'``.
+        """
+        fmt = kwargs.pop("format", "table")
+        if fmt != "table":
+            raise ValueError(
+                "Invalid store format '{}', only 'table' is supported "
+                "[{}]".format(fmt, self.name)
+            )
+
+    def store_remove(self, key, **kwargs):
+        """
+        Removes the table at *key*, and any tables under it, from the current
+        store and removes their cached selections.
+
+        Keyword arguments are passed to the store.
+        """
+        self.table_cache.invalidate(self.store_path, key)
+        self.store.remove(key, **kwargs)
+
+    def store_link(self, key, source, source_key=None):
+        """
+        Adds the table at *source_key* in the HDF5 file *source* to the
+        current store at *key* without copying it, and removes the cached
+        selections of *key*.
+
+        The table is copied into the store if it is later appended to.
+        """
+        self.table_cache.invalidate(self.store_path, key)
+        self.store.link(key, source, source_key)
+
+    def store_compact(self, force=False):
+        """
+        Repacks the current store to return the space left by removed and
+        rewritten tables to the file system. Stores that cannot be repacked
+        are left unchanged.
+
+        Parameters
+        ----------
+        force : `bool`
+            Repack the store even if its free space has not passed the
+            ``compact_threshold`` of the store.
+
+        Returns
+        -------
+        `int`
+            Number of bytes reclaimed.
+        """
+        if force:
+            compact = getattr(self.store, "compact", None)
+        else:
+            compact = getattr(self.store, "compact_if_needed", None)
+        if compact is None:
+            return 0
+        reclaimed = compact()
+        if reclaimed > 0:
+            log_message(
+                logging_callback=logging.info,
+                msg="Compacted store '{}', reclaiming {:.1f} MB".format(
+                    self.store_path, reclaimed / 1024 ** 2
+                ),
+                extra={"oname": self.name},
+            )
+        return reclaimed
+
+    def _is_interned(self, key):
+        """
+        Returns ``True`` if the table at *key* is stored indexed by element
+        ids. Only the calculated tables under ``'/main'`` are interned.
+        """
+        return self.intern_index and ("/" + key.lstrip("/")).startswith("/main/")
+
+    def _encode_index(self, key, value, kwargs):
+        """
+        Returns *value* with its element string index replaced by ids if the
+        table at *key* is interned, and saves any new elements to the store.
+
+        The ``'index'`` entry of a ``min_itemsize`` in *kwargs* is removed
+        for every interned table, including values that are already encoded,
+        because the ids are not strings.
+        """
+        if not self._is_interned(key) or isinstance(value.index, pd.MultiIndex):
+            return value
+        if "min_itemsize" in kwargs:
+            kwargs["min_itemsize"] = {
+                k: v for k, v in kwargs["min_itemsize"].items() if k != "index"
+            }
+        if not pd.api.types.is_object_dtype(value.index):
+            return value
+
+        value = value.copy(deep=False)
+        value.index = pd.Index(
+            self.element_index.encode(value.index), name=value.index.name
+        )
+        if len(self.element_index) > self.element_index.saved:
+            self._save_elements()
+        return value
+
+    def _save_elements(self):
+        """
+        Appends the elements added since the last save to the element table
+        in the current store.
+
+        The width of the element column is fixed when the table is written,
+        so the table is rewritten only when a new element is longer than the
+        column. The column at least doubles in width each time, so the table
+        is rewritten a few times at most.
+        """
+        elements = self.element_index
+        new = elements.to_frame(start=elements.saved)
+        length = int(new[ElementIndex.column].str.len().max())
+        if elements.saved == 0 or length > elements.width:
+            elements.width = max(length, 2 * elements.width)
+            self.store.put(
+                ElementIndex.table_key,
+                elements.to_frame(),
+                min_itemsize={"values": elements.width},
+            )
+        else:
+            self.store.append(ElementIndex.table_key, new)
+        elements.saved = len(elements)
+
+    def _decode_index(self, key, df):
+        """
+        Returns *df* with its element id index replaced by the element strings
+        if the table at *key* is interned.
+        """
+        if not self._is_interned(key) or isinstance(df.index, pd.MultiIndex):
+            return df
+        if not pd.api.types.is_integer_dtype(df.index):
+            return df
+        df.index = pd.Index(self.element_index.decode(df.index), name=df.index.name)
+        return df
+
+    def _encode_where(self, key, where):
+        """
+        Returns the query *where* on element strings rewritten as a query on
+        element ids if the table at *key* is interned. Each query in a list
+        is rewritten separately.
+        """
+        if where is None or not self._is_interned(key):
+            return where
+        if isinstance(where, str):
+            return self.element_index.translate_where(where)
+        if isinstance(where, list):
+            return [
+                self.element_index.translate_where(w) if isinstance(w, str) else w
+                for w in where
+            ]
+        return where
 
     def get_table(self, key):
         """
@@ -748,7 +1685,7 @@ class StoreManager(object):
         if not self.check_store(key):
             raise ValueError("Store {} does not exist [{}]".format(key, self.name))
         else:
-            return self.store[key]
+            return self.store_select(key)
 
     def check_store(self, key):
         """
@@ -765,7 +1702,7 @@ class StoreManager(object):
         `bool` 
             True if the key exists in the HDF5 store, else False.
         """
-        if key in list(self.store.keys()):
+        if key in self.store:
             log_message(
                 logging_callback=logging.info,
                 msg="Found existing '{}'".format(key),
@@ -803,7 +1740,7 @@ class StoreManager(object):
         destination_data_columns : `Iterable`
             Iterable of column names
         """
-        if destination in list(self.store.keys()):
+        if destination in self.store:
             # remove the current destination table because we are using append
             # append takes the "min_itemsize" argument, and put doesn't
             log_message(
@@ -811,7 +1748,7 @@ class StoreManager(object):
                 msg="Overwriting existing '{}'".format(destination),
                 extra={"oname": self.name},
             )
-            self.store.remove(destination)
+            self.store_remove(destination)
 
         # turn the single table name into a list to use select_as_multiple
         if isinstance(source, str):
@@ -819,10 +1756,10 @@ class StoreManager(object):
 
         # assumes the source tables all have the same index
         # find the min_itemsize
-        max_index_length = self.store.get_column(source[0], "index").map(len).max()
+        max_index_length = self.store_index(source[0]).map(len).max()
 
-        selections = self.store.select_as_multiple(
-            keys=source, where=source_query, selector=source[0], chunk=True
+        selections = self.store_select_as_multiple(
+            source, where=source_query, selector=source[0], chunk=True
         )
         for df in selections:
             if row_callback is not None:
@@ -831,14 +1768,14 @@ class StoreManager(object):
                 if destination_data_columns is None:
                     # if not specified, index all columns
                     destination_data_columns = list(df.columns)
-                self.store.append(
+                self.store_append(
                     destination,
                     df,
                     min_itemsize={"index": max_index_length},
                     data_columns=destination_data_columns,
                 )
             else:
-                self.store.append(destination, df)
+                self.store_append(destination, df)
 
     def combined_index(self, tables):
         """
@@ -893,7 +1830,7 @@ class StoreManager(object):
         `dict`
             Metadata dictionary.
         """
-        cfg = self.serialize()
+        cfg = _without_store_options(self.serialize())
         metadata = {"cfg": cfg, "time": self.creationtime, "user": self.username}
         return metadata
 
@@ -939,7 +1876,7 @@ class StoreManager(object):
         Parameters
         ----------
         key : `str`
-            The name of the group or node in the HDF5 data store.
+            The name of the group or node in the data store.
         store : :py:class:`~HDFStore`, optional, default None
             Can be an external open HDFStore (used when copying metadata
             from raw counts). If it is ``None``, use this object's store.
@@ -969,7 +1906,7 @@ class StoreManager(object):
         Parameters
         ----------
         key : `str`
-            The name of the group or node in the HDF5 data store.
+            The name of the group or node in the data store.
         d : `dict`
             The dictionary containing the new metadata.
         update : `bool`, default: True
@@ -988,6 +1925,7 @@ class StoreManager(object):
     # -----------------------------------------------------------------------#
     #                              File I/O
     # -----------------------------------------------------------------------#
+    @timed_stage("write_tsv")
     def write_tsv(self, subdirectory=None, keys=None):
         """
         Pure virtual method for writing tsv files.
@@ -1010,6 +1948,6 @@ class StoreManager(object):
         """
         fname = key.strip("/")  # remove leading slash
         fname = fname.replace("/", "_") + ".tsv"
-        self.store[key].to_csv(
+        self.store_select(key).to_csv(
             os.path.join(str(self.tsv_dir), fname), sep="\t", na_rep="NA"
         )
@@ -0,0 +1,202 @@
+"""
+Enrich2 base table_cache module
+===============================
+
+Contains the ``TableCache`` class, a memory-bounded least recently used cache
+of tables read from the HDF5 stores of
+:py:class:`~enrich2.base.storemanager.StoreManager` objects.
+"""
+
+
+import os
+from collections import OrderedDict
+
+
+__all__ = ["TableCache"]
+
+
+class TableCache(object):
+    """
+    Least recently used cache of :py:class:`pandas.DataFrame` objects
+    selected from HDF5 stores.
+
+    Entries are keyed by the store path, the table key, the selected columns
+    and the query used to select the rows. The least recently used entries
+    are evicted when the memory used by the cached tables exceeds
+    *max_bytes*. Tables larger than *max_bytes* are never cached.
+
+    Cached tables are copied on the way in and on the way out, so callers are
+    free to modify the tables they are given.
+
+    Parameters
+    ----------
+    max_bytes : `int`
+        Maximum memory in bytes used by the cached tables. ``0`` disables
+        the cache.
+
+    Attributes
+    ----------
+    max_bytes : `int`
+        Maximum memory in bytes used by the cached tables.
+    nbytes : `int`
+        Memory in bytes used by the cached tables.
+    hits : `int`
+        Number of lookups that returned a cached table.
+    misses : `int`
+        Number of lookups that did not.
+
+    Methods
+    -------
+    entry_key
+        Returns the key used to identify a selection.
+    get
+        Returns a copy of a cached table.
+    put
+        Adds a table to the cache.
+    invalidate
+        Removes the cached tables for a store or table.
+    clear
+        Removes all cached tables.
+    hit_rate
+        Returns the fraction of lookups that returned a cached table.
+    """
+
+    default_max_bytes = 512 * 1024 ** 2
+
+    def __init__(self, max_bytes=default_max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def entry_key(path, key, columns=None, where=None):
+        """
+        Returns the key used to identify a selection from a store.
+
+        Parameters
+        ----------
+        path : `str`
+            Path to the HDF5 store.
+        key : `str`
+            Table key in the store.
+        columns : `list` or None
+            Selected columns, or ``None`` for all columns.
+        where : `str`, `list` or None
+            Query used to select rows, or ``None`` for all rows.
+
+        Returns
+        -------
+        `tuple`
+        """
+        if columns is not None:
+            if isinstance(columns, str):
+                columns = [columns]
+            columns = tuple(columns)
+        if where is not None:
+            where = repr(where)
+        return os.path.abspath(path), "/" + key.lstrip("/"), columns, where
+
+    def get(self, entry_key):
+        """
+        Returns a copy of the table cached under *entry_key*, or ``None`` if
+        there is no such table.
+
+        Parameters
+        ----------
+        entry_key : `tuple`
+            Key returned by :py:meth:`entry_key`.
+
+        Returns
+        -------
+        :py:class:`pandas.DataFrame` or None
+        """
+        try:
+            df, _ = self._entries[entry_key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(entry_key)
+        self.hits += 1
+        return df.copy()
+
+    def put(self, entry_key, df):
+        """
+        Adds a copy of *df* to the cache under *entry_key*, evicting the least
+        recently used tables if needed.
+
+        Parameters
+        ----------
+        entry_key : `tuple`
+            Key returned by :py:meth:`entry_key`.
+        df : :py:class:`pandas.DataFrame`
+            Table to cache.
+        """
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        self._discard(entry_key)
+        if nbytes > self.max_bytes:
+            return
+        while self.nbytes + nbytes > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+        self._entries[entry_key] = (df.copy(), nbytes)
+        self.nbytes += nbytes
+
+    def _discard(self, entry_key):
+        """
+        Removes the entry for *entry_key* if it exists.
+        """
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def invalidate(self, path, key=None):
+        """
+        Removes the cached tables read from the store at *path*.
+
+        Parameters
+        ----------
+        path : `str`
+            Path to the HDF5 store.
+        key : `str` or None
+            If given, only tables at *key* or under it (such as
+            ``'/main/variants/counts'`` for the key ``'/main'``) are removed.
+        """
+        path = os.path.abspath(path)
+        if key is not None:
+            key = "/" + key.lstrip("/")
+        for entry_key in list(self._entries):
+            entry_path, entry_table = entry_key[:2]
+            if entry_path != path:
+                continue
+            if (
+                key is None
+                or entry_table == key
+                or entry_table.startswith(key.rstrip("/") + "/")
+            ):
+                self._discard(entry_key)
+
+    def clear(self):
+        """
+        Removes all cached tables. The hit and miss counts are kept.
+        """
+        self._entries.clear()
+        self.nbytes = 0
+
+    def hit_rate(self):
+        """
+        Returns the fraction of lookups that returned a cached table.
+
+        Returns
+        -------
+        `float`
+            ``0.0`` if there have been no lookups.
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        else:
+            return self.hits / lookups
@@ -23,6 +23,7 @@ __all__ = [
     "infer_multiindex_header_rows",
     "is_number",
     "compute_md5",
+    "compute_prefix_fingerprint",
     "init_logging_queue",
     "get_logging_queue",
     "log_message",
@@ -306,3 +307,40 @@ def compute_md5(fname):
         md5 = hashlib.md5(fp.read()).hexdigest()
         fp.close()
     return md5
+
+
+def compute_prefix_fingerprint(fname, end=None, block_size=1024 ** 2):
+    """
+    Returns an MD5 fingerprint of the first *end* bytes of a file, computed
+    from the first and last *block_size* bytes of that prefix and its
+    length. Used to check cheaply that a growing file has only been appended
+    to since *end* bytes of it were read, or that a file is unchanged.
+
+    Parameters
+    ----------
+    fname : `str`
+        Path to file.
+    end : `int` or None
+        Length of the prefix in bytes, or ``None`` for the whole file.
+    block_size : `int`
+        Number of bytes hashed at each end of the prefix.
+
+    Returns
+    -------
+    `str`
+        MD5 string of the fingerprint, or an empty string if the file does
+        not exist or is shorter than *end* bytes.
+    """
+    if not os.path.isfile(fname):
+        return ""
+    if end is None:
+        end = os.path.getsize(fname)
+    elif os.path.getsize(fname) < end:
+        return ""
+    md5 = hashlib.md5(str(end).encode("ascii"))
+    with open(fname, "rb") as fp:
+        md5.update(fp.read(min(end, block_size)))
+        if end > block_size:
+            fp.seek(max(block_size, end - block_size))
+            md5.update(fp.read(end - fp.tell()))
+    return md5.hexdigest()
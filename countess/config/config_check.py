@@ -150,7 +150,7 @@ def seqlib_type(cfg):
         else:
             return "BarcodeSeqLib"
     elif VARIANTS in cfg and OVERLAP in cfg:
-        raise ValueError("OverlapSeqLib no longer supported.")
+        return "OverlapSeqLib"
     elif VARIANTS in cfg:
         return "BasicSeqLib"
     elif IDENTIFIERS in cfg:
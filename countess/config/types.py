@@ -12,6 +12,7 @@ import re
 import os
 import sys
 import logging
+import tables
 from abc import ABC, abstractclassmethod
 
 from ..base.config_constants import *
@@ -19,17 +20,23 @@ from ..base.utils import log_message
 from .config_check import *
 from ..plugins import load_scorer_class_and_options
 from ..plugins.options import Options
+from ..store.execution import Execution, SCHEDULERS
+from ..store.managed import BACKENDS, path_backend
 
 
 __all__ = [
     "Configuration",
     "ScorerConfiguration",
     "FASTQConfiguration",
+    "DemultiplexConfiguration",
     "FiltersConfiguration",
+    "OverlapFASTQConfiguration",
+    "OverlapFiltersConfiguration",
     "BarcodeConfiguration",
     "IdentifiersConfiguration",
     "VariantsConfiguration",
     "WildTypeConfiguration",
+    "OverlapConfiguration",
     "BaseLibraryConfiguration",
     "BaseVariantSeqLibConfiguration",
     "BarcodeSeqLibConfiguration",
@@ -37,9 +44,12 @@ __all__ = [
     "BcvSeqLibConfiguration",
     "IdOnlySeqLibConfiguration",
     "BasicSeqLibConfiguration",
+    "OverlapSeqLibConfiguration",
     "ExperimentConfiguration",
     "ConditonConfiguration",
     "SelectionConfiguration",
+    "StoreOptionsConfiguration",
+    "ExecutionConfiguration",
     "StoreConfiguration",
 ]
 
@@ -215,6 +225,8 @@ class FASTQConfiguration(Configuration):
         from `trim_start`
     filters_cfg : :py:class:`~FiltersConfiguration`
         Filters configuration object loaded from the configuration `dict`.
+    demux_cfg : :py:class:`~DemultiplexConfiguration` or None
+        Demultiplexing configuration object if the reads are multiplexed.
     
     Methods
     -------
@@ -225,10 +237,12 @@ class FASTQConfiguration(Configuration):
     validate_trim_start
     validate_trim_length
     validate_reads
+    validate_reads_file
 
     See Also
     --------
     :py:class:`~FiltersConfiguration`
+    :py:class:`~DemultiplexConfiguration`
 
 
     """
@@ -248,6 +262,10 @@ class FASTQConfiguration(Configuration):
         self.trim_start = cfg.get(TRIM_START, 1)
         self.trim_length = cfg.get(TRIM_LENGTH, sys.maxsize)
         self.filters_cfg = FiltersConfiguration(filters_cfg)
+        if DEMULTIPLEX in cfg:
+            self.demux_cfg = DemultiplexConfiguration(cfg[DEMULTIPLEX])
+        else:
+            self.demux_cfg = None
         self.validate()
 
     def validate_reverse(self):
@@ -287,17 +305,21 @@ class FASTQConfiguration(Configuration):
         """
         Ensure reads file exists and has an appropriate extension.
         """
-        if not isinstance(self.reads, str):
-            raise TypeError(
-                "Expected str for reads but found {}.".format(type(self.reads))
-            )
-        if not os.path.isfile(self.reads):
+        self.validate_reads_file(self.reads)
+
+    @staticmethod
+    def validate_reads_file(reads):
+        """
+        Ensure the reads file *reads* exists and has an appropriate extension.
+        """
+        if not isinstance(reads, str):
+            raise TypeError("Expected str for reads but found {}.".format(type(reads)))
+        if not os.path.isfile(reads):
             raise IOError(
-                "File {} does not exist."
-                " Try using absolute paths.".format(self.reads)
+                "File {} does not exist." " Try using absolute paths.".format(reads)
             )
 
-        _, tail = os.path.split(self.reads)
+        _, tail = os.path.split(reads)
         _, ext = os.path.splitext(tail)
         if ext not in {".bz2", ".gz", ".fq", ".fastq"}:
             raise IOError(
@@ -315,8 +337,114 @@ class FASTQConfiguration(Configuration):
         self.validate_trim_length()
         self.validate_reads()
         self.filters_cfg.validate()
+        if self.demux_cfg is not None:
+            self.demux_cfg.validate()
+        return self
+
+
+class DemultiplexConfiguration(Configuration):
+    """
+    Class representing the demultiplexing options found in a configuration
+    file under the key 'demultiplex' of the 'fastq' section. Reads are
+    assigned to the library whose index sequence matches the start of the
+    index read, or the start of the read itself if there is no index read.
+
+    Parameters
+    ----------
+    cfg : `dict`
+        The dictionary parsed from a configuration file.
+
+    Attributes
+    ----------
+    index : `str`
+        The library's index sequence.
+    index_reads : `str` or None
+        The filepath of the index reads, or ``None`` if the index is an
+        inline tag at the start of each read.
+    mismatches : `int`
+        Number of mismatches allowed when matching the index sequence.
+
+    Methods
+    -------
+    validate
+        Validate the instance instantiated from a `dict`.
+    to_dict
+
+    See Also
+    --------
+    :py:class:`~enrich2.libraries.demultiplex.Demultiplexer`
+
+    """
+
+    def __init__(self, cfg):
+        if not isinstance(cfg, dict):
+            raise TypeError("dict required for demultiplex configuration.")
+
+        if DEMUX_INDEX not in cfg:
+            raise KeyError(
+                "Missing '{}' key from {} configuration.".format(
+                    DEMUX_INDEX, DEMULTIPLEX
+                )
+            )
+
+        self.index = cfg.get(DEMUX_INDEX, "")
+        self.index_reads = cfg.get(DEMUX_INDEX_READS, None)
+        self.mismatches = cfg.get(DEMUX_MISMATCHES, 0)
+        self.validate()
+
+    def validate(self):
+        """
+        Validate all attributes. Overrides parent method.
+        """
+        if not isinstance(self.index, str):
+            raise TypeError(
+                "Expected str for index but found {}.".format(type(self.index))
+            )
+        if not re.match("^[ACGTN]+$", self.index.upper()):
+            raise ValueError(
+                "Demultiplex index '{}' must be a non-empty DNA "
+                "sequence.".format(self.index)
+            )
+
+        if not isinstance(self.mismatches, int) or isinstance(self.mismatches, bool):
+            raise TypeError(
+                "Demultiplex `mismatches` must be an integer."
+                " Found type {}.".format(type(self.mismatches))
+            )
+        if not 0 <= self.mismatches < len(self.index):
+            raise ValueError(
+                "Demultiplex `mismatches` must not be negative and must be "
+                "less than the index length."
+            )
+
+        if self.index_reads is not None:
+            if not isinstance(self.index_reads, str):
+                raise TypeError(
+                    "Expected str for index reads but found {}.".format(
+                        type(self.index_reads)
+                    )
+                )
+            if not os.path.isfile(self.index_reads):
+                raise IOError(
+                    "File {} does not exist."
+                    " Try using absolute paths.".format(self.index_reads)
+                )
+
         return self
 
+    def to_dict(self):
+        """
+        Serialize current attributes into a `dict`
+
+        Returns
+        -------
+        `dict`
+        """
+        cfg = {DEMUX_INDEX: self.index, DEMUX_MISMATCHES: self.mismatches}
+        if self.index_reads is not None:
+            cfg[DEMUX_INDEX_READS] = self.index_reads
+        return cfg
+
 
 class FiltersConfiguration(Configuration):
     """
@@ -438,6 +566,141 @@ class FiltersConfiguration(Configuration):
         }
 
 
+class OverlapFASTQConfiguration(FASTQConfiguration):
+    """
+    Class representing the FASTQ options of an overlapping paired-end
+    library, found in a configuration file under the key 'fastq'. Instead of
+    a single reads file, the forward and reverse reads are in two files with
+    the records of each pair in the same order.
+
+    Inherits from :py:class:`~FASTQConfiguration`.
+
+    Parameters
+    ----------
+    cfg : `dict`
+        The dictionary parsed from a configuration file.
+
+    Attributes
+    ----------
+    forward_reads : `str`
+        The filepath of the forward reads.
+    reverse_reads : `str`
+        The filepath of the reverse reads.
+    filters_cfg : :py:class:`~OverlapFiltersConfiguration`
+        Filters configuration object loaded from the configuration `dict`.
+
+    Methods
+    -------
+    validate
+        Validate the instance instantiated from a `dict`.
+    validate_reads
+
+    See Also
+    --------
+    :py:class:`~OverlapFiltersConfiguration`
+
+    """
+
+    def __init__(self, cfg):
+        if not isinstance(cfg, dict):
+            raise TypeError("dict required for fastq configuration.")
+
+        for key in (FORWARD_READS, REVERSE_READS):
+            if key not in cfg:
+                raise KeyError(
+                    "Missing '{}' key from {} configuration.".format(key, FASTQ)
+                )
+
+        self.forward_reads = cfg.get(FORWARD_READS, "")
+        self.reverse_reads = cfg.get(REVERSE_READS, "")
+        self.filters_cfg = OverlapFiltersConfiguration(cfg.get(FILTERS, {}))
+        self.demux_cfg = None
+        self.validate()
+
+    def validate_reads(self):
+        """
+        Ensure both reads files exist and have an appropriate extension.
+        """
+        self.validate_reads_file(self.forward_reads)
+        self.validate_reads_file(self.reverse_reads)
+
+    def validate(self):
+        """
+        Validate all attributes. Overrides parent method.
+        """
+        self.validate_reads()
+        self.filters_cfg.validate()
+        return self
+
+
+class OverlapFiltersConfiguration(FiltersConfiguration):
+    """
+    Class representing the filters of an overlapping paired-end library,
+    which also has an option to remove merged reads with unresolvable
+    mismatches in the overlap.
+
+    Inherits from :py:class:`~FiltersConfiguration`.
+
+    Parameters
+    ----------
+    cfg : `dict`
+        The dictionary parsed from a configuration file.
+
+    Attributes
+    ----------
+    remove_unresolvable : `bool`
+        Filter out merged reads with unresolvable mismatches.
+
+    Methods
+    -------
+    validate
+    validate_remove_unresolvable
+    to_dict
+
+    See Also
+    --------
+    :py:class:`~FiltersConfiguration`
+
+    """
+
+    def __init__(self, cfg):
+        if not isinstance(cfg, dict):
+            raise TypeError("dict required for filters configuration.")
+
+        self.remove_unresolvable = cfg.get(FILTERS_REMOVE_UNRESOLVABLE, False)
+        FiltersConfiguration.__init__(self, cfg)
+
+    def validate_remove_unresolvable(self):
+        """
+        Ensure that `remove_unresolvable` is a `bool`.
+        """
+        if not isinstance(self.remove_unresolvable, bool):
+            raise TypeError(
+                "FASTQ filter `remove unresolvable` must be a boolean."
+                " Found type {}.".format(type(self.remove_unresolvable))
+            )
+
+    def validate(self):
+        """
+        Validate all attributes. Overrides parent method.
+        """
+        FiltersConfiguration.validate(self)
+        self.validate_remove_unresolvable()
+        return self
+
+    def to_dict(self):
+        """
+        Serialize current attributes into a `dict`
+
+        Returns
+        -------
+        `dict`
+        """
+        cfg = FiltersConfiguration.to_dict(self)
+        cfg[FILTERS_REMOVE_UNRESOLVABLE] = self.remove_unresolvable
+        return cfg
+
+
 class BarcodeConfiguration(Configuration):
     """
     Class to represent the barcode configuration found in ``enrich2``
@@ -809,6 +1072,106 @@ class WildTypeConfiguration(Configuration):
                 )
 
 
+class OverlapConfiguration(Configuration):
+    """
+    Class representing the options for merging overlapping paired-end reads,
+    found in a configuration file under the key 'overlap'.
+
+    Parameters
+    ----------
+    cfg : `dict`
+        The dictionary parsed from a configuration file.
+
+    Attributes
+    ----------
+    fwd_start : `int`
+        Position of the first overlapping base in the forward read, 1-based.
+    rev_start : `int`
+        Position of the first overlapping base in the reverse read before it
+        is reverse-complemented, 1-based.
+    length : `int`
+        Number of overlapping bases.
+    max_mismatches : `int`
+        Maximum number of mismatches in the overlap of a merged read.
+    overlap_only : `bool`
+        Trim the merged reads to the overlap.
+
+    Methods
+    -------
+    validate
+        Validate the instance instantiated from a `dict`.
+    to_dict
+
+    """
+
+    def __init__(self, cfg):
+        if not isinstance(cfg, dict):
+            raise TypeError("dict required for overlap configuration.")
+
+        for key in (OVERLAP_FWD_START, OVERLAP_REV_START, OVERLAP_LENGTH):
+            if key not in cfg:
+                raise KeyError(
+                    "Missing '{}' key from {} configuration.".format(key, OVERLAP)
+                )
+
+        self.fwd_start = cfg.get(OVERLAP_FWD_START)
+        self.rev_start = cfg.get(OVERLAP_REV_START)
+        self.length = cfg.get(OVERLAP_LENGTH)
+        self.max_mismatches = cfg.get(OVERLAP_MAX_MISMATCHES, 0)
+        self.overlap_only = cfg.get(OVERLAP_ONLY, False)
+        self.validate()
+
+    def validate(self):
+        """
+        Validate all attributes. Overrides parent method.
+        """
+        for key, value in (
+            (OVERLAP_FWD_START, self.fwd_start),
+            (OVERLAP_REV_START, self.rev_start),
+            (OVERLAP_LENGTH, self.length),
+            (OVERLAP_MAX_MISMATCHES, self.max_mismatches),
+        ):
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise TypeError(
+                    "Overlap `{}` must be an integer."
+                    " Found type {}.".format(key, type(value))
+                )
+        if self.fwd_start < 1 or self.rev_start < 1 or self.length < 1:
+            raise ValueError(
+                "Overlap `{}`, `{}` and `{}` must be positive.".format(
+                    OVERLAP_FWD_START, OVERLAP_REV_START, OVERLAP_LENGTH
+                )
+            )
+        if not 0 <= self.max_mismatches <= self.length:
+            raise ValueError(
+                "Overlap `max mismatches` must not be negative and must not be "
+                "greater than the overlap length."
+            )
+        if not isinstance(self.overlap_only, bool):
+            raise TypeError(
+                "Expected bool for `overlap only` but found {}.".format(
+                    type(self.overlap_only)
+                )
+            )
+        return self
+
+    def to_dict(self):
+        """
+        Serialize current attributes into a `dict`
+
+        Returns
+        -------
+        `dict`
+        """
+        return {
+            OVERLAP_FWD_START: self.fwd_start,
+            OVERLAP_REV_START: self.rev_start,
+            OVERLAP_LENGTH: self.length,
+            OVERLAP_MAX_MISMATCHES: self.max_mismatches,
+            OVERLAP_ONLY: self.overlap_only,
+        }
+
+
 # -------------------------------------------------------------------------- #
 #
 #                      Library Configuration Classes
@@ -828,6 +1191,11 @@ class BaseLibraryConfiguration(Configuration):
         should also be parsed and validated. Not all sequence libraries
         are to be parsed from reads.
     
+    Class Attributes
+    ----------------
+    fastq_configuration : `type`
+        Configuration class of the fastq options.
+
     Attributes
     ----------
     fastq_cfg : :py:class:`~FASTQConfiguration`
@@ -853,6 +1221,8 @@ class BaseLibraryConfiguration(Configuration):
 
     """
 
+    fastq_configuration = FASTQConfiguration
+
     def __init__(self, cfg, init_fastq=False):
         if not isinstance(cfg, dict):
             raise TypeError("dict required for base library configuration.")
@@ -877,7 +1247,7 @@ class BaseLibraryConfiguration(Configuration):
         fastq_cfg = cfg.get(FASTQ, None)
         self.counts_file = cfg.get(COUNTS_FILE, None)
         if init_fastq:
-            self.fastq_cfg = FASTQConfiguration(fastq_cfg).validate()
+            self.fastq_cfg = self.fastq_configuration(fastq_cfg).validate()
         else:
             self.fastq_cfg = None
 
@@ -1198,6 +1568,49 @@ class BasicSeqLibConfiguration(BaseVariantSeqLibConfiguration):
         self.validate()
 
 
+class OverlapSeqLibConfiguration(BaseVariantSeqLibConfiguration):
+    """
+    Class representing the configuration of a
+    :py:class:`~enrich2.libraries.overlap.OverlapSeqLib` object.
+
+    Inherits from :py:class:`~BaseVariantSeqLibConfiguration`.
+
+    Parameters
+    ----------
+    cfg : `dict`
+        The dictionary parsed from a configuration file.
+    init_fastq : `bool`, default `True`
+        Set to `True` if `cfg` contains a fastq configuration `dict` that
+        should also be parsed and validated.
+
+    Attributes
+    ----------
+    overlap_cfg : :py:class:`~OverlapConfiguration`
+        Configuration object for the overlap options in a library
+        configuration.
+
+    See Also
+    --------
+    :py:class:`~BaseVariantSeqLibConfiguration`
+
+    """
+
+    fastq_configuration = OverlapFASTQConfiguration
+
+    def __init__(self, cfg, init_fastq=True):
+        if not isinstance(cfg, dict):
+            raise TypeError("dict required for OverlapSeqLibConfiguration.")
+
+        BaseVariantSeqLibConfiguration.__init__(self, cfg, init_fastq)
+
+        if OVERLAP not in cfg:
+            raise KeyError(
+                "Key {} missing for OverlapSeqLib configuration.".format(OVERLAP)
+            )
+        self.overlap_cfg = OverlapConfiguration(cfg.get(OVERLAP)).validate()
+        self.validate()
+
+
 # -------------------------------------------------------------------------- #
 #
 #                      Root Configuration Classes
@@ -1405,6 +1818,7 @@ class SelectionConfiguration(Configuration):
         "BcvSeqLib": BcvSeqLibConfiguration,
         "IdOnlySeqLib": IdOnlySeqLibConfiguration,
         "BasicSeqLib": BasicSeqLibConfiguration,
+        "OverlapSeqLib": OverlapSeqLibConfiguration,
     }
 
     def __init__(self, cfg, has_scorer=True, init_from_gui=False):
@@ -1476,6 +1890,248 @@ class SelectionConfiguration(Configuration):
         return self
 
 
+class StoreOptionsConfiguration(Configuration):
+    """
+    Class representing the storage options found in a configuration file
+    under the key 'store options'. The compression and chunk options only
+    apply to the ``'hdf5'`` backend.
+
+    Parameters
+    ----------
+    cfg : `dict`
+        The dictionary parsed from a configuration file.
+
+    Attributes
+    ----------
+    backend : `str`
+        Store backend, one of ``'hdf5'``, ``'duckdb'`` or ``'feather'``.
+    compression : `str` or None
+        PyTables compression library such as ``'blosc:zstd'``, or ``None``
+        for uncompressed tables.
+    compression_level : `int`
+        Compression level from 0 to 9.
+    expected_rows : `int` or None
+        Expected number of rows in each table, used to choose chunk shapes.
+    chunk_shape : `int` or None
+        Number of rows in each chunk of new tables.
+    compact_threshold : `float` or None
+        Fraction of free space that triggers automatic compaction, or
+        ``None`` to only compact on request.
+
+    Methods
+    -------
+    validate
+        Validate the instance instantiated from a `dict`.
+    to_dict
+    store_kwargs
+
+    See Also
+    --------
+    :py:class:`~enrich2.store.hdf.HdfStore`
+
+    """
+
+    def __init__(self, cfg):
+        if not isinstance(cfg, dict):
+            raise TypeError("dict required for store options configuration.")
+
+        self.backend = cfg.get(STORE_BACKEND, "hdf5")
+        self.compression = cfg.get(STORE_COMPRESSION, "blosc:zstd")
+        self.compression_level = cfg.get(STORE_COMPLEVEL, 5)
+        self.expected_rows = cfg.get(STORE_EXPECTED_ROWS, None)
+        self.chunk_shape = cfg.get(STORE_CHUNKSHAPE, None)
+        self.compact_threshold = cfg.get(STORE_COMPACT_THRESHOLD, 0.5)
+        self.validate()
+
+    def validate(self):
+        """
+        Validate all attributes. Overrides parent method.
+        """
+        if not isinstance(self.backend, str):
+            raise TypeError("Store option `backend` must be a str.")
+        if self.backend not in BACKENDS:
+            raise ValueError(
+                "Unrecognized store backend '{}'. Expected one "
+                "of {}.".format(self.backend, BACKENDS)
+            )
+
+        if self.compression is not None:
+            if not isinstance(self.compression, str):
+                raise TypeError("Store option `compression` must be a str.")
+            if self.compression not in tables.filters.all_complibs:
+                raise ValueError(
+                    "Unrecognized store compression '{}'. Expected one "
+                    "of {}.".format(self.compression, tables.filters.all_complibs)
+                )
+
+        if not isinstance(self.compression_level, int):
+            raise TypeError("Store option `compression level` must be an integer.")
+        if not 0 <= self.compression_level <= 9:
+            raise ValueError("Store option `compression level` must be from 0 to 9.")
+
+        for name, value in (
+            (STORE_EXPECTED_ROWS, self.expected_rows),
+            (STORE_CHUNKSHAPE, self.chunk_shape),
+        ):
+            if value is None:
+                continue
+            if not isinstance(value, int):
+                raise TypeError("Store option `{}` must be an integer.".format(name))
+            if value < 1:
+                raise ValueError("Store option `{}` must be positive.".format(name))
+
+        if self.compact_threshold is not None:
+            if not isinstance(self.compact_threshold, (int, float)) or isinstance(
+                self.compact_threshold, bool
+            ):
+                raise TypeError("Store option `compact threshold` must be a number.")
+            if not 0 <= self.compact_threshold < 1:
+                raise ValueError(
+                    "Store option `compact threshold` must be at least 0 and "
+                    "less than 1."
+                )
+
+        return self
+
+    def to_dict(self):
+        """
+        Serialize current attributes into a `dict`
+
+        Returns
+        -------
+        `dict`
+        """
+        return {
+            STORE_BACKEND: self.backend,
+            STORE_COMPRESSION: self.compression,
+            STORE_COMPLEVEL: self.compression_level,
+            STORE_EXPECTED_ROWS: self.expected_rows,
+            STORE_CHUNKSHAPE: self.chunk_shape,
+            STORE_COMPACT_THRESHOLD: self.compact_threshold,
+        }
+
+    def store_kwargs(self):
+        """
+        Returns the options as keyword arguments for
+        :py:class:`~enrich2.store.hdf.HdfStore`, with the ``'backend'`` used
+        to choose the store class.
+
+        Returns
+        -------
+        `dict`
+        """
+        return {
+            "backend": self.backend,
+            "complib": self.compression,
+            "complevel": self.compression_level,
+            "expectedrows": self.expected_rows,
+            "chunkshape": self.chunk_shape,
+            "compact_threshold": self.compact_threshold,
+        }
+
+
+class ExecutionConfiguration(Configuration):
+    """
+    Class representing the Dask scheduler options found in a configuration
+    file under the key 'execution'.
+
+    Parameters
+    ----------
+    cfg : `dict`
+        The dictionary parsed from a configuration file.
+
+    Attributes
+    ----------
+    scheduler : `str`
+        One of ``'threads'``, ``'processes'``, ``'synchronous'`` or
+        ``'local-cluster'``.
+    workers : `int` or None
+        Number of workers, or ``None`` for one per core.
+    memory_limit : `int` or None
+        Memory limit in megabytes for each ``'local-cluster'`` worker.
+    memory_budget : `int` or None
+        Memory budget in megabytes used to size the chunks of table
+        operations.
+
+    Methods
+    -------
+    validate
+        Validate the instance instantiated from a `dict`.
+    to_dict
+    execution
+
+    See Also
+    --------
+    :py:class:`~enrich2.store.execution.Execution`
+
+    """
+
+    def __init__(self, cfg):
+        if not isinstance(cfg, dict):
+            raise TypeError("dict required for execution configuration.")
+
+        self.scheduler = cfg.get(EXECUTION_SCHEDULER, "threads")
+        self.workers = cfg.get(EXECUTION_WORKERS, None)
+        self.memory_limit = cfg.get(EXECUTION_MEMORY_LIMIT, None)
+        self.memory_budget = cfg.get(EXECUTION_MEMORY_BUDGET, None)
+        self.validate()
+
+    def validate(self):
+        """
+        Validate all attributes. Overrides parent method.
+        """
+        if self.scheduler not in SCHEDULERS:
+            raise ValueError(
+                "Unrecognized execution scheduler '{}'. Expected one "
+                "of {}.".format(self.scheduler, SCHEDULERS)
+            )
+
+        for name, value in (
+            (EXECUTION_WORKERS, self.workers),
+            (EXECUTION_MEMORY_LIMIT, self.memory_limit),
+            (EXECUTION_MEMORY_BUDGET, self.memory_budget),
+        ):
+            if value is None:
+                continue
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise TypeError("Execution `{}` must be an integer.".format(name))
+            if value < 1:
+                raise ValueError("Execution `{}` must be positive.".format(name))
+
+        if self.memory_limit is not None and self.scheduler != "local-cluster":
+            raise ValueError(
+                "Execution `memory limit` requires the 'local-cluster' scheduler."
+            )
+
+        return self
+
+    def to_dict(self):
+        """
+        Serialize current attributes into a `dict`
+
+        Returns
+        -------
+        `dict`
+        """
+        return {
+            EXECUTION_SCHEDULER: self.scheduler,
+            EXECUTION_WORKERS: self.workers,
+            EXECUTION_MEMORY_LIMIT: self.memory_limit,
+            EXECUTION_MEMORY_BUDGET: self.memory_budget,
+        }
+
+    def execution(self):
+        """
+        Returns the options as an
+        :py:class:`~enrich2.store.execution.Execution`.
+
+        Returns
+        -------
+        :py:class:`~enrich2.store.execution.Execution`
+        """
+        return Execution(self.scheduler, self.workers, self.memory_limit)
+
+
 class StoreConfiguration(Configuration):
     """
     Class representing the configuration of an
@@ -1500,12 +2156,20 @@ class StoreConfiguration(Configuration):
         Filepath to the output directory.
     store_path : `str`
         Filepath to the store to load.
+    store_options_cfg : :py:class:`~StoreOptionsConfiguration` or None
+        Storage options, if given in the configuration.
+    execution_cfg : :py:class:`~ExecutionConfiguration` or None
+        Dask scheduler options, if given in the configuration.
     has_scorer : `bool`
         Indicates if the store has a scorer.
     has_store_path : `bool`
         Indicates if the store manages a preexisting store
     has_output_dir : `bool`
         Indicates if the store has an output directory.
+    has_store_options : `bool`
+        Indicates if the configuration sets storage options.
+    has_execution : `bool`
+        Indicates if the configuration sets Dask scheduler options.
 
     See Also
     --------
@@ -1528,6 +2192,8 @@ class StoreConfiguration(Configuration):
         self.name = cfg.get(NAME)
         self.output_dir = cfg.get(OUTPUT_DIR, "")
         self.store_path = cfg.get(STORE, "")
+        self.store_options_cfg = cfg.get(STORE_OPTIONS, None)
+        self.execution_cfg = cfg.get(EXECUTION, None)
         self.has_scorer = has_scorer
 
         if not isinstance(self.name, str):
@@ -1542,6 +2208,16 @@ class StoreConfiguration(Configuration):
         if not isinstance(self.scorer_cfg, dict):
             raise TypeError("Store `scorer_cfg` must be a dict.")
 
+        if self.store_options_cfg is not None and not isinstance(
+            self.store_options_cfg, dict
+        ):
+            raise TypeError("Store `store options` must be a dict.")
+
+        if self.execution_cfg is not None and not isinstance(
+            self.execution_cfg, dict
+        ):
+            raise TypeError("Store `execution` must be a dict.")
+
         if not self.name:
             raise ValueError("Store does not have a name.")
 
@@ -1550,6 +2226,12 @@ class StoreConfiguration(Configuration):
 
         self.has_store_path = bool(self.store_path)
         self.has_output_dir = bool(self.output_dir)
+        self.has_store_options = self.store_options_cfg is not None
+        if self.has_store_options:
+            self.store_options_cfg = StoreOptionsConfiguration(self.store_options_cfg)
+        self.has_execution = self.execution_cfg is not None
+        if self.has_execution:
+            self.execution_cfg = ExecutionConfiguration(self.execution_cfg)
         if self.has_scorer:
             self.scorer_cfg = ScorerConfiguration(self.scorer_cfg)
         else:
@@ -1566,13 +2248,16 @@ class StoreConfiguration(Configuration):
         if self.has_scorer and self.scorer_cfg is None:
             raise ValueError("Scorer config cannot be NoneType.")
 
+        if self.has_store_options:
+            self.store_options_cfg.validate()
+
+        if self.has_execution:
+            self.execution_cfg.validate()
+
         if self.has_store_path and not os.path.exists(self.store_path):
             raise IOError('Specified store file "{}" not found'.format(self.store_path))
 
-        elif (
-            self.has_store_path
-            and os.path.splitext(self.store_path)[-1].lower() != ".h5"
-        ):
+        elif self.has_store_path and path_backend(self.store_path) is None:
             raise IOError(
                 "Unrecognized store file extension for " '"{}"'.format(self.store_path)
             )
@@ -1582,3 +2267,4 @@ class StoreConfiguration(Configuration):
                 os.makedirs(self.output_dir)
 
         return self
+
@@ -19,8 +19,10 @@ from ..base.utils import compute_md5, log_message
 
 from ..base.constants import WILD_TYPE_VARIANT
 from ..base.storemanager import StoreManager
+from ..base.run_report import timed_stage
 from ..statistics.random_effects import partitioned_rml_estimator
 from ..statistics.random_effects import nan_filter_generator
+from ..libraries.read_pass import schedule_read_passes
 from .condition import Condition
 
 
@@ -64,6 +66,8 @@ class Experiment(StoreManager):
         Returns a boolean indicating if all children have coding sequences.
     has_wt_sequence
         Returns a boolean indicating if all children have a wt sequence.
+    count_shared_reads
+        Counts libraries that read the same FASTQ_ file in one pass.
     calculate
         Calculates combined scores with statistics from selections 
         and conditions.
@@ -273,6 +277,28 @@ class Experiment(StoreManager):
         """
         return all(x.has_wt_sequence() for x in self.selection_list())
 
+    def count_shared_reads(self):
+        """
+        Counts the reads of libraries in all selections that read the same
+        FASTQ_ file, or are multiplexed in the same file, with a single pass
+        over the file instead of one pass for each library.
+
+        See :py:func:`~enrich2.libraries.read_pass.schedule_read_passes` for
+        how the libraries are grouped.
+        """
+        libraries = [lib for s in self.selection_list() for lib in s.children]
+        for read_pass in schedule_read_passes(libraries):
+            log_message(
+                logging_callback=logging.info,
+                msg="Counting {} libraries in one pass over '{}'".format(
+                    len(read_pass.libraries), read_pass.reads
+                ),
+                extra={"oname": self.name},
+            )
+            read_pass.count()
+            for lib in read_pass.libraries:
+                lib.save_counts_to_cache()
+
     def calculate(self):
         """
         Calculate scores for all 
@@ -284,6 +310,7 @@ class Experiment(StoreManager):
             raise ValueError(
                 "No data present across all conditions [{}]" "".format(self.name)
             )
+        self.count_shared_reads()
         for s in self.selection_list():
             s.calculate()
         self.combine_barcode_maps()
@@ -314,19 +341,21 @@ class Experiment(StoreManager):
 
         bcm = None
         for sel in self.selection_list():
-            if "/main/barcodemap" in list(sel.store.keys()):
+            if "/main/barcodemap" in sel.store:
                 if bcm is None:
-                    bcm = sel.store["/main/barcodemap"]
+                    bcm = sel.store_select("/main/barcodemap")
                 else:
                     bcm = bcm.join(
-                        sel.store["/main/barcodemap"], rsuffix=".drop", how="outer"
+                        sel.store_select("/main/barcodemap"),
+                        rsuffix=".drop",
+                        how="outer",
                     )
                     new = bcm.loc[pd.isnull(bcm)["value"]]
                     bcm.loc[new.index, "value"] = new["value.drop"]
                     bcm.drop("value.drop", axis="columns", inplace=True)
         if bcm is not None:
             bcm.sort_values("value", inplace=True)
-            self.store.put("/main/barcodemap", bcm, data_columns=bcm.columns)
+            self.store_put("/main/barcodemap", bcm, data_columns=bcm.columns)
 
     def calc_counts(self, label):
         """
@@ -379,13 +408,13 @@ class Experiment(StoreManager):
         first = True
         for s in self.selection_list():
             if first:
-                combined = s.store.select(
+                combined = s.store_select(
                     key="/main/{}/counts_unfiltered".format(label), columns=["index"]
                 ).index
                 first = False
             else:
                 combined = combined.join(
-                    s.store.select(
+                    s.store_select(
                         key="/main/{}/counts_unfiltered".format(label),
                         columns=["index"],
                     ).index,
@@ -401,15 +430,16 @@ class Experiment(StoreManager):
         data = pd.DataFrame(index=combined, columns=columns)
         for cnd in self.children:
             for sel in cnd.children:
-                sel_data = sel.store.select(
+                sel_data = sel.store_select(
                     key="/main/{}/counts_unfiltered".format(label)
                 )
                 for tp in sel.timepoints:
                     data.loc[:, idx[cnd.name, sel.name, "c_{}".format(tp)]] = sel_data[
                         "c_{}".format(tp)
                     ]
-        self.store.put("/main/{}/counts".format(label), data)
+        self.store_put("/main/{}/counts".format(label), data)
 
+    @timed_stage("calc_shared_full", label_arg=True)
     def calc_shared_full(self, label):
         """
         Use joins to create a data frame containing all scores across all
@@ -464,13 +494,13 @@ class Experiment(StoreManager):
         first = True
         for s in self.selection_list():
             if first:
-                combined = s.store.select(
+                combined = s.store_select(
                     key="/main/{}/scores".format(label), columns=["index"]
                 ).index
                 first = False
             else:
                 combined = combined.join(
-                    s.store.select(
+                    s.store_select(
                         key="/main/{}/scores".format(label), columns=["index"]
                     ).index,
                     how="outer",
@@ -485,10 +515,10 @@ class Experiment(StoreManager):
         data = pd.DataFrame(index=combined, columns=columns)
         for cnd in self.children:
             for sel in cnd.children:
-                sel_data = sel.store.select("/main/{}/scores".format(label))
+                sel_data = sel.store_select("/main/{}/scores".format(label))
                 for v in values_list:
                     data.loc[:, idx[cnd.name, sel.name, v]] = sel_data[v]
-        self.store.put("/main/{}/scores_shared_full".format(label), data)
+        self.store_put("/main/{}/scores_shared_full".format(label), data)
 
     def calc_shared(self, label):
         """
@@ -514,7 +544,7 @@ class Experiment(StoreManager):
             extra={"oname": self.name},
         )
 
-        data = self.store.select("/main/{}/scores_shared_full".format(label))
+        data = self.store_select("/main/{}/scores_shared_full".format(label))
 
         # identify variants found in all selections in at least two conditions
         idx = pd.IndexSlice
@@ -534,8 +564,9 @@ class Experiment(StoreManager):
             #     pass
 
         data = data.loc[complete]
-        self.store.put("/main/{}/scores_shared".format(label), data)
+        self.store_put("/main/{}/scores_shared".format(label), data)
 
+    @timed_stage("calc_scores", label_arg=True)
     def calc_scores(self, label):
         """
         Combine the scores and standard errors within each condition.
@@ -560,7 +591,7 @@ class Experiment(StoreManager):
         )
 
         # set up new data frame
-        shared_index = self.store.select(
+        shared_index = self.store_select(
             key="/main/{}/scores_shared".format(label), columns=["index"]
         ).index
 
@@ -576,7 +607,7 @@ class Experiment(StoreManager):
         # set up local variables
         idx = pd.IndexSlice
 
-        score_df = self.store.select("/main/{}/scores_shared".format(label))
+        score_df = self.store_select("/main/{}/scores_shared".format(label))
         if self.get_root().scorer_class.name == "Ratios (Old Enrich)":
             # special case for simple ratios that have no SE
             # calculates the average score
@@ -619,7 +650,7 @@ class Experiment(StoreManager):
         # store the data
         if data.empty:
             raise ValueError("All {} have a NaN score.".format(label))
-        self.store.put("/main/{}/scores".format(label), data)
+        self.store_put("/main/{}/scores".format(label), data)
 
     def calc_pvalues_wt(self, label):
         """
@@ -640,7 +671,7 @@ class Experiment(StoreManager):
 
         idx = pd.IndexSlice
 
-        wt = self.store.select(
+        wt = self.store_select(
             key="/main/{}/scores".format(label),
             where="index={}".format(WILD_TYPE_VARIANT),
         )
@@ -652,7 +683,7 @@ class Experiment(StoreManager):
                 extra={"oname": self.name},
             )
             return
-        data = self.store.select(
+        data = self.store_select(
             key="/main/{}/scores".format(label),
             where="index!={}".format(WILD_TYPE_VARIANT),
         )
@@ -676,7 +707,7 @@ class Experiment(StoreManager):
                 result_df.loc[:, idx[cnd, "z"]]
             )
 
-        self.store.put("/main/{}/scores_pvalues_wt".format(label), result_df)
+        self.store_put("/main/{}/scores_pvalues_wt".format(label), result_df)
 
     def calc_pvalues_pairwise(self, label):
         """
@@ -695,7 +726,7 @@ class Experiment(StoreManager):
         if self.check_store("/main/{}/scores_pvalues".format(label)):
             return
 
-        data = self.store["/main/{}/scores".format(label)]
+        data = self.store_select("/main/{}/scores".format(label))
 
         cnd1_index = list()
         cnd2_index = list()
@@ -728,8 +759,9 @@ class Experiment(StoreManager):
                     result_df.loc[:, idx[cnd1, cnd2, "z"]]
                 )
 
-        self.store.put("/main/{}/scores_pvalues".format(label), result_df)
+        self.store_put("/main/{}/scores_pvalues".format(label), result_df)
 
+    @timed_stage("write_tsv")
     def write_tsv(self, subdirectory=None, keys=None):
         """
         Write each table from the store to its own tab-separated file.
@@ -6,6 +6,7 @@ for all other frames.
 """
 
 
+import os
 import json
 import platform
 import logging
@@ -17,11 +18,14 @@ import tkinter.messagebox
 import tkinter.simpledialog
 
 from tkinter.ttk import Frame, Button, Checkbutton, Treeview, LabelFrame
+from tkinter.ttk import Label, Progressbar
 from tkinter.messagebox import askyesno, showinfo, showwarning, askokcancel
 
 from ..base.config_constants import SCORER, SCORER_OPTIONS, SCORER_PATH
 from ..base.constants import CALLBACK, MESSAGE, KWARGS
 from ..base.utils import get_logging_queue, log_message
+from ..base.stage_profiler import StageProfiler
+from ..base.read_progress import PROGRESS
 from ..experiment.condition import Condition
 from ..selection.selection import Selection
 from .create_root_dialog import CreateRootDialog
@@ -81,10 +85,16 @@ class Configurator(tk.Tk):
         The tkinter boolean variable for this option.
     tsv_requested : :py:class:`tkinter.BooleanVar`
         The tkinter boolean variable for this option.
+    profile : :py:class:`tkinter.BooleanVar`
+        The tkinter boolean variable for this option.
     treeview_buttons : `list`
         The ``new``, ``edit`` and ``delete`` buttons.
     go_button : :py:class`~tkinter.ttk.Button`
         The button that begins the analysis
+    progress_bar : :py:class:`~tkinter.ttk.Progressbar`
+        The bar showing the progress of counting reads.
+    progress_text : :py:class:`tkinter.StringVar`
+        The text shown under the progress bar.
     scorer_widget : :py:class:`~enrich2.gui.options_frame.ScorerScriptsDropDown`
         The ScorerScriptsDropDown instance associated with this app.
     scorer : :py:class:`~enrich2.plugins.scoring.BaseScorerPlugin`
@@ -161,6 +171,7 @@ class Configurator(tk.Tk):
         self.force_recalculate = tk.BooleanVar()
         self.component_outliers = tk.BooleanVar()
         self.tsv_requested = tk.BooleanVar()
+        self.profile = tk.BooleanVar()
 
         # allow resizing
         self.rowconfigure(0, weight=1)
@@ -308,6 +319,13 @@ class Configurator(tk.Tk):
         tsv_requested.invoke()
         row += 1
 
+        # profile stages
+        profile = Checkbutton(
+            options_frame, text="Profile Analysis Stages", variable=self.profile
+        )
+        profile.grid(column=0, row=row, sticky="w")
+        row += 1
+
         # ------------------------------------------------------- #
         # Run Analysis button frame
         go_button_frame = Frame(main, padding=(3, 3, 12, 12))
@@ -318,6 +336,14 @@ class Configurator(tk.Tk):
         go_button.grid(column=0, row=0)
         self.go_button = go_button
 
+        # read counting progress
+        self.progress_bar = Progressbar(
+            go_button_frame, orient="horizontal", mode="determinate", maximum=100
+        )
+        self.progress_bar.grid(column=0, row=1, sticky="ew", pady=(6, 0))
+        self.progress_text = tk.StringVar()
+        Label(go_button_frame, textvariable=self.progress_text).grid(column=0, row=2)
+
     def create_new_element(self):
         """
         Create and return a new element based on the current selection.
@@ -895,10 +921,31 @@ class Configurator(tk.Tk):
         try:
             log = get_logging_queue(init=True).get(0)
             log[CALLBACK](log[MESSAGE], **log[KWARGS])
+            extra = log[KWARGS].get("extra", {})
+            if PROGRESS in extra:
+                self.show_progress(extra[PROGRESS])
             self.after(10, self.poll_logging_queue)
         except queue.Empty:
             self.after(10, self.poll_logging_queue)
 
+    def show_progress(self, event):
+        """
+        Shows a read counting progress event from
+        :py:class:`~enrich2.base.read_progress.ReadProgress` in the progress
+        bar.
+
+        Parameters
+        ----------
+        event : `dict`
+            The progress event.
+        """
+        if event["fraction"] is not None:
+            self.progress_bar["value"] = 100 * event["fraction"]
+        text = "{}: {:,} reads".format(event["name"], event["reads"])
+        if event["eta_seconds"] is not None and not event["done"]:
+            text += ", {:.0f}s left".format(event["eta_seconds"])
+        self.progress_text.set(text)
+
     def poll_analysis_thread(self):
         """
         Polls the thread to check it's state. When it is finished, all stores
@@ -958,10 +1005,17 @@ class Configurator(tk.Tk):
         """
         try:
             self.root_element.validate()
+            if self.profile.get():
+                self.root_element.run_report.profiler = StageProfiler(
+                    os.path.join(self.root_element.output_dir, "profile")
+                )
+            else:
+                self.root_element.run_report.profiler = None
             self.root_element.store_open(children=True)
-            self.root_element.calculate()
-            if self.root_element.tsv_requested:
-                self.root_element.write_tsv()
+            with self.root_element.execution.activate():
+                self.root_element.calculate()
+                if self.root_element.tsv_requested:
+                    self.root_element.write_tsv()
             self.queue.put(True, block=False)
         except Exception as exception:
             log_message(
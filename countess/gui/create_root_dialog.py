@@ -14,6 +14,7 @@ from ..libraries.barcodeid import BcidSeqLib
 from ..libraries.barcodevariant import BcvSeqLib
 from ..libraries.basic import BasicSeqLib
 from ..libraries.idonly import IdOnlySeqLib
+from ..libraries.overlap import OverlapSeqLib
 
 globals()["Selection"] = Selection
 globals()["Condition"] = Condition
@@ -23,6 +24,7 @@ globals()["BcidSeqLib"] = BcidSeqLib
 globals()["BcvSeqLib"] = BcvSeqLib
 globals()["BasicSeqLib"] = BasicSeqLib
 globals()["IdOnlySeqLib"] = IdOnlySeqLib
+globals()["OverlapSeqLib"] = OverlapSeqLib
 
 
 class CreateRootDialog(CustomDialog):
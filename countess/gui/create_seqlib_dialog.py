@@ -14,8 +14,8 @@ from ..libraries.barcodevariant import BcvSeqLib
 from ..libraries.barcodeid import BcidSeqLib
 from ..libraries.barcode import BarcodeSeqLib
 from ..libraries.seqlib import SeqLib
-from ..libraries.variant import VariantSeqLib
 from ..libraries.idonly import IdOnlySeqLib
+from ..libraries.overlap import OverlapSeqLib
 
 
 seqlib_label_text = OrderedDict(
@@ -23,6 +23,7 @@ seqlib_label_text = OrderedDict(
         ("BcvSeqLib", "Barcoded Variant"),
         ("BcidSeqLib", "Barcoded Identifier"),
         ("BasicSeqLib", "Basic"),
+        ("OverlapSeqLib", "Overlap"),
         ("BarcodeSeqLib", "Barcodes Only"),
         ("IdOnlySeqLib", "Identifiers Only"),
     ]
@@ -15,6 +15,7 @@ from ..libraries.barcodeid import BcidSeqLib
 from ..libraries.barcodevariant import BcvSeqLib
 from ..libraries.basic import BasicSeqLib
 from ..libraries.idonly import IdOnlySeqLib
+from ..libraries.overlap import OverlapSeqLib
 from ..libraries.seqlib import SeqLib
 from ..libraries.variant import VariantSeqLib
 from ..base.utils import log_message
@@ -71,6 +72,11 @@ element_layouts = {
         ("fastq", "trimming", "filters"),
         ("barcodes",),
     ],
+    "OverlapSeqLib": [
+        ("main", "counts"),
+        ("fastq", "filters"),
+        ("overlap", "variants"),
+    ],
     "IdOnlySeqLib": [("main", "counts"), ("identifiers",)],
     "Selection": [("main",)],
     "Condition": [("main",)],
@@ -379,6 +385,70 @@ class EditDialog(CustomDialog):
                     )
                 )
 
+            if isinstance(self.element, OverlapSeqLib):
+                self.frame_dict["fastq"].append(
+                    FileEntry(
+                        "Forward Reads",
+                        self.element_cfg["fastq"],
+                        "forward reads",
+                        extensions=_FASTQ_SUFFIXES,
+                    )
+                )
+                self.frame_dict["fastq"].append(
+                    FileEntry(
+                        "Reverse Reads",
+                        self.element_cfg["fastq"],
+                        "reverse reads",
+                        extensions=_FASTQ_SUFFIXES,
+                    )
+                )
+                self.frame_dict["filters"].append(
+                    Checkbox(
+                        "Remove Unresolvable Overlaps",
+                        self.element_cfg["fastq"]["filters"],
+                        "remove unresolvable",
+                    )
+                )
+
+                self.frame_dict["overlap"] = list()
+                self.frame_dict["overlap"].append(SectionLabel("Overlap Options"))
+                self.frame_dict["overlap"].append(
+                    IntegerEntry(
+                        "Forward Start",
+                        self.element_cfg["overlap"],
+                        "forward start",
+                        minvalue=1,
+                    )
+                )
+                self.frame_dict["overlap"].append(
+                    IntegerEntry(
+                        "Reverse Start",
+                        self.element_cfg["overlap"],
+                        "reverse start",
+                        minvalue=1,
+                    )
+                )
+                self.frame_dict["overlap"].append(
+                    IntegerEntry(
+                        "Overlap Length",
+                        self.element_cfg["overlap"],
+                        "length",
+                        minvalue=1,
+                    )
+                )
+                self.frame_dict["overlap"].append(
+                    IntegerEntry(
+                        "Maximum Mismatches",
+                        self.element_cfg["overlap"],
+                        "max mismatches",
+                    )
+                )
+                self.frame_dict["overlap"].append(
+                    Checkbox(
+                        "Overlap Only", self.element_cfg["overlap"], "overlap only"
+                    )
+                )
+
             if isinstance(self.element, BarcodeSeqLib):
                 self.frame_dict["barcodes"] = list()
                 self.frame_dict["barcodes"].append(SectionLabel("Barcode Options"))
@@ -15,7 +15,9 @@ __all__ = [
     "barcodemap",
     "barcodevariant",
     "basic",
+    "demultiplex",
     "idonly",
+    "read_pass",
     "seqlib",
     "overlap",
     "variant",
@@ -7,12 +7,10 @@ library which only contains barcoded sequences.
 """
 
 
-import logging
 import sys
 
-from ..sequence.fqread import read_fastq
 from .seqlib import SeqLib
-from ..base.utils import compute_md5, log_message
+from ..base.utils import compute_md5
 
 
 __all__ = ["BarcodeSeqLib"]
@@ -58,10 +56,10 @@ class BarcodeSeqLib(SeqLib):
         settings for this instance.
     calculate
         Counts variants from counts file or FASTQ.
-    counts_from_reads
-        Reads the forward or reverse FASTQ_ file (reverse reads are
-        reverse-complemented), performs quality-based filtering, and counts
-        the barcodes.
+    trim_read
+        Trims a FASTQ_ read (reverse reads are reverse-complemented).
+    count_filtered_read
+        Counts the barcode in a FASTQ_ read that passed filtering.
         
     See Also
     --------
@@ -69,6 +67,7 @@ class BarcodeSeqLib(SeqLib):
     """
 
     treeview_class_name = "Barcode SeqLib"
+    read_counts_label = "barcodes"
 
     def __init__(self):
         # Init step handled by VariantSeqLib's init for Barcode-variant
@@ -141,6 +140,10 @@ class BarcodeSeqLib(SeqLib):
         self.trim_start = cfg.trim_start
         self.trim_length = cfg.trim_length
         self.filters = cfg.filters_cfg.to_dict()
+        if cfg.demux_cfg is not None:
+            self.demux_index = cfg.demux_cfg.index
+            self.demux_index_reads = cfg.demux_cfg.index_reads
+            self.demux_mismatches = cfg.demux_cfg.mismatches
 
     def serialize_fastq(self):
         """
@@ -163,42 +166,38 @@ class BarcodeSeqLib(SeqLib):
         if self.trim_length is not None and self.trim_length < sys.maxsize:
             fastq["length"] = self.trim_length
 
+        if self.demux_index is not None:
+            fastq["demultiplex"] = self.serialize_demultiplex()
+
         return fastq
 
-    def counts_from_reads(self):
+    def trim_read(self, fq):
+        """
+        Trims the FASTQ_ read *fq*. Reverse reads are reverse-complemented.
+
+        Parameters
+        ----------
+        fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+            The read to trim.
+        """
+        fq.trim_length(self.trim_length, start=self.trim_start)
+        if self.revcomp_reads:
+            fq.revcomp()
+
+    def count_filtered_read(self, fq):
         """
-        Reads the forward or reverse FASTQ_ file (reverse reads are
-        reverse-complemented), performs quality-based filtering, and counts
-        the barcodes.
+        Counts the barcode of the FASTQ_ read *fq*, which passed the quality
+        filters.
 
         Barcode counts after read-level filtering are stored under
-        ``"/raw/barcodes/counts"``.
+        ``"/raw/barcodes/counts"`` by :py:meth:`finish_read_counts`.
+
+        Parameters
+        ----------
+        fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+            The read to count.
         """
-        df_dict = dict()
-
-        filter_flags = dict()
-        for key in self.filters:
-            filter_flags[key] = False
-
-        # count all the barcodes
-        log_message(
-            logging_callback=logging.info,
-            msg="Counting Barcodes",
-            extra={"oname": self.name},
-        )
-        for fqr in read_fastq(self.reads):
-            fqr.trim_length(self.trim_length, start=self.trim_start)
-            if self.revcomp_reads:
-                fqr.revcomp()
-
-            if self.read_quality_filter(fqr):  # passed filtering
-                try:
-                    df_dict[fqr.sequence.upper()] += 1
-                except KeyError:
-                    df_dict[fqr.sequence.upper()] = 1
-
-        self.save_counts(label="barcodes", df_dict=df_dict, raw=True)
-        del df_dict
+        self._read_counter.add(fq.sequence.upper())
 
     def calculate(self):
         """
@@ -211,6 +210,7 @@ class BarcodeSeqLib(SeqLib):
         If ``"/main/barcodes/counts"`` already exists, those will be used
         instead of re-counting.
         """
+        self.update_appended_reads()
         if self.check_store("/main/barcodes/counts"):
             return
 
@@ -218,8 +218,9 @@ class BarcodeSeqLib(SeqLib):
         if not self.check_store("/raw/barcodes/counts"):
             if self.counts_file is not None:
                 self.counts_from_file(self.counts_file)
-            else:
+            elif not self.counts_from_cache():
                 self.counts_from_reads()
+                self.save_counts_to_cache()
 
         if len(self.labels) == 1:  # only barcodes
             self.save_filtered_counts(
@@ -134,6 +134,7 @@ class BcidSeqLib(BarcodeSeqLib):
         them into identifier counts using the 
         :py:class:`~enrich2.libraries.barcodemap.BarcodeMap`
         """
+        self.update_appended_reads()
         if not self.check_store("/main/identifiers/counts"):
             BarcodeSeqLib.calculate(self)  # count the barcodes
             df_dict = dict()
@@ -154,7 +155,7 @@ class BcidSeqLib(BarcodeSeqLib):
             )
 
             # count identifiers associated with the barcodes
-            for bc, count in self.store["/main/barcodes/counts"].iterrows():
+            for bc, count in self.store_select("/main/barcodes/counts").iterrows():
                 count = count["count"]
                 identifier = self.barcode_map[bc]
                 try:
@@ -176,7 +177,7 @@ class BcidSeqLib(BarcodeSeqLib):
             barcode_identifiers = pd.DataFrame(data, index=barcodes)
             del barcodes
             barcode_identifiers.sort_values("value", inplace=True)
-            self.store.put(
+            self.store_put(
                 key="/raw/barcodemap",
                 value=barcode_identifiers,
                 data_columns=barcode_identifiers.columns,
@@ -124,6 +124,7 @@ class BcvSeqLib(VariantSeqLib, BarcodeSeqLib):
         and combines them into variant counts using the 
         :py:class:`~enrich2.libraries.barcodemap.BarcodeMap`
         """
+        self.update_appended_reads()
         if not self.check_store("/main/variants/counts"):
             BarcodeSeqLib.calculate(self)  # count the barcodes
             df_dict = dict()
@@ -146,7 +147,7 @@ class BcvSeqLib(VariantSeqLib, BarcodeSeqLib):
             # count variants associated with the barcodes
             max_mut_barcodes = 0
             max_mut_variants = 0
-            for bc, count in self.store["/main/barcodes/counts"].iterrows():
+            for bc, count in self.store_select("/main/barcodes/counts").iterrows():
                 count = count["count"]
                 variant = self.barcode_map[bc]
                 mutations = self.count_variant(variant)
@@ -161,6 +162,7 @@ class BcvSeqLib(VariantSeqLib, BarcodeSeqLib):
                     except KeyError:
                         df_dict[mutations] = count
                     barcode_variants[bc] = mutations
+            self.close_filtered_sink()
 
             # save counts, filtering based on the min count
             counts = {k: v for k, v in df_dict.items() if v >= self.variant_min_count}
@@ -174,7 +176,7 @@ class BcvSeqLib(VariantSeqLib, BarcodeSeqLib):
             del barcodes
 
             barcode_variants.sort_values("value", inplace=True)
-            self.store.put(
+            self.store_put(
                 key="/raw/barcodemap",
                 value=barcode_variants,
                 data_columns=barcode_variants.columns,
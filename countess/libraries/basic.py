@@ -10,7 +10,6 @@ library with variants that must be aligned to wild type sequence.
 import sys
 import logging
 
-from ..sequence.fqread import read_fastq
 from .variant import VariantSeqLib
 from ..base.utils import compute_md5, log_message
 
@@ -54,6 +53,10 @@ class BasicSeqLib(VariantSeqLib):
     serialize_fastq
         Returns a `dict` with all configurable fastq options and their
         settings for this instance.
+    trim_read
+        Trims a FASTQ_ read (reverse reads are reverse-complemented).
+    count_filtered_read
+        Counts the variant in a FASTQ_ read that passed filtering.
     calculate
         Counts variants from counts file or FASTQ.
     
@@ -63,6 +66,7 @@ class BasicSeqLib(VariantSeqLib):
     """
 
     treeview_class_name = "Basic SeqLib"
+    read_counts_label = "variants"
 
     def __init__(self):
         VariantSeqLib.__init__(self)
@@ -125,6 +129,10 @@ class BasicSeqLib(VariantSeqLib):
         self.trim_start = cfg.trim_start
         self.trim_length = cfg.trim_length
         self.filters = cfg.filters_cfg.to_dict()
+        if cfg.demux_cfg is not None:
+            self.demux_index = cfg.demux_cfg.index
+            self.demux_index_reads = cfg.demux_cfg.index_reads
+            self.demux_mismatches = cfg.demux_cfg.mismatches
 
     def serialize_fastq(self):
         """
@@ -150,41 +158,62 @@ class BasicSeqLib(VariantSeqLib):
         if self.trim_length < sys.maxsize:
             fastq["length"] = self.trim_length
 
+        if self.demux_index is not None:
+            fastq["demultiplex"] = self.serialize_demultiplex()
+
         return fastq
 
-    def counts_from_reads(self):
+    def start_read_counts(self):
         """
-        Reads the forward or reverse FASTQ_ file (reverse reads are
-        reverse-complemented), performs quality-based filtering, and counts
-        the variants.
+        Prepare to count variants, restoring the partial counts and the
+        number of variants with excess mutations from a checkpoint.
+
+        Returns
+        -------
+        `int`
+            The number of reads already counted.
         """
-        df_dict = dict()
-        log_message(
-            logging_callback=logging.info,
-            msg="Counting variants",
-            extra={"oname": self.name},
-        )
+        resume_from = VariantSeqLib.start_read_counts(self)
+        self._read_state.setdefault("max_mut_variants", 0)
+        return resume_from
+
+    def trim_read(self, fq):
+        """
+        Trims the FASTQ_ read *fq*. Reverse reads are reverse-complemented.
+
+        Parameters
+        ----------
+        fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+            The read to trim.
+        """
+        fq.trim_length(self.trim_length, start=self.trim_start)
+        if self.revcomp_reads:
+            fq.revcomp()
+
+    def count_filtered_read(self, fq):
+        """
+        Counts the variant of the FASTQ_ read *fq*, which passed the quality
+        filters.
+
+        Parameters
+        ----------
+        fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+            The read to count.
+        """
+        mutations = self.count_variant(fq.sequence)
+        if mutations is None:  # too many mutations
+            self._read_state["max_mut_variants"] += 1
+            if self.report_filtered:
+                self.report_filtered_variant(fq.sequence, 1)
+        else:
+            self._read_counter.add(mutations)
 
-        max_mut_variants = 0
-        for fq in read_fastq(self.reads):
-            fq.trim_length(self.trim_length, start=self.trim_start)
-            if self.revcomp_reads:
-                fq.revcomp()
-
-            if self.read_quality_filter(fq):
-                mutations = self.count_variant(fq.sequence)
-                if mutations is None:  # too many mutations
-                    max_mut_variants += 1
-                    if self.report_filtered:
-                        self.report_filtered_variant(fq.sequence, 1)
-                else:
-                    try:
-                        df_dict[mutations] += 1
-                    except KeyError:
-                        df_dict[mutations] = 1
-
-        self.save_counts("variants", df_dict, raw=True)
-        del df_dict
+    def finish_read_counts(self):
+        """
+        Store the raw variant counts and the filter statistics.
+        """
+        max_mut_variants = self._read_state["max_mut_variants"]
+        VariantSeqLib.finish_read_counts(self)
 
         if self.aligner is not None:
             log_message(
@@ -206,12 +235,14 @@ class BasicSeqLib(VariantSeqLib):
         """
         Counts variants from counts file or FASTQ.
         """
+        self.update_appended_reads()
         if not self.check_store("/main/variants/counts"):
             if not self.check_store("/raw/variants/counts"):
                 if self.counts_file is not None:
                     self.counts_from_file(self.counts_file)
-                else:
+                elif not self.counts_from_cache():
                     self.counts_from_reads()
+                    self.save_counts_to_cache()
             self.save_filtered_counts(
                 "variants", "count >= {}".format(self.variant_min_count)
             )
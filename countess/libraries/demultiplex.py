@@ -0,0 +1,263 @@
+"""
+Enrich2 libraries demultiplex module
+====================================
+
+Contains the ``Demultiplexer`` class, which counts the reads of several
+sequencing libraries multiplexed in one FASTQ_ file in a single pass over
+the file, assigning each read to a library by its index sequence.
+"""
+
+
+import os
+import logging
+
+from ..sequence.fqread import read_fastq, read_fastq_multi
+from ..base.utils import log_message
+
+
+__all__ = ["Demultiplexer"]
+
+
+# positions returned by Demultiplexer._position for reads not assigned
+_UNASSIGNED = -1
+_AMBIGUOUS = -2
+
+
+class Demultiplexer(object):
+    """
+    Counts the reads of a multiplexed FASTQ_ file for several
+    :py:class:`~enrich2.libraries.seqlib.SeqLib` objects in one pass.
+
+    Each read is assigned to the library whose ``demux_index`` matches the
+    start of the read's index read, or the start of the read itself if
+    there is no index read file. A library accepts index sequences with up to
+    ``demux_mismatches`` mismatches; reads that match no library are
+    unassigned, and reads that match several libraries equally well are
+    ambiguous. Neither are counted.
+
+    Assigned reads are passed to the library's
+    :py:meth:`~enrich2.libraries.seqlib.SeqLib.count_read`, so trimming,
+    filtering and counting are exactly as if each library had read its own
+    file. Inline tags are not removed from the reads, so libraries using them
+    should set their trim start past the tag.
+
+    Index sequences are looked up in a dictionary, and the result of each
+    inexact match is added to the dictionary, so each distinct index sequence
+    is only compared with the libraries once.
+
+    Parameters
+    ----------
+    reads : `str`
+        Path to the multiplexed FASTQ_ file.
+    index_reads : `str` or None
+        Path to the FASTQ_ file of index reads, or ``None`` for inline tags.
+    libraries : `list` of :py:class:`~enrich2.libraries.seqlib.SeqLib`
+        Libraries to add with :py:meth:`add_library`.
+
+    Attributes
+    ----------
+    libraries : `list` of :py:class:`~enrich2.libraries.seqlib.SeqLib`
+        Libraries that reads are assigned to.
+    assigned : `list` of `int`
+        Number of reads assigned to each library.
+    unassigned : `int`
+        Number of reads that matched no library.
+    ambiguous : `int`
+        Number of reads that matched several libraries.
+
+    Methods
+    -------
+    add_library
+        Adds a library that reads can be assigned to.
+    assign
+        Returns the library for an index sequence.
+    count
+        Counts the reads of all libraries.
+    """
+
+    max_cached_tags = 1000000
+
+    def __init__(self, reads, index_reads=None, libraries=None):
+        self.reads = reads
+        self.index_reads = index_reads
+        self.libraries = list()
+        self.assigned = list()
+        self.unassigned = 0
+        self.ambiguous = 0
+        self._indexes = list()
+        self._tags = dict()
+        if libraries is not None:
+            for lib in libraries:
+                self.add_library(lib)
+
+    @property
+    def index_length(self):
+        """
+        Length of the index sequences, or ``None`` if there are no libraries.
+        """
+        if len(self._indexes) == 0:
+            return None
+        return len(self._indexes[0])
+
+    def add_library(self, lib):
+        """
+        Adds *lib* to the libraries that reads can be assigned to.
+
+        Parameters
+        ----------
+        lib : :py:class:`~enrich2.libraries.seqlib.SeqLib`
+            A library with a ``demux_index`` that reads the same files.
+
+        Raises
+        ------
+        ValueError
+            If the library has no index, reads different files, or has an
+            index that is a different length from or the same as the index
+            of another library.
+        """
+        if lib.demux_index is None:
+            raise ValueError("No demultiplex index [{}]".format(lib.name))
+        if lib.reads != self.reads or lib.demux_index_reads != self.index_reads:
+            raise ValueError(
+                "Library reads do not match the multiplexed reads "
+                "[{}]".format(lib.name)
+            )
+        index = lib.demux_index.upper()
+        if self.index_length is not None and len(index) != self.index_length:
+            raise ValueError(
+                "Demultiplex index '{}' is not {} bases long "
+                "[{}]".format(index, self.index_length, lib.name)
+            )
+        if index in self._indexes:
+            raise ValueError(
+                "Demultiplex index '{}' is used by more than one library "
+                "[{}]".format(index, lib.name)
+            )
+        self.libraries.append(lib)
+        self.assigned.append(0)
+        self._indexes.append(index)
+        self._tags = {idx: i for i, idx in enumerate(self._indexes)}
+
+    def _match(self, tag):
+        """
+        Returns the position of the library with the fewest mismatches
+        between its index and *tag*, :py:data:`_UNASSIGNED` if no library
+        allows that many mismatches, or :py:data:`_AMBIGUOUS` if several
+        libraries are equally close.
+        """
+        best = _UNASSIGNED
+        best_distance = None
+        for i, index in enumerate(self._indexes):
+            distance = len(index) - len(tag)
+            distance += sum(1 for a, b in zip(tag, index) if a != b)
+            if distance > self.libraries[i].demux_mismatches:
+                continue
+            if best_distance is None or distance < best_distance:
+                best = i
+                best_distance = distance
+            elif distance == best_distance:
+                best = _AMBIGUOUS
+        return best
+
+    def _position(self, tag):
+        """
+        Returns the position of the library for *tag*, recording unassigned
+        and ambiguous reads.
+        """
+        tag = tag[: self.index_length].upper()
+        try:
+            i = self._tags[tag]
+        except KeyError:
+            i = self._match(tag)
+            if len(self._tags) < self.max_cached_tags:
+                self._tags[tag] = i
+        if i == _UNASSIGNED:
+            self.unassigned += 1
+        elif i == _AMBIGUOUS:
+            self.ambiguous += 1
+        else:
+            self.assigned[i] += 1
+        return i
+
+    def assign(self, tag):
+        """
+        Returns the library for the index sequence *tag*.
+
+        Parameters
+        ----------
+        tag : `str`
+            The index read, or the read itself for inline tags. Only the
+            first :py:attr:`index_length` bases are used.
+
+        Returns
+        -------
+        :py:class:`~enrich2.libraries.seqlib.SeqLib` or None
+            ``None`` if the read is unassigned or ambiguous.
+        """
+        i = self._position(tag)
+        if i < 0:
+            return None
+        return self.libraries[i]
+
+    def _iter_reads(self):
+        """
+        Yields each read with the sequence used to assign it.
+        """
+        if self.index_reads is None:
+            for fq in read_fastq(self.reads):
+                yield fq, fq.sequence
+        else:
+            for pair in read_fastq_multi([self.reads, self.index_reads]):
+                if pair is None:
+                    raise ValueError(
+                        "Index reads file '{}' does not have one read for "
+                        "each read in '{}'".format(self.index_reads, self.reads)
+                    )
+                fq, index = pair
+                yield fq, index.sequence
+
+    def count(self):
+        """
+        Reads the multiplexed file once and counts the reads of each library,
+        storing the raw counts of each library as
+        :py:meth:`~enrich2.libraries.seqlib.SeqLib.counts_from_reads` would.
+
+        Counting checkpoints are saved for each library, numbered by the
+        position of the read in the multiplexed file, and each library
+        resumes from its own checkpoint.
+        """
+        if len(self.libraries) == 0:
+            return
+
+        resume_from = [lib.start_read_counts() for lib in self.libraries]
+        first = min(resume_from)
+        checkpoint_due = self.libraries[0].checkpoint_due
+
+        for records, (fq, tag) in enumerate(self._iter_reads(), start=1):
+            if records <= first:
+                continue
+            i = self._position(tag)
+            if i >= 0 and records > resume_from[i]:
+                self.libraries[i].count_read(fq)
+
+            if checkpoint_due(records):
+                for lib, resume in zip(self.libraries, resume_from):
+                    if records > resume:
+                        lib.checkpoint_read_counts(records)
+
+        for lib, assigned in zip(self.libraries, self.assigned):
+            log_message(
+                logging_callback=logging.info,
+                msg="Assigned {} reads by index '{}'".format(
+                    assigned, lib.demux_index
+                ),
+                extra={"oname": lib.name},
+            )
+            lib.finish_read_counts()
+        log_message(
+            logging_callback=logging.info,
+            msg="{} reads unassigned, {} reads ambiguous".format(
+                self.unassigned, self.ambiguous
+            ),
+            extra={"oname": os.path.basename(self.reads)},
+        )
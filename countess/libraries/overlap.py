@@ -0,0 +1,489 @@
+"""
+Enrich2 libraries overlap module
+================================
+
+Contains the concrete class ``OverlapSeqLib`` which represents a sequencing
+library with variants in overlapping paired-end reads that must be merged.
+"""
+
+
+import logging
+import os.path
+import numpy as np
+
+from .variant import VariantSeqLib
+from ..base.run_report import timed_stage
+from ..base.read_progress import ReadProgress
+from ..base.utils import compute_md5, log_message
+from ..sequence.fqread import FQRead, read_fastq_batches
+from ..sequence.read_filter import ReadBlock
+
+
+__all__ = ["OverlapSeqLib"]
+
+
+#: Lookup table from the ASCII code of a base to the code of its complement.
+COMPLEMENT = np.frombuffer(
+    bytes.maketrans(b"actgACTG", b"tgacTGAC"), np.uint8
+)
+
+
+class OverlapSeqLib(VariantSeqLib):
+    """
+    Class for count data from sequencing libraries with overlapping
+    paired-end reads for each variant. Creating a
+    :py:class:`~enrich2.libraries.overlap.OverlapSeqLib` requires a valid
+    *config* object, usually from a ``.json`` configuration file.
+
+    The forward and reverse reads are read in batches and each pair is
+    merged into a single read with :py:meth:`merge_block`. The merged reads
+    are filtered and their variants are counted as for a
+    :py:class:`~enrich2.libraries.basic.BasicSeqLib`, so no merged FASTQ_
+    file is written.
+
+    Class Attributes
+    ----------------
+    treeview_class_name :  `str`
+        String used to render object in the GUI.
+    paired_reads : `bool`
+        ``True``, because the forward and reverse reads are read in pairs.
+
+    Attributes
+    ----------
+    forward_reads : `str`
+        File path of the forward reads.
+    reverse_reads : `str`
+        File path of the reverse reads.
+    fwd_start : `int`
+        Position of the first overlapping base in the forward read, 1-based.
+    rev_start : `int`
+        Position of the first overlapping base in the reverse read before it
+        is reverse-complemented, 1-based.
+    overlap_length : `int`
+        Number of overlapping bases.
+    max_overlap_mismatches : `int`
+        Maximum number of mismatches in the overlap of a merged read.
+    overlap_only : `bool`
+        ``True`` to trim the merged reads to the overlap.
+
+    Methods
+    -------
+    configure
+        Configures the object from an dictionary loaded from a configuration
+        file.
+    serialize
+        Returns a `dict` with all configurable attributes stored that can
+        be used to reconfigure a new instance.
+    configure_fastq
+        Configures the fastq options following the `configure` method
+    serialize_fastq
+        Returns a `dict` with all configurable fastq options and their
+        settings for this instance.
+    merge_block
+        Merges the overlapping reads of a batch of read pairs.
+    count_pairs
+        Merges, filters and counts the variants in a batch of read pairs.
+    counts_from_reads
+        Counts the variants in the forward and reverse FASTQ_ files.
+    calculate
+        Counts variants from counts file or FASTQ.
+
+    See Also
+    --------
+    :py:class:`~enrich2.libraries.variant.VariantSeqLib`
+    """
+
+    treeview_class_name = "Overlap SeqLib"
+    read_counts_label = "variants"
+    paired_reads = True
+
+    def __init__(self):
+        VariantSeqLib.__init__(self)
+        self.forward_reads = None
+        self.reverse_reads = None
+        self.fwd_start = None
+        self.rev_start = None
+        self.overlap_length = None
+        self.max_overlap_mismatches = None
+        self.overlap_only = False
+        self.default_filters.update({"merge failure": True})
+        self.default_filters.update({"remove unresolvable": False})
+
+    def configure(self, cfg):
+        """
+        Set up the object using the config object *cfg*, usually derived from
+        a ``.json`` file.
+
+        Parameters
+        ----------
+        cfg : `dict` or :py:class:`~enrich2.config.types.OverlapSeqLibConfiguration`
+            The object to configure this instance with.
+        """
+        from ..config.types import OverlapSeqLibConfiguration
+
+        if isinstance(cfg, dict):
+            init_fastq = bool(cfg.get("fastq", {}).get("forward reads", ""))
+            cfg = OverlapSeqLibConfiguration(cfg, init_fastq)
+        elif not isinstance(cfg, OverlapSeqLibConfiguration):
+            raise TypeError(
+                "`cfg` was neither a " "OverlapSeqLibConfiguration or dict."
+            )
+
+        VariantSeqLib.configure(self, cfg)
+
+        self.fwd_start = cfg.overlap_cfg.fwd_start
+        self.rev_start = cfg.overlap_cfg.rev_start
+        self.overlap_length = cfg.overlap_cfg.length
+        self.max_overlap_mismatches = cfg.overlap_cfg.max_mismatches
+        self.overlap_only = cfg.overlap_cfg.overlap_only
+
+        # if counts are specified, copy them later
+        # else handle the FASTQ config options and check the files
+        if self.counts_file is None:
+            self.configure_fastq(cfg.fastq_cfg)
+
+    def serialize(self):
+        """
+        Format this object (and its children) as a config object suitable for
+        dumping to a config file.
+
+        Returns
+        -------
+        `dict`
+            Attributes of this instance and that of inherited classes
+            in a dictionary.
+        """
+        cfg = VariantSeqLib.serialize(self)
+        cfg["fastq"] = self.serialize_fastq()
+        cfg["overlap"] = {
+            "forward start": self.fwd_start,
+            "reverse start": self.rev_start,
+            "length": self.overlap_length,
+            "max mismatches": self.max_overlap_mismatches,
+            "overlap only": self.overlap_only,
+        }
+        return cfg
+
+    def configure_fastq(self, cfg):
+        """
+        Set up the object's FASTQ_ file handling and filtering options.
+
+        Parameters
+        ----------
+        cfg : :py:class:`~enrich2.config.types.OverlapFASTQConfiguration`
+            Configures the fastq options of this instance.
+        """
+        self.forward_reads = cfg.forward_reads
+        self.reverse_reads = cfg.reverse_reads
+        self.filters = cfg.filters_cfg.to_dict()
+
+    def serialize_fastq(self):
+        """
+        Serialize this object's FASTQ_ file handling and filtering options.
+
+        Returns
+        -------
+        `dict`
+            Return a `dict` of filtering options that have non-default values.
+        """
+        fastq = dict(filters=self.serialize_filters())
+        fastq["forward reads"] = self.forward_reads
+        fastq["forward reads md5"] = compute_md5(self.forward_reads)
+        fastq["reverse reads"] = self.reverse_reads
+        fastq["reverse reads md5"] = compute_md5(self.reverse_reads)
+        return fastq
+
+    def counts_cache_cfg(self, cfg=None):
+        """
+        Returns the settings that determine the raw counts produced by
+        :py:meth:`counts_from_reads`, with the forward and reverse reads
+        identified by their md5.
+
+        Parameters
+        ----------
+        cfg : `dict`, optional
+            The output of :py:meth:`serialize`, if it has already been
+            computed.
+
+        Returns
+        -------
+        `dict` or None
+            The settings, or ``None`` if the reads files could not be hashed.
+        """
+        if cfg is None:
+            cfg = self.serialize()
+        fastq = dict(cfg["fastq"])
+        fastq.pop("forward reads", None)
+        fastq.pop("reverse reads", None)
+        if not (fastq["forward reads md5"] and fastq["reverse reads md5"]):
+            return None
+        return {
+            "type": self.__class__.__name__,
+            "fastq": fastq,
+            "overlap": cfg["overlap"],
+            "variants": {
+                k: v for k, v in cfg["variants"].items() if k != "min count"
+            },
+        }
+
+    def appends_reads(self):
+        """
+        Returns ``False``, because reads added to a pair of FASTQ_ files
+        cannot be counted on their own.
+
+        Returns
+        -------
+        `bool`
+        """
+        return False
+
+    def update_appended_reads(self):
+        """
+        Does nothing, because append mode is not supported for paired reads.
+        The raw counts are kept until the store is recalculated.
+        """
+        return
+
+    def read_progress(self):
+        """
+        Returns a :py:class:`~enrich2.base.read_progress.ReadProgress` for
+        reporting the progress of counting the forward FASTQ_ file.
+
+        Returns
+        -------
+        :py:class:`~enrich2.base.read_progress.ReadProgress`
+        """
+        return ReadProgress(self.name, os.path.getsize(self.forward_reads))
+
+    def merge_block(self, forward, reverse):
+        """
+        Merges the overlapping forward and reverse reads of a batch of read
+        pairs, given as the :py:class:`~enrich2.sequence.read_filter.ReadBlock`
+        objects *forward* and *reverse*.
+
+        The reverse reads are reverse-complemented and aligned to the
+        forward reads by the configured overlap positions. Where the bases in
+        the overlap match, the merged read has the higher of the two quality
+        values. Where they do not match, the merged read has the base with
+        the higher quality, or ``'X'`` if both have the same quality, which
+        is an unresolvable mismatch. Pairs with more than
+        :py:attr:`max_overlap_mismatches` mismatches, or with reads too short
+        to contain the overlap, are not merged.
+
+        The merged reads contain the forward read up to the end of the
+        overlap, followed by the rest of the reverse-complemented reverse
+        read, or only the overlap if :py:attr:`overlap_only` is set.
+
+        Parameters
+        ----------
+        forward : :py:class:`~enrich2.sequence.read_filter.ReadBlock`
+            The forward reads.
+        reverse : :py:class:`~enrich2.sequence.read_filter.ReadBlock`
+            The reverse reads, in the same order.
+
+        Returns
+        -------
+        `tuple`
+            A boolean :py:class:`numpy.ndarray` that is ``True`` for the
+            pairs that were merged, and a
+            :py:class:`~enrich2.sequence.read_filter.ReadBlock` of the merged
+            reads of those pairs.
+        """
+        fwd_begin = self.fwd_start - 1
+        fwd_end = fwd_begin + self.overlap_length
+        rev_begin = self.rev_start - 1
+        rev_end = rev_begin + self.overlap_length
+
+        merged = (forward.lengths >= fwd_end) & (reverse.lengths >= rev_end)
+        if not merged.any():
+            empty = np.zeros((0, 0), dtype=np.uint8)
+            return merged, ReadBlock(empty, empty, np.zeros(0, dtype=np.int64))
+
+        # the overlap of the reverse reads, reverse-complemented
+        fwd_seq = forward.sequences[merged, fwd_begin:fwd_end]
+        fwd_qual = forward.qualities[merged, fwd_begin:fwd_end]
+        rev_seq = COMPLEMENT[reverse.sequences[merged, rev_begin:rev_end][:, ::-1]]
+        rev_qual = reverse.qualities[merged, rev_begin:rev_end][:, ::-1]
+
+        match = fwd_seq == rev_seq
+        mismatches = np.count_nonzero(~match, axis=1)
+        sequences = np.where(
+            match | (fwd_qual > rev_qual),
+            fwd_seq,
+            np.where(rev_qual > fwd_qual, rev_seq, ord("X")),
+        ).astype(np.uint8)
+        qualities = np.maximum(fwd_qual, rev_qual)
+
+        if not self.overlap_only:
+            # bases before the overlap in the reverse read follow it
+            rev_tail = reverse.sequences[merged, :rev_begin][:, ::-1]
+            sequences = np.hstack(
+                [forward.sequences[merged, :fwd_begin], sequences, COMPLEMENT[rev_tail]]
+            )
+            qualities = np.hstack(
+                [
+                    forward.qualities[merged, :fwd_begin],
+                    qualities,
+                    reverse.qualities[merged, :rev_begin][:, ::-1],
+                ]
+            )
+
+        within = mismatches <= self.max_overlap_mismatches
+        merged[merged] = within
+        sequences = sequences[within]
+        qualities = qualities[within]
+        lengths = np.full(len(sequences), sequences.shape[1], dtype=np.int64)
+        return merged, ReadBlock(sequences, qualities, lengths)
+
+    def count_pairs(self, forward, reverse):
+        """
+        Merges the read pairs in the lists of
+        :py:class:`~enrich2.sequence.fqread.FQRead` objects *forward* and
+        *reverse* with :py:meth:`merge_block`, performs quality-based
+        filtering on the merged reads, and counts the variants.
+
+        Pairs that could not be merged are counted as ``'merge failure'``
+        and their forward read is reported if filtered reads are reported.
+
+        Parameters
+        ----------
+        forward : `list`
+            The forward reads.
+        reverse : `list`
+            The reverse reads, in the same order.
+        """
+        merged, block = self.merge_block(
+            ReadBlock.from_reads(forward), ReadBlock.from_reads(reverse)
+        )
+
+        failed = np.flatnonzero(~merged)
+        self.filter_stats["merge failure"] += len(failed)
+        self.filter_stats["total"] += len(failed)
+        if self.report_filtered:
+            for i in failed:
+                self.report_filtered_read(forward[i], {"merge failure": True})
+
+        if len(block) == 0:
+            return
+        width = block.width
+        sequences = block.sequences.tobytes().decode("ascii")
+        qualities = block.qualities.astype(np.int16) + forward[0].qbase
+        qualities = qualities.astype(np.uint8).tobytes().decode("ascii")
+        reads = list()
+        for row, i in enumerate(np.flatnonzero(merged)):
+            fq = forward[i]
+            start = row * width
+            reads.append(
+                FQRead(
+                    fq.header,
+                    sequences[start : start + width],
+                    fq.header2,
+                    qualities[start : start + width],
+                    qbase=fq.qbase,
+                )
+            )
+
+        keep = self.read_quality_filter_batch(reads, block=block)
+        for i in np.flatnonzero(keep):
+            mutations = self.count_variant(reads[i].sequence)
+            if mutations is None:  # too many mutations
+                self._read_state["max_mut_variants"] += 1
+                if self.report_filtered:
+                    self.report_filtered_variant(reads[i].sequence, 1)
+            else:
+                self._read_counter.add(mutations)
+
+    def start_read_counts(self):
+        """
+        Prepare to count variants, restoring the partial counts and the
+        number of variants with excess mutations from a checkpoint.
+
+        Returns
+        -------
+        `int`
+            The number of read pairs already counted.
+        """
+        resume_from = VariantSeqLib.start_read_counts(self)
+        self._read_state.setdefault("max_mut_variants", 0)
+        return resume_from
+
+    def finish_read_counts(self):
+        """
+        Store the raw variant counts and the filter statistics.
+        """
+        max_mut_variants = self._read_state["max_mut_variants"]
+        VariantSeqLib.finish_read_counts(self)
+
+        if self.aligner is not None:
+            log_message(
+                logging_callback=logging.info,
+                msg="Aligned {} variants".format(self.aligner.calls),
+                extra={"oname": self.name},
+            )
+            self.aligner_cache = None
+
+        log_message(
+            logging_callback=logging.info,
+            msg="Removed {} total variants with excess "
+            "mutations".format(max_mut_variants),
+            extra={"oname": self.name},
+        )
+        self.save_filter_stats()
+
+    @timed_stage("counts_from_reads")
+    def counts_from_reads(self):
+        """
+        Reads the forward and reverse FASTQ_ files in batches of read pairs
+        and counts each batch with :py:meth:`count_pairs`.
+
+        Checkpoints are saved after the batch in which the checkpoint
+        interval is reached.
+        """
+        resume_from = self.start_read_counts()
+        interval = self.checkpoint_interval
+        records = 0
+        progress = self.read_progress()
+        filtered = self.filter_stats["total"]
+
+        def report(nbytes):
+            progress.update(
+                nbytes,
+                max(0, records - resume_from),
+                self.filter_stats["total"] - filtered,
+            )
+
+        batches = read_fastq_batches(
+            [self.forward_reads, self.reverse_reads], progress=report
+        )
+        for forward, reverse in batches:
+            start = records
+            records += len(forward)
+            if records <= resume_from:
+                continue
+            skip = max(0, resume_from - start)
+            self.count_pairs(forward[skip:], reverse[skip:])
+            if interval is not None and records // interval > start // interval:
+                self.checkpoint_read_counts(records)
+        progress.finish(
+            progress.total_bytes,
+            max(0, records - resume_from),
+            self.filter_stats["total"] - filtered,
+        )
+        self.finish_read_counts()
+        self.run_report.add(rows_in=records - resume_from)
+
+    def calculate(self):
+        """
+        Counts variants from counts file or FASTQ.
+        """
+        if not self.check_store("/main/variants/counts"):
+            if not self.check_store("/raw/variants/counts"):
+                if self.counts_file is not None:
+                    self.counts_from_file(self.counts_file)
+                elif not self.counts_from_cache():
+                    self.counts_from_reads()
+                    self.save_counts_to_cache()
+            self.save_filtered_counts(
+                "variants", "count >= {}".format(self.variant_min_count)
+            )
+        self.count_synonymous()
@@ -0,0 +1,231 @@
+"""
+Enrich2 libraries read_pass module
+==================================
+
+Contains the ``SharedReadPass`` class, which counts the reads of several
+sequencing libraries that use the same FASTQ_ file in a single pass over the
+file, and the ``schedule_read_passes`` function that groups libraries into
+shared passes.
+"""
+
+
+import os
+
+from ..sequence.fqread import read_fastq_batches
+from ..base.utils import compute_md5
+from .demultiplex import Demultiplexer
+
+
+__all__ = ["SharedReadPass", "schedule_read_passes"]
+
+
+class SharedReadPass(object):
+    """
+    Counts the reads of a FASTQ_ file for several
+    :py:class:`~enrich2.libraries.seqlib.SeqLib` objects in one pass.
+
+    Each batch of reads is parsed once and passed to the
+    :py:meth:`~enrich2.libraries.seqlib.SeqLib.count_reads` of every
+    library, so each library applies its own trimming, filtering and
+    counting. All libraries but the last are given copies of the reads,
+    since counting trims the reads.
+
+    Parameters
+    ----------
+    reads : `str`
+        Path to the FASTQ_ file.
+    libraries : `list` of :py:class:`~enrich2.libraries.seqlib.SeqLib`
+        Libraries to add with :py:meth:`add_library`.
+
+    Attributes
+    ----------
+    libraries : `list` of :py:class:`~enrich2.libraries.seqlib.SeqLib`
+        Libraries that the reads are counted for.
+
+    Methods
+    -------
+    add_library
+        Adds a library that the reads are counted for.
+    count
+        Counts the reads of all libraries.
+    """
+
+    def __init__(self, reads, libraries=None):
+        self.reads = reads
+        self.libraries = list()
+        if libraries is not None:
+            for lib in libraries:
+                self.add_library(lib)
+
+    def add_library(self, lib):
+        """
+        Adds *lib* to the libraries that the reads are counted for.
+
+        Parameters
+        ----------
+        lib : :py:class:`~enrich2.libraries.seqlib.SeqLib`
+            A library that reads the same file and is not demultiplexed.
+
+        Raises
+        ------
+        ValueError
+            If the library is demultiplexed, is already in the pass, or reads
+            a different file.
+        """
+        if lib.demux_index is not None:
+            raise ValueError(
+                "Demultiplexed libraries must be counted by a "
+                "Demultiplexer [{}]".format(lib.name)
+            )
+        if any(lib is other for other in self.libraries):
+            raise ValueError("Library is already in the pass [{}]".format(lib.name))
+        if not _same_reads(lib.reads, self.reads):
+            raise ValueError(
+                "Library reads do not match the shared reads [{}]".format(lib.name)
+            )
+        self.libraries.append(lib)
+
+    def count(self):
+        """
+        Reads the file once and counts the reads of each library, storing
+        the raw counts of each library as
+        :py:meth:`~enrich2.libraries.seqlib.SeqLib.counts_from_reads` would.
+
+        Counting checkpoints are saved for each library, and each library
+        resumes from its own checkpoint.
+        """
+        if len(self.libraries) == 0:
+            return
+
+        resume_from = [lib.start_read_counts() for lib in self.libraries]
+        first = min(resume_from)
+        last = len(self.libraries) - 1
+        checkpoint_due = self.libraries[0].checkpoint_due
+        batch_size = self.libraries[0].read_batch_size()
+
+        # progress and the filter pass rate are reported for the first library
+        records = 0
+        progress = self.libraries[0].read_progress()
+        filter_stats = self.libraries[0].filter_stats
+        filtered = filter_stats["total"]
+
+        def report(nbytes):
+            progress.update(
+                nbytes, max(0, records - first), filter_stats["total"] - filtered
+            )
+
+        batches = read_fastq_batches(
+            [self.reads], batch_size=batch_size, progress=report
+        )
+        for (reads,) in batches:
+            start = records
+            records += len(reads)
+            if records <= first:
+                continue
+            for i, lib in enumerate(self.libraries):
+                if records > resume_from[i]:
+                    batch = reads[max(0, resume_from[i] - start) :]
+                    if i != last:
+                        batch = [fq.copy() for fq in batch]
+                    lib.count_reads(batch)
+
+            if checkpoint_due(records, start):
+                for lib, resume in zip(self.libraries, resume_from):
+                    if records > resume:
+                        lib.checkpoint_read_counts(records)
+
+        progress.finish(
+            progress.total_bytes,
+            max(0, records - first),
+            filter_stats["total"] - filtered,
+        )
+        for lib in self.libraries:
+            lib.finish_read_counts()
+
+
+def schedule_read_passes(libraries):
+    """
+    Groups the libraries that need to count reads into shared read passes.
+
+    Libraries that are not demultiplexed are grouped by the real path of
+    their reads, and each group of two or more libraries is counted by a
+    :py:class:`SharedReadPass`. Files at different paths are grouped if they
+    are copies of each other, which is only checked by hashing files of the
+    same size. Demultiplexed libraries are grouped by their reads and index
+    reads, and each group of two or more libraries is counted by a
+    :py:class:`~enrich2.libraries.demultiplex.Demultiplexer`. Other libraries
+    count their own reads when they are calculated.
+
+    Libraries that read pairs of files, such as
+    :py:class:`~enrich2.libraries.overlap.OverlapSeqLib`, count their own
+    reads. Libraries whose raw counts are already stored are left out, and raw
+    counts found in the counts cache are copied into the libraries' stores.
+    In append mode every library counts its own reads, so that it can
+    record how much of its file has been counted.
+
+    Parameters
+    ----------
+    libraries : `Iterable` of :py:class:`~enrich2.libraries.seqlib.SeqLib`
+        Libraries to schedule.
+
+    Returns
+    -------
+    `list`
+        :py:class:`SharedReadPass` and
+        :py:class:`~enrich2.libraries.demultiplex.Demultiplexer` objects.
+    """
+    shared = dict()
+    multiplexed = dict()
+    for lib in libraries:
+        if lib.append_reads or lib.paired_reads or not lib.needs_read_counts():
+            continue
+        if lib.counts_from_cache():
+            continue
+        if lib.demux_index is not None:
+            key = (lib.reads, lib.demux_index_reads)
+            multiplexed.setdefault(key, list()).append(lib)
+        else:
+            shared.setdefault(os.path.realpath(lib.reads), list()).append(lib)
+
+    passes = list()
+    for libs in _merge_copies(shared):
+        if len(libs) > 1:
+            passes.append(SharedReadPass(libs[0].reads, libs))
+    for (reads, index_reads), libs in multiplexed.items():
+        if len(libs) > 1:
+            passes.append(Demultiplexer(reads, index_reads, libs))
+    return passes
+
+
+def _merge_copies(shared):
+    """
+    Returns the lists of libraries in *shared*, a `dict` keyed by the real
+    path of the libraries' reads, with the lists of files that are copies of
+    each other joined. Only files of the same size are hashed.
+    """
+    by_size = dict()
+    for path in shared:
+        by_size.setdefault(os.path.getsize(path), list()).append(path)
+
+    merged = list()
+    for paths in by_size.values():
+        if len(paths) == 1:
+            merged.append(shared[paths[0]])
+            continue
+        by_md5 = dict()
+        for path in paths:
+            by_md5.setdefault(compute_md5(path), list()).extend(shared[path])
+        merged.extend(by_md5.values())
+    return merged
+
+
+def _same_reads(first, second):
+    """
+    Returns ``True`` if the files *first* and *second* are the same file or
+    copies of each other. Only different files of the same size are hashed.
+    """
+    if os.path.realpath(first) == os.path.realpath(second):
+        return True
+    if os.path.getsize(first) != os.path.getsize(second):
+        return False
+    return compute_md5(first) == compute_md5(second)
@@ -7,7 +7,9 @@ classes used in ``Enrich2``.
 """
 
 
+import json
 import logging
+import itertools
 import os.path
 import sys
 from collections import OrderedDict
@@ -15,8 +17,20 @@ import numpy as np
 import pandas as pd
 
 from ..base.storemanager import StoreManager
+from ..base.spilling_counter import SpillingCounter
+from ..base.chunk_sizer import ChunkSizer
+from ..base.run_report import timed_stage
+from ..base.read_progress import ReadProgress
+from ..base.filtered_sink import FilteredReadSink
+from ..base.count_shard import write_count_shard, read_count_shard_header
+from ..base.count_shard import merge_count_shards
 from ..base.utils import fix_filename, compute_md5, log_message
+from ..base.utils import compute_prefix_fingerprint
 from ..base.constants import ELEMENT_LABELS
+from ..sequence.fqread import read_fastq_batches, read_fastq_range
+from ..sequence.fqread import split_fastq_path, BATCH_SIZE
+from ..sequence.read_filter import ReadFilter
+from .demultiplex import Demultiplexer
 from countess.store.hdf import HdfStore
 
 
@@ -35,6 +49,9 @@ class SeqLib(StoreManager):
     store_suffix : `str`
         Default suffix for the base class
         :py:class:`~enrich2.base.storemanager.StoreManager` `name` attribute.
+    paired_reads : `bool`
+        ``True`` for libraries that read pairs of records from two FASTQ_
+        files, which cannot share a read pass with other libraries.
         
     Attributes
     ----------
@@ -43,6 +60,12 @@ class SeqLib(StoreManager):
         configured via a config file.
     counts_file : str
         File path pointing to a valid counts file.
+    demux_index : `str` or None
+        Index sequence of this library in a multiplexed FASTQ_ file.
+    demux_index_reads : `str` or None
+        File path of the index reads, or ``None`` for inline tags.
+    demux_mismatches : `int`
+        Number of mismatches allowed when matching the index sequence.
     _filters : `dict`
         Configured FASTQ filters used during read parsing.
     filter_stats : `dict`
@@ -71,11 +94,66 @@ class SeqLib(StoreManager):
     serialize
         Returns a `dict` with all configurable attributes stored that can
         be used to reconfigure a new instance.
+    serialize_demultiplex
+        Returns a `dict` with the demultiplexing options.
     validate
         Validates the attributes of this instance.
     
     report_filtered_read
-        Writes a filtered read and it's associated stats to the log.
+        Adds a filtered read and the filters that removed it to the
+        filtered reads file.
+    filtered_sink
+        Returns the writer of the filtered reads file.
+    discard_filtered_reads
+        Removes the filtered reads file of an earlier run.
+    close_filtered_sink
+        Closes the filtered reads file and logs a summary.
+    new_counter
+        Returns a counter that respects the counts memory limit.
+    checkpoint_due
+        Returns ``True`` if a counting checkpoint should be saved.
+    read_batch_size
+        Returns the number of reads counted in each batch.
+    run_metadata
+        Returns the metadata of the current counting run.
+    save_checkpoint
+        Save the partial counts and filter statistics of a counting run.
+    load_checkpoint
+        Restore the partial counts and filter statistics of a counting run.
+    remove_checkpoint
+        Remove the checkpoint of a counting run.
+    needs_read_counts
+        Returns ``True`` if the raw counts are not stored yet.
+    start_read_counts
+        Prepare to count reads, resuming from a checkpoint.
+    count_read
+        Trim, filter and count a single read.
+    count_reads
+        Trim, filter and count a batch of reads.
+    trim_read
+        Trim a read before it is filtered.
+    count_filtered_read
+        Count a read that passed the quality filters.
+    checkpoint_read_counts
+        Save a checkpoint of the reads counted so far.
+    finish_read_counts
+        Store the raw counts of the reads.
+    counts_from_reads
+        Count the reads in the FASTQ_ file.
+    appends_reads
+        Returns ``True`` if reads added to the FASTQ_ file can be counted.
+    count_appended_reads
+        Count the reads from a byte offset and add them to the raw counts.
+    update_appended_reads
+        Count the reads added to the FASTQ_ file since the last run.
+    save_reads_ledger
+        Record how much of the FASTQ_ file has been counted.
+    load_reads_ledger
+        Return how much of the FASTQ_ file has been counted.
+    check_metadata
+        Compare the stored metadata, ignoring the reads md5 in append mode.
+    count_chunk_rows
+        Returns the number of counts to write to the store at a time.
     save_counts
          Convert count data in a `dict` into a :py:class:`pandas.DataFrame`
     save_filtered_counts
@@ -98,6 +176,18 @@ class SeqLib(StoreManager):
         into a new dataframe and save as raw counts
     counts_from_file
         Get raw counts from a counts file instead of FASTQ_ file
+    counts_cache_cfg
+        Returns the settings that determine the raw counts from reads.
+    counts_from_cache
+        Copy raw counts from the shared counts cache if they are present.
+    save_counts_to_cache
+        Copy raw counts from this store to the shared counts cache.
+    count_shard_settings
+        Returns the settings that count shards must share to be merged.
+    save_count_shard
+        Write the raw counts and filter statistics to a count shard.
+    counts_from_shards
+        Merge count shards into the raw counts.
     
     See Also
     --------
@@ -123,13 +213,23 @@ class SeqLib(StoreManager):
     )
 
     store_suffix = "lib"
+    read_counts_label = None
+    paired_reads = False
 
     def __init__(self):
         StoreManager.__init__(self)
         self.timepoint = None
         self.counts_file = None
         self.report_filtered = None
+        self._filtered_sink = None
+        self.demux_index = None
+        self.demux_index_reads = None
+        self.demux_mismatches = 0
+        self._read_counter = None
+        self._read_state = None
+        self._run_metadata = None
         self._filters = dict()
+        self._read_filter = None
         self.filter_stats = dict()
         self.default_filters = dict()
         self.default_filters.update({"min quality": 0})
@@ -227,6 +327,20 @@ class SeqLib(StoreManager):
             cfg["counts file md5"] = compute_md5(self.counts_file)
         return cfg
 
+    def serialize_demultiplex(self):
+        """
+        Serialize this object's demultiplexing options.
+
+        Returns
+        -------
+        `dict`
+        """
+        demux = {"index": self.demux_index, "mismatches": self.demux_mismatches}
+        if self.demux_index_reads is not None:
+            demux["index reads"] = self.demux_index_reads
+            demux["index reads md5"] = compute_md5(self.demux_index_reads)
+        return demux
+
     def calculate(self):
         """
         Pure virtual method that defines how the data are counted.
@@ -238,12 +352,10 @@ class SeqLib(StoreManager):
     # ---------------------------------------------------------------------- #
     def report_filtered_read(self, fq, filter_flags):
         """
-        Write the :py:class:`~enrich2.sequence.fqread.FQRead` object *fq* to 
-        the ``DEBUG`` logging . The dictionary *filter_flags* contains ``True``
-        values for each filtering option that applies to *fq*. Keys in
-        *filter_flags* are converted to messages using the
-        ``StoreManager.filter_messages`` dictionary.
-        
+        Add the :py:class:`~enrich2.sequence.fqread.FQRead` object *fq* to
+        the filtered reads file. The dictionary *filter_flags* contains
+        ``True`` values for each filtering option that applies to *fq*.
+
         Parameters
         ----------
         fq : :py:class:`~enrich2.sequence.fqread.FQRead`
@@ -252,17 +364,770 @@ class SeqLib(StoreManager):
             Dictionary of flags that applying to *fq*.
 
         """
-        messages = ", ".join(
-            StoreManager.filter_messages[x] for x in filter_flags if filter_flags[x]
+        self.filtered_sink().add(
+            fq.sequence,
+            [x for x in filter_flags if filter_flags[x]],
+            read=fq.header,
+            quality=fq.quality_string(),
+        )
+
+    @property
+    def filtered_reads_path(self):
+        """
+        Path of the filtered reads file, ``SeqLibName.filtered.tsv.gz`` in
+        the output directory.
+        """
+        return os.path.join(
+            self.output_dir, fix_filename(self.name) + ".filtered.tsv.gz"
+        )
+
+    def filtered_sink(self):
+        """
+        Returns the :py:class:`~enrich2.base.filtered_sink.FilteredReadSink`
+        that writes the reads removed by the filters to
+        :py:attr:`filtered_reads_path`, creating it if needed.
+
+        The file has a column for each read filter and for variants removed
+        for having too many mutations.
+
+        Returns
+        -------
+        :py:class:`~enrich2.base.filtered_sink.FilteredReadSink`
+        """
+        if self._filtered_sink is None:
+            reasons = [x for x in SeqLib.filter_messages if x != "total"]
+            self._filtered_sink = FilteredReadSink(
+                self.filtered_reads_path, reasons + ["max mutations"]
+            )
+        return self._filtered_sink
+
+    def discard_filtered_reads(self):
+        """
+        Remove the filtered reads file of an earlier run before all of the
+        reads are counted again.
+        """
+        if self.report_filtered and os.path.exists(self.filtered_reads_path):
+            os.remove(self.filtered_reads_path)
+
+    def close_filtered_sink(self):
+        """
+        Write the remaining filtered reads, close the filtered reads file and
+        log the number of reads written for each filter.
+        """
+        if self._filtered_sink is None:
+            return
+        sink = self._filtered_sink
+        sink.close()
+        self._filtered_sink = None
+        if sink.rows == 0:
+            return
+        reasons = ", ".join(
+            "{} {}".format(n, SeqLib.filter_messages.get(x, "excess mutations"))
+            for x, n in sink.reason_counts.most_common()
         )
         log_message(
-            logging_callback=logging.debug,
-            msg="Filtered read ({messages})\n{read!s}".format(
-                messages=messages, name=self.name, read=fq
+            logging_callback=logging.info,
+            msg="Wrote {} filtered reads ({}) to {}".format(
+                sink.rows, reasons, sink.path
             ),
             extra={"oname": self.name},
         )
 
+    def new_counter(self):
+        """
+        Returns a :py:class:`~enrich2.base.spilling_counter.SpillingCounter`
+        for counting reads. If :py:attr:`counts_memory_limit` is set, the
+        counter spills to disk in the output directory once it uses more than
+        that many megabytes.
+
+        Returns
+        -------
+        :py:class:`~enrich2.base.spilling_counter.SpillingCounter`
+        """
+        limit = self.counts_memory_limit
+        if limit is None:
+            return SpillingCounter()
+        else:
+            return SpillingCounter(
+                max_bytes=limit * 1024 ** 2, spill_dir=self.output_dir
+            )
+
+    def checkpoint_due(self, records, start=None):
+        """
+        Returns ``True`` if a checkpoint should be saved after *records*
+        reads, according to :py:attr:`checkpoint_interval`.
+
+        Parameters
+        ----------
+        records : `int`
+            Number of reads processed so far.
+        start : `int`
+            Number of reads processed before the last batch. A checkpoint is
+            due if the interval is reached anywhere in the batch. Default
+            ``None`` checks the last read only.
+
+        Returns
+        -------
+        `bool`
+        """
+        interval = self.checkpoint_interval
+        if interval is None or records <= 0:
+            return False
+        if start is None:
+            start = records - 1
+        return records // interval > start // interval
+
+    def read_batch_size(self):
+        """
+        Returns the number of reads counted in each batch by
+        :py:meth:`count_reads`.
+
+        Batches are no larger than :py:attr:`checkpoint_interval`, so that
+        checkpoints are saved after the same reads as when counting one read
+        at a time.
+
+        Returns
+        -------
+        `int`
+        """
+        if self.checkpoint_interval is None:
+            return BATCH_SIZE
+        return min(BATCH_SIZE, self.checkpoint_interval)
+
+    @staticmethod
+    def checkpoint_keys(label):
+        """
+        Returns the keys of the partial counts table and the checkpoint
+        state table for *label*.
+
+        Parameters
+        ----------
+        label : `str`
+            The table's group label.
+
+        Returns
+        -------
+        `tuple`
+        """
+        return (
+            "/checkpoint/{}/counts".format(label),
+            "/checkpoint/{}/state".format(label),
+        )
+
+    def run_metadata(self):
+        """
+        Returns the :py:meth:`metadata` of the current counting run. It is
+        computed once per run rather than at every checkpoint, since
+        serializing the library hashes the reads.
+
+        Returns
+        -------
+        `dict`
+        """
+        if self._run_metadata is None:
+            self._run_metadata = self.metadata()
+        return self._run_metadata
+
+    def save_checkpoint(self, label, counter, records, state=None):
+        """
+        Save the counts in *counter*, the filter statistics and the number of
+        reads processed so that counting can be resumed with
+        :py:meth:`load_checkpoint`.
+
+        The counts are written before the state, and the state records the
+        total count, so a checkpoint interrupted part way through is detected
+        and ignored.
+
+        No checkpoint is saved if the reads could not be hashed, since the
+        checkpoint could not be matched to its input on restart.
+
+        Parameters
+        ----------
+        label : `str`
+            The table's group label.
+        counter : :py:class:`~enrich2.base.spilling_counter.SpillingCounter`
+            The partial counts.
+        records : `int`
+            Number of reads processed so far.
+        state : `dict`, optional
+            Other JSON serializable values to restore on resume.
+        """
+        metadata = self.run_metadata()
+        cfg = self.counts_cache_cfg(metadata["cfg"])
+        if cfg is None:
+            return
+        counts_key, state_key = self.checkpoint_keys(label)
+        if counts_key in self.store:
+            self.store_remove(counts_key)
+        total = 0
+        rows = self.count_chunk_rows(counter.max_key_length)
+        for chunk in counter.iter_chunks(rows):
+            self.store_append(
+                counts_key, chunk, min_itemsize={"index": counter.max_key_length}
+            )
+            total += int(chunk["count"].sum())
+
+        checkpoint = {
+            "records": records,
+            "total": total,
+            "cfg": cfg,
+            "filter_stats": self.filter_stats,
+            "state": state if state is not None else dict(),
+        }
+        self.store_put(
+            state_key,
+            pd.DataFrame({"checkpoint": [json.dumps(checkpoint, sort_keys=True)]}),
+            format="table",
+        )
+        # a store whose tables lack metadata is cleared when it is reopened
+        for key in (counts_key, state_key):
+            if key in self.store:
+                self.set_metadata(key, metadata, update=False)
+        log_message(
+            logging_callback=logging.info,
+            msg="Saved {} checkpoint after {} reads".format(label, records),
+            extra={"oname": self.name},
+        )
+
+    def load_checkpoint(self, label, counter):
+        """
+        Restore the counts and filter statistics saved by
+        :py:meth:`save_checkpoint` if the reads and the settings that
+        determine the counts are unchanged.
+
+        Parameters
+        ----------
+        label : `str`
+            The table's group label.
+        counter : :py:class:`~enrich2.base.spilling_counter.SpillingCounter`
+            An empty counter to restore the partial counts into.
+
+        Returns
+        -------
+        `tuple`
+            The number of reads already processed, ``0`` if there is no
+            usable checkpoint, and the ``state`` passed to
+            :py:meth:`save_checkpoint`.
+        """
+        counts_key, state_key = self.checkpoint_keys(label)
+        if state_key not in self.store:
+            return 0, dict()
+
+        checkpoint = json.loads(self.store_select(state_key)["checkpoint"].iloc[0])
+        cfg = self.counts_cache_cfg(self.run_metadata()["cfg"])
+        if cfg is None or checkpoint["cfg"] != json.loads(json.dumps(cfg)):
+            log_message(
+                logging_callback=logging.info,
+                msg="Ignoring {} checkpoint for different reads or "
+                "settings".format(label),
+                extra={"oname": self.name},
+            )
+            self.remove_checkpoint(label)
+            return 0, dict()
+
+        total = 0
+        if counts_key in self.store:
+            for chunk in self.store_select(counts_key, chunksize=self.chunksize):
+                for key, count in zip(chunk.index, chunk["count"]):
+                    counter.add(key, int(count))
+                total += int(chunk["count"].sum())
+        if total != checkpoint["total"]:
+            log_message(
+                logging_callback=logging.warning,
+                msg="Ignoring incomplete {} checkpoint".format(label),
+                extra={"oname": self.name},
+            )
+            counter.close()
+            self.remove_checkpoint(label)
+            return 0, dict()
+
+        self.filter_stats.update(checkpoint["filter_stats"])
+        log_message(
+            logging_callback=logging.info,
+            msg="Resuming {} counts after {} reads".format(
+                label, checkpoint["records"]
+            ),
+            extra={"oname": self.name},
+        )
+        return checkpoint["records"], checkpoint["state"]
+
+    def remove_checkpoint(self, label):
+        """
+        Remove the checkpoint tables for *label* from the store.
+
+        Parameters
+        ----------
+        label : `str`
+            The table's group label.
+        """
+        for key in self.checkpoint_keys(label):
+            if key in self.store:
+                self.store_remove(key)
+
+    def needs_read_counts(self):
+        """
+        Returns ``True`` if :py:meth:`calculate` would count the reads or
+        copy their counts from the counts cache, that is if there is no
+        counts file and the raw counts are not in the store.
+
+        Returns
+        -------
+        `bool`
+        """
+        if self.read_counts_label is None or self.counts_file is not None:
+            return False
+        for group in ("main", "raw"):
+            if "/{}/{}/counts".format(group, self.read_counts_label) in self.store:
+                return False
+        return True
+
+    def start_read_counts(self):
+        """
+        Prepare to count reads with :py:meth:`count_read`, restoring the
+        partial counts of an interrupted run from its checkpoint.
+
+        Filtered reads written after the checkpoint are removed from the
+        filtered reads file, since they will be filtered again.
+
+        Returns
+        -------
+        `int`
+            The number of reads already counted.
+        """
+        log_message(
+            logging_callback=logging.info,
+            msg="Counting {}".format(self.read_counts_label),
+            extra={"oname": self.name},
+        )
+        self._run_metadata = None
+        self._read_counter = self.new_counter()
+        resume_from, self._read_state = self.load_checkpoint(
+            self.read_counts_label, self._read_counter
+        )
+        if resume_from == 0 and not self.appends_reads():
+            self.discard_filtered_reads()
+        elif resume_from > 0 and "filtered_reads_end" in self._read_state:
+            self.filtered_sink().truncate(self._read_state["filtered_reads_end"])
+        return resume_from
+
+    def count_read(self, fq):
+        """
+        Trim, filter and count the :py:class:`~enrich2.sequence.fqread.FQRead`
+        object *fq* with :py:meth:`trim_read`, :py:meth:`read_quality_filter`
+        and :py:meth:`count_filtered_read`.
+
+        Parameters
+        ----------
+        fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+            The read to count.
+        """
+        self.trim_read(fq)
+        if self.read_quality_filter(fq):
+            self.count_filtered_read(fq)
+
+    def count_reads(self, reads):
+        """
+        Trim, filter and count a list of
+        :py:class:`~enrich2.sequence.fqread.FQRead` objects as
+        :py:meth:`count_read` does, checking the quality filters for the
+        whole list with :py:meth:`read_quality_filter_batch`.
+
+        Parameters
+        ----------
+        reads : `list`
+            The reads to count.
+        """
+        for fq in reads:
+            self.trim_read(fq)
+        keep = self.read_quality_filter_batch(reads)
+        for i in np.flatnonzero(keep):
+            self.count_filtered_read(reads[i])
+
+    def trim_read(self, fq):
+        """
+        Trim the :py:class:`~enrich2.sequence.fqread.FQRead` object *fq*
+        before it is filtered. Must be implemented by subclasses that count
+        reads.
+
+        Parameters
+        ----------
+        fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+            The read to trim.
+        """
+        raise NotImplementedError("must be implemented by subclass")
+
+    def count_filtered_read(self, fq):
+        """
+        Count the :py:class:`~enrich2.sequence.fqread.FQRead` object *fq*,
+        which passed the quality filters. Must be implemented by subclasses
+        that count reads.
+
+        Parameters
+        ----------
+        fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+            The read to count.
+        """
+        raise NotImplementedError("must be implemented by subclass")
+
+    def checkpoint_read_counts(self, records):
+        """
+        Save a checkpoint of the reads counted since
+        :py:meth:`start_read_counts`.
+
+        Parameters
+        ----------
+        records : `int`
+            Number of reads processed so far.
+        """
+        if self.report_filtered:
+            end = self.filtered_sink().checkpoint()
+            self._read_state["filtered_reads_end"] = end
+        self.save_checkpoint(
+            self.read_counts_label,
+            self._read_counter,
+            records,
+            state=self._read_state,
+        )
+
+    def finish_read_counts(self):
+        """
+        Store the counts of the reads counted since
+        :py:meth:`start_read_counts` as raw counts and remove the checkpoint.
+        """
+        self.save_counts(self.read_counts_label, self._read_counter, raw=True)
+        self.remove_checkpoint(self.read_counts_label)
+        self._read_counter.close()
+        self._read_counter = None
+        self._run_metadata = None
+        self.close_filtered_sink()
+
+    @timed_stage("counts_from_reads")
+    def counts_from_reads(self):
+        """
+        Reads the forward or reverse FASTQ_ file in batches, performs
+        quality-based filtering, and counts the reads with
+        :py:meth:`count_reads`.
+
+        If the library has a demultiplexing index, only the reads assigned
+        to it by a :py:class:`~enrich2.libraries.demultiplex.Demultiplexer`
+        are counted.
+
+        In append mode, the part of the file that was counted is recorded
+        with :py:meth:`save_reads_ledger`.
+        """
+        if self.appends_reads():
+            self.count_appended_reads()
+            return
+
+        # hash before counting, so reads added while counting are recounted
+        fingerprint = None
+        if self.append_reads:
+            fingerprint = compute_prefix_fingerprint(self.reads)
+        if self.demux_index is not None:
+            Demultiplexer(self.reads, self.demux_index_reads, [self]).count()
+            records = 0
+        else:
+            resume_from = self.start_read_counts()
+            records = 0
+            progress = self.read_progress()
+            filtered = self.filter_stats["total"]
+
+            def report(nbytes):
+                progress.update(
+                    nbytes,
+                    max(0, records - resume_from),
+                    self.filter_stats["total"] - filtered,
+                )
+
+            batches = read_fastq_batches(
+                [self.reads], batch_size=self.read_batch_size(), progress=report
+            )
+            for (reads,) in batches:
+                start = records
+                records += len(reads)
+                if records <= resume_from:
+                    continue
+                self.count_reads(reads[max(0, resume_from - start) :])
+                if self.checkpoint_due(records, start):
+                    self.checkpoint_read_counts(records)
+            progress.finish(
+                progress.total_bytes,
+                max(0, records - resume_from),
+                self.filter_stats["total"] - filtered,
+            )
+            self.finish_read_counts()
+            self.run_report.add(rows_in=records - resume_from)
+        if self.append_reads:
+            self.save_reads_ledger(None, records, fingerprint)
+
+    def read_progress(self):
+        """
+        Returns a :py:class:`~enrich2.base.read_progress.ReadProgress` for
+        reporting the progress of counting the FASTQ_ file.
+
+        Returns
+        -------
+        :py:class:`~enrich2.base.read_progress.ReadProgress`
+        """
+        return ReadProgress(self.name, os.path.getsize(self.reads))
+
+    def appends_reads(self):
+        """
+        Returns ``True`` if append mode is set and the reads added to the
+        FASTQ_ file can be counted on their own, which requires an
+        uncompressed file that is not demultiplexed.
+
+        Returns
+        -------
+        `bool`
+        """
+        if not self.append_reads or self.read_counts_label is None:
+            return False
+        if self.counts_file is not None or self.demux_index is not None:
+            return False
+        _, _, ext, compression = split_fastq_path(self.reads)
+        return compression is None and ext in (".fq", ".fastq")
+
+    def count_appended_reads(self, start=0, records=0):
+        """
+        Count the complete reads from the byte offset *start* to the end of
+        the FASTQ_ file, add them to the raw counts and record the new end
+        of the counted reads with :py:meth:`save_reads_ledger`.
+
+        Parameters
+        ----------
+        start : `int`
+            Byte offset of the first read to count. ``0`` counts the whole
+            file and replaces any raw counts.
+        records : `int`
+            Number of reads before *start*.
+
+        Returns
+        -------
+        `bool`
+            ``True`` if any reads were counted.
+        """
+        reads = read_fastq_range(self.reads, start=start)
+        first = next(reads, None)
+        if first is None and start > 0:
+            return False
+
+        resume_from = self.start_read_counts()
+        if start > 0 and resume_from == 0:
+            # a checkpoint already includes the earlier counts
+            self.load_raw_read_counts()
+        elif start == 0 and resume_from == 0:
+            self.discard_filtered_reads()
+
+        end = start
+        pending = [] if first is None else [first]
+        for fq, end in itertools.chain(pending, reads):
+            records += 1
+            if records <= resume_from:
+                continue
+            self.count_read(fq)
+            if self.checkpoint_due(records):
+                self.checkpoint_read_counts(records)
+
+        self.override_filter_stats = True
+        self.finish_read_counts()
+        self.save_reads_ledger(
+            end, records, compute_prefix_fingerprint(self.reads, end)
+        )
+        log_message(
+            logging_callback=logging.info,
+            msg="Counted reads up to byte {} of '{}'".format(end, self.reads),
+            extra={"oname": self.name},
+        )
+        return True
+
+    def load_raw_read_counts(self):
+        """
+        Add the stored raw counts and filter statistics to the counts being
+        made since :py:meth:`start_read_counts`.
+        """
+        counts = self.store_select("/raw/{}/counts".format(self.read_counts_label))
+        for element, count in zip(counts.index, counts["count"]):
+            self._read_counter.add(element, int(count))
+        del counts
+
+        if "/raw/filter" in self.store:
+            keys = {v: k for k, v in SeqLib.filter_messages.items()}
+            for message, count in self.store_select("/raw/filter")["count"].items():
+                if message in keys:
+                    self.filter_stats[keys[message]] = int(count)
+
+    def update_appended_reads(self):
+        """
+        In append mode, bring the raw counts up to date with the FASTQ_
+        file before they are used.
+
+        If reads have been added to the end of the file since it was last
+        counted, only the new reads are counted and added to the raw counts,
+        and the tables under ``'/main'`` that depend on them are removed so
+        that they are recalculated. If the file has been changed in any
+        other way, the raw counts are removed so that the whole file is
+        counted again.
+        """
+        if not self.append_reads or self.read_counts_label is None:
+            return
+        if self.counts_file is not None:
+            return
+        raw_key = "/raw/{}/counts".format(self.read_counts_label)
+        if raw_key not in self.store:
+            return
+
+        ledger = self.load_reads_ledger()
+        if ledger is not None and ledger["reads"] == os.path.abspath(self.reads):
+            if ledger["end"] < 0:
+                if ledger["fingerprint"] == compute_prefix_fingerprint(self.reads):
+                    return
+            elif ledger["fingerprint"] == compute_prefix_fingerprint(
+                self.reads, ledger["end"]
+            ):
+                if self.appends_reads():
+                    if self.count_appended_reads(ledger["end"], ledger["records"]):
+                        if "/main" in self.store:
+                            self.store_remove("/main")
+                    return
+
+        log_message(
+            logging_callback=logging.info,
+            msg="Reads changed since they were counted, counting them again",
+            extra={"oname": self.name},
+        )
+        for key in (raw_key, "/raw/filter", self.reads_ledger_key()):
+            if key in self.store:
+                self.store_remove(key)
+        if "/main" in self.store:
+            self.store_remove("/main")
+
+    def reads_ledger_key(self):
+        """
+        Returns the key of the table recording how much of the FASTQ_ file
+        has been counted.
+
+        Returns
+        -------
+        `str`
+        """
+        return "/inputs/{}".format(self.read_counts_label)
+
+    def save_reads_ledger(self, end, records, fingerprint):
+        """
+        Record how much of the FASTQ_ file has been counted.
+
+        Parameters
+        ----------
+        end : `int` or None
+            Byte offset just past the last counted read, or ``None`` if the
+            whole file was counted.
+        records : `int`
+            Number of reads counted.
+        fingerprint : `str`
+            Fingerprint of the counted bytes from
+            :py:func:`~enrich2.base.utils.compute_prefix_fingerprint`, of
+            the whole file if *end* is ``None``.
+        """
+        ledger = pd.DataFrame(
+            {
+                "reads": [os.path.abspath(self.reads)],
+                "end": [-1 if end is None else end],
+                "records": [records],
+                "fingerprint": [fingerprint],
+            }
+        )
+        self.store_put(self.reads_ledger_key(), ledger, format="table")
+
+    def load_reads_ledger(self):
+        """
+        Return the record saved by :py:meth:`save_reads_ledger`.
+
+        Returns
+        -------
+        `dict` or None
+            The ``'reads'``, ``'end'``, ``'records'`` and ``'fingerprint'``
+            values, with an ``'end'`` of ``-1`` if the whole file was
+            counted, or ``None`` if nothing has been recorded.
+        """
+        key = self.reads_ledger_key()
+        if key not in self.store:
+            return None
+        row = self.store_select(key).iloc[0]
+        return {
+            "reads": row["reads"],
+            "end": int(row["end"]),
+            "records": int(row["records"]),
+            "fingerprint": row["fingerprint"],
+        }
+
+    def check_metadata(self, key, store=None):
+        """
+        Check if the metadata of this instance is equal to the metadata
+        stored for *key*.
+
+        In append mode the md5 of the reads is left out of the comparison,
+        so that a growing FASTQ_ file does not clear the store. The reads are
+        compared with the record saved by :py:meth:`save_reads_ledger` by
+        :py:meth:`update_appended_reads` instead.
+
+        Parameters
+        ----------
+        key : `str`
+            The key to the current table
+        store : :py:class:`~HdfStore`
+            The store object to check
+
+        Returns
+        -------
+        `bool`
+        """
+        if not self.append_reads:
+            return StoreManager.check_metadata(self, key, store)
+        if store is None:
+            store = self.store
+
+        other = self.get_metadata(key, store)
+        if other is None:
+            return False
+        this_cfg = self._without_reads_md5(self.metadata().get("cfg", {}))
+        other_cfg = self._without_reads_md5(other.get("cfg", {}))
+        return this_cfg == other_cfg
+
+    @staticmethod
+    def _without_reads_md5(cfg):
+        """
+        Returns a copy of *cfg* without the md5 of the reads and index reads.
+        """
+        cfg = dict(cfg)
+        if "fastq" in cfg:
+            cfg["fastq"] = dict(cfg["fastq"])
+            # BasicSeqLib writes "read md5", the other libraries "reads md5"
+            cfg["fastq"].pop("reads md5", None)
+            cfg["fastq"].pop("read md5", None)
+            if "demultiplex" in cfg["fastq"]:
+                cfg["fastq"]["demultiplex"] = dict(cfg["fastq"]["demultiplex"])
+                cfg["fastq"]["demultiplex"].pop("index reads md5", None)
+        return cfg
+
+    def count_chunk_rows(self, max_key_length):
+        """
+        Returns the number of elements to write to the store at a time from
+        a table of counts, sized to fit in the memory budget.
+
+        Parameters
+        ----------
+        max_key_length : `int`
+            Length of the longest element.
+
+        Returns
+        -------
+        `int`
+        """
+        row_bytes = ChunkSizer.string_bytes(max_key_length) + 8
+        return self.chunk_sizer(row_bytes).rows
+
+    @timed_stage("save_counts", label_arg=True)
     def save_counts(self, label, df_dict, raw):
         """
         Convert the counts in the dictionary *df_dict* into a DataFrame object
@@ -270,18 +1135,29 @@ class SeqLib(StoreManager):
 
         If *raw* is ``True``, the counts are stored under
         ``"/raw/label/counts"``; else ``"/main/label/counts"``.
+
+        If *df_dict* is a
+        :py:class:`~enrich2.base.spilling_counter.SpillingCounter` that has
+        spilled to disk, the merged counts are appended to the store one
+        chunk at a time in element order instead of being sorted by count.
         
         Parameters
         ----------
         label : `str`
             The table's group label to save counts to.
-        df_dict : `dict`
+        df_dict : `dict` or :py:class:`~enrich2.base.spilling_counter.SpillingCounter`
             The count data to store, with an index containing 
             variant/barcode/identifier/synonymous entries.
         raw : `bool`
             Set to ``True`` to store under the root group ``'raw'``.
         
         """
+        if isinstance(df_dict, SpillingCounter):
+            if df_dict.spilled:
+                self.save_counts_external(label, df_dict, raw)
+                return
+            df_dict = df_dict.counts
+
         if len(list(df_dict.keys())) == 0:
             raise ValueError("Failed to count {} [{}]".format(label, self.name))
         df = pd.DataFrame.from_dict(df_dict, orient="index", dtype=np.int32)
@@ -298,9 +1174,62 @@ class SeqLib(StoreManager):
             key = "/raw/{}/counts".format(label)
         else:
             key = "/main/{}/counts".format(label)
-        self.store.put(key, df, data_columns=df.columns)
+        self.store_put(key, df, data_columns=df.columns)
         del df
 
+    def save_counts_external(self, label, counter, raw):
+        """
+        Merge the spilled counts in *counter* and append them to the data
+        store in chunks of :py:attr:`chunksize` elements, so that the full
+        table is never held in memory.
+
+        Parameters
+        ----------
+        label : `str`
+            The table's group label to save counts to.
+        counter : :py:class:`~enrich2.base.spilling_counter.SpillingCounter`
+            The counter holding the count data.
+        raw : `bool`
+            Set to ``True`` to store under the root group ``'raw'``.
+
+        """
+        if raw:
+            key = "/raw/{}/counts".format(label)
+        else:
+            key = "/main/{}/counts".format(label)
+        if key in self.store:
+            self.store_remove(key)
+
+        log_message(
+            logging_callback=logging.info,
+            msg="Merging {} spilled runs of {} counts".format(
+                len(counter.runs), label
+            ),
+            extra={"oname": self.name},
+        )
+        total = 0
+        unique = 0
+        rows = self.count_chunk_rows(counter.max_key_length)
+        for chunk in counter.iter_chunks(rows):
+            self.store_append(
+                key,
+                chunk,
+                data_columns=["count"],
+                min_itemsize={"index": counter.max_key_length},
+            )
+            total += chunk["count"].sum()
+            unique += len(chunk)
+
+        if unique == 0:
+            raise ValueError("Failed to count {} [{}]".format(label, self.name))
+        log_message(
+            logging_callback=logging.info,
+            msg="Counted {n} {label} ({u} unique)".format(
+                n=total, u=unique, label=label
+            ),
+            extra={"oname": self.name},
+        )
+
     def save_filtered_counts(self, label, query):
         """
         Filter the counts in ``"/raw/label/counts"`` using the *query* string
@@ -330,9 +1259,10 @@ class SeqLib(StoreManager):
 
         self.map_table(source=raw_table, destination=main_table, source_query=query)
 
+        main_counts = self.store_select(main_table)
         msg = "Counted {n} {label} ({u} unique) after query".format(
-            n=self.store[main_table]["count"].sum(),
-            u=len(self.store[main_table].index),
+            n=main_counts["count"].sum(),
+            u=len(main_counts.index),
             label=label,
         )
         log_message(logging_callback=logging.info, msg=msg, extra={"oname": self.name})
@@ -386,7 +1316,7 @@ class SeqLib(StoreManager):
                 df.loc[SeqLib.filter_messages[key], "count"] = self.filter_stats[key]
         df.dropna(inplace=True)
         if self.override_filter_stats:
-            self.store.put("/raw/filter", df.astype(int), data_columns=df.columns)
+            self.store_put("/raw/filter", df.astype(int), data_columns=df.columns)
         else:
             log_message(
                 logging.info,
@@ -399,8 +1329,9 @@ class SeqLib(StoreManager):
         Check the quality of the FQRead object *fq*.
 
         Checks ``'chastity'``, ``'min quality'``, ``'avg quality'``,
-        ``'max N'``, and ``'remove unresolvable'``. Counts failed reads for 
-        later output and reports the filtered read if desired.
+        ``'max N'``, and ``'remove unresolvable'`` with the compiled
+        :py:attr:`read_filter`. Counts failed reads for later output and
+        reports the filtered read if desired.
         
         Parameters
         ----------
@@ -412,44 +1343,67 @@ class SeqLib(StoreManager):
         `bool`
             Returns ``True`` if the read passes all filters, else ``False``.
         """
-        filter_flags = dict()
-        for key in self.filters:
-            filter_flags[key] = False
+        failed = self.read_filter.check(fq)
+        if len(failed) == 0:
+            return True
 
-        if self.filters["chastity"]:
-            if not fq.is_chaste():
-                self.filter_stats["chastity"] += 1
-                filter_flags["chastity"] = True
+        # update total and report if failed
+        for key in failed:
+            self.filter_stats[key] += 1
+        self.filter_stats["total"] += 1
+        if self.report_filtered:
+            self.report_filtered_read(fq, dict.fromkeys(failed, True))
+        return False
 
-        if self.filters["min quality"] > 0:
-            if fq.min_quality() < self.filters["min quality"]:
-                self.filter_stats["min quality"] += 1
-                filter_flags["min quality"] = True
+    def read_quality_filter_batch(self, reads, block=None):
+        """
+        Check the quality of a batch of FQRead objects *reads* with the same
+        filters as :py:meth:`read_quality_filter`, counting the failed reads
+        and reporting them if desired.
 
-        if self.filters["avg quality"] > 0:
-            if fq.mean_quality() < self.filters["avg quality"]:
-                self.filter_stats["avg quality"] += 1
-                filter_flags["avg quality"] = True
+        The quality, ``'max N'`` and ``'remove unresolvable'`` filters are
+        checked with array operations over the whole batch, and the counts
+        added to :py:attr:`filter_stats` are the same as if each read was
+        checked by :py:meth:`read_quality_filter`.
 
-        if self.filters["max N"] >= 0:
-            if fq.sequence.upper().count("N") > self.filters["max N"]:
-                self.filter_stats["max N"] += 1
-                filter_flags["max N"] = True
+        Parameters
+        ----------
+        reads : `list`
+            List of :py:class:`~enrich2.sequence.fqread.FQRead` objects.
+        block : :py:class:`~enrich2.sequence.read_filter.ReadBlock`
+            The sequences and quality values of *reads* as arrays, or
+            ``None`` to create them from *reads*.
 
-        if "remove unresolvable" in self.filters:  # OverlapSeqLib only
-            if self.filters["remove unresolvable"]:
-                if "X" in fq.sequence:
-                    self.filter_stats["remove unresolvable"] += 1
-                    filter_flags["remove unresolvable"] = True
+        Returns
+        -------
+        :py:class:`numpy.ndarray`
+            Boolean array that is ``True`` for the reads that pass all
+            filters.
+        """
+        keep, counts = self.read_filter.mask(reads, block=block)
+        for key, count in counts.items():
+            self.filter_stats[key] += count
+        if self.report_filtered:
+            for i in np.flatnonzero(~keep):
+                failed = self.read_filter.check(reads[i])
+                self.report_filtered_read(reads[i], dict.fromkeys(failed, True))
+        return keep
 
-        # update total and report if failed
-        if any(filter_flags.values()):
-            self.filter_stats["total"] += 1
-            if self.report_filtered:
-                self.report_filtered_read(fq, filter_flags)
-            return False
-        else:
-            return True
+    @property
+    def read_filter(self):
+        """
+        The :py:class:`~enrich2.sequence.read_filter.ReadFilter` compiled
+        from :py:attr:`filters`.
+
+        Every filter is checked for each read if
+        :py:attr:`exact_filter_stats` or :py:attr:`report_filtered` is set.
+        Otherwise a read is only counted for the first filter it fails, and
+        filters are checked cheapest first.
+        """
+        exhaustive = bool(self.exact_filter_stats or self.report_filtered)
+        if self._read_filter is None or self._read_filter.exhaustive != exhaustive:
+            self._read_filter = ReadFilter(self.filters, exhaustive=exhaustive)
+        return self._read_filter
 
     @property
     def filters(self):
@@ -488,6 +1442,7 @@ class SeqLib(StoreManager):
         for key in self._filters:
             self.filter_stats[key] = 0
         self.filter_stats["total"] = 0
+        self._read_filter = None
 
     def serialize_filters(self):
         """
@@ -507,6 +1462,7 @@ class SeqLib(StoreManager):
     # ---------------------------------------------------------------------- #
     #                           File I/O
     # ---------------------------------------------------------------------- #
+    @timed_stage("write_tsv")
     def write_tsv(self, **kwargs):
         """
         Write each table from the store to its own tab-separated file.
@@ -534,6 +1490,8 @@ class SeqLib(StoreManager):
         store, copy those counts into this store, and close the counts store.
 
         Copies all tables in the ``'/raw'`` group along with their metadata.
+        If :py:attr:`link_counts` is set, the tables are linked instead and
+        are only copied if they are later modified.
         
         Parameters
         ----------
@@ -548,16 +1506,26 @@ class SeqLib(StoreManager):
         )
         # this could probably be much more efficient, but the PyTables docs
         # don't explain copying subsets of files adequately
-        raw_keys = [key for key in store.keys() if key.startswith("/raw/")]
+        raw_keys = ["/" + key for key in store.keys() if key.startswith("raw/")]
         if len(raw_keys) == 0:
             raise ValueError(
                 "No raw counts found in '{}' [{}]".format(fname, self.name)
             )
         else:
             for k in raw_keys:
+                if self.link_counts:
+                    # reference the data table and its metadata in place
+                    self.store_link(k, fname)
+                    log_message(
+                        logging_callback=logging.info,
+                        msg="Linked raw data '{}'".format(k),
+                        extra={"oname": self.name},
+                    )
+                    continue
+
                 # Copy the data table
                 raw = store[k]
-                self.store.put(k, raw, data_columns=raw.columns)
+                self.store_put(k, raw, data_columns=raw.columns)
                 # copy the metadata
                 self.set_metadata(k, self.get_metadata(k, store=store), update=False)
 
@@ -594,7 +1562,7 @@ class SeqLib(StoreManager):
         if label is None:
             raise ValueError("No valid element labels [{}]".format(self.name))
         key = "/raw/{}/counts".format(label)
-        self.store.put(key, df.astype(np.int32), data_columns=df.columns)
+        self.store_put(key, df.astype(np.int32), data_columns=df.columns)
 
     def counts_from_file(self, fname):
         """
@@ -626,3 +1594,264 @@ class SeqLib(StoreManager):
                 "Unrecognized counts file extension for '{}' "
                 "[{}]".format(fname, self.name)
             )
+
+    def counts_cache_cfg(self, cfg=None):
+        """
+        Returns the settings that determine the raw counts produced by
+        ``counts_from_reads``, used to build the shared counts cache key.
+
+        The reads are identified by their md5 rather than their path, and
+        options that are only applied after counting (such as minimum counts)
+        are left out so that they can be changed without recounting.
+
+        Parameters
+        ----------
+        cfg : `dict`, optional
+            The output of :py:meth:`serialize`, if it has already been
+            computed.
+
+        Returns
+        -------
+        `dict` or None
+            The settings, or ``None`` if the reads file could not be hashed.
+        """
+        if cfg is None:
+            cfg = self.serialize()
+        fastq = dict(cfg.get("fastq", {}))
+        fastq.pop("reads", None)
+        if "demultiplex" in fastq:
+            fastq["demultiplex"] = dict(fastq["demultiplex"])
+            fastq["demultiplex"].pop("index reads", None)
+        if not (fastq.get("reads md5") or fastq.get("read md5")):
+            return None
+
+        cache_cfg = {"type": self.__class__.__name__, "fastq": fastq}
+        if "variants" in cfg:
+            cache_cfg["variants"] = {
+                k: v for k, v in cfg["variants"].items() if k != "min count"
+            }
+        return cache_cfg
+
+    def counts_from_cache(self):
+        """
+        If a shared counts cache has been configured and contains counts for
+        this object's reads and settings, copy the ``'/raw'`` tables into
+        this store and restore the filter statistics.
+
+        Returns
+        -------
+        `bool`
+            ``True`` if the counts were found in the cache, else ``False``.
+        """
+        cache = self.counts_cache
+        if cache is None:
+            return False
+        cache_cfg = self.counts_cache_cfg()
+        if cache_cfg is None:
+            return False
+
+        cached = cache.load(cache.cache_key(cache_cfg))
+        if cached is None:
+            return False
+
+        tables, filter_stats = cached
+        for k, df in tables.items():
+            self.store_put(k, df, data_columns=df.columns)
+            log_message(
+                logging_callback=logging.info,
+                msg="Copied cached raw data '{}'".format(k),
+                extra={"oname": self.name},
+            )
+        for key in self.filter_stats:
+            self.filter_stats[key] = filter_stats.get(key, 0)
+        self.save_filter_stats()
+        return True
+
+    def save_counts_to_cache(self):
+        """
+        If a shared counts cache has been configured, copy the ``'/raw'``
+        count tables from this store into it so that other analyses of the
+        same reads can skip counting.
+        """
+        cache = self.counts_cache
+        if cache is None:
+            return
+        cache_cfg = self.counts_cache_cfg()
+        if cache_cfg is None:
+            return
+
+        keys = [
+            "/" + k
+            for k in self.store.keys()
+            if k.startswith("raw/") and k != "raw/filter"
+        ]
+        tables = {k: self.store_select(k) for k in keys}
+        cache.save(cache.cache_key(cache_cfg), tables, self.filter_stats)
+
+    def count_shard_settings(self):
+        """
+        Returns the settings that determine the raw counts of each part of
+        the reads, which must be the same for count shards to be merged.
+
+        These are the settings from :py:meth:`counts_cache_cfg` without the
+        md5 of the reads, since each shard counts different reads.
+
+        Returns
+        -------
+        `dict`
+        """
+        cfg = self.counts_cache_cfg()
+        if cfg is None:
+            raise ValueError("Reads could not be hashed [{}]".format(self.name))
+        return json.loads(json.dumps(self._without_reads_md5(cfg)))
+
+    def save_count_shard(self, path):
+        """
+        Write the raw counts and filter statistics in the store to a count
+        shard at *path*, to be merged with the shards of the rest of the
+        reads by :py:meth:`counts_from_shards`.
+
+        The shard records the library type, the settings from
+        :py:meth:`count_shard_settings`, and the path and md5 of the reads
+        that were counted.
+
+        Parameters
+        ----------
+        path : `str`
+            Path of the shard file.
+
+        Returns
+        -------
+        `dict`
+            The header written to the shard.
+        """
+        if self.read_counts_label is None:
+            raise ValueError(
+                "{} does not count reads [{}]".format(
+                    self.__class__.__name__, self.name
+                )
+            )
+        counts = self.store_select("/raw/{}/counts".format(self.read_counts_label))
+        header = {
+            "type": self.__class__.__name__,
+            "label": self.read_counts_label,
+            "settings": self.count_shard_settings(),
+            "reads": os.path.abspath(self.reads),
+            "reads md5": compute_md5(self.reads),
+            "filter_stats": self.filter_stats,
+        }
+        header = write_count_shard(path, counts[["count"]], header)
+        log_message(
+            logging_callback=logging.info,
+            msg="Wrote {} {} ({} unique) to count shard '{}'".format(
+                header["total"], self.read_counts_label, header["elements"], path
+            ),
+            extra={"oname": self.name},
+        )
+        return header
+
+    def counts_from_shards(self, paths):
+        """
+        Merge the count shards in *paths* written by
+        :py:meth:`save_count_shard` and store the result as the raw counts,
+        with the filter statistics added up over the shards.
+
+        The shards are merged in element order and appended to the store in
+        chunks of :py:attr:`chunksize` elements, so that the full table is
+        never held in memory. The path and md5 of the reads counted by each
+        shard are stored under ``'/inputs/shards'``.
+
+        Parameters
+        ----------
+        paths : `list` of `str`
+            Paths of the shard files.
+
+        Raises
+        ------
+        ValueError
+            If there are no shards, a shard was made by a different library
+            type or with different settings, or the same reads were counted
+            by more than one shard.
+        """
+        if len(paths) == 0:
+            raise ValueError("No count shards to merge [{}]".format(self.name))
+        settings = self.count_shard_settings()
+        headers = list()
+        for path in paths:
+            header = read_count_shard_header(path)
+            if header["type"] != self.__class__.__name__:
+                raise ValueError(
+                    "Count shard '{}' was made by a {} [{}]".format(
+                        path, header["type"], self.name
+                    )
+                )
+            if header["label"] != self.read_counts_label:
+                raise ValueError(
+                    "Count shard '{}' has {} counts, expected {} "
+                    "[{}]".format(
+                        path, header["label"], self.read_counts_label, self.name
+                    )
+                )
+            if header["settings"] != settings:
+                raise ValueError(
+                    "Count shard '{}' was made with different settings "
+                    "[{}]".format(path, self.name)
+                )
+            for other in headers:
+                if other["reads md5"] == header["reads md5"]:
+                    raise ValueError(
+                        "Count shards '{}' and '{}' counted the same reads "
+                        "[{}]".format(other["path"], path, self.name)
+                    )
+            header["path"] = path
+            headers.append(header)
+
+        label = self.read_counts_label
+        key = "/raw/{}/counts".format(label)
+        if key in self.store:
+            self.store_remove(key)
+        max_key_length = max(h["max_key_length"] for h in headers)
+        merged = merge_count_shards(paths)
+        rows = self.count_chunk_rows(max_key_length)
+        total = 0
+        unique = 0
+        while True:
+            chunk = list(itertools.islice(merged, rows))
+            if len(chunk) == 0:
+                break
+            keys, counts = zip(*chunk)
+            df = pd.DataFrame(
+                {"count": np.array(counts, dtype=np.int32)},
+                index=pd.Index(keys, dtype=object),
+            )
+            self.store_append(
+                key,
+                df,
+                data_columns=["count"],
+                min_itemsize={"index": max_key_length},
+            )
+            total += int(df["count"].sum())
+            unique += len(df)
+        if unique == 0:
+            raise ValueError("Failed to count {} [{}]".format(label, self.name))
+
+        for k in self.filter_stats:
+            self.filter_stats[k] = sum(h["filter_stats"].get(k, 0) for h in headers)
+        self.override_filter_stats = True
+        self.save_filter_stats()
+        inputs = pd.DataFrame(
+            {
+                "path": [os.path.abspath(h["path"]) for h in headers],
+                "reads": [h["reads"] for h in headers],
+                "reads md5": [h["reads md5"] for h in headers],
+                "total": [h["total"] for h in headers],
+            }
+        )
+        self.store_put("/inputs/shards", inputs, format="table")
+        log_message(
+            logging_callback=logging.info,
+            msg="Merged {} count shards into {n} {label} ({u} unique)".format(
+                len(headers), n=total, label=label, u=unique
+            ),
+            extra={"oname": self.name},
+        )
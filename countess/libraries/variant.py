@@ -305,7 +305,7 @@ class VariantSeqLib(SeqLib):
     count_synonymous
         Count the number of synonymous variants.
     report_filtered_variant
-        Report a variant that was filtered to the log.
+        Add a variant that was filtered to the filtered reads file.
     
     See Also
     --------
@@ -602,7 +602,7 @@ class VariantSeqLib(SeqLib):
         )
         df_dict = dict()
 
-        for variant, count in self.store["/main/variants/counts"].iterrows():
+        for variant, count in self.store_select("/main/variants/counts").iterrows():
             if variant == WILD_TYPE_VARIANT:
                 df_dict[variant] = count["count"]
             else:
@@ -619,20 +619,14 @@ class VariantSeqLib(SeqLib):
 
     def report_filtered_variant(self, variant, count):
         """
-        Outputs a summary of the filtered variant to *handle*. Internal filter
-        names are converted to messages using the ``SeqLib.filter_messages``
-        dictionary. Related to :py:meth:`SeqLib.report_filtered`.
+        Adds the variant sequence *variant*, which has too many mutations, to
+        the filtered reads file. Related to :py:meth:`SeqLib.report_filtered`.
         
         Parameters 
         ----------
-        variant : :py:class:`~enrich2.sequence.fqread.FQRead`
-            The ``FQRead`` object that represents the variant.
+        variant : `str`
+            The variant sequence.
         count : `int`
             Count of the variant.
         """
-        log_message(
-            logging_callback=logging.debug,
-            msg="Filtered variant (quantity={n}) (excess mutations)"
-            "\n{read!s}".format(n=count, read=variant),
-            extra={"oname": self.name},
-        )
+        self.filtered_sink().add(variant, ["max mutations"], count=count)
@@ -4,9 +4,11 @@ import json
 import logging
 import os.path
 import sys
+import tempfile
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
 
 from .base.utils import init_logging_queue, log_message
+from .base.stage_profiler import StageProfiler
 from .experiment.experiment import Experiment
 from .experiment.condition import Condition
 from .selection.selection import Selection
@@ -16,6 +18,10 @@ from .libraries.barcodeid import BcidSeqLib
 from .libraries.barcodevariant import BcvSeqLib
 from .libraries.basic import BasicSeqLib
 from .libraries.idonly import IdOnlySeqLib
+from .libraries.overlap import OverlapSeqLib
+from .libraries.seqlib import SeqLib
+from .store.execution import Execution, SCHEDULERS
+from .store.managed import BACKENDS
 
 
 __author__ = "Alan F Rubin, Daniel C Esposito"
@@ -34,6 +40,7 @@ globals()["BcidSeqLib"] = BcidSeqLib
 globals()["BcvSeqLib"] = BcvSeqLib
 globals()["BasicSeqLib"] = BasicSeqLib
 globals()["IdOnlySeqLib"] = IdOnlySeqLib
+globals()["OverlapSeqLib"] = OverlapSeqLib
 
 
 #: Name of the driver script. Used for logging output.
@@ -121,11 +128,276 @@ def main_gui():
     app.mainloop()
 
 
+def load_config(path):
+    """
+    Read the JSON configuration file at *path*.
+
+    Args:
+        path (str): Path to the configuration file.
+
+    Returns:
+        dict: The configuration.
+
+    """
+    try:
+        with open(path) as handle:
+            cfg = json.load(handle)
+    except IOError:
+        raise IOError("Failed to open '{}' [{}]".format(path, DRIVER_NAME))
+    except ValueError:
+        raise ValueError("Improperly formatted .json file [{}]".format(DRIVER_NAME))
+    return cfg
+
+
+def create_root(cfg):
+    """
+    Create the root object for the configuration *cfg*, detecting whether it
+    describes an Experiment, a Selection or a SeqLib.
+
+    Args:
+        cfg (dict): The configuration.
+
+    Returns:
+        The unconfigured object.
+
+    """
+    # identify config file type and create the object
+    if config_check.is_experiment(cfg):
+        log_message(
+            logging_callback=logging.info,
+            msg="Detected an Experiment config file",
+            extra={"oname": DRIVER_NAME},
+        )
+        obj = Experiment()
+    elif config_check.is_selection(cfg):
+        log_message(
+            logging_callback=logging.info,
+            msg="Detected an Selection config file",
+            extra={"oname": DRIVER_NAME},
+        )
+        obj = Selection()
+    elif config_check.is_seqlib(cfg):
+        seqlib_type = config_check.seqlib_type(cfg)
+        log_message(
+            logging_callback=logging.info,
+            msg="Detected a {} config file".format(seqlib_type),
+            extra={"oname": DRIVER_NAME},
+        )
+        if seqlib_type == "BarcodeSeqLib":
+            obj = BarcodeSeqLib()
+        elif seqlib_type == "BcidSeqLib":
+            obj = BcidSeqLib()
+        elif seqlib_type == "BcvSeqLib":
+            obj = BcvSeqLib()
+        elif seqlib_type == "BasicSeqLib":
+            obj = BasicSeqLib()
+        elif seqlib_type == "IdOnlySeqLib":
+            obj = IdOnlySeqLib()
+        elif seqlib_type == "OverlapSeqLib":
+            obj = OverlapSeqLib()
+        else:
+            raise ValueError(
+                "Unrecognized SeqLib type '{}' [{}]".format(seqlib_type, DRIVER_NAME)
+            )
+    else:
+        raise ValueError("Unrecognized .json config [{}]".format(DRIVER_NAME))
+    return obj
+
+
+def create_seqlib(cfg):
+    """
+    Create and configure the SeqLib for the configuration *cfg* as the root
+    of an analysis that only counts reads.
+
+    Args:
+        cfg (dict): A SeqLib configuration.
+
+    Returns:
+        SeqLib: The configured object.
+
+    """
+    obj = create_root(cfg)
+    if not isinstance(obj, SeqLib):
+        raise ValueError("Expected a SeqLib config file [{}]".format(DRIVER_NAME))
+    obj.force_recalculate = False
+    obj.component_outliers = False
+    obj.tsv_requested = False
+    return obj
+
+
+def count_cmd(argv=None):
+    """
+    Entry point for the ``count`` command, which counts the reads in one part
+    of a SeqLib's reads and writes them to a count shard.
+
+    Args:
+        argv (list, None): Command line arguments, or ``None`` to use
+            ``sys.argv``.
+
+    """
+    parser = ArgumentParser(
+        prog="Enrich2 count",
+        description="Count one FASTQ shard of a SeqLib into a count shard",
+        formatter_class=RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("config", help="JSON SeqLib configuration file")
+    parser.add_argument("reads", help="FASTQ file to count instead of the reads")
+    parser.add_argument("output", help="count shard file to write")
+    parser.add_argument(
+        "--log", metavar="FILE", dest="log_file", help="path to log file"
+    )
+    parser.add_argument(
+        "--counts-memory-limit",
+        metavar="MB",
+        dest="counts_memory_limit",
+        type=int,
+        help="spill read counts to disk when they use more than MB megabytes",
+    )
+    args = parser.parse_args(argv)
+    start_logging(args.log_file, logging.DEBUG)
+
+    cfg = load_config(args.config)
+    cfg["fastq"] = dict(cfg.get("fastq", {}), reads=args.reads)
+    output = os.path.abspath(args.output)
+    try:
+        obj = create_seqlib(cfg)
+        obj.counts_memory_limit = args.counts_memory_limit
+        # the store only holds the counts until the shard is written
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(output)) as tmp:
+            obj.output_dir_override = True
+            obj.output_dir = tmp
+            obj.configure(cfg)
+            obj.validate()
+            if obj.counts_file is not None:
+                raise ValueError(
+                    "Cannot count a SeqLib with a counts file [{}]".format(obj.name)
+                )
+            obj.store_open()
+            try:
+                obj.counts_from_reads()
+                obj.save_count_shard(output)
+            finally:
+                obj.store_close()
+    except Exception:
+        print("Program finished running but with errors. See log for details.")
+        log_message(
+            logging_callback=logging.exception,
+            msg="Counting failed",
+            extra={"oname": DRIVER_NAME},
+        )
+        sys.exit(1)
+    print("Program finished successfully! See log for information.")
+
+
+def reduce_cmd(argv=None):
+    """
+    Entry point for the ``reduce`` command, which merges count shards into
+    the raw counts of a SeqLib's store.
+
+    Args:
+        argv (list, None): Command line arguments, or ``None`` to use
+            ``sys.argv``.
+
+    """
+    parser = ArgumentParser(
+        prog="Enrich2 reduce",
+        description="Merge count shards into the store of a SeqLib",
+        formatter_class=RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("config", help="JSON SeqLib configuration file")
+    parser.add_argument("shards", nargs="+", help="count shard files to merge")
+    parser.add_argument(
+        "--log", metavar="FILE", dest="log_file", help="path to log file"
+    )
+    parser.add_argument(
+        "--output-dir",
+        metavar="DIR",
+        dest="output_dir_override",
+        help="override the config file's output directory",
+    )
+    args = parser.parse_args(argv)
+    start_logging(args.log_file, logging.DEBUG)
+
+    cfg = load_config(args.config)
+    try:
+        obj = create_seqlib(cfg)
+        if args.output_dir_override is not None:
+            obj.output_dir_override = True
+            obj.output_dir = args.output_dir_override
+        else:
+            obj.output_dir_override = False
+        obj.configure(cfg)
+        obj.validate()
+        obj.store_open()
+        try:
+            obj.counts_from_shards(args.shards)
+        finally:
+            obj.store_close()
+    except Exception:
+        print("Program finished running but with errors. See log for details.")
+        log_message(
+            logging_callback=logging.exception,
+            msg="Merging count shards failed",
+            extra={"oname": DRIVER_NAME},
+        )
+        sys.exit(1)
+    print("Program finished successfully! See log for information.")
+
+
+def report_run(obj):
+    """
+    Writes the run report of the analysis rooted at *obj* to its output
+    directory and logs the time and rows of each stage.
+    """
+    try:
+        json_path, _ = obj.run_report.write(obj.output_dir)
+    except (IOError, OSError) as e:
+        log_message(
+            logging_callback=logging.warning,
+            msg="Could not write the run report: {}".format(e),
+            extra={"oname": DRIVER_NAME},
+        )
+    else:
+        log_message(
+            logging_callback=logging.info,
+            msg="Run report written to {}".format(json_path),
+            extra={"oname": DRIVER_NAME},
+        )
+    profiler = obj.run_report.profiler
+    if profiler is not None and len(profiler.paths) > 0:
+        log_message(
+            logging_callback=logging.info,
+            msg="Profiles of {} stages written to {}".format(
+                len(profiler.paths), profiler.directory
+            ),
+            extra={"oname": DRIVER_NAME},
+        )
+    for entry in obj.run_report.summary():
+        log_message(
+            logging_callback=logging.info,
+            msg="{stage}: {calls} calls, {wall_seconds:.2f}s wall, "
+            "{cpu_seconds:.2f}s CPU, {rows_in} rows in, "
+            "{rows_out} rows out".format(**entry),
+            extra={"oname": DRIVER_NAME},
+        )
+
+
+#: Commands run by :py:func:`main_cmd` when named as the first argument.
+SUBCOMMANDS = {"count": count_cmd, "reduce": reduce_cmd}
+
+
 def main_cmd():
     """
     Entry point for command line.
 
+    The ``count`` and ``reduce`` commands are run if they are named as the
+    first argument, otherwise the configuration is analysed.
+
     """
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
     # build description string based on available methods
     desc_string = "Command-line driver for Enrich2 v{}".format(__version__)
 
@@ -175,62 +447,134 @@ def main_cmd():
         dest="output_dir_override",
         help="override the config file's output directory",
     )
+    parser.add_argument(
+        "--counts-cache",
+        metavar="DIR",
+        dest="counts_cache",
+        help="reuse raw counts from and add raw counts to a shared cache directory",
+    )
+    parser.add_argument(
+        "--compact",
+        dest="compact_stores",
+        action="store_true",
+        default=False,
+        help="repack HDF5 stores to reclaim free space when they are closed",
+    )
+    parser.add_argument(
+        "--store-backend",
+        dest="store_backend",
+        choices=BACKENDS,
+        help="format of the stores written for the analysis, overriding the "
+        "config file's store options (default: hdf5)",
+    )
+    parser.add_argument(
+        "--link-counts",
+        dest="link_counts",
+        action="store_true",
+        default=False,
+        help="link raw counts from HDF5 counts files instead of copying them",
+    )
+    parser.add_argument(
+        "--exact-filter-stats",
+        dest="exact_filter_stats",
+        action="store_true",
+        default=False,
+        help="check every read filter for each read, so that the filter "
+        "statistics count every filter a read fails",
+    )
+    parser.add_argument(
+        "--append-reads",
+        dest="append_reads",
+        action="store_true",
+        default=False,
+        help="count only the reads added to growing FASTQ files since the last run",
+    )
+    parser.add_argument(
+        "--counts-memory-limit",
+        metavar="MB",
+        dest="counts_memory_limit",
+        type=int,
+        help="spill read counts to disk when they use more than MB megabytes",
+    )
+    parser.add_argument(
+        "--scheduler",
+        dest="scheduler",
+        choices=SCHEDULERS,
+        help="Dask scheduler used to compute store tables (default: threads)",
+    )
+    parser.add_argument(
+        "--workers",
+        metavar="N",
+        dest="workers",
+        type=int,
+        help="number of Dask workers (default: one per core)",
+    )
+    parser.add_argument(
+        "--worker-memory",
+        metavar="MB",
+        dest="worker_memory",
+        type=int,
+        help="memory limit in megabytes for each local-cluster worker",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        metavar="MB",
+        dest="memory_budget",
+        type=int,
+        help="size table chunks to fit in MB megabytes of memory",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        metavar="N",
+        dest="checkpoint_interval",
+        type=int,
+        help="save partial read counts every N reads so that counting can resume",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        dest="trace_memory",
+        action="store_true",
+        default=False,
+        help="record the peak memory allocated by each stage in the run report",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        action="store_true",
+        default=False,
+        help="profile each analysis stage and write the profiles to the "
+        "output directory",
+    )
     args = parser.parse_args()
 
     # start the logs
     start_logging(args.log_file, logging.DEBUG)
 
-    # read the JSON file
-    try:
-        cfg = json.load(open(args.config, "U"))
-    except IOError:
-        raise IOError("Failed to open '{}' [{}]".format(args.config, DRIVER_NAME))
-    except ValueError:
-        raise ValueError("Improperly formatted .json file [{}]".format(DRIVER_NAME))
-
-    # identify config file type and create the object
-    if config_check.is_experiment(cfg):
-        log_message(
-            logging_callback=logging.info,
-            msg="Detected an Experiment config file",
-            extra={"oname": DRIVER_NAME},
-        )
-        obj = Experiment()
-    elif config_check.is_selection(cfg):
-        log_message(
-            logging_callback=logging.info,
-            msg="Detected an Selection config file",
-            extra={"oname": DRIVER_NAME},
-        )
-        obj = Selection()
-    elif config_check.is_seqlib(cfg):
-        seqlib_type = config_check.seqlib_type(cfg)
-        log_message(
-            logging_callback=logging.info,
-            msg="Detected a {} config file".format(seqlib_type),
-            extra={"oname": DRIVER_NAME},
-        )
-        if seqlib_type == "BarcodeSeqLib":
-            obj = BarcodeSeqLib()
-        elif seqlib_type == "BcidSeqLib":
-            obj = BcidSeqLib()
-        elif seqlib_type == "BcvSeqLib":
-            obj = BcvSeqLib()
-        elif seqlib_type == "BasicSeqLib":
-            obj = BasicSeqLib()
-        elif seqlib_type == "IdOnlySeqLib":
-            obj = IdOnlySeqLib()
-        else:
-            raise ValueError(
-                "Unrecognized SeqLib type '{}' [{}]".format(seqlib_type, DRIVER_NAME)
-            )
-    else:
-        raise ValueError("Unrecognized .json config [{}]".format(DRIVER_NAME))
+    # read the JSON file and create the object
+    cfg = load_config(args.config)
+    obj = create_root(cfg)
 
     # set analysis options
     obj.force_recalculate = args.force_recalculate
     obj.component_outliers = args.component_outliers
     obj.tsv_requested = args.tsv_requested
+    obj.counts_cache = args.counts_cache
+    obj.compact_stores = args.compact_stores
+    obj.link_counts = args.link_counts
+    obj.exact_filter_stats = args.exact_filter_stats
+    obj.append_reads = args.append_reads
+    obj.counts_memory_limit = args.counts_memory_limit
+    obj.checkpoint_interval = args.checkpoint_interval
+    obj.memory_budget = args.memory_budget
+    obj.run_report.clear()
+    obj.run_report.trace_memory = args.trace_memory
+    if (args.scheduler, args.workers, args.worker_memory) != (None, None, None):
+        try:
+            obj.execution = Execution(
+                args.scheduler or "threads", args.workers, args.worker_memory
+            )
+        except ValueError as e:
+            parser.error(str(e))
 
     if args.output_dir_override is not None:
         obj.output_dir_override = True
@@ -247,7 +591,13 @@ def main_cmd():
         if isinstance(obj, Selection):
             cfg = SelectionConfiguration(cfg, has_scorer=True)
         obj.configure(cfg)
+        if args.store_backend is not None:
+            obj.store_options = dict(obj.store_options, backend=args.store_backend)
         obj.validate()
+        if args.profile:
+            obj.run_report.profiler = StageProfiler(
+                os.path.join(obj.output_dir, "profile")
+            )
     except Exception:
         print("Program finished running but with errors. See log for details.")
         log_message(
@@ -259,31 +609,37 @@ def main_cmd():
         # open HDF5 files for the object and all child objects
         obj.store_open(children=True)
 
-        # perform the analysis
-        try:
-            obj.calculate()
-        except Exception as e:
-            print("Program finished running but with errors. " "See log for details.")
-            log_message(
-                logging_callback=logging.exception, msg=e, extra={"oname": DRIVER_NAME}
-            )
-            obj.store_close(children=True)
-            sys.exit(0)
-
-        try:
-            obj.write_tsv()
-        except Exception:
-            print("Program finished running but with errors. " "See log for details.")
-            log_message(
-                logging_callback=logging.exception,
-                msg="Calculations completed, but TSV ouput failed.",
-                extra={"oname": DRIVER_NAME},
-            )
-            obj.store_close(children=True)
-            sys.exit(0)
+        # perform the analysis with the configured Dask scheduler
+        with obj.execution.activate():
+            try:
+                obj.calculate()
+            except Exception as e:
+                print("Program finished running but with errors. See log for details.")
+                log_message(
+                    logging_callback=logging.exception,
+                    msg=e,
+                    extra={"oname": DRIVER_NAME},
+                )
+                obj.store_close(children=True)
+                report_run(obj)
+                sys.exit(0)
+
+            try:
+                obj.write_tsv()
+            except Exception:
+                print("Program finished running but with errors. See log for details.")
+                log_message(
+                    logging_callback=logging.exception,
+                    msg="Calculations completed, but TSV ouput failed.",
+                    extra={"oname": DRIVER_NAME},
+                )
+                obj.store_close(children=True)
+                report_run(obj)
+                sys.exit(0)
 
         # clean up
         obj.store_close(children=True)
+        report_run(obj)
         print("Program finished successfully! See log for information.")
         log_message(
             logging_callback=logging.exception,
@@ -86,7 +86,8 @@ class BaseScorerPlugin(ABC):
         Runs the function `compute_scores`. Used internally by ``Enrich2``
         """
         try:
-            self.compute_scores()
+            with self._store_manager.run_report.span("run", self.name):
+                self.compute_scores()
         except BaseException as err:
             raise Exception(
                 "The following error occured when trying to run "
@@ -148,7 +149,7 @@ class BaseScorerPlugin(ABC):
         --------
         :py:class:`pandas.HDFStore`
         """
-        return self._store_manager.store.get(key)
+        return self._store_manager.store_select(key)
 
     def store_put(self, *args, **kwargs):
         """
@@ -159,7 +160,7 @@ class BaseScorerPlugin(ABC):
         --------
         :py:class:`pandas.HDFStore`
         """
-        self._store_manager.store.put(*args, **kwargs)
+        self._store_manager.store_put(*args, **kwargs)
 
     def store_remove(self, *args, **kwargs):
         """
@@ -170,7 +171,7 @@ class BaseScorerPlugin(ABC):
         --------
         :py:class:`pandas.HDFStore`
         """
-        self._store_manager.store.remove(*args, **kwargs)
+        self._store_manager.store_remove(*args, **kwargs)
 
     def store_append(self, *args, **kwargs):
         """
@@ -181,7 +182,7 @@ class BaseScorerPlugin(ABC):
         --------
         :py:class:`pandas.HDFStore`
         """
-        self._store_manager.store.append(*args, **kwargs)
+        self._store_manager.store_append(*args, **kwargs)
 
     def store_check(self, key):
         """
@@ -202,24 +203,38 @@ class BaseScorerPlugin(ABC):
     def store_select(self, *args, **kwargs):
         """
         Wrapper for HDF manipulation. Selects data from a 
-        :py:class:`pandas.HDFStore`
+        :py:class:`pandas.HDFStore`. Repeated selections are served from
+        the :py:class:`~enrich2.base.table_cache.TableCache` of the store
+        manager.
 
         See Also
         --------
         :py:class:`pandas.HDFStore`
         """
-        return self._store_manager.store.select(*args, **kwargs)
+        return self._store_manager.store_select(*args, **kwargs)
 
     def store_select_as_multiple(self, *args, **kwargs):
         """
-        Wrapper for HDF manipulation. Selects data from multiple  
-        :py:class:`pandas.HDFStore` stores.
+        Wrapper for HDF manipulation. Selects data from multiple tables of
+        the :py:class:`pandas.HDFStore`, with the element index decoded like
+        :py:meth:`store_select`.
 
         See Also
         --------
         :py:class:`pandas.HDFStore`
         """
-        return self._store_manager.store.select_as_multiple(*args, **kwargs)
+        return self._store_manager.store_select_as_multiple(*args, **kwargs)
+
+    def store_column_sums(self, *args, **kwargs):
+        """
+        Wrapper for HDF manipulation. Returns the sum of each column of a
+        table, computed by the store when it can sum tables.
+
+        See Also
+        --------
+        :py:meth:`enrich2.base.storemanager.StoreManager.store_column_sums`
+        """
+        return self._store_manager.store_column_sums(*args, **kwargs)
 
     def store_labels(self):
         """
@@ -255,7 +270,7 @@ class BaseScorerPlugin(ABC):
         `set`
             A set of root group keys.
         """
-        return set([k.split("/")[0] for k in self._store_manager.store])
+        return set([k.split("/")[0] for k in self._store_manager.store.keys()])
 
     def store_keys(self):
         """
@@ -265,10 +280,11 @@ class BaseScorerPlugin(ABC):
         Returns
         -------
         `list`
-            List of store keys in string format.
+            List of store keys in string format, starting with ``'/'`` like
+            the keys passed to the other store methods.
 
         """
-        return [k for k in self._store_manager.store]
+        return ["/" + k for k in self._store_manager.store.keys()]
 
     def store_timepoints(self):
         """
@@ -15,6 +15,8 @@ import scipy.stats as stats
 from ..base.constants import WILD_TYPE_VARIANT
 from ..base.utils import compute_md5, log_message
 from ..base.storemanager import StoreManager
+from ..base.chunk_sizer import ChunkSizer
+from ..base.run_report import timed_stage
 from ..base.config_constants import SCORER, SCORER_OPTIONS, SCORER_PATH
 from ..base.config_constants import LIBRARIES
 
@@ -23,13 +25,16 @@ from ..libraries.barcodeid import BcidSeqLib
 from ..libraries.barcodevariant import BcvSeqLib
 from ..libraries.basic import BasicSeqLib
 from ..libraries.idonly import IdOnlySeqLib
+from ..libraries.overlap import OverlapSeqLib
 from ..libraries.variant import protein_variant
+from ..libraries.read_pass import schedule_read_passes
 
 globals()["BasicSeqLib"] = BasicSeqLib
 globals()["BarcodeSeqLib"] = BarcodeSeqLib
 globals()["BcvSeqLib"] = BcvSeqLib
 globals()["BcidSeqLib"] = BcidSeqLib
 globals()["IdOnlySeqLib"] = IdOnlySeqLib
+globals()["OverlapSeqLib"] = OverlapSeqLib
 
 
 __all__ = ["Selection"]
@@ -80,6 +85,8 @@ class Selection(StoreManager):
         Returns a boolean indicating if all children have coding sequences.
     has_wt_sequence
         Returns a boolean indicating if all children have a wt sequence.
+    count_shared_reads
+        Counts libraries that read the same FASTQ_ file in one pass.
     merge_counts_unfiltered
         Counts :py:class:`~enrich2.libraries.seqlib.SeqLib` objects and 
         tabulates counts for each timepoint.
@@ -335,6 +342,28 @@ class Selection(StoreManager):
         """
         return all(x.has_wt_sequence() for x in self.children)
 
+    def count_shared_reads(self):
+        """
+        Counts the reads of libraries that read the same FASTQ_ file, or
+        are multiplexed in the same file, with a single pass over the file
+        instead of one pass for each library.
+
+        See :py:func:`~enrich2.libraries.read_pass.schedule_read_passes` for
+        how the libraries are grouped.
+        """
+        for read_pass in schedule_read_passes(self.children):
+            log_message(
+                logging_callback=logging.info,
+                msg="Counting {} libraries in one pass over '{}'".format(
+                    len(read_pass.libraries), read_pass.reads
+                ),
+                extra={"oname": self.name},
+            )
+            read_pass.count()
+            for lib in read_pass.libraries:
+                lib.save_counts_to_cache()
+
+    @timed_stage("merge_counts_unfiltered", label_arg=True)
     def merge_counts_unfiltered(self, label):
         """
         Counts :py:class:`~enrich2.libraries.seqlib.SeqLib` objects and 
@@ -364,7 +393,7 @@ class Selection(StoreManager):
         )
 
         destination = "/main/{}/counts_unfiltered".format(label)
-        if destination in list(self.store.keys()):
+        if destination in self.store:
             # need to remove the current destination table because we are
             # using append, append is required because it takes
             # the "min_itemsize" argument, and put doesn't
@@ -373,18 +402,22 @@ class Selection(StoreManager):
                 msg="Replacing existing '{}'".format(destination),
                 extra={"oname": self.name},
             )
-            self.store.remove(destination)
+            self.store_remove(destination)
 
         # seqlib count table name for this element type
         lib_table = "/main/{}/counts".format(label)
 
+        # stores that can sum tables by index, such as DuckDB stores, add up
+        # the libraries with a query instead of in chunks of a shared index
+        if getattr(self.store, "sum_by_index", None) is not None:
+            self.merge_counts_by_index(label, lib_table)
+            return
+
         # create an index of all elements in the analysis
         complete_index = pd.Index([])
         for tp in self.timepoints:
             for lib in self.libraries[tp]:
-                complete_index = complete_index.union(
-                    pd.Index(lib.store.get_column(lib_table, "index"))
-                )
+                complete_index = complete_index.union(lib.store_index(lib_table))
         log_message(
             logging_callback=logging.info,
             msg="Created shared index for count data ({} {})".format(
@@ -396,53 +429,132 @@ class Selection(StoreManager):
         # min_itemsize value
         max_index_length = complete_index.map(len).max()
 
+        # the positions in the shared index of each library's rows, sorted,
+        # so that the rows in a chunk of the shared index are found by
+        # position instead of a query listing every element of the chunk
+        lib_rows = dict()
+        for tp in self.timepoints:
+            lib_rows[tp] = list()
+            for lib in self.libraries[tp]:
+                positions = complete_index.get_indexer(lib.store_index(lib_table))
+                order = np.argsort(positions, kind="stable")
+                lib_rows[tp].append((positions[order], order))
+
+        # size the chunks from the width of a row: the index and one count
+        # for each library selection, plus a column for each time point
+        libraries = [lib for tp in self.timepoints for lib in self.libraries[tp]]
+        index_bytes = ChunkSizer.string_bytes(max_index_length)
+        sizer = self.chunk_sizer(
+            row_bytes=index_bytes + 8, tables=len(libraries) + len(self.timepoints)
+        )
+
         # perform operation in chunks
-        for i in range(0, len(complete_index), self.chunksize):
+        i = 0
+        chunk_number = 0
+        while i < len(complete_index):
+            rows = sizer.rows
             # don't duplicate the index if the chunksize is large
-            if self.chunksize < len(complete_index):
-                index_chunk = complete_index[i : i + self.chunksize]
+            if rows < len(complete_index):
+                index_chunk = complete_index[i : i + rows]
             else:
                 index_chunk = complete_index
+            chunk_number += 1
 
             log_message(
                 logging_callback=logging.info,
                 msg="Merging counts for chunk {} ({} rows)".format(
-                    i // self.chunksize + 1, len(index_chunk)
+                    chunk_number, len(index_chunk)
                 ),
                 extra={"oname": self.name},
             )
 
+            nbytes = 0
             for tp in self.timepoints:
-                c = self.libraries[tp][0].store.select(
-                    key=lib_table, where="index={}".format(list(index_chunk))
-                )
-                for lib in self.libraries[tp][1:]:
-                    c = c.add(
-                        lib.store.select(
-                            key=lib_table, where="index={}".format(list(index_chunk))
-                        ),
-                        fill_value=0,
+                c = None
+                for lib, (positions, order) in zip(self.libraries[tp], lib_rows[tp]):
+                    start, stop = positions.searchsorted([i, i + len(index_chunk)])
+                    selected = lib.store_select_rows(
+                        lib_table, np.sort(order[start:stop])
                     )
+                    nbytes += selected.memory_usage(deep=True).sum()
+                    if c is None:
+                        c = selected
+                    else:
+                        c = c.add(selected, fill_value=0)
                 c.columns = ["c_{}".format(tp)]
                 if tp == 0:
                     tp_frame = c
                 else:
                     tp_frame = tp_frame.join(c, how="outer")
+            nbytes += tp_frame.memory_usage(deep=True).sum()
 
             # save the unfiltered counts
             if "/main/{}/counts_unfiltered".format(label) not in self.store:
-                self.store.append(
+                self.store_append(
                     key="/main/{}/counts_unfiltered".format(label),
                     value=tp_frame.astype(float),
                     min_itemsize={"index": max_index_length},
                     data_columns=list(tp_frame.columns),
                 )
             else:
-                self.store.append(
+                self.store_append(
                     key="/main/{}/counts_unfiltered".format(label),
                     value=tp_frame.astype(float),
                 )
 
+            i += len(index_chunk)
+            if sizer.update(nbytes, len(index_chunk)):
+                log_message(
+                    logging_callback=logging.info,
+                    msg="Chunk {} used {:.1f} MB, over its memory share; "
+                    "using {} rows per chunk".format(
+                        chunk_number, nbytes / 1024 ** 2, sizer.rows
+                    ),
+                    extra={"oname": self.name},
+                )
+
+    def merge_counts_by_index(self, label, lib_table):
+        """
+        Combines the counts of the :py:class:`~enrich2.libraries.seqlib.SeqLib`
+        objects for each timepoint with the store's
+        :py:meth:`~enrich2.base.storemanager.StoreManager.store_sum_by_index`,
+        for :py:meth:`merge_counts_unfiltered`.
+
+        Each library's counts are copied in chunks into a temporary table of
+        this store under ``'/merge'``, with a column for each timepoint that
+        is missing except for the library's timepoint, so that a single sum
+        by index gives the unfiltered counts. The temporary tables are
+        removed afterwards.
+        """
+        columns = ["c_{}".format(tp) for tp in self.timepoints]
+        keys = list()
+        try:
+            libraries = [
+                (tp, lib) for tp in self.timepoints for lib in self.libraries[tp]
+            ]
+            for i, (tp, lib) in enumerate(libraries):
+                key = "/merge/{}/lib_{}".format(label, i)
+                chunks = lib.store_select(lib_table, chunksize=self.chunksize)
+                for chunk in chunks:
+                    counts = pd.DataFrame(np.nan, index=chunk.index, columns=columns)
+                    counts["c_{}".format(tp)] = chunk.iloc[:, 0].astype(float)
+                    self.store_append(key, counts)
+                if key in self.store:
+                    keys.append(key)
+
+            if len(keys) > 0:
+                counts = self.store_sum_by_index(keys, columns)
+                self.store_append(
+                    key="/main/{}/counts_unfiltered".format(label),
+                    value=counts.astype(float),
+                    min_itemsize={"index": counts.index.map(len).max()},
+                    data_columns=columns,
+                )
+        finally:
+            if "/merge" in self.store:
+                self.store_remove("/merge")
+
+    @timed_stage("filter_counts", label_arg=True)
     def filter_counts(self, label):
         """
         Converts unfiltered counts stored in ``/main/label/counts_unfiltered`` 
@@ -463,11 +575,11 @@ class Selection(StoreManager):
             # redo the barcode->variant/id mapping with the filtered counts
             # NOT YET IMPLEMENTED
             # TODO: just do this for now
-            df = self.store.select("/main/{}/counts_unfiltered".format(label))
+            df = self.store_select("/main/{}/counts_unfiltered".format(label))
         else:
-            df = self.store.select("/main/{}/counts_unfiltered".format(label))
+            df = self.store_select("/main/{}/counts_unfiltered".format(label))
         df.dropna(axis="index", how="any", inplace=True)
-        self.store.put(
+        self.store_put(
             "/main/{}/counts".format(label), df.astype(float), data_columns=df.columns
         )
 
@@ -490,16 +602,16 @@ class Selection(StoreManager):
         bcm = None
         for lib in self.children:
             if bcm is None:
-                bcm = lib.store["/raw/barcodemap"]
+                bcm = lib.store_select("/raw/barcodemap")
             else:
                 bcm = bcm.join(
-                    lib.store["/raw/barcodemap"], rsuffix=".drop", how="outer"
+                    lib.store_select("/raw/barcodemap"), rsuffix=".drop", how="outer"
                 )
                 new = bcm.loc[pd.isnull(bcm)["value"]]
                 bcm.loc[new.index, "value"] = new["value.drop"]
                 bcm.drop("value.drop", axis="columns", inplace=True)
         bcm.sort_values("value", inplace=True)
-        self.store.put(key="/main/barcodemap", value=bcm, data_columns=bcm.columns)
+        self.store_put(key="/main/barcodemap", value=bcm, data_columns=bcm.columns)
 
     def timepoint_indices_intersect(self):
         """
@@ -518,7 +630,7 @@ class Selection(StoreManager):
 
         table_key = "/main/{}/counts".format(label)
         libs = [lib for tp in self.timepoints for lib in self.libraries[tp]]
-        series_ls = [lib.store.get_column(table_key, "index") for lib in libs]
+        series_ls = [lib.store_index(table_key) for lib in libs]
         index_ls = [pd.Index(series.values) for series in series_ls]
         index_len_ls = [len(set(idx)) for idx in index_ls]
         common = reduce(lambda idx1, idx2: idx1.intersection(idx2), index_ls)
@@ -544,7 +656,7 @@ class Selection(StoreManager):
         """
         table_key = "/main/{}/counts".format(label)
         libs = [lib for tp in self.timepoints for lib in self.libraries[tp]]
-        series_ls = [lib.store.get_column(table_key, "index") for lib in libs]
+        series_ls = [lib.store_index(table_key) for lib in libs]
         all_good = all(set(s.values) != set(["_wt"]) for s in series_ls)
         if not all_good:
             raise ValueError(
@@ -569,7 +681,7 @@ class Selection(StoreManager):
         """
         if not self.table_exists_for_key(key):
             raise ValueError("Required table {} does " "not exist.".format(key))
-        empty = self.store[key].empty
+        empty = self.store_select(key).empty
         return not empty
 
     def score_index_has_been_modified(self, label):
@@ -643,6 +755,7 @@ class Selection(StoreManager):
                 "sequencing libraries [{}]".format(self.name)
             )
 
+        self.count_shared_reads()
         for label in self.labels:
             self.merge_counts_unfiltered(label)
             self.filter_counts(label)
@@ -679,6 +792,7 @@ class Selection(StoreManager):
             if self.is_coding():
                 self.calc_outliers("variants")
 
+    @timed_stage("write_tsv")
     def write_tsv(self):
         """
         Write each table from the store to its own tab-separated file.
@@ -705,9 +819,7 @@ class Selection(StoreManager):
         """
         mapping = dict()
         try:
-            variants = self.store.get_column(
-                key="/main/variants/counts", column="index"
-            )
+            variants = self.store_index("/main/variants/counts")
         except KeyError:
             raise KeyError("No variant counts found [{}]".format(self.name))
         for v in variants:
@@ -728,7 +840,7 @@ class Selection(StoreManager):
             Mapping of barcode keys to barcode map values.
         """
         mapping = dict()
-        for bc, v in self.store["/main/barcodemap"].iterrows():
+        for bc, v in self.store_select("/main/barcodemap").iterrows():
             v = v["value"]
             try:
                 mapping[v].update([bc])
@@ -795,10 +907,10 @@ class Selection(StoreManager):
             )
 
         # get the scores
-        df1 = self.store.select(
+        df1 = self.store_select(
             "/main/{}/scores".format(label), columns=["score", "SE"]
         )
-        df2 = self.store.select(
+        df2 = self.store_select(
             "/main/{}/scores".format(label2), columns=["score", "SE"]
         )
 
@@ -850,7 +962,7 @@ class Selection(StoreManager):
         result_df["z"] = result_df["z"].astype(float)
         result_df["pvalue_raw"] = result_df["pvalue_raw"].astype(float)
 
-        self.store.put(
+        self.store_put(
             key="/main/{}/outliers".format(label),
             value=result_df,
             data_columns=result_df.columns,
@@ -8,6 +8,7 @@ handling FASTQ files.
 
 
 from sys import stderr
+import io
 import os.path
 import re
 import itertools
@@ -19,12 +20,15 @@ from array import array
 __all__ = [
     "header_pattern",
     "BUFFER_SIZE",
+    "BATCH_SIZE",
     "dna_trans",
     "FQRead",
     "split_fastq_path",
     "create_compressed_outfile",
     "read_fastq",
     "read_fastq_multi",
+    "read_fastq_batches",
+    "read_fastq_range",
     "fastq_filter_chastity",
 ]
 
@@ -48,6 +52,10 @@ header_pattern = re.compile(
 BUFFER_SIZE = 100000
 
 
+# number of records in each batch read by read_fastq_batches
+BATCH_SIZE = 10000
+
+
 # Helper translator for dna complimenting
 dna_trans = str.maketrans("actgACTG", "tgacTGAC")
 
@@ -95,6 +103,8 @@ class FQRead(object):
         a specified position.
     revcomp
         Performs reverse complement on the read and quality sequences
+    copy
+        Returns a copy of the read that can be trimmed independently.
     header_information
         Parses the first FASTQ_ header (@ header) and returns a dictionary
         of matches corresponding to a supplied regex pattern.
@@ -142,9 +152,20 @@ class FQRead(object):
         Reformat as a four-line FASTQ_ record. This method converts the 
         integer quality values back into a string.
         """
+        return "\n".join(
+            [self.header, self.sequence, self.header2, self.quality_string()]
+        )
+
+    def quality_string(self):
+        """
+        Returns the quality values as a FASTQ_ quality string.
+
+        Returns
+        -------
+        `str`
+        """
         quality = array("b", [x + self.qbase for x in self.quality]).tobytes()
-        quality = quality.decode("ascii")
-        return "\n".join([self.header, self.sequence, self.header2, quality])
+        return quality.decode("ascii")
 
     def __len__(self):
         """
@@ -189,6 +210,22 @@ class FQRead(object):
         self.sequence = self.sequence.translate(dna_trans)[::-1]
         self.quality = self.quality[::-1]
 
+    def copy(self):
+        """
+        Returns a copy of this :py:class:`~FQRead` without parsing the
+        record again. Trimming and reverse-complementing replace the
+        sequence and quality values rather than modifying them, so the copy
+        can be changed without affecting this read.
+
+        Returns
+        -------
+        :py:class:`~FQRead`
+        """
+        fq = FQRead.__new__(FQRead)
+        for attr in self.__slots__:
+            setattr(fq, attr, getattr(self, attr))
+        return fq
+
     def header_information(self, pattern=header_pattern):
         """
         Parses the first FASTQ_ header (@ header) and returns a dictionary. 
@@ -354,7 +391,9 @@ def create_compressed_outfile(fname, compression):
     return handle
 
 
-def read_fastq(fname, filter_function=None, buffer_size=BUFFER_SIZE, qbase=33):
+def read_fastq(
+    fname, filter_function=None, buffer_size=BUFFER_SIZE, qbase=33, progress=None
+):
     """
     Generator function for reading from FASTQ_ file *fname*. Yields an 
     :py:class:`~FQRead` object for each FASTQ_ record in the file. The 
@@ -373,6 +412,10 @@ def read_fastq(fname, filter_function=None, buffer_size=BUFFER_SIZE, qbase=33):
         Size of the buffer that :py:func:`open.read` accepts.
     qbase : `int`, default: 33
         Integer ASCII value that correponds to Phred score of 0
+    progress : `Callable`, default: None
+        A function called with the number of bytes of the file read so far
+        after each buffer is read. For compressed files, this is the number
+        of compressed bytes.
         
     Returns
     -------
@@ -382,15 +425,16 @@ def read_fastq(fname, filter_function=None, buffer_size=BUFFER_SIZE, qbase=33):
     Notes
     -----
     .. note:: To read multiple files in parallel (such as index or \
-        forward/reverse reads), use :py:func:`read_fastq_multi` instead.
+        forward/reverse reads), use :py:func:`read_fastq_multi` or \
+        :py:func:`read_fastq_batches` instead.
     """
     _, _, ext, compression = split_fastq_path(fname)
     if compression is None and ext in (".fq", ".fastq"):  # raw FASTQ
-        open_func = open
+        open_func = io.TextIOWrapper
     elif compression == "bz2":
-        open_func = bz2.open
+        open_func = lambda f: bz2.open(f, "rt")
     elif compression == "gz":
-        open_func = gzip.open
+        open_func = lambda f: gzip.open(f, "rt")
     else:
         raise IOError(
             "Unrecognized compression " "mode '{mode}'".format(mode=compression)
@@ -398,11 +442,14 @@ def read_fastq(fname, filter_function=None, buffer_size=BUFFER_SIZE, qbase=33):
 
     eof = False
     leftover = ""
-    with open_func(fname, "rt") as handle:
+    # open the file separately to track the bytes read from it
+    with open(fname, "rb") as raw, open_func(raw) as handle:
         while not eof:
             buf = handle.read(buffer_size)
             if len(buf) < buffer_size:
                 eof = True
+            if progress is not None:
+                progress(raw.tell())
 
             buf = leftover + buf  # prepend partial record from previous buffer
             lines = buf.split("\n")
@@ -487,6 +534,128 @@ def read_fastq_multi(
             continue
 
 
+def read_fastq_batches(
+    fnames, batch_size=BATCH_SIZE, buffer_size=BUFFER_SIZE, qbase=33, progress=None
+):
+    """
+    Generator function for reading from multiple FASTQ_ files in lockstep
+    batches. The argument *fnames* is an iterable of FASTQ_ file names.
+    Yields a tuple with a list of up to *batch_size* :py:class:`~FQRead`
+    objects for each file in *fnames*, where the records at the same
+    position in each list are from the same position in their files.
+
+    Parameters
+    ----------
+    fnames : `list`
+        List of fastq file paths to parse.
+    batch_size : `int`, default: 10000
+        Number of records from each file in a batch.
+    buffer_size : `int`, default: 100000
+        Size of the buffer that :py:func:`open.read` accepts.
+    qbase : `int`, default: 33
+        Integer ASCII value that correponds to Phred score of 0
+    progress : `Callable`, default: None
+        A function called with the number of bytes of the first file read
+        so far, as for :py:func:`read_fastq`.
+
+    Returns
+    -------
+    `generator`
+        A generator of tuples of lists of :py:class:`~FQRead` objects.
+
+    Raises
+    ------
+    ValueError
+        If the files do not contain the same number of FASTQ_ records.
+    """
+    fq_generators = list()
+    for i, f in enumerate(fnames):
+        fq_generators.append(
+            read_fastq(
+                f,
+                buffer_size=buffer_size,
+                qbase=qbase,
+                progress=progress if i == 0 else None,
+            )
+        )
+
+    while True:
+        batch = tuple(list(itertools.islice(g, batch_size)) for g in fq_generators)
+        sizes = set(len(records) for records in batch)
+        if len(sizes) > 1:
+            raise ValueError(
+                "FASTQ files do not contain the same number of records "
+                "({})".format(", ".join(fnames))
+            )
+        if sizes == {0} or len(sizes) == 0:
+            return
+        yield batch
+
+
+def read_fastq_range(fname, start=0, end=None, buffer_size=BUFFER_SIZE, qbase=33):
+    """
+    Generator function for reading the FASTQ_ records between the byte
+    offsets *start* and *end* of an uncompressed FASTQ_ file, such as the
+    records added to a file since it was last read. Yields a tuple of an
+    :py:class:`~FQRead` object and the byte offset just past the end of that
+    record, from which reading can continue later.
+
+    *start* must be the offset of the start of a record. Records that are
+    not terminated by a newline before *end* are not read, so a record that
+    is still being written is left for the next read.
+
+    Parameters
+    ----------
+    fname : `str`
+        Path to the fastq file.
+    start : `int`, default: 0
+        Byte offset of the first record to read.
+    end : `int`, default: None
+        Byte offset to stop reading at, or ``None`` for the current size of
+        the file.
+    buffer_size : `int`, default: 100000
+        Number of bytes to read at a time.
+    qbase : `int`, default: 33
+        Integer ASCII value that correponds to Phred score of 0
+
+    Returns
+    -------
+    `generator`
+        A generator of tuples of a :py:class:`~FQRead` object and an `int`.
+    """
+    _, _, ext, compression = split_fastq_path(fname)
+    if compression is not None or ext not in (".fq", ".fastq"):
+        raise IOError(
+            "Only uncompressed FASTQ files can be read by byte offset "
+            "'{}'".format(fname)
+        )
+    if end is None:
+        end = os.path.getsize(fname)
+
+    offset = start
+    leftover = b""
+    with open(fname, "rb") as handle:
+        handle.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            buf = handle.read(min(buffer_size, remaining))
+            if len(buf) == 0:
+                break
+            remaining -= len(buf)
+
+            # the last line has no newline yet, so it is always left over
+            lines = (leftover + buf).split(b"\n")
+            fastq_count = (len(lines) - 1) // 4
+            for i in range(fastq_count):
+                record = lines[i * 4 : (i + 1) * 4]
+                offset += sum(len(x) for x in record) + 4
+                fq = FQRead(
+                    *(x.decode("ascii").rstrip("\r") for x in record), qbase=qbase
+                )
+                yield fq, offset
+            leftover = b"\n".join(lines[fastq_count * 4 :])
+
+
 def fastq_filter_chastity(fq):
     """
     Filtering function for :py:func:`read_fastq` and 
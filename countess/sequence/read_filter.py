@@ -0,0 +1,370 @@
+"""
+Enrich2 sequence read_filter module
+===================================
+
+Contains the ``ReadFilter`` class, which compiles the FASTQ_ read filters of
+a :py:class:`~enrich2.libraries.seqlib.SeqLib` into an ordered pipeline of
+checks that is applied to single reads or to batches of reads, and the
+``ReadBlock`` class, which holds a batch of reads as 2-D arrays for the
+batch checks.
+"""
+
+
+import sys
+import itertools
+from collections import OrderedDict
+
+import numpy as np
+
+
+__all__ = ["ReadFilter", "ReadBlock", "fast_is_chaste"]
+
+
+#: Quality value of the padding after the end of a shorter read in a
+#: :py:class:`ReadBlock`, which is higher than any real quality value.
+QUALITY_PAD = 255
+
+
+def fast_is_chaste(fq):
+    """
+    Returns ``True`` if the chastity bit is set in the header of the
+    :py:class:`~enrich2.sequence.fqread.FQRead` *fq*.
+
+    The chastity bit is read from its fixed position just before the ``'#'``
+    of a header in the format matched by
+    :py:data:`~enrich2.sequence.fqread.header_pattern`. Headers that do not
+    have a chastity bit at that position are checked with
+    :py:meth:`~enrich2.sequence.fqread.FQRead.is_chaste`, which raises an
+    error for headers in an unexpected format.
+
+    Parameters
+    ----------
+    fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+        The read to check.
+
+    Returns
+    -------
+    `bool`
+    """
+    header = fq.header
+    i = header.rfind("#")
+    if i >= 2 and header[i - 2] == ":":
+        bit = header[i - 1]
+        if bit == "1":
+            return True
+        elif bit == "0":
+            return False
+    return fq.is_chaste()
+
+
+class ReadBlock(object):
+    """
+    The sequences and quality values of a batch of reads as 2-D arrays with
+    one row per read.
+
+    Sequences are stored as ASCII codes, padded with ``0`` after the end of
+    shorter reads, and quality values are padded with
+    :py:data:`QUALITY_PAD`. Both are `uint8` arrays, unless a read has
+    quality values below ``0`` for its quality base, in which case the
+    quality values are `int16`.
+
+    Blocks are created with :py:meth:`from_reads` from
+    :py:class:`~enrich2.sequence.fqread.FQRead` objects, or more quickly
+    with :py:meth:`from_strings` from the sequence and quality lines of
+    FASTQ_ records.
+
+    Parameters
+    ----------
+    sequences : :py:class:`numpy.ndarray`
+        Sequence block.
+    qualities : :py:class:`numpy.ndarray`
+        Quality block.
+    lengths : :py:class:`numpy.ndarray`
+        Length of each read.
+
+    Attributes
+    ----------
+    sequences : :py:class:`numpy.ndarray`
+        Sequence block.
+    qualities : :py:class:`numpy.ndarray`
+        Quality block.
+    lengths : :py:class:`numpy.ndarray`
+        Length of each read.
+    """
+
+    def __init__(self, sequences, qualities, lengths):
+        self.sequences = sequences
+        self.qualities = qualities
+        self.lengths = lengths
+
+    @classmethod
+    def from_strings(cls, sequences, qualities, qbase=33):
+        """
+        Returns the block of the reads with the sequence strings *sequences*
+        and the FASTQ_ quality strings *qualities*.
+
+        Parameters
+        ----------
+        sequences : `list`
+            Sequence of each read.
+        qualities : `list`
+            Quality string of each read.
+        qbase : `int`
+            ASCII value that corresponds to a quality of 0.
+
+        Returns
+        -------
+        :py:class:`ReadBlock`
+        """
+        n = len(sequences)
+        lengths = np.fromiter((len(x) for x in sequences), np.int64, n)
+        seq_codes = np.frombuffer("".join(sequences).encode("ascii"), np.uint8)
+        qual_codes = np.frombuffer("".join(qualities).encode("ascii"), np.uint8)
+        if len(qual_codes) != len(seq_codes):
+            raise ValueError("Sequence and quality lengths do not match")
+        return cls._from_codes(seq_codes, qual_codes.astype(np.int16) - qbase, lengths)
+
+    @classmethod
+    def from_reads(cls, reads):
+        """
+        Returns the block of the :py:class:`~enrich2.sequence.fqread.FQRead`
+        objects *reads*.
+
+        Parameters
+        ----------
+        reads : `list`
+            List of :py:class:`~enrich2.sequence.fqread.FQRead` objects.
+
+        Returns
+        -------
+        :py:class:`ReadBlock`
+        """
+        n = len(reads)
+        lengths = np.fromiter((len(fq.sequence) for fq in reads), np.int64, n)
+        seq_codes = np.frombuffer(
+            "".join(fq.sequence for fq in reads).encode("ascii"), np.uint8
+        )
+        qual_codes = np.fromiter(
+            itertools.chain.from_iterable(fq.quality for fq in reads),
+            np.int16,
+            int(lengths.sum()),
+        )
+        return cls._from_codes(seq_codes, qual_codes, lengths)
+
+    @classmethod
+    def _from_codes(cls, seq_codes, qual_codes, lengths):
+        n = len(lengths)
+        width = int(lengths.max()) if n > 0 else 0
+        if n == 0 or (lengths == width).all():
+            # all reads have the same length
+            sequences = seq_codes.reshape(n, width)
+            qualities = qual_codes.reshape(n, width)
+        else:
+            valid = np.arange(width) < lengths[:, np.newaxis]
+            sequences = np.zeros((n, width), dtype=np.uint8)
+            sequences[valid] = seq_codes
+            qualities = np.full((n, width), QUALITY_PAD, dtype=np.int16)
+            qualities[valid] = qual_codes
+        if qualities.size == 0 or qualities.min() >= 0:
+            qualities = qualities.astype(np.uint8)
+        return cls(sequences, qualities, lengths)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @property
+    def width(self):
+        """
+        Length of the longest read.
+        """
+        return self.sequences.shape[1]
+
+    def count_bases(self, *bases):
+        """
+        Returns the number of each read's bases that are one of *bases*.
+        """
+        found = np.zeros(self.sequences.shape, dtype=bool)
+        for base in bases:
+            found |= self.sequences == ord(base)
+        return found.sum(axis=1)
+
+    def min_quality(self):
+        """
+        Returns the minimum quality value of each read.
+        """
+        return self.qualities.min(axis=1)
+
+    def mean_quality(self):
+        """
+        Returns the average quality value of each read.
+        """
+        total = self.qualities.sum(axis=1, dtype=np.int64)
+        total -= QUALITY_PAD * (self.width - self.lengths)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return total / self.lengths
+
+
+class ReadFilter(object):
+    """
+    Read filters compiled into an ordered pipeline of checks.
+
+    Only the enabled filters are compiled, cheapest first: chastity, then
+    unresolvable bases, excess N bases, single-base quality and average
+    quality. Unless *exhaustive* is set, a read is rejected by the first
+    filter it fails and the remaining filters are not checked, so each
+    rejected read is counted for one filter only. With *exhaustive* set,
+    every filter is checked and a read is counted for every filter it
+    fails, as needed to report the reasons a read was filtered.
+
+    All filters except chastity also have a batch version that checks a
+    :py:class:`ReadBlock` with array operations, which :py:meth:`mask`
+    uses instead of checking the reads one at a time.
+
+    Parameters
+    ----------
+    filters : `dict`
+        The filter settings of a
+        :py:class:`~enrich2.libraries.seqlib.SeqLib`.
+    exhaustive : `bool`
+        Check every filter for each read.
+
+    Attributes
+    ----------
+    stages : `list`
+        List of tuples of a filter name and a function that returns ``True``
+        if a read fails the filter, in the order they are checked.
+    batch_checks : `dict`
+        Dictionary of filter names and functions that return a boolean
+        array that is ``True`` for the reads of a :py:class:`ReadBlock` that
+        fail the filter.
+    exhaustive : `bool`
+        Check every filter for each read.
+
+    Methods
+    -------
+    check
+        Returns the filters failed by a read.
+    mask
+        Returns the reads of a batch that pass the filters.
+    """
+
+    def __init__(self, filters, exhaustive=False):
+        self.exhaustive = exhaustive
+        self.stages = list()
+        self.batch_checks = dict()
+
+        if filters.get("chastity", False):
+            self.stages.append(("chastity", lambda fq: not fast_is_chaste(fq)))
+
+        if filters.get("remove unresolvable", False):
+            self.stages.append(("remove unresolvable", lambda fq: "X" in fq.sequence))
+            self.batch_checks["remove unresolvable"] = (
+                lambda block: block.count_bases("X") > 0
+            )
+
+        max_n = filters.get("max N", sys.maxsize)
+        if 0 <= max_n < sys.maxsize:
+            self.stages.append(
+                (
+                    "max N",
+                    lambda fq: fq.sequence.count("N") + fq.sequence.count("n")
+                    > max_n,
+                )
+            )
+            self.batch_checks["max N"] = (
+                lambda block: block.count_bases("N", "n") > max_n
+            )
+
+        min_quality = filters.get("min quality", 0)
+        if min_quality > 0:
+            self.stages.append(
+                ("min quality", lambda fq: min(fq.quality) < min_quality)
+            )
+            self.batch_checks["min quality"] = (
+                lambda block: block.min_quality() < min_quality
+            )
+
+        avg_quality = filters.get("avg quality", 0)
+        if avg_quality > 0:
+            self.stages.append(
+                (
+                    "avg quality",
+                    lambda fq: float(sum(fq.quality)) / len(fq) < avg_quality,
+                )
+            )
+            self.batch_checks["avg quality"] = (
+                lambda block: block.mean_quality() < avg_quality
+            )
+
+    def check(self, fq):
+        """
+        Returns the names of the filters failed by the
+        :py:class:`~enrich2.sequence.fqread.FQRead` *fq*, which is empty if
+        the read passes. Unless :py:attr:`exhaustive` is set, only the first
+        filter failed is returned.
+
+        Parameters
+        ----------
+        fq : :py:class:`~enrich2.sequence.fqread.FQRead`
+            The read to check.
+
+        Returns
+        -------
+        `list`
+        """
+        failed = list()
+        for key, fails in self.stages:
+            if fails(fq):
+                failed.append(key)
+                if not self.exhaustive:
+                    break
+        return failed
+
+    def mask(self, reads, block=None):
+        """
+        Checks a batch of reads one filter at a time. Unless
+        :py:attr:`exhaustive` is set, each filter only counts the reads
+        that passed the earlier filters, so the counts match
+        :py:meth:`check`.
+
+        Filters with a batch version check all of the reads at once in a
+        :py:class:`ReadBlock`. Other filters check the reads one at a time,
+        skipping the reads that already failed unless :py:attr:`exhaustive`
+        is set.
+
+        Parameters
+        ----------
+        reads : `list`
+            List of :py:class:`~enrich2.sequence.fqread.FQRead` objects.
+        block : :py:class:`ReadBlock`
+            The reads as a :py:class:`ReadBlock`, or ``None`` to create it
+            if needed.
+
+        Returns
+        -------
+        `tuple`
+            A boolean :py:class:`numpy.ndarray` that is ``True`` for the
+            reads that pass, and an ordered dictionary of the number of reads
+            that failed each filter, including a ``'total'``.
+        """
+        keep = np.ones(len(reads), dtype=bool)
+        counts = OrderedDict()
+        for key, fails in self.stages:
+            if key in self.batch_checks:
+                if block is None:
+                    block = ReadBlock.from_reads(reads)
+                failed = self.batch_checks[key](block)
+                if not self.exhaustive:
+                    failed &= keep
+                counts[key] = int(failed.sum())
+                keep &= ~failed
+                continue
+            if self.exhaustive:
+                idx = np.arange(len(reads))
+            else:
+                idx = np.flatnonzero(keep)
+            failed = np.fromiter((fails(reads[i]) for i in idx), bool, len(idx))
+            counts[key] = int(failed.sum())
+            keep[idx[failed]] = False
+        counts["total"] = int(len(reads) - keep.sum())
+        return keep, counts
@@ -15,12 +15,14 @@
 #  You should have received a copy of the GNU General Public License
 #  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
 
+import pandas as pd
 import dask.dataframe as dd
 import numpy as np
 import json
-from typing import Union, Sequence, Mapping, Any, Dict
+from dask.utils import natural_sort_key
+from typing import Union, Sequence, Mapping, Any, Dict, Optional, Iterator, List
 from os import PathLike
-from countess.store.interface import StoreInterface
+from countess.store.interface import StoreInterface, has_rows, rechunk
 
 
 class CsvStore(StoreInterface):
@@ -42,6 +44,7 @@ class CsvStore(StoreInterface):
 
     file_extensions = (".csv",)
     _metadata_file_name = "countess_metadata.json"
+    chunksize = 100000
 
     def __init__(self, path: Union[PathLike, str]) -> None:
         super().__init__(path)
@@ -76,6 +79,18 @@ class CsvStore(StoreInterface):
         with self._key_file.open(mode="w") as handle:
             json.dump(self.keys(), handle, indent=2)
 
+    def _data_files(self, key: str) -> List[str]:
+        """Returns the paths of the csv files for key in partition order.
+
+        Files are sorted so that "data-10.csv" comes after "data-9.csv",
+        matching the order used by Dask.
+
+        """
+        return sorted(
+            (str(p) for p in self.path.joinpath(key).glob(f"data-*{self._csv_suffix}")),
+            key=natural_sort_key,
+        )
+
     def put(self, key: str, value: dd.DataFrame) -> None:
         """
         Stores a data frame in the HDF file under the given key.
@@ -232,10 +247,129 @@ class CsvStore(StoreInterface):
                 result = result.merge(
                     self.get(key), how="inner", left_index=True, right_index=True
                 )
-        if result.shape[0].compute() == 0:
+        if not has_rows(result):
             raise ValueError(f"{self.__class__.__name__} merge result is empty")
         return result
 
+    def select(
+        self,
+        key: str,
+        index: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns some or all of the data at key as a pandas DataFrame.
+
+        Only the requested columns are parsed. When index values are given,
+        the files are read in chunks and filtered as they are read, so the
+        whole table is never held in memory.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        index: Optional[Sequence[Any]]
+            Index values of the rows to return. Default None returns all rows.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+
+        Returns
+        -------
+        :py:class:`~pandas.DataFrame`
+            The selected data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        usecols = None if columns is None else ["index", *columns]
+        if index is None:
+            frames = [
+                pd.read_csv(f, index_col="index", usecols=usecols)
+                for f in self._data_files(key)
+            ]
+        else:
+            index_values = pd.Index(list(index))
+            frames = [
+                chunk.loc[chunk.index.isin(index_values)]
+                for f in self._data_files(key)
+                for chunk in pd.read_csv(
+                    f, index_col="index", usecols=usecols, chunksize=self.chunksize
+                )
+            ]
+        df = pd.concat(frames)
+        if columns is not None:
+            df = df[list(columns)]
+        return df
+
+    def append(self, key: str, value: Union[pd.DataFrame, dd.DataFrame]) -> None:
+        """
+        Appends the rows of a data frame to the table stored under key.
+
+        If the key is not in the store, a new table is created. The appended
+        rows are written as new csv files numbered after the existing ones.
+
+        Parameters
+        ----------
+        key:  str
+            Name of the data frame in the store.
+        value : Union[pd.DataFrame, dd.DataFrame]
+            The pandas or Dask data frame to append.
+
+        """
+        if isinstance(value, pd.DataFrame):
+            value = dd.from_pandas(value, npartitions=1)
+        if key not in self.keys():
+            self.put(key, value)
+        else:
+            offset = len(self._data_files(key))
+            value.to_csv(
+                str(self.path.joinpath(key, f"data-*{self._csv_suffix}")),
+                name_function=lambda i: str(offset + i),
+            )
+
+    def iter_chunks(
+        self, key: str, chunksize: int, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterates over the data at key as pandas DataFrames of chunksize rows.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        chunksize: int
+            Number of rows in each chunk. Only the last chunk may be shorter.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+
+        Returns
+        -------
+        Iterator[pd.DataFrame]
+            The data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        usecols = None if columns is None else ["index", *columns]
+        chunks = (
+            chunk if columns is None else chunk[list(columns)]
+            for f in self._data_files(key)
+            for chunk in pd.read_csv(
+                f, index_col="index", usecols=usecols, chunksize=chunksize
+            )
+        )
+        return rechunk(chunks, chunksize)
+
     def set_metadata(
         self, key: str, metadata: Dict[str, Any], update: bool = False
     ) -> None:
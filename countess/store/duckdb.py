@@ -0,0 +1,700 @@
+#  Copyright 2016-2017 Alan F Rubin, Daniel C Esposito
+#
+#  This file is part of Enrich2.
+#
+#  Enrich2 is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Enrich2 is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
+
+import pandas as pd
+import dask
+import dask.dataframe as dd
+import numpy as np
+import json
+import duckdb
+from dask.delayed import Delayed
+from typing import Union, Sequence, Mapping, Any, Dict, Optional, Iterator, List
+from os import PathLike
+from countess.store.interface import StoreInterface, rechunk
+
+
+def quote_identifier(name: str) -> str:
+    """Returns name quoted for use as a DuckDB table or column identifier."""
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _read_query(
+    path: str,
+    config: Dict[str, Any],
+    query: str,
+    parameters: Sequence[Any],
+    index_name: Optional[str],
+) -> pd.DataFrame:
+    """Runs query on the database file at path and returns the result with its
+    pandas index restored.
+
+    Used by the Dask tasks of get() and get_with_merge(). Each task opens its
+    own connection, so the tasks can be pickled and run in other processes.
+
+    """
+    with duckdb.connect(path, config=config) as connection:
+        df = connection.execute(query, parameters).df()
+    df = df.set_index(DuckDbStore.index_column)
+    df.index.name = index_name
+    return df
+
+
+class DuckDbStore(StoreInterface):
+    """
+    Implementation for using a DuckDB database file as the storage backend.
+
+    Each key is a table in a single ``.duckdb`` file. The pandas index is
+    stored in the column named by ``index_column`` and row order is kept by
+    the table row ids. Joins, index filters and sums are executed as SQL by
+    DuckDB, which runs them on multiple threads and spills to disk when they
+    do not fit in memory.
+
+    The database is only opened while a method runs, or while a partition of
+    a Dask data frame is computed, so the partitions can be computed by other
+    processes.
+
+    Parameters
+    ----------
+    path: str
+        Path to a new or existing DuckDB database file.
+    threads: Optional[int]
+        Number of threads DuckDB may use. Default None uses all cores.
+    memory_limit: Optional[str]
+        Memory limit for DuckDB such as ``"4GB"``. Larger operations spill to
+        a temporary directory next to the database. Default None uses the
+        DuckDB default.
+
+    Attributes
+    ----------
+    chunksize: int
+        Number of rows in each partition of the Dask data frames returned by
+        get(), and number of rows of the first table in each partition of the
+        data frames returned by get_with_merge().
+
+    See Also
+    --------
+
+    """
+
+    file_extensions = (".duckdb", ".db")
+    index_column = "__index__"
+    chunksize = 100000
+    _catalog_table = "_countess_tables"
+
+    def __init__(
+        self,
+        path: Union[PathLike, str],
+        threads: Optional[int] = None,
+        memory_limit: Optional[str] = None,
+    ) -> None:
+        super().__init__(path)
+
+        self._config = dict()
+        if threads is not None:
+            self._config["threads"] = int(threads)
+        if memory_limit is not None:
+            self._config["memory_limit"] = memory_limit
+        with self._connect() as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._catalog_table} "
+                "(key VARCHAR, position BIGINT, index_name VARCHAR, metadata VARCHAR)"
+            )
+            self._keys.extend(
+                row[0]
+                for row in connection.execute(
+                    f"SELECT key FROM {self._catalog_table} ORDER BY position"
+                ).fetchall()
+            )
+
+    def _connect(self) -> duckdb.DuckDBPyConnection:
+        """Returns a new connection to the database file."""
+        return duckdb.connect(str(self.path), config=self._config)
+
+    def close(self) -> None:
+        """Does nothing, since the database is only opened while a method
+        runs. Kept so the store can be used like the other stores."""
+
+    def _check_key(self, key: str) -> None:
+        """Raises a KeyError if key is not in the store."""
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+
+    def _columns(self, key: str) -> List[str]:
+        """Returns the names of the data columns of the table for key."""
+        with self._connect() as connection:
+            cursor = connection.execute(
+                f"SELECT * FROM {quote_identifier(key)} LIMIT 0"
+            )
+            return [d[0] for d in cursor.description if d[0] != self.index_column]
+
+    def _index_name(self, key: str) -> Optional[str]:
+        """Returns the name of the pandas index stored for key."""
+        with self._connect() as connection:
+            return connection.execute(
+                f"SELECT index_name FROM {self._catalog_table} WHERE key = ?", [key]
+            ).fetchone()[0]
+
+    def _to_frame(self, df: pd.DataFrame, index_name: Optional[str]) -> pd.DataFrame:
+        """Restores the pandas index of a query result."""
+        df = df.set_index(self.index_column)
+        df.index.name = index_name
+        return df
+
+    def _from_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Moves the pandas index of df into the index column."""
+        df = df.copy(deep=False)
+        df.index.name = self.index_column
+        return df.reset_index()
+
+    def _insert(self, key: str, df: pd.DataFrame, create: bool) -> None:
+        """Creates or appends to the table for key from a pandas data frame."""
+        with self._connect() as connection:
+            connection.register("_countess_insert", self._from_frame(df))
+            if create:
+                connection.execute(
+                    f"CREATE OR REPLACE TABLE {quote_identifier(key)} AS "
+                    "SELECT * FROM _countess_insert"
+                )
+            else:
+                connection.execute(
+                    f"INSERT INTO {quote_identifier(key)} BY NAME "
+                    "SELECT * FROM _countess_insert"
+                )
+            connection.unregister("_countess_insert")
+
+    def _delayed_query(
+        self, query: str, parameters: Sequence[Any], index_name: Optional[str]
+    ) -> Delayed:
+        """Returns a Dask task that runs query with _read_query."""
+        return dask.delayed(_read_query)(
+            str(self.path), self._config, query, parameters, index_name
+        )
+
+    def put(self, key: str, value: dd.DataFrame) -> None:
+        """
+        Stores a data frame in the database under the given key.
+
+        Partitions are computed and inserted one at a time. The database is
+        not open while a partition is computed, so the partitions may be read
+        from this store.
+
+        Parameters
+        ----------
+        key:  str
+            Name of the data frame in the store.
+        value : dd.DataFrame
+            The data frame to store.
+
+        """
+        created = False
+        for partition in value.to_delayed():
+            df = partition.compute()
+            if len(df) > 0:
+                self._insert(key, df, create=not created)
+                created = True
+        if not created:
+            self._insert(key, value._meta, create=True)
+        with self._connect() as connection:
+            if key in self.keys():
+                connection.execute(
+                    f"UPDATE {self._catalog_table} SET index_name = ? WHERE key = ?",
+                    [value.index.name, key],
+                )
+            else:
+                connection.execute(
+                    f"INSERT INTO {self._catalog_table} VALUES "
+                    f"(?, (SELECT coalesce(max(position) + 1, 0) "
+                    f"FROM {self._catalog_table}), ?, NULL)",
+                    [key, value.index.name],
+                )
+                self._keys.append(key)
+
+    def drop(self, key: str) -> None:
+        """
+        Remove a table and its data from the store.
+
+        Parameters
+        ----------
+        key: str
+            Name of the table to remove.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        self._check_key(key)
+        with self._connect() as connection:
+            connection.execute(f"DROP TABLE {quote_identifier(key)}")
+            connection.execute(
+                f"DELETE FROM {self._catalog_table} WHERE key = ?", [key]
+            )
+        self._keys.remove(key)
+
+    def nrows(self, key: str) -> int:
+        """
+        Returns the number of rows in the table at key.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+
+        Returns
+        -------
+        int
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        self._check_key(key)
+        with self._connect() as connection:
+            return connection.execute(
+                f"SELECT count(*) FROM {quote_identifier(key)}"
+            ).fetchone()[0]
+
+    def get(self, key: str) -> dd.DataFrame:
+        """
+        Returns the data at key as a dask DataFrame.
+
+        Each partition is read by a separate query when it is computed.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+
+        Returns
+        -------
+        :py:class:`~dask.dataframe.DataFrame`
+            The data frame stored under key.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        rows = self.nrows(key)
+        index_name = self._index_name(key)
+        query = (
+            f"SELECT * FROM {quote_identifier(key)} "
+            "WHERE rowid >= ? AND rowid < ? ORDER BY rowid"
+        )
+        meta = _read_query(str(self.path), self._config, query, [0, 0], index_name)
+        if rows == 0:
+            return dd.from_pandas(meta, npartitions=1)
+        partitions = [
+            self._delayed_query(query, [start, start + self.chunksize], index_name)
+            for start in range(0, rows, self.chunksize)
+        ]
+        return dd.from_delayed(partitions, meta=meta)
+
+    def get_column(self, key: str, column: str) -> np.ndarray:
+        """
+        Returns the values of a single column of the data frame stored under key.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        column: name
+            The name of a single column in the data
+
+        Returns
+        -------
+        :py:class:`~numpy.ndarray`
+            The column's values.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store or the column is not in the data.
+
+        """
+        self._check_key(key)
+        if column not in self._columns(key):
+            raise KeyError(
+                f"{self.__class__.__name__} key '{key}' does not contain column '{column}'"
+            )
+        with self._connect() as connection:
+            df = connection.execute(
+                f"SELECT {quote_identifier(column)} FROM {quote_identifier(key)} "
+                "ORDER BY rowid"
+            ).df()
+        return df[column].values
+
+    def get_with_merge(self, keys: Sequence[str]) -> dd.DataFrame:
+        """
+        Returns a single data frame that is the result of merging multiple keys
+        on the data frame indices.
+
+        This performs an inner join, meaning that the index will contain only
+        those values that are shared across all keys. The order of items in the
+        index will be the same as in the first of the keys.
+
+        Passing in keys that share column names will result in columns
+        being re-labeled in the result, using the same names as a chain of
+        pandas merges.
+
+        The join is executed by DuckDB. Each partition joins a range of
+        chunksize rows of the first table with the other tables, and is only
+        queried when it is computed, so the result is never held in memory
+        as a whole.
+
+        Parameters
+        ----------
+        keys: Sequence[str]
+            The keys to access and merge.
+
+        Returns
+        -------
+        dd.DataFrame
+            Result of combining the data frames.
+
+        Raises
+        ------
+        KeyError
+            If any key is not in the store.
+        ValueError
+            If the resulting data frame is empty (no shared index values).
+
+        """
+        for key in keys:
+            self._check_key(key)
+
+        # use empty pandas frames to get the column labels pandas would use
+        sources = list()
+        labels = None
+        for i, key in enumerate(keys):
+            columns = self._columns(key)
+            sources.extend((i, c) for c in columns)
+            empty = pd.DataFrame(columns=columns)
+            if labels is None:
+                labels = empty
+            else:
+                labels = labels.merge(
+                    empty, how="inner", left_index=True, right_index=True
+                )
+
+        select = ", ".join(
+            [f"t0.{quote_identifier(self.index_column)}"]
+            + [
+                f"t{i}.{quote_identifier(c)} AS {quote_identifier(label)}"
+                for (i, c), label in zip(sources, labels.columns)
+            ]
+        )
+        tables = f"{quote_identifier(keys[0])} AS t0" + "".join(
+            f" JOIN {quote_identifier(key)} AS t{i} "
+            f"ON t0.{quote_identifier(self.index_column)} = "
+            f"t{i}.{quote_identifier(self.index_column)}"
+            for i, key in enumerate(keys)
+            if i > 0
+        )
+        with self._connect() as connection:
+            found = connection.execute(f"SELECT 1 FROM {tables} LIMIT 1").fetchone()
+        if found is None:
+            raise ValueError(f"{self.__class__.__name__} merge result is empty")
+
+        query = (
+            f"SELECT {select} FROM {tables} "
+            "WHERE t0.rowid >= ? AND t0.rowid < ? ORDER BY t0.rowid"
+        )
+        index_name = self._index_name(keys[0])
+        meta = _read_query(str(self.path), self._config, query, [0, 0], index_name)
+        partitions = [
+            self._delayed_query(query, [start, start + self.chunksize], index_name)
+            for start in range(0, self.nrows(keys[0]), self.chunksize)
+        ]
+        return dd.from_delayed(partitions, meta=meta)
+
+    def select(
+        self,
+        key: str,
+        index: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns some or all of the data at key as a pandas DataFrame.
+
+        Index values are passed to DuckDB and matched with a semi-join.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        index: Optional[Sequence[Any]]
+            Index values of the rows to return. Default None returns all rows.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+
+        Returns
+        -------
+        :py:class:`~pandas.DataFrame`
+            The selected data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        self._check_key(key)
+        if columns is None:
+            columns = self._columns(key)
+        select = ", ".join(quote_identifier(c) for c in [self.index_column, *columns])
+        query = f"SELECT {select} FROM {quote_identifier(key)}"
+        with self._connect() as connection:
+            if index is not None:
+                connection.register(
+                    "_countess_index", pd.DataFrame({"value": list(index)})
+                )
+                query += (
+                    f" WHERE {quote_identifier(self.index_column)} IN "
+                    "(SELECT value FROM _countess_index)"
+                )
+            df = connection.execute(query + " ORDER BY rowid").df()
+        return self._to_frame(df, self._index_name(key))
+
+    def append(self, key: str, value: Union[pd.DataFrame, dd.DataFrame]) -> None:
+        """
+        Appends the rows of a data frame to the table stored under key.
+
+        If the key is not in the store, a new table is created. Columns are
+        matched by name.
+
+        Parameters
+        ----------
+        key:  str
+            Name of the data frame in the store.
+        value : Union[pd.DataFrame, dd.DataFrame]
+            The pandas or Dask data frame to append.
+
+        """
+        if isinstance(value, pd.DataFrame):
+            value = dd.from_pandas(value, npartitions=1, sort=False)
+        if key not in self.keys():
+            self.put(key, value)
+        else:
+            for partition in value.to_delayed():
+                self._insert(key, partition.compute(), create=False)
+
+    def iter_chunks(
+        self, key: str, chunksize: int, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterates over the data at key as pandas DataFrames of chunksize rows.
+
+        The query result is streamed from DuckDB as Arrow record batches.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        chunksize: int
+            Number of rows in each chunk. Only the last chunk may be shorter.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+
+        Returns
+        -------
+        Iterator[pd.DataFrame]
+            The data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        self._check_key(key)
+        if columns is None:
+            columns = self._columns(key)
+        select = ", ".join(quote_identifier(c) for c in [self.index_column, *columns])
+        batches = self._stream(
+            f"SELECT {select} FROM {quote_identifier(key)} ORDER BY rowid",
+            self._index_name(key),
+            chunksize,
+        )
+        return rechunk(batches, chunksize)
+
+    def _stream(
+        self, query: str, index_name: Optional[str], batch_size: int
+    ) -> Iterator[pd.DataFrame]:
+        """Generator that streams the result of query as Arrow record batches,
+        keeping the database open until the iteration is complete."""
+        with self._connect() as connection:
+            reader = connection.execute(query).to_arrow_reader(batch_size)
+            for batch in reader:
+                yield self._to_frame(batch.to_pandas(), index_name)
+
+    def sum_by_index(
+        self, keys: Sequence[str], columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Returns the sums of columns for each index value across several keys.
+
+        This is an outer combination: index values missing from a key
+        contribute nothing to the sum. It is equivalent to chaining
+        ``DataFrame.add(..., fill_value=0)`` over the keys, as is done when
+        combining the counts of libraries from the same timepoint.
+
+        Parameters
+        ----------
+        keys: Sequence[str]
+            The keys to combine.
+        columns: Optional[Sequence[str]]
+            Names of the columns to sum. Default None uses the columns of the
+            first key.
+
+        Returns
+        -------
+        :py:class:`~pandas.DataFrame`
+            The sums, sorted by index.
+
+        Raises
+        ------
+        KeyError
+            If any key is not in the store.
+
+        """
+        for key in keys:
+            self._check_key(key)
+        if columns is None:
+            columns = self._columns(keys[0])
+        index = quote_identifier(self.index_column)
+        select = ", ".join([index, *(quote_identifier(c) for c in columns)])
+        union = " UNION ALL ".join(
+            f"SELECT {select} FROM {quote_identifier(key)}" for key in keys
+        )
+        sums = ", ".join(
+            f"sum({quote_identifier(c)}) AS {quote_identifier(c)}" for c in columns
+        )
+        with self._connect() as connection:
+            df = connection.execute(
+                f"SELECT {index}, {sums} FROM ({union}) "
+                f"GROUP BY {index} ORDER BY {index}"
+            ).df()
+        return self._to_frame(df, self._index_name(keys[0]))
+
+    def column_sums(
+        self, key: str, columns: Optional[Sequence[str]] = None
+    ) -> pd.Series:
+        """
+        Returns the sum of each column of the data frame stored under key,
+        such as the total counts used to normalize scores. Missing values
+        are skipped.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        columns: Optional[Sequence[str]]
+            Names of the columns to sum. Default None sums all columns.
+
+        Returns
+        -------
+        :py:class:`~pandas.Series`
+            The sums, indexed by column name.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        self._check_key(key)
+        if columns is None:
+            columns = self._columns(key)
+        sums = ", ".join(
+            f"coalesce(sum({quote_identifier(c)}), 0) AS {quote_identifier(c)}"
+            for c in columns
+        )
+        with self._connect() as connection:
+            df = connection.execute(f"SELECT {sums} FROM {quote_identifier(key)}").df()
+        return df.iloc[0]
+
+    def set_metadata(
+        self, key: str, metadata: Dict[str, Any], update: bool = False
+    ) -> None:
+        """
+        Sets the metadata of the data frame located at key with the supplied
+        key-value pairs.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        metadata : Dict[str, Any]
+            The metadata to store.
+        update : bool
+            Update the metadata instead of replacing it. Default False.
+
+        Raises
+        ------
+        KeyError
+            If any key is not in the store.
+        TypeError
+            If the metadata is not a Mapping.
+
+        """
+        self._check_key(key)
+        if not isinstance(metadata, Mapping):
+            raise TypeError(f"{self.__class__.__name__} must be a Mapping")
+
+        if update:
+            existing = self.get_metadata(key)
+            metadata.update(existing)
+        with self._connect() as connection:
+            connection.execute(
+                f"UPDATE {self._catalog_table} SET metadata = ? WHERE key = ?",
+                [json.dumps(metadata), key],
+            )
+
+    def get_metadata(self, key: str) -> Dict[str, Any]:
+        """
+        Returns the metadata of the data frame located at key.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The metadata.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        self._check_key(key)
+        with self._connect() as connection:
+            metadata = connection.execute(
+                f"SELECT metadata FROM {self._catalog_table} WHERE key = ?", [key]
+            ).fetchone()[0]
+        if metadata is None:
+            return {}
+        else:
+            return json.loads(metadata)
@@ -0,0 +1,136 @@
+#  Copyright 2016-2017 Alan F Rubin, Daniel C Esposito
+#
+#  This file is part of Enrich2.
+#
+#  Enrich2 is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Enrich2 is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import dask
+from typing import Any, Dict, Iterator, Optional
+
+
+SCHEDULERS = ("threads", "processes", "synchronous", "local-cluster")
+
+
+class Execution(object):
+    """Selects the Dask scheduler used to compute the data frames returned by
+    the stores.
+
+    The stores compute Dask data frames with the scheduler that is active
+    when they are called, so running an analysis inside :py:meth:`activate`
+    applies the same scheduler to every store and scorer.
+
+    Parameters
+    ----------
+    scheduler: str
+        One of "threads", "processes", "synchronous" or "local-cluster".
+        "local-cluster" starts a ``distributed.LocalCluster`` in this process
+        and requires the distributed package.
+    workers: Optional[int]
+        Number of worker threads, processes or cluster workers. None uses the
+        Dask default of one per core.
+    memory_limit: Optional[int]
+        Memory limit in megabytes for each cluster worker, past which the
+        worker spills data to disk. Only used by "local-cluster".
+
+    """
+
+    def __init__(
+        self,
+        scheduler: str = "threads",
+        workers: Optional[int] = None,
+        memory_limit: Optional[int] = None,
+    ) -> None:
+        if scheduler not in SCHEDULERS:
+            raise ValueError(
+                f"scheduler must be one of {', '.join(SCHEDULERS)} [{scheduler}]"
+            )
+        if workers is not None and workers < 1:
+            raise ValueError(f"workers must be positive [{workers}]")
+        if memory_limit is not None:
+            if memory_limit < 1:
+                raise ValueError(f"memory_limit must be positive [{memory_limit}]")
+            if scheduler != "local-cluster":
+                raise ValueError(
+                    f"memory_limit requires the local-cluster scheduler [{scheduler}]"
+                )
+        self.scheduler = scheduler
+        self.workers = workers
+        self.memory_limit = memory_limit
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Execution):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(scheduler={self.scheduler!r}, "
+            f"workers={self.workers!r}, memory_limit={self.memory_limit!r})"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the settings as keyword arguments for the constructor."""
+        return {
+            "scheduler": self.scheduler,
+            "workers": self.workers,
+            "memory_limit": self.memory_limit,
+        }
+
+    def dask_config(self) -> Dict[str, Any]:
+        """Returns the Dask configuration for the "threads", "processes" and
+        "synchronous" schedulers.
+
+        Returns
+        -------
+        Dict[str, Any]
+
+        """
+        if self.scheduler == "local-cluster":
+            raise ValueError("the local-cluster scheduler is set by a client")
+        config = {"scheduler": self.scheduler}
+        if self.workers is not None and self.scheduler != "synchronous":
+            config["num_workers"] = self.workers
+        return config
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator[None]:
+        """Context manager that makes this the scheduler for all Dask
+        computations, and shuts down the local cluster on exit.
+
+        Raises
+        ------
+        ImportError
+            If the local-cluster scheduler is used without the distributed
+            package.
+
+        """
+        if self.scheduler != "local-cluster":
+            with dask.config.set(self.dask_config()):
+                yield
+            return
+
+        try:
+            from distributed import Client, LocalCluster
+        except ImportError:
+            raise ImportError(
+                "the local-cluster scheduler requires the distributed package"
+            )
+        kwargs = {"processes": False, "threads_per_worker": 1}
+        if self.workers is not None:
+            kwargs["n_workers"] = self.workers
+        if self.memory_limit is not None:
+            kwargs["memory_limit"] = f"{self.memory_limit}MB"
+        with LocalCluster(**kwargs) as cluster, Client(cluster):
+            yield
@@ -0,0 +1,569 @@
+#  Copyright 2016-2017 Alan F Rubin, Daniel C Esposito
+#
+#  This file is part of Enrich2.
+#
+#  Enrich2 is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Enrich2 is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
+
+import pandas as pd
+import dask
+import dask.dataframe as dd
+import numpy as np
+import json
+import os
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Union, Sequence, Mapping, Any, Dict, Optional, Iterator, List
+from os import PathLike
+from countess.store.interface import StoreInterface, rechunk
+
+
+class FeatherStore(StoreInterface):
+    """
+    Implementation for using Arrow IPC (Feather version 2) files as the
+    storage backend.
+
+    Each key is a directory containing a single uncompressed Arrow IPC file.
+    Files are memory-mapped when read, so there is no decompression or
+    decoding step and only the selected columns and record batches are paged
+    in. This suits intermediate tables that are written once and read many
+    times within a run.
+
+    Parameters
+    ----------
+    path: str
+        Path to a new or existing directory for the Arrow files.
+
+    Attributes
+    ----------
+    batch_size: int
+        Maximum number of rows in each record batch. Record batches are the
+        unit of reading for get() and iter_chunks().
+
+    See Also
+    --------
+    ParquetStore
+
+    """
+
+    file_extensions = (".feather", ".arrow")
+    _metadata_file_name = "countess_metadata.json"
+    _data_file_name = "data.arrow"
+    batch_size = 100000
+
+    def __init__(self, path: Union[PathLike, str]) -> None:
+        super().__init__(path)
+
+        self._key_file = self.path.joinpath("dataset_keys.json")
+        if self.path.is_dir():
+            if self._key_file.exists():
+                self._keys.extend(self._read_key_file())
+            else:
+                raise ValueError(f"unable to read keys for {self.__class__.__name__}")
+        else:
+            # will raise a FileExistsError if the path exists
+            self.path.mkdir(parents=True)
+            self._write_key_file()
+
+    def _read_key_file(self) -> List[str]:
+        """Returns the keys listed in the key file.
+
+        Raises
+        ------
+        ValueError
+            If the key file is not a JSON list of distinct strings, or if the
+            Arrow file of any key is missing.
+
+        """
+        with self._key_file.open() as handle:
+            try:
+                keys = json.load(handle)
+            except json.JSONDecodeError:
+                raise ValueError(f"unable to read keys for {self.__class__.__name__}")
+        if not isinstance(keys, list) or not all(isinstance(k, str) for k in keys):
+            raise ValueError(
+                f"keys for {self.__class__.__name__} must be a list of strings"
+            )
+        if len(set(keys)) != len(keys):
+            raise ValueError(f"duplicate keys for {self.__class__.__name__}")
+        missing = [k for k in keys if not os.path.isfile(self._data_file(k))]
+        if len(missing) > 0:
+            raise ValueError(
+                f"{self.__class__.__name__} is missing the data for keys "
+                f"{', '.join(missing)}"
+            )
+        return keys
+
+    def _write_key_file(self) -> None:
+        """Writes the contents of self.keys() to the key file.
+
+        This is required after put() and drop() operations to keep the keys in
+        the file in sync with what's in the data structure.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._key_file.open(mode="w") as handle:
+            json.dump(self.keys(), handle, indent=2)
+
+    def _data_file(self, key: str) -> str:
+        """Returns the path of the Arrow file for key."""
+        return str(self.path.joinpath(key, self._data_file_name))
+
+    def _open(self, key: str) -> pa.ipc.RecordBatchFileReader:
+        """Returns a reader for the memory-mapped Arrow file for key.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        return pa.ipc.open_file(pa.memory_map(self._data_file(key)))
+
+    @staticmethod
+    def _index_columns(schema: pa.Schema) -> List[str]:
+        """Returns the names of the columns holding the pandas index."""
+        pandas_metadata = schema.pandas_metadata or {}
+        return [
+            c for c in pandas_metadata.get("index_columns", []) if isinstance(c, str)
+        ]
+
+    def _write_batches(self, key: str, batches: Iterator[pd.DataFrame]) -> None:
+        """Writes data frames as record batches of a new Arrow file for key.
+
+        The file is written next to the existing file and moved into place
+        once complete, so existing memory maps remain valid.
+
+        """
+        key_path = self.path.joinpath(key)
+        key_path.mkdir(parents=True, exist_ok=True)
+        temp_path = f"{self._data_file(key)}.{os.getpid()}.tmp"
+        writer = None
+        schema = None
+        try:
+            for df in batches:
+                table = pa.Table.from_pandas(df, schema=schema, preserve_index=True)
+                if writer is None:
+                    schema = table.schema
+                    writer = pa.ipc.new_file(temp_path, schema)
+                for batch in table.to_batches(max_chunksize=self.batch_size):
+                    writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is not None:
+            os.replace(temp_path, self._data_file(key))
+
+    def put(self, key: str, value: dd.DataFrame) -> None:
+        """
+        Stores a data frame in the store under the given key.
+
+        Partitions are computed and written one at a time. Column types are
+        taken from the first non-empty partition.
+
+        Parameters
+        ----------
+        key:  str
+            Name of the data frame in the store.
+        value : dd.DataFrame
+            The data frame to store.
+
+        """
+        self._write_batches(key, self._partitions(value))
+        if key not in self.keys():
+            self._keys.append(key)
+        self._write_key_file()
+
+    @staticmethod
+    def _partitions(value: dd.DataFrame) -> Iterator[pd.DataFrame]:
+        """Yields the non-empty partitions of value, or one empty data frame
+        if there are none."""
+        empty = True
+        for partition in value.to_delayed():
+            df = partition.compute()
+            if len(df) > 0:
+                empty = False
+                yield df
+        if empty:
+            yield value._meta
+
+    def drop(self, key: str) -> None:
+        """
+        Remove a table and its data from the store.
+
+        Parameters
+        ----------
+        key: str
+            Name of the table to remove.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+        ValueError
+            If the key's directory contains files not written by the store.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        else:
+            for child in self.path.joinpath(key).iterdir():
+                if child.name in (self._data_file_name, self._metadata_file_name):
+                    child.unlink()
+            try:
+                self.path.joinpath(key).rmdir()
+            except OSError:
+                raise ValueError(
+                    f"unexpected files remaining in {self.__class__.__name__} directory"
+                )
+            self._keys.remove(key)
+            self._write_key_file()
+
+    def get(self, key: str) -> dd.DataFrame:
+        """
+        Returns the data at key as a dask DataFrame.
+
+        Each record batch becomes one partition.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+
+        Returns
+        -------
+        :py:class:`~dask.dataframe.DataFrame`
+            The data frame stored under key.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        reader = self._open(key)
+        meta = reader.schema.empty_table().to_pandas()
+        if reader.num_record_batches == 0:
+            return dd.from_pandas(meta, npartitions=1)
+        path = self._data_file(key)
+        partitions = [
+            dask.delayed(_read_batch)(path, i) for i in range(reader.num_record_batches)
+        ]
+        return dd.from_delayed(partitions, meta=meta)
+
+    def get_column(self, key: str, column: str) -> np.ndarray:
+        """
+        Returns the values of a single column of the data frame stored under key.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        column: name
+            The name of a single column in the data
+
+        Returns
+        -------
+        :py:class:`~numpy.ndarray`
+            The column's values.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store or the column is not in the data.
+
+        """
+        table = self._open(key).read_all()
+        if column not in table.column_names or column in self._index_columns(
+            table.schema
+        ):
+            raise KeyError(
+                f"{self.__class__.__name__} key '{key}' does not contain column '{column}'"
+            )
+        return table.column(column).to_numpy()
+
+    def get_with_merge(self, keys: Sequence[str]) -> dd.DataFrame:
+        """
+        Returns a single data frame that is the result of merging multiple keys
+        on the data frame indices.
+
+        This performs an inner join, meaning that the index will contain only
+        those values that are shared across all keys. The order of items in the
+        index will be the same as in the first of the keys.
+
+        Passing in keys that share column names will result in columns
+        being re-labeled in the result.
+
+        Each record batch of the first key becomes one partition, which is
+        merged with the rows of the other keys that share its index values
+        when the partition is computed. Only the batches up to the first
+        non-empty partition are merged here, to check that the result is not
+        empty.
+
+        Parameters
+        ----------
+        keys: Sequence[str]
+            The keys to access and merge.
+
+        Returns
+        -------
+        dd.DataFrame
+            Result of combining the data frames.
+
+        Raises
+        ------
+        KeyError
+            If any key is not in the store.
+        ValueError
+            If the resulting data frame is empty (no shared index values).
+
+        """
+        for key in keys:
+            if key not in self.keys():
+                raise KeyError(
+                    f"{self.__class__.__name__} does not contain key '{key}'"
+                )
+        paths = [self._data_file(key) for key in keys]
+        num_batches = self._open(keys[0]).num_record_batches
+        for i in range(num_batches):
+            meta = _merge_batch(paths, i)
+            if len(meta) > 0:
+                break
+        else:
+            raise ValueError(f"{self.__class__.__name__} merge result is empty")
+        partitions = [dask.delayed(_merge_batch)(paths, i) for i in range(num_batches)]
+        return dd.from_delayed(partitions, meta=meta.iloc[:0])
+
+    def select(
+        self,
+        key: str,
+        index: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns some or all of the data at key as a pandas DataFrame.
+
+        Columns and rows are selected on the memory-mapped Arrow table, so
+        only the selected data is converted to pandas.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        index: Optional[Sequence[Any]]
+            Index values of the rows to return. Default None returns all rows.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+
+        Returns
+        -------
+        :py:class:`~pandas.DataFrame`
+            The selected data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        return _select(self._data_file(key), index, columns)
+
+    def append(self, key: str, value: Union[pd.DataFrame, dd.DataFrame]) -> None:
+        """
+        Appends the rows of a data frame to the table stored under key.
+
+        If the key is not in the store, a new table is created. Arrow files
+        cannot be extended in place, so the existing record batches are copied
+        from the memory map into a new file followed by the new rows.
+
+        Parameters
+        ----------
+        key:  str
+            Name of the data frame in the store.
+        value : Union[pd.DataFrame, dd.DataFrame]
+            The pandas or Dask data frame to append.
+
+        """
+        if isinstance(value, pd.DataFrame):
+            value = dd.from_pandas(value, npartitions=1, sort=False)
+        if key not in self.keys():
+            self.put(key, value)
+        else:
+            reader = self._open(key)
+            existing = (
+                reader.get_batch(i).to_pandas()
+                for i in range(reader.num_record_batches)
+            )
+            self._write_batches(
+                key,
+                (
+                    df
+                    for frames in (existing, self._partitions(value))
+                    for df in frames
+                    if len(df) > 0
+                ),
+            )
+
+    def iter_chunks(
+        self, key: str, chunksize: int, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterates over the data at key as pandas DataFrames of chunksize rows.
+
+        Record batches are converted to pandas one at a time.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        chunksize: int
+            Number of rows in each chunk. Only the last chunk may be shorter.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+
+        Returns
+        -------
+        Iterator[pd.DataFrame]
+            The data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        reader = self._open(key)
+        if columns is not None:
+            columns = [*columns, *self._index_columns(reader.schema)]
+        tables = (
+            pa.Table.from_batches([reader.get_batch(i)])
+            for i in range(reader.num_record_batches)
+        )
+        if columns is not None:
+            tables = (t.select(columns) for t in tables)
+        return rechunk((t.to_pandas() for t in tables), chunksize)
+
+    def set_metadata(
+        self, key: str, metadata: Dict[str, Any], update: bool = False
+    ) -> None:
+        """
+        Sets the metadata of the data frame located at key with the supplied
+        key-value pairs.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        metadata : Dict[str, Any]
+            The metadata to store.
+        update : bool
+            Update the metadata instead of replacing it. Default False.
+
+        Raises
+        ------
+        KeyError
+            If any key is not in the store.
+        TypeError
+            If the metadata is not a Mapping.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        if not isinstance(metadata, Mapping):
+            raise TypeError(f"{self.__class__.__name__} must be a Mapping")
+
+        if update:
+            existing = self.get_metadata(key)
+            metadata.update(existing)
+        with self.path.joinpath(key, self._metadata_file_name).open(mode="w") as handle:
+            json.dump(metadata, handle, indent=2)
+
+    def get_metadata(self, key: str) -> Dict[str, Any]:
+        """
+        Returns the metadata of the data frame located at key.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The metadata.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+
+        metadata_path = self.path.joinpath(key, self._metadata_file_name)
+        if metadata_path.exists():
+            with metadata_path.open() as handle:
+                metadata = json.load(handle)
+        else:
+            metadata = {}
+        return metadata
+
+
+def _read_batch(path: str, i: int) -> pd.DataFrame:
+    """Returns record batch i of the memory-mapped Arrow file at path."""
+    return pa.ipc.open_file(pa.memory_map(path)).get_batch(i).to_pandas()
+
+
+def _select(
+    path: str,
+    index: Optional[Sequence[Any]] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Returns the rows with the given index values and the given columns of
+    the memory-mapped Arrow file at path, for FeatherStore.select()."""
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    index_columns = FeatherStore._index_columns(table.schema)
+    if columns is not None:
+        table = table.select([*columns, *index_columns])
+    if index is not None and len(index_columns) == 1:
+        index_column = table[index_columns[0]]
+        value_set = pa.array(list(index), type=index_column.type)
+        table = table.filter(pc.is_in(index_column, value_set=value_set))
+    df = table.to_pandas()
+    if index is not None and len(index_columns) != 1:
+        df = df.loc[df.index.isin(list(index))]
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def _merge_batch(paths: Sequence[str], i: int) -> pd.DataFrame:
+    """Returns record batch i of the first Arrow file at paths merged on the
+    index with the matching rows of the other files."""
+    result = _read_batch(paths[0], i)
+    for path in paths[1:]:
+        result = result.merge(
+            _select(path, index=result.index),
+            how="inner",
+            left_index=True,
+            right_index=True,
+        )
+    return result
@@ -15,12 +15,26 @@
 #  You should have received a copy of the GNU General Public License
 #  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import posixpath
+import tempfile
 import pandas as pd
 import dask.dataframe as dd
 import numpy as np
-from typing import Union, Sequence, Mapping, Any, Dict
+import tables
+from typing import (
+    Union,
+    Sequence,
+    Mapping,
+    Any,
+    Dict,
+    Optional,
+    Iterator,
+    Iterable,
+    Tuple,
+)
 from os import PathLike
-from countess.store.interface import StoreInterface
+from countess.store.interface import StoreInterface, has_rows, rechunk
 
 
 class HdfStore(StoreInterface):
@@ -31,15 +45,57 @@ class HdfStore(StoreInterface):
     TypeError.
 
     Leading "/" characters are removed from the HDF5 keys when an existing
-    store is loaded.
+    store is loaded. Keys passed to the methods may start with "/", as in
+    pandas HDFStore, and refer to the same table.
+
+    Tables are compressed with complib at complevel. A completely sorted
+    index (CSI) is built on the "index" column once a table is finished so
+    that queries on the index read only the matching chunks. Tables written
+    with put are finished immediately. Tables written with append are
+    indexed by create_index, which is called by close, so that a table built
+    from many appends is only indexed once.
+
+    The file is only opened while a method runs. is_open and close track
+    whether the store is in use, like the methods of pandas HDFStore.
+
+    A key can also be a link to a table in another HDF5 file, created with
+    link. Linked tables are read in place. Their metadata is kept in this
+    store, and the data is copied into this store only when the table is
+    appended to (copy-on-write). Put and drop replace or remove the link
+    without modifying the other file.
 
     Parameters
     ----------
     path: str
         Path to a new or existing HDF5 file.
+    complib: Optional[str]
+        PyTables compression library, such as "blosc:zstd" or "blosc:lz4".
+        None disables compression. Default "blosc:zstd".
+    complevel: int
+        Compression level from 0 (no compression) to 9. Default 5.
+    expectedrows: Optional[int]
+        Expected number of rows in each table, used by PyTables to choose the
+        chunk shape of new tables. Default None uses the PyTables default.
+    chunkshape: Optional[int]
+        Number of rows in each chunk of new tables. Overrides the chunk shape
+        chosen from expectedrows. Default None.
+    compact_threshold: Optional[float]
+        Fraction of the file that may be free space left by dropped or
+        rewritten tables before the file is compacted automatically after a
+        drop. None disables automatic compaction. Default 0.5.
 
     Attributes
     ----------
+    complib: Optional[str]
+        PyTables compression library.
+    complevel: int
+        Compression level.
+    expectedrows: Optional[int]
+        Expected number of rows in each table.
+    chunkshape: Optional[Tuple[int]]
+        Chunk shape of new tables.
+    compact_threshold: Optional[float]
+        Free space fraction that triggers automatic compaction.
 
     See Also
     --------
@@ -48,17 +104,79 @@ class HdfStore(StoreInterface):
 
     file_extensions = (".h5",)
     metadata_key = "countESS"
-
-    def __init__(self, path: Union[PathLike, str]) -> None:
+    links_key = "countESS_links"
+    index_optlevel = 9
+    compact_min_bytes = 1024 ** 2
+
+    def __init__(
+        self,
+        path: Union[PathLike, str],
+        complib: Optional[str] = "blosc:zstd",
+        complevel: int = 5,
+        expectedrows: Optional[int] = None,
+        chunkshape: Optional[int] = None,
+        compact_threshold: Optional[float] = 0.5,
+    ) -> None:
+        if complib is not None and complib not in tables.filters.all_complibs:
+            raise ValueError(f"invalid compression library '{complib}'")
+        if not 0 <= complevel <= 9:
+            raise ValueError(f"complevel must be between 0 and 9 [{complevel}]")
+        if expectedrows is not None and expectedrows < 1:
+            raise ValueError(f"expectedrows must be positive [{expectedrows}]")
+        if chunkshape is not None and chunkshape < 1:
+            raise ValueError(f"chunkshape must be positive [{chunkshape}]")
+        if compact_threshold is not None and not 0 <= compact_threshold < 1:
+            raise ValueError(
+                f"compact_threshold must be between 0 and 1 [{compact_threshold}]"
+            )
         super().__init__(path)
+        self.complib = complib
+        self.complevel = complevel
+        self.expectedrows = expectedrows
+        self.chunkshape = (chunkshape,) if chunkshape is not None else None
+        self.compact_threshold = compact_threshold
+        self._closed = False
+        self._unindexed = set()
 
         if self.path.is_file():
             with pd.HDFStore(str(self.path)) as store:
                 # drop the leading "/" from the file keys
                 file_keys = [k[1:] if k.startswith("/") else k for k in store.keys()]
                 self._keys.extend(file_keys)
-
-    def put(self, key: str, value: dd.DataFrame) -> None:
+            self._keys.extend(self.links())
+
+    @staticmethod
+    def _normalize_key(key: str) -> str:
+        """Returns key without the leading "/" of pandas HDFStore keys."""
+        return key.lstrip("/")
+
+    def __contains__(self, key: str) -> bool:
+        """Returns True if key is a table in the store, or a group containing
+        tables, like pandas HDFStore."""
+        key = self._normalize_key(key)
+        return any(k == key or k.startswith(key + "/") for k in self.keys())
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        """Returns the table at key as a pandas DataFrame."""
+        return self.select(key)
+
+    def is_open(self) -> bool:
+        """Returns True until the store is closed."""
+        return not self._closed
+
+    def close(self) -> None:
+        """Builds the indexes of tables that were appended to and marks the
+        store as closed."""
+        self.create_index()
+        self._closed = True
+
+    def put(
+        self,
+        key: str,
+        value: Union[pd.DataFrame, dd.DataFrame],
+        data_columns: Optional[Sequence[str]] = None,
+        min_itemsize: Optional[Dict[str, int]] = None,
+    ) -> None:
         """
         Stores a data frame in the HDF file under the given key.
 
@@ -66,20 +184,34 @@ class HdfStore(StoreInterface):
         ----------
         key:  str
             Name of the data frame in the store.
-        value : dd.DataFrame
-            The Dask data frame to store.
+        value : Union[pd.DataFrame, dd.DataFrame]
+            The pandas or Dask data frame to store.
+        data_columns: Optional[Sequence[str]]
+            Columns that can be used in where queries, as in pandas HDFStore.
+        min_itemsize: Optional[Dict[str, int]]
+            Minimum width of string columns, as in pandas HDFStore.
 
         """
-        if key not in self.keys():
-            self._keys.append(key)
-        value.to_hdf(self.path, key, format="table")
+        key = self._normalize_key(key)
+        if self.is_link(key):
+            self._remove_link(key)
+        if self._write_table(key, value, False, data_columns, min_itemsize):
+            if key not in self.keys():
+                self._keys.append(key)
+            self.create_index(key)
+        elif key in self.keys():
+            # pandas does not write empty tables
+            self._keys.remove(key)
 
     def drop(self, key: str) -> None:
         """
         Remove a table and its data from the store.
 
-        Note that this operation may not reduce the HDF5 file size on disk
-        until the file is repacked using ptrepack or a similar utility.  # TODO check ptrepack reference
+        HDF5 does not return the space used by the table to the file system.
+        If the free space in the file then passes compact_threshold, the file
+        is repacked with compact.
+
+        Dropping a linked table only removes the link.
 
         Parameters
         ----------
@@ -92,12 +224,268 @@ class HdfStore(StoreInterface):
             If the key is not in the store.
 
         """
+        key = self._normalize_key(key)
         if key not in self.keys():
             raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        elif self.is_link(key):
+            self._remove_link(key)
+            self._keys.remove(key)
         else:
             with pd.HDFStore(self.path) as store:
                 del store[key]
             self._keys.remove(key)
+            self._unindexed.discard(key)
+            self.compact_if_needed()
+
+    def remove(self, key: str) -> None:
+        """
+        Remove a table, or a group and all the tables under it, from the
+        store, like pandas HDFStore.
+
+        The free space is handled as in drop.
+
+        Parameters
+        ----------
+        key: str
+            Name of the table or group to remove.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        key = self._normalize_key(key)
+        if key not in self:
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        removed = [k for k in self.keys() if k == key or k.startswith(key + "/")]
+        links = self.links()
+        if any(k in links for k in removed):
+            self._set_links({k: v for k, v in links.items() if k not in removed})
+        with pd.HDFStore(self.path) as store:
+            if key in store:
+                store.remove(key)
+        for k in removed:
+            self._keys.remove(k)
+            self._unindexed.discard(k)
+        self.compact_if_needed()
+
+    def link(
+        self, key: str, source: Union[PathLike, str], source_key: Optional[str] = None
+    ) -> None:
+        """
+        Adds a table in another HDF5 file to the store without copying it.
+
+        The table is read from the other file until it is appended to, when
+        it is copied into this store first. The metadata of the table is
+        copied when the link is created.
+
+        Parameters
+        ----------
+        key: str
+            Name of the table in this store.
+        source: Union[PathLike, str]
+            Path to the HDF5 file containing the table.
+        source_key: Optional[str]
+            Name of the table in the source file. Default None uses key.
+
+        Raises
+        ------
+        KeyError
+            If the source file does not contain source_key.
+
+        """
+        key = self._normalize_key(key)
+        source = os.path.abspath(source)
+        if source_key is None:
+            source_key = key
+        source_key = self._normalize_key(source_key)
+        with pd.HDFStore(source, mode="r") as store:
+            if source_key not in store:
+                raise KeyError(
+                    f"{self.__class__.__name__} source '{source}' does not "
+                    f"contain key '{source_key}'"
+                )
+            try:
+                metadata = store.get_storer(source_key).attrs[self.metadata_key]
+            except KeyError:
+                metadata = {}
+
+        if key in self.keys():
+            self.drop(key)
+        links = self.links()
+        links[key] = {"path": source, "key": source_key, "metadata": metadata}
+        self._set_links(links)
+        self._keys.append(key)
+
+    def links(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the linked tables in the store.
+
+        Returns
+        -------
+        Dict[str, Dict[str, Any]]
+            For each linked key, the "path" and "key" of the source table and
+            the "metadata" of the table.
+
+        """
+        if not self.path.is_file():
+            return dict()
+        with tables.open_file(str(self.path), mode="r") as h5:
+            return dict(getattr(h5.root._v_attrs, self.links_key, dict()))
+
+    def is_link(self, key: str) -> bool:
+        """
+        Returns True if key is a link to a table in another file.
+
+        Parameters
+        ----------
+        key: str
+            The key to check.
+
+        Returns
+        -------
+        bool
+
+        """
+        return self._normalize_key(key) in self.links()
+
+    def _set_links(self, links: Dict[str, Dict[str, Any]]) -> None:
+        """Replaces the linked tables recorded in the file."""
+        with tables.open_file(str(self.path), mode="a") as h5:
+            if links:
+                h5.root._v_attrs[self.links_key] = links
+            elif self.links_key in h5.root._v_attrs:
+                del h5.root._v_attrs[self.links_key]
+
+    def _remove_link(self, key: str) -> None:
+        """Removes a link, leaving the key in the list of keys."""
+        links = self.links()
+        del links[key]
+        self._set_links(links)
+
+    def _location(self, key: str) -> Tuple[str, str]:
+        """Returns the file and key in that file where the data for key is
+        stored."""
+        link = self.links().get(key)
+        if link is None:
+            return str(self.path), key
+        else:
+            return link["path"], link["key"]
+
+    def _copy_link(self, key: str) -> None:
+        """Copies a linked table into the store, replacing the link."""
+        link = self.links()[key]
+        node_path = "/" + key.lstrip("/")
+        parent_path, name = posixpath.split(node_path)
+        with tables.open_file(link["path"], mode="r") as source:
+            with tables.open_file(str(self.path), mode="a") as h5:
+                if parent_path == "/":
+                    parent = h5.root
+                else:
+                    parent_where, parent_name = posixpath.split(parent_path)
+                    if parent_path in h5:
+                        parent = h5.get_node(parent_path)
+                    else:
+                        parent = h5.create_group(
+                            parent_where, parent_name, createparents=True
+                        )
+                source.copy_node(
+                    "/" + link["key"],
+                    newparent=parent,
+                    newname=name,
+                    recursive=True,
+                    propindexes=True,
+                )
+                h5.get_node(node_path)._v_attrs[self.metadata_key] = link["metadata"]
+        self._remove_link(key)
+
+    def free_space_ratio(self) -> float:
+        """
+        Returns the fraction of the file that is not used by table data.
+
+        The space used by each table and its index is taken from PyTables, so
+        the result also counts the space used by HDF5 metadata as free. This
+        is only significant for small files.
+
+        Returns
+        -------
+        float
+            0.0 if the file does not exist or is empty.
+
+        """
+        if not self.path.is_file():
+            return 0.0
+        file_size = self.path.stat().st_size
+        if file_size == 0:
+            return 0.0
+        with tables.open_file(str(self.path), mode="r") as h5:
+            used = self._used_bytes(h5.root)
+        return max(0.0, 1.0 - used / file_size)
+
+    @classmethod
+    def _used_bytes(cls, group: tables.Group) -> int:
+        """Returns the space used by the leaves under a group, including the
+        hidden leaves that hold the table indexes."""
+        used = 0
+        nodes = list(group._v_children.values()) + list(group._v_hidden.values())
+        for node in nodes:
+            if isinstance(node, tables.Leaf):
+                used += node.size_on_disk
+            elif isinstance(node, tables.Group):
+                used += cls._used_bytes(node)
+        return used
+
+    def compact(self) -> int:
+        """
+        Repacks the file to return the space left by dropped or rewritten
+        tables to the file system.
+
+        Like ptrepack, every table is copied into a fresh file, keeping its
+        attributes (including the metadata), compression and indexes. The
+        fresh file then replaces the original.
+
+        Returns
+        -------
+        int
+            Number of bytes reclaimed.
+
+        """
+        if not self.path.is_file():
+            return 0
+        size = self.path.stat().st_size
+        fd, temp_path = tempfile.mkstemp(
+            suffix=self.file_extensions[0], dir=self.path.parent
+        )
+        os.close(fd)
+        try:
+            with tables.open_file(str(self.path), mode="r") as h5:
+                h5.copy_file(temp_path, overwrite=True, propindexes=True)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return size - self.path.stat().st_size
+
+    def compact_if_needed(self) -> int:
+        """
+        Repacks the file with compact if the fraction of free space is at
+        least compact_threshold and at least compact_min_bytes are free.
+
+        Returns
+        -------
+        int
+            Number of bytes reclaimed, 0 if the file was not compacted.
+
+        """
+        if self.compact_threshold is None:
+            return 0
+        ratio = self.free_space_ratio()
+        if ratio < self.compact_threshold:
+            return 0
+        if ratio * self.path.stat().st_size < self.compact_min_bytes:
+            return 0
+        return self.compact()
 
     def get(self, key: str) -> dd.DataFrame:
         """
@@ -119,10 +507,12 @@ class HdfStore(StoreInterface):
             If the key is not in the store.
 
         """
+        key = self._normalize_key(key)
         if key not in self.keys():
             raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
         else:
-            return dd.read_hdf(self.path, key)
+            path, key = self._location(key)
+            return dd.read_hdf(path, key)
 
     def get_column(self, key: str, column: str) -> np.ndarray:
         """
@@ -133,7 +523,8 @@ class HdfStore(StoreInterface):
         key: str
             The key to access.
         column: name
-            The name of a single column in the data
+            The name of a single column in the data, or "index" for the
+            index, which is read without the other columns.
 
         Returns
         -------
@@ -146,12 +537,14 @@ class HdfStore(StoreInterface):
             If the key is not in the store.
 
         """
+        key = self._normalize_key(key)
         if key not in self.keys():
             raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
-        else:
-            return (
-                dd.read_hdf(self.path, key, columns=[column]).compute().values.flatten()
-            )
+        path, key = self._location(key)
+        if column == "index":
+            with pd.HDFStore(path, mode="r") as store:
+                return store.select_column(key, "index").values
+        return dd.read_hdf(path, key, columns=[column]).compute().values.flatten()
 
     def get_with_merge(self, keys: Sequence[str]) -> dd.DataFrame:
         """
@@ -183,6 +576,7 @@ class HdfStore(StoreInterface):
             If the resulting data frame is empty (no shared index values).
 
         """
+        keys = [self._normalize_key(key) for key in keys]
         for key in keys:
             if key not in self.keys():
                 raise KeyError(
@@ -196,10 +590,355 @@ class HdfStore(StoreInterface):
                 result = result.merge(
                     self.get(key), how="inner", left_index=True, right_index=True
                 )
-        if result.shape[0].compute() == 0:
+        if not has_rows(result):
             raise ValueError(f"{self.__class__.__name__} merge result is empty")
         return result
 
+    def select(
+        self,
+        key: str,
+        index: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+        where: Optional[Union[str, Sequence[Any]]] = None,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns some or all of the data at key as a pandas DataFrame.
+
+        The index values and columns are passed to PyTables as a query, so
+        only the requested rows and columns are read from disk.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        index: Optional[Sequence[Any]]
+            Index values of the rows to return. Default None returns all rows.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+        where: Optional[Union[str, Sequence[Any]]]
+            pandas HDFStore query, or list of queries, that the rows must
+            also match, or an array of row positions to read. Default None.
+        start: Optional[int]
+            First row of the table to consider. Default None starts at the
+            first row.
+        stop: Optional[int]
+            Row of the table to stop before. Default None stops at the end.
+
+        Returns
+        -------
+        :py:class:`~pandas.DataFrame`
+            The selected data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        key = self._normalize_key(key)
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        if columns is not None:
+            columns = list(columns)
+        if where is None:
+            terms = []
+        elif isinstance(where, str):
+            terms = [where]
+        else:
+            terms = list(where)
+        if index is not None:
+            index_values = list(index)
+            terms.append("index in index_values")
+        path, key = self._location(key)
+        with pd.HDFStore(path, mode="r") as store:
+            return store.select(
+                key, where=terms or None, columns=columns, start=start, stop=stop
+            )
+
+    def nrows(self, key: str) -> int:
+        """
+        Returns the number of rows in the table at key without reading it.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+
+        Returns
+        -------
+        int
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        key = self._normalize_key(key)
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        path, key = self._location(key)
+        with pd.HDFStore(path, mode="r") as store:
+            return store.get_storer(key).nrows
+
+    def select_as_multiple(
+        self,
+        keys: Sequence[str],
+        where: Optional[Union[str, Sequence[Any]]] = None,
+        selector: Optional[str] = None,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the columns of several tables with the same rows as a single
+        pandas DataFrame, like pandas HDFStore.
+
+        The rows are chosen by querying the selector table with where, and
+        the same rows are read from the other tables by their position.
+
+        Parameters
+        ----------
+        keys: Sequence[str]
+            The keys of the tables to combine.
+        where: Optional[Union[str, Sequence[Any]]]
+            pandas HDFStore query on the selector table. Default None selects
+            all rows.
+        selector: Optional[str]
+            The table queried with where. Default None uses the first key.
+        start: Optional[int]
+            First row of the tables to consider. Default None.
+        stop: Optional[int]
+            Row of the tables to stop before. Default None.
+
+        Returns
+        -------
+        :py:class:`~pandas.DataFrame`
+
+        Raises
+        ------
+        KeyError
+            If any key is not in the store.
+        ValueError
+            If the tables do not have the same number of rows.
+
+        """
+        keys = [self._normalize_key(key) for key in keys]
+        selector = keys[0] if selector is None else self._normalize_key(selector)
+        for key in keys + [selector]:
+            if key not in self.keys():
+                raise KeyError(
+                    f"{self.__class__.__name__} does not contain key '{key}'"
+                )
+        if len(set(self.nrows(key) for key in keys + [selector])) > 1:
+            raise ValueError(
+                f"{self.__class__.__name__} tables must have the same number of rows"
+            )
+
+        if where is None:
+            rows = dict(start=start, stop=stop)
+        else:
+            path, location = self._location(selector)
+            with pd.HDFStore(path, mode="r") as store:
+                coordinates = store.select_as_coordinates(
+                    location, where=where, start=start, stop=stop
+                )
+            rows = dict(where=coordinates)
+        frames = list()
+        for key in keys:
+            path, location = self._location(key)
+            with pd.HDFStore(path, mode="r") as store:
+                frames.append(store.select(location, **rows))
+        return pd.concat(frames, axis=1)
+
+    def append(
+        self,
+        key: str,
+        value: Union[pd.DataFrame, dd.DataFrame],
+        data_columns: Optional[Sequence[str]] = None,
+        min_itemsize: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Appends the rows of a data frame to the table stored under key.
+
+        If the key is not in the store, a new table is created.
+
+        Note that the width of string columns, including the index, is fixed
+        when the table is created. Appending longer strings raises a
+        ValueError. The chunk shape is also fixed when the table is created.
+
+        A linked table is copied into the store before it is appended to.
+
+        The index of the table is not updated until create_index is called.
+
+        Parameters
+        ----------
+        key:  str
+            Name of the data frame in the store.
+        value : Union[pd.DataFrame, dd.DataFrame]
+            The pandas or Dask data frame to append.
+        data_columns: Optional[Sequence[str]]
+            Columns that can be used in where queries, as in pandas HDFStore.
+        min_itemsize: Optional[Dict[str, int]]
+            Minimum width of string columns, as in pandas HDFStore.
+
+        """
+        key = self._normalize_key(key)
+        if self.is_link(key):
+            self._copy_link(key)
+        if self._write_table(key, value, True, data_columns, min_itemsize):
+            if key not in self.keys():
+                self._keys.append(key)
+            self._unindexed.add(key)
+
+    def create_index(self, key: Optional[str] = None) -> None:
+        """
+        Builds the index of a table that has been appended to since its index
+        was last built.
+
+        Appending to an indexed table does not update its index, so that a
+        table built from many appends is indexed once it is finished.
+
+        Parameters
+        ----------
+        key: Optional[str]
+            The key of the table to index. Default None indexes every table
+            that needs it.
+
+        """
+        if key is None:
+            keys = sorted(self._unindexed)
+        else:
+            keys = [self._normalize_key(key)]
+        keys = [k for k in keys if k in self.keys() and not self.is_link(k)]
+        if len(keys) > 0:
+            with pd.HDFStore(self.path, mode="a") as store:
+                for k in keys:
+                    if k not in store:
+                        continue
+                    column = store.get_storer(k).table.colinstances["index"]
+                    if column.is_indexed:
+                        column.remove_index()
+                    store.create_table_index(
+                        k, columns=["index"], optlevel=self.index_optlevel, kind="full"
+                    )
+        self._unindexed.difference_update(keys)
+
+    def _write_table(
+        self,
+        key: str,
+        value: Union[pd.DataFrame, dd.DataFrame],
+        append: bool,
+        data_columns: Optional[Sequence[str]],
+        min_itemsize: Optional[Dict[str, int]],
+    ) -> bool:
+        """Writes the partitions of a data frame to a table one at a time,
+        then sets the chunk shape of a new table. Returns False if there was
+        nothing to write and the table does not exist."""
+        if data_columns is not None:
+            data_columns = list(data_columns)
+        with pd.HDFStore(self.path, mode="a") as store:
+            if not append and key in store:
+                store.remove(key)
+            new_table = key not in store
+            if not new_table:
+                # the index is rebuilt by create_index
+                store.get_storer(key).table.autoindex = False
+            for partition in self._partitions(value):
+                store.append(
+                    key,
+                    partition,
+                    format="table",
+                    index=False,
+                    data_columns=data_columns,
+                    min_itemsize=min_itemsize,
+                    complib=self.complib,
+                    complevel=self.complevel,
+                    expectedrows=self.expectedrows,
+                )
+            if key not in store:
+                return False
+            if new_table and self.chunkshape is not None:
+                self._set_chunkshape(store, key)
+        return True
+
+    @staticmethod
+    def _partitions(value: Union[pd.DataFrame, dd.DataFrame]) -> Iterable[pd.DataFrame]:
+        """Yields a pandas data frame, or the computed partitions of a Dask
+        data frame."""
+        if isinstance(value, dd.DataFrame):
+            for i in range(value.npartitions):
+                yield value.get_partition(i).compute()
+        else:
+            yield value
+
+    def _set_chunkshape(self, store: pd.HDFStore, key: str) -> None:
+        """Copies a table to a new table with the configured chunk shape,
+        keeping its attributes and compression, and replaces the original."""
+        table = store.get_storer(key).table
+        if table.chunkshape == self.chunkshape:
+            return
+        group = table._v_parent
+        table.copy(group, "_rechunked", chunkshape=self.chunkshape)
+        table.remove()
+        group._f_get_child("_rechunked").move(group, "table")
+
+    def iter_chunks(
+        self,
+        key: str,
+        chunksize: int,
+        columns: Optional[Sequence[str]] = None,
+        where: Optional[Union[str, Sequence[Any]]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterates over the data at key as pandas DataFrames of chunksize rows.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        chunksize: int
+            Number of rows in each chunk. Only the last chunk may be shorter.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+        where: Optional[Union[str, Sequence[Any]]]
+            pandas HDFStore query that the rows must match. Default None
+            returns all rows.
+
+        Returns
+        -------
+        Iterator[pd.DataFrame]
+            The data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        key = self._normalize_key(key)
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        if columns is not None:
+            columns = list(columns)
+        return rechunk(self._iter_table(key, chunksize, columns, where), chunksize)
+
+    def _iter_table(
+        self,
+        key: str,
+        chunksize: int,
+        columns: Optional[Sequence[str]],
+        where: Optional[Union[str, Sequence[Any]]],
+    ) -> Iterator[pd.DataFrame]:
+        """Yields the PyTables chunks of a table, keeping the file open until
+        the iteration is complete."""
+        path, key = self._location(key)
+        with pd.HDFStore(path, mode="r") as store:
+            yield from store.select(
+                key, columns=columns, where=where, chunksize=chunksize
+            )
+
     def set_metadata(
         self, key: str, metadata: Dict[str, Any], update: bool = False
     ) -> None:
@@ -224,6 +963,7 @@ class HdfStore(StoreInterface):
             If the metadata is not a Mapping.
 
         """
+        key = self._normalize_key(key)
         if key not in self.keys():
             raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
         if not isinstance(metadata, Mapping):
@@ -232,6 +972,11 @@ class HdfStore(StoreInterface):
         if update:
             existing = self.get_metadata(key)
             metadata.update(existing)
+        links = self.links()
+        if key in links:
+            links[key]["metadata"] = metadata
+            self._set_links(links)
+            return
         with pd.HDFStore(self.path) as store:
             store.get_storer(key).attrs[self.metadata_key] = metadata
 
@@ -255,9 +1000,13 @@ class HdfStore(StoreInterface):
             If the key is not in the store.
 
         """
+        key = self._normalize_key(key)
         if key not in self.keys():
             raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
 
+        links = self.links()
+        if key in links:
+            return links[key]["metadata"]
         with pd.HDFStore(self.path) as store:
             try:
                 metadata = store.get_storer(key).attrs[self.metadata_key]
@@ -16,13 +16,80 @@
 #  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
 
 from abc import ABCMeta, abstractmethod
-from typing import List, Sequence, Dict, Any, Union
+from typing import List, Sequence, Dict, Any, Union, Optional, Iterator, Iterable
 from os import PathLike
 import pathlib
 import numpy as np
+import pandas as pd
 import dask.dataframe as dd
 
 
+def rechunk(frames: Iterable[pd.DataFrame], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Regroups an iterable of data frames into data frames of a fixed size.
+
+    Used by the backends to turn their native unit of storage (HDF5 table
+    chunks, Parquet row groups, CSV files) into chunks of the size requested
+    by the caller.
+
+    Parameters
+    ----------
+    frames: Iterable[pd.DataFrame]
+        Data frames with the same columns, in order.
+    chunksize: int
+        Number of rows in each chunk. Only the last chunk may be shorter.
+
+    Returns
+    -------
+    Iterator[pd.DataFrame]
+
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer")
+    return _rechunk(iter(frames), chunksize)
+
+
+def _rechunk(frames: Iterator[pd.DataFrame], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Generator used by :py:func:`rechunk` once the arguments are checked."""
+    pending = list()
+    pending_rows = 0
+    for df in frames:
+        pending.append(df)
+        pending_rows += len(df)
+        if pending_rows >= chunksize:
+            combined = pd.concat(pending)
+            start = 0
+            while len(combined) - start >= chunksize:
+                yield combined.iloc[start : start + chunksize]
+                start += chunksize
+            pending = [combined.iloc[start:]]
+            pending_rows = len(pending[0])
+    if pending_rows > 0:
+        yield pd.concat(pending)
+
+
+def has_rows(ddf: dd.DataFrame) -> bool:
+    """Returns True if a Dask DataFrame contains at least one row.
+
+    Partitions are probed one at a time for their first row and the search
+    stops at the first non-empty partition, so a non-empty result is usually
+    detected without computing the whole data frame.
+
+    Parameters
+    ----------
+    ddf: dd.DataFrame
+        The data frame to check.
+
+    Returns
+    -------
+    bool
+
+    """
+    for i in range(ddf.npartitions):
+        if len(ddf.get_partition(i).head(1, npartitions=1)) > 0:
+            return True
+    return False
+
+
 class StoreInterface(metaclass=ABCMeta):
     """
     TODO: this docstring
@@ -34,6 +101,11 @@ class StoreInterface(metaclass=ABCMeta):
     This could be updated later by forcing the keys() method to check what's
     on disk each time it's called, but this would add some overhead.
 
+    The get() and get_with_merge() methods return Dask data frames for tables
+    that may not fit in memory. The select() and iter_chunks() methods return
+    pandas data frames directly, avoiding the cost of building a Dask graph
+    for small tables or subsets of rows and columns.
+
     """
 
     file_extensions = None
@@ -77,6 +149,25 @@ class StoreInterface(metaclass=ABCMeta):
     def get_with_merge(self, keys: Sequence[str]) -> dd.DataFrame:
         pass  # pragma: no cover
 
+    @abstractmethod
+    def select(
+        self,
+        key: str,
+        index: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def append(self, key: str, value: Union[pd.DataFrame, dd.DataFrame]) -> None:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def iter_chunks(
+        self, key: str, chunksize: int, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        pass  # pragma: no cover
+
     @abstractmethod
     def set_metadata(
         self, key: str, metadata: Dict[str, Any], update: bool = True
@@ -0,0 +1,517 @@
+#  Copyright 2016-2017 Alan F Rubin, Daniel C Esposito
+#
+#  This file is part of Enrich2.
+#
+#  Enrich2 is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Enrich2 is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import pathlib
+import pandas as pd
+import dask.dataframe as dd
+import numpy as np
+from typing import Union, Sequence, Any, Dict, Optional, Iterator, List, Tuple
+from os import PathLike
+from countess.store.interface import StoreInterface, rechunk
+from countess.store.hdf import HdfStore
+
+
+#: Names of the store backends that can be chosen in the store options.
+BACKENDS = ("hdf5", "duckdb", "feather")
+
+# "=" comparisons of pandas HDFStore queries, which pandas eval writes "=="
+_assignment_pattern = re.compile(r"(?<![<>=!])=(?!=)")
+
+# unquoted names compared with a column, such as "_wt" in "index!=_wt"
+_name_pattern = re.compile(r"((?:==|!=|<=|>=|<|>)\s*)([A-Za-z_]\w*)\b(?!\s*[\[(])")
+
+
+def store_class(backend: str) -> type:
+    """Returns the store class for one of the BACKENDS.
+
+    The DuckDB backend is only imported when it is chosen, since duckdb is an
+    optional dependency.
+
+    Raises
+    ------
+    ValueError
+        If backend is not one of the BACKENDS.
+    ImportError
+        If the backend needs a package that is not installed.
+
+    """
+    if backend == "hdf5":
+        return HdfStore
+    elif backend == "duckdb":
+        try:
+            from countess.store.duckdb import DuckDbStore
+        except ImportError:
+            raise ImportError("the duckdb store backend requires the duckdb package")
+        return DuckDbStore
+    elif backend == "feather":
+        from countess.store.feather import FeatherStore
+
+        return FeatherStore
+    else:
+        raise ValueError(f"unrecognized store backend '{backend}'")
+
+
+def path_backend(path: Union[PathLike, str]) -> Optional[str]:
+    """Returns the backend whose store class has the file extension of path,
+    or None if no backend has it.
+
+    Backends that need a package that is not installed are skipped.
+
+    """
+    suffix = pathlib.Path(path).suffix.lower()
+    for backend in BACKENDS:
+        try:
+            if suffix in store_class(backend).file_extensions:
+                return backend
+        except ImportError:
+            continue
+    return None
+
+
+def open_store(
+    backend: str, path: Union[PathLike, str], **kwargs: Any
+) -> Union[HdfStore, "ManagedStore"]:
+    """Opens the store at path with one of the BACKENDS.
+
+    HDF5 stores are returned as an HdfStore, which is opened with kwargs.
+    Stores of the other backends are wrapped in a ManagedStore, and kwargs
+    are ignored since they are HdfStore options.
+
+    """
+    cls = store_class(backend)
+    if cls is HdfStore:
+        return HdfStore(path, **kwargs)
+    return ManagedStore(cls(path))
+
+
+def query_mask(df: pd.DataFrame, where: Union[str, Sequence[str]]) -> np.ndarray:
+    """Returns a boolean array of the rows of df that match a pandas HDFStore
+    query, or all of a list of queries.
+
+    The queries are evaluated by pandas eval, after rewriting "=" as "==" and
+    quoting the unquoted names that are not columns, as HDFStore does.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        The rows to check.
+    where: Union[str, Sequence[str]]
+        Query such as ``"count >= 5"`` or ``"index=[1, 2]"``.
+
+    Returns
+    -------
+    :py:class:`~numpy.ndarray`
+
+    """
+    if isinstance(where, str):
+        where = [where]
+    columns = set(df.columns) | {"index", "True", "False"}
+
+    def quote(match: "re.Match") -> str:
+        if match.group(2) in columns:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)!r}"
+
+    mask = np.ones(len(df), dtype=bool)
+    for term in where:
+        term = _name_pattern.sub(quote, _assignment_pattern.sub("==", term))
+        mask &= np.asarray(df.eval(term), dtype=bool)
+    return mask
+
+
+class ManagedStore(object):
+    """
+    Adds the table methods that StoreManager uses to a StoreInterface backend
+    that does not have them, so that the analysis can be stored with any of
+    the BACKENDS.
+
+    Like pandas HDFStore and HdfStore, keys may start with "/" and a key can
+    also name a group of tables. Queries are pandas HDFStore queries, which
+    are evaluated on chunks of the table by query_mask, so the layout options
+    of HdfStore such as data_columns and min_itemsize are not needed and are
+    ignored.
+
+    Parameters
+    ----------
+    store: StoreInterface
+        The backend store.
+
+    Attributes
+    ----------
+    chunksize: int
+        Number of rows read at a time to evaluate queries.
+
+    See Also
+    --------
+    HdfStore
+
+    """
+
+    chunksize = 100000
+
+    def __init__(self, store: StoreInterface) -> None:
+        self._store = store
+        self._closed = False
+
+    @staticmethod
+    def _normalize_key(key: str) -> str:
+        """Returns key without the leading "/" of pandas HDFStore keys."""
+        return key.lstrip("/")
+
+    def _check_key(self, key: str) -> str:
+        """Returns the normalized key, raising a KeyError if it is not in the
+        store."""
+        key = self._normalize_key(key)
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        return key
+
+    @property
+    def store(self) -> StoreInterface:
+        """The backend store."""
+        return self._store
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._store.path
+
+    def keys(self) -> List[str]:
+        return self._store.keys()
+
+    def is_empty(self) -> bool:
+        return self._store.is_empty()
+
+    def __contains__(self, key: str) -> bool:
+        """Returns True if key is a table in the store, or a group containing
+        tables."""
+        key = self._normalize_key(key)
+        return any(k == key or k.startswith(key + "/") for k in self.keys())
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        """Returns the table at key as a pandas DataFrame."""
+        return self.select(key)
+
+    def is_open(self) -> bool:
+        """Returns True until the store is closed."""
+        return not self._closed
+
+    def close(self) -> None:
+        """Closes the backend store and marks the store as closed."""
+        close = getattr(self._store, "close", None)
+        if close is not None:
+            close()
+        self._closed = True
+
+    def put(
+        self,
+        key: str,
+        value: Union[pd.DataFrame, dd.DataFrame],
+        data_columns: Optional[Sequence[str]] = None,
+        min_itemsize: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """Stores a data frame under key, replacing any existing table. The
+        HdfStore layout options are ignored."""
+        if isinstance(value, pd.DataFrame):
+            value = dd.from_pandas(value, npartitions=1, sort=False)
+        self._store.put(self._normalize_key(key), value)
+
+    def append(
+        self,
+        key: str,
+        value: Union[pd.DataFrame, dd.DataFrame],
+        data_columns: Optional[Sequence[str]] = None,
+        min_itemsize: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """Appends the rows of a data frame to the table under key. The
+        HdfStore layout options are ignored."""
+        self._store.append(self._normalize_key(key), value)
+
+    def drop(self, key: str) -> None:
+        """Removes the table at key."""
+        self._store.drop(self._check_key(key))
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a table, or a group and all the tables under it.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        key = self._normalize_key(key)
+        if key not in self:
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        for k in [k for k in self.keys() if k == key or k.startswith(key + "/")]:
+            self._store.drop(k)
+
+    def link(
+        self, key: str, source: Union[PathLike, str], source_key: Optional[str] = None
+    ) -> None:
+        """
+        Copies a table and its metadata from an HDF5 file into the store.
+
+        Other backends cannot read HDF5 tables in place, so the table is
+        copied in chunks instead of being linked.
+
+        Parameters
+        ----------
+        key: str
+            Name of the table in this store.
+        source: Union[PathLike, str]
+            Path to the HDF5 file containing the table.
+        source_key: Optional[str]
+            Name of the table in the source file. Default None uses key.
+
+        Raises
+        ------
+        KeyError
+            If the source file does not contain source_key.
+
+        """
+        if source_key is None:
+            source_key = key
+        source = HdfStore(source)
+        metadata = source.get_metadata(source_key)
+        if key in self.keys():
+            self.drop(key)
+        for chunk in source.iter_chunks(source_key, self.chunksize):
+            self.append(key, chunk)
+        if self._normalize_key(key) not in self.keys():
+            self.put(key, source.select(source_key, start=0, stop=0))
+        self.set_metadata(key, metadata)
+
+    def is_link(self, key: str) -> bool:
+        """Returns False, since tables are copied by link."""
+        return False
+
+    def nrows(self, key: str) -> int:
+        """Returns the number of rows in the table at key."""
+        key = self._check_key(key)
+        nrows = getattr(self._store, "nrows", None)
+        if nrows is not None:
+            return nrows(key)
+        return sum(len(df) for df in self._store.iter_chunks(key, self.chunksize))
+
+    def get(self, key: str) -> dd.DataFrame:
+        return self._store.get(self._check_key(key))
+
+    def get_with_merge(self, keys: Sequence[str]) -> dd.DataFrame:
+        return self._store.get_with_merge([self._normalize_key(k) for k in keys])
+
+    def get_column(self, key: str, column: str) -> np.ndarray:
+        """Returns the values of a column, or of the index if column is
+        "index", as HdfStore does."""
+        key = self._check_key(key)
+        if column == "index":
+            return self._store.select(key, columns=[]).index.values
+        return self._store.get_column(key, column)
+
+    def _empty(self, key: str, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        """Returns the table at key with no rows."""
+        df = next(iter(self._store.iter_chunks(key, 1, columns=columns)), None)
+        if df is None:
+            return self._store.select(key, columns=columns)
+        return df.iloc[:0]
+
+    def _chunks(self, key: str) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """Yields the chunks of the table at key with the position of their
+        first row."""
+        start = 0
+        for df in self._store.iter_chunks(key, self.chunksize):
+            yield start, df
+            start += len(df)
+
+    def _rows(
+        self,
+        key: str,
+        where: Optional[Union[str, Sequence[Any]]],
+        start: Optional[int],
+        stop: Optional[int],
+    ) -> Iterator[Tuple[np.ndarray, pd.DataFrame]]:
+        """Yields the positions and rows of the table at key between start
+        and stop that match where, which is a query, a list of queries or an
+        array of row positions, one chunk at a time."""
+        positions = None
+        if where is not None and not isinstance(where, str):
+            where = np.asarray(where)
+            if where.dtype.kind in "iu":
+                positions, where = np.sort(where), None
+            else:
+                where = list(where)
+        for offset, df in self._chunks(key):
+            end = offset + len(df)
+            if stop is not None and offset >= stop:
+                break
+            if start is not None and end <= start:
+                continue
+            rows = np.arange(offset, end)
+            mask = np.ones(len(df), dtype=bool)
+            if start is not None:
+                mask &= rows >= start
+            if stop is not None:
+                mask &= rows < stop
+            if positions is not None:
+                mask &= np.isin(rows, positions)
+            if where is not None and mask.any():
+                mask &= query_mask(df, where)
+            if mask.any():
+                yield rows[mask], df[mask]
+
+    def select(
+        self,
+        key: str,
+        index: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+        where: Optional[Union[str, Sequence[Any]]] = None,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns some or all of the data at key as a pandas DataFrame, with the
+        arguments of HdfStore.select.
+
+        Without where, start or stop the selection is made by the backend.
+        Otherwise the table is read in chunks and only the matching rows are
+        kept.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        key = self._check_key(key)
+        if columns is not None:
+            # HDFStore selects the index as the "index" column
+            columns = [c for c in columns if c != "index"]
+        if where is None and start is None and stop is None:
+            return self._store.select(key, index=index, columns=columns)
+        frames = [df for _, df in self._rows(key, where, start, stop)]
+        if len(frames) == 0:
+            return self._empty(key, columns)
+        df = pd.concat(frames)
+        if index is not None:
+            df = df.loc[df.index.isin(list(index))]
+        if columns is not None:
+            df = df[columns]
+        return df
+
+    def iter_chunks(
+        self,
+        key: str,
+        chunksize: int,
+        columns: Optional[Sequence[str]] = None,
+        where: Optional[Union[str, Sequence[Any]]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterates over the rows of the table at key that match where as pandas
+        DataFrames of chunksize rows.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        key = self._check_key(key)
+        if where is None:
+            return self._store.iter_chunks(key, chunksize, columns=columns)
+        frames = (df for _, df in self._rows(key, where, None, None))
+        if columns is not None:
+            frames = (df[list(columns)] for df in frames)
+        return rechunk(frames, chunksize)
+
+    def select_as_multiple(
+        self,
+        keys: Sequence[str],
+        where: Optional[Union[str, Sequence[Any]]] = None,
+        selector: Optional[str] = None,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the columns of several tables with the same rows as a single
+        pandas DataFrame, like HdfStore.select_as_multiple.
+
+        Raises
+        ------
+        KeyError
+            If any key is not in the store.
+        ValueError
+            If the tables do not have the same number of rows.
+
+        """
+        keys = [self._check_key(key) for key in keys]
+        selector = keys[0] if selector is None else self._check_key(selector)
+        if len(set(self.nrows(key) for key in keys + [selector])) > 1:
+            raise ValueError(
+                f"{self.__class__.__name__} tables must have the same number of rows"
+            )
+        if where is None:
+            rows = dict(start=start, stop=stop)
+        else:
+            positions = [p for p, _ in self._rows(selector, where, start, stop)]
+            positions = np.concatenate(positions) if positions else np.array([], int)
+            rows = dict(where=positions)
+            if len(positions) == 0:
+                rows = dict(start=0, stop=0)
+        return pd.concat([self.select(key, **rows) for key in keys], axis=1)
+
+    def column_sums(
+        self, key: str, columns: Optional[Sequence[str]] = None
+    ) -> pd.Series:
+        """Returns the sum of each column of the table at key, skipping missing
+        values, with the backend's column_sums if it has one."""
+        key = self._check_key(key)
+        column_sums = getattr(self._store, "column_sums", None)
+        if column_sums is not None:
+            return column_sums(key, columns)
+        sums = None
+        for df in self._store.iter_chunks(key, self.chunksize, columns=columns):
+            sums = df.sum() if sums is None else sums.add(df.sum(), fill_value=0)
+        if sums is None:
+            sums = self._empty(key, columns).sum()
+        return sums
+
+    def __getattr__(self, name: str) -> Any:
+        """Returns the sum_by_index method of backends that have one, such as
+        DuckDbStore, so that it can be looked up like the optional methods of
+        HdfStore."""
+        if name == "sum_by_index" and hasattr(self.__dict__.get("_store"), name):
+            return self._sum_by_index
+        raise AttributeError(
+            f"'{self.__class__.__name__}' object has no attribute '{name}'"
+        )
+
+    def _sum_by_index(
+        self, keys: Sequence[str], columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """Returns the sums of columns for each index value across several
+        keys with the backend's sum_by_index."""
+        keys = [self._check_key(key) for key in keys]
+        return self._store.sum_by_index(keys, columns)
+
+    def set_metadata(
+        self, key: str, metadata: Dict[str, Any], update: bool = False
+    ) -> None:
+        self._store.set_metadata(self._check_key(key), metadata, update)
+
+    def get_metadata(self, key: str) -> Dict[str, Any]:
+        return self._store.get_metadata(self._check_key(key))
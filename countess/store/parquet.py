@@ -15,12 +15,102 @@
 #  You should have received a copy of the GNU General Public License
 #  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
 
+import pandas as pd
+import dask
 import dask.dataframe as dd
 import numpy as np
 import json
-from typing import Union, Sequence, Mapping, Any, Dict
+import operator
+import pathlib
+import fastparquet
+from dask.utils import natural_sort_key
+from typing import Union, Sequence, Mapping, Any, Dict, Optional, Iterator, List, Tuple
 from os import PathLike
-from countess.store.interface import StoreInterface
+from countess.store.interface import StoreInterface, has_rows, rechunk
+
+
+Filters = Union[List[Tuple[str, str, Any]], List[List[Tuple[str, str, Any]]]]
+
+_FILTER_OPERATORS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda values, other: values.isin(other),
+    "not in": lambda values, other: ~values.isin(other),
+}
+
+
+def normalize_filters(filters: Filters) -> List[List[Tuple[str, str, Any]]]:
+    """Returns filters in disjunctive normal form.
+
+    Filters use the same format as :py:func:`dask.dataframe.read_parquet`.
+    A list of ``(column, operator, value)`` tuples is combined with AND, and a
+    list of such lists is combined with OR.
+
+    Parameters
+    ----------
+    filters: Filters
+        The filters to normalize.
+
+    Returns
+    -------
+    List[List[Tuple[str, str, Any]]]
+
+    Raises
+    ------
+    ValueError
+        If the filters are empty or use an unsupported operator.
+
+    """
+    if len(filters) == 0:
+        raise ValueError("filters must not be empty")
+    if not isinstance(filters[0], list):
+        filters = [filters]
+    normalized = list()
+    for conjunction in filters:
+        for column, op, value in conjunction:
+            if op not in _FILTER_OPERATORS:
+                raise ValueError(f"unsupported filter operator '{op}'")
+        normalized.append([tuple(f) for f in conjunction])
+    return normalized
+
+
+def apply_filters(
+    df: pd.DataFrame, filters: List[List[Tuple[str, str, Any]]]
+) -> pd.DataFrame:
+    """Returns the rows of df that match the normalized filters.
+
+    Row-group statistics can only rule out whole row groups, so this is used
+    to drop the remaining non-matching rows after reading. A filter on the
+    index name is applied to the index.
+
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    for conjunction in filters:
+        conjunction_mask = np.ones(len(df), dtype=bool)
+        for column, op, value in conjunction:
+            values = df.index if column == df.index.name else df[column]
+            conjunction_mask &= np.asarray(_FILTER_OPERATORS[op](values, value))
+        mask |= conjunction_mask
+    return df.loc[mask]
+
+
+def _write_part_file(df: pd.DataFrame, path: str, row_group_size: int) -> bool:
+    """Writes a data frame sorted by index to a single parquet file.
+
+    Empty data frames are not written. Returns True if a file was written.
+
+    """
+    if len(df) == 0:
+        return False
+    fastparquet.write(
+        path, df.sort_index(), row_group_offsets=row_group_size, stats=True
+    )
+    return True
 
 
 class ParquetStore(StoreInterface):
@@ -34,14 +124,24 @@ class ParquetStore(StoreInterface):
 
     Attributes
     ----------
+    row_group_size: int
+        Maximum number of rows in each parquet row group.
 
     See Also
     --------
 
+    Notes
+    -----
+    Tables are written sorted by index, one file per Dask partition, with
+    min/max statistics for every column. Reads use the statistics to compute
+    partition divisions and to skip row groups that cannot match a filter.
+
     """
 
     file_extensions = (".parquet",)
     _metadata_file_name = "countess_metadata.json"
+    parquet_engine = "fastparquet"
+    row_group_size = 100000
 
     def __init__(self, path: Union[PathLike, str]) -> None:
         super().__init__(path)
@@ -73,9 +173,57 @@ class ParquetStore(StoreInterface):
         with self._key_file.open(mode="w") as handle:
             json.dump(self.keys(), handle, indent=2)
 
+    def _data_files(self, key: str) -> List[str]:
+        """Returns the paths of the parquet files for key in partition order.
+
+        Files are sorted so that "part.10.parquet" comes after
+        "part.9.parquet", matching the order used by Dask.
+
+        """
+        return sorted(
+            (str(p) for p in self.path.joinpath(key).glob("*.parquet")),
+            key=natural_sort_key,
+        )
+
+    def _index_name(self, key: str) -> Optional[str]:
+        """Returns the name of the index column stored for key."""
+        parquet_file = fastparquet.ParquetFile(self._data_files(key)[0])
+        index_names = parquet_file.pandas_metadata.get("index_columns", [])
+        if len(index_names) == 1 and isinstance(index_names[0], str):
+            return index_names[0]
+        else:
+            return None
+
+    def _write_partitions(self, key: str, value: dd.DataFrame, first: int) -> None:
+        """Writes each partition of value as a parquet file under key.
+
+        Files are numbered starting from first. If no rows are written and the
+        key has no other files, an empty file is written to record the schema.
+
+        """
+        key_path = self.path.joinpath(key)
+        key_path.mkdir(exist_ok=True)
+        writes = [
+            dask.delayed(_write_part_file)(
+                partition,
+                str(key_path.joinpath(f"part.{first + i}.parquet")),
+                self.row_group_size,
+            )
+            for i, partition in enumerate(value.to_delayed())
+        ]
+        written = dask.compute(*writes)
+        if not any(written) and len(self._data_files(key)) == 0:
+            fastparquet.write(
+                str(key_path.joinpath(f"part.{first}.parquet")), value._meta
+            )
+
     def put(self, key: str, value: dd.DataFrame) -> None:
         """
-        Stores a data frame in the HDF file under the given key.
+        Stores a data frame in the store under the given key.
+
+        The data frame is sorted by index before it is written. Data frames
+        with known divisions are already sorted across partitions, so only
+        data frames with unknown divisions are shuffled.
 
         Parameters
         ----------
@@ -88,7 +236,22 @@ class ParquetStore(StoreInterface):
         if key not in self.keys():
             self._keys.append(key)
         self._write_key_file()
-        value.to_parquet(self.path.joinpath(key))
+        if not value.known_divisions:
+            index_name = value.index.name
+            value = value.reset_index().set_index(
+                "index" if index_name is None else index_name
+            )
+            if index_name is None:
+                value = value.map_partitions(pd.DataFrame.rename_axis, None)
+        key_path = self.path.joinpath(key)
+        if key_path.is_dir():
+            for child in key_path.iterdir():
+                if child.suffix == ".parquet" or child.name in (
+                    "_metadata",
+                    "_common_metadata",
+                ):
+                    child.unlink()
+        self._write_partitions(key, value, first=0)
 
     def drop(self, key: str) -> None:
         """
@@ -128,14 +291,30 @@ class ParquetStore(StoreInterface):
             self._keys.remove(key)
             self._write_key_file()
 
-    def get(self, key: str) -> dd.DataFrame:
+    def get(
+        self,
+        key: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Filters] = None,
+    ) -> dd.DataFrame:
         """
         Returns the data at key as a dask DataFrame.
 
+        Only the requested columns are read. When filters are given, each row
+        group is read as a separate partition and row groups whose statistics
+        show they cannot match are skipped; the remaining rows are filtered
+        as the partitions are computed.
+
         Parameters
         ----------
         key: str
             The key to access.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+        filters: Optional[Filters]
+            Row filters in the format used by
+            :py:func:`dask.dataframe.read_parquet`, for example
+            ``[("count", ">=", 10)]``. Filters may refer to the index name.
 
         Returns
         -------
@@ -146,12 +325,34 @@ class ParquetStore(StoreInterface):
         ------
         KeyError
             If the key is not in the store.
+        ValueError
+            If the filters are not valid.
 
         """
         if key not in self.keys():
             raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
-        else:
-            return dd.read_parquet(self.path.joinpath(key))
+        read_columns = None if columns is None else list(columns)
+        if filters is not None:
+            filters = normalize_filters(filters)
+            if read_columns is not None:
+                index_name = self._index_name(key)
+                for conjunction in filters:
+                    for column, _, _ in conjunction:
+                        if column != index_name and column not in read_columns:
+                            read_columns.append(column)
+        result = dd.read_parquet(
+            self._data_files(key),
+            engine=self.parquet_engine,
+            columns=read_columns,
+            filters=filters,
+            calculate_divisions=True,
+            split_row_groups=filters is not None,
+        )
+        if filters is not None:
+            result = result.map_partitions(apply_filters, filters)
+            if columns is not None:
+                result = result[list(columns)]
+        return result
 
     def get_column(self, key: str, column: str) -> np.ndarray:
         """
@@ -177,12 +378,12 @@ class ParquetStore(StoreInterface):
         """
         if key not in self.keys():
             raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
-        else:
-            return (
-                dd.read_parquet(self.path.joinpath(key), columns=[column])
-                .compute()
-                .values.flatten()
+        parquet_file = fastparquet.ParquetFile(self._data_files(key))
+        if column not in parquet_file.columns or column == self._index_name(key):
+            raise KeyError(
+                f"{self.__class__.__name__} key '{key}' does not contain column '{column}'"
             )
+        return parquet_file.to_pandas(columns=[column])[column].values
 
     def get_with_merge(self, keys: Sequence[str]) -> dd.DataFrame:
         """
@@ -227,10 +428,120 @@ class ParquetStore(StoreInterface):
                 result = result.merge(
                     self.get(key), how="inner", left_index=True, right_index=True
                 )
-        if result.shape[0].compute() == 0:
+        if not has_rows(result):
             raise ValueError(f"{self.__class__.__name__} merge result is empty")
         return result
 
+    def select(
+        self,
+        key: str,
+        index: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns some or all of the data at key as a pandas DataFrame.
+
+        Only the requested columns are read. Row groups whose index statistics
+        show they cannot contain any of the requested index values are
+        skipped.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        index: Optional[Sequence[Any]]
+            Index values of the rows to return. Default None returns all rows.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+
+        Returns
+        -------
+        :py:class:`~pandas.DataFrame`
+            The selected data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        if columns is not None:
+            columns = list(columns)
+        parquet_file = fastparquet.ParquetFile(self._data_files(key))
+        if index is None:
+            return parquet_file.to_pandas(columns=columns)
+        else:
+            index_values = list(index)
+            filters = None
+            index_names = parquet_file.pandas_metadata.get("index_columns", [])
+            if len(index_values) > 0 and len(index_names) == 1:
+                filters = [(index_names[0], "in", index_values)]
+            df = parquet_file.to_pandas(columns=columns, filters=filters)
+            return df.loc[df.index.isin(index_values)]
+
+    def append(self, key: str, value: Union[pd.DataFrame, dd.DataFrame]) -> None:
+        """
+        Appends the rows of a data frame to the table stored under key.
+
+        If the key is not in the store, a new table is created. The appended
+        rows are written as new parquet files alongside the existing ones,
+        sorted within each file but not merged with the existing rows.
+
+        Parameters
+        ----------
+        key:  str
+            Name of the data frame in the store.
+        value : Union[pd.DataFrame, dd.DataFrame]
+            The pandas or Dask data frame to append.
+
+        """
+        if isinstance(value, pd.DataFrame):
+            value = dd.from_pandas(value, npartitions=1)
+        if key not in self.keys():
+            self.put(key, value)
+        else:
+            files = self._data_files(key)
+            first = int(pathlib.Path(files[-1]).stem.split(".")[-1]) + 1 if files else 0
+            self._write_partitions(key, value, first=first)
+
+    def iter_chunks(
+        self, key: str, chunksize: int, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterates over the data at key as pandas DataFrames of chunksize rows.
+
+        Row groups are read one at a time, so at most one row group and one
+        chunk are held in memory.
+
+        Parameters
+        ----------
+        key: str
+            The key to access.
+        chunksize: int
+            Number of rows in each chunk. Only the last chunk may be shorter.
+        columns: Optional[Sequence[str]]
+            Names of the columns to return. Default None returns all columns.
+
+        Returns
+        -------
+        Iterator[pd.DataFrame]
+            The data in the order it is stored.
+
+        Raises
+        ------
+        KeyError
+            If the key is not in the store.
+
+        """
+        if key not in self.keys():
+            raise KeyError(f"{self.__class__.__name__} does not contain key '{key}'")
+        if columns is not None:
+            columns = list(columns)
+        parquet_file = fastparquet.ParquetFile(self._data_files(key))
+        return rechunk(parquet_file.iter_row_groups(columns=columns), chunksize)
+
     def set_metadata(
         self, key: str, metadata: Dict[str, Any], update: bool = False
     ) -> None:
@@ -82,22 +82,20 @@ class RatiosScorer(BaseScorerPlugin):
 
         elif self.logr_method == "complete":
             shared_counts = (
-                self.store_select(
+                self.store_column_sums(
                     key="/main/{}/counts".format(label),
                     columns=["c_0", "{}".format(c_last)],
                 )
-                .sum(axis="index")
                 .values
                 + 0.5
             )
 
         elif self.logr_method == "full":
             shared_counts = (
-                self.store_select(
+                self.store_column_sums(
                     key="/main/{}/counts_unfiltered".format(label),
                     columns=["c_0", "{}".format(c_last)],
                 )
-                .sum(axis="index", skipna=True)
                 .values
                 + 0.5
             )
@@ -132,17 +132,15 @@ class RegressionScorer(BaseScorerPlugin):
 
         elif self.logr_method == "complete":
             ratios = ratios - np.log(
-                self.store_select(key="/main/{}/counts".format(label), columns=c_n)
-                .sum(axis="index")
+                self.store_column_sums(key="/main/{}/counts".format(label), columns=c_n)
                 .values
                 + 0.5
             )
         elif self.logr_method == "full":
             ratios = ratios - np.log(
-                self.store_select(
+                self.store_column_sums(
                     key="/main/{}/counts_unfiltered".format(label), columns=c_n
                 )
-                .sum(axis="index", skipna=True)
                 .values
                 + 0.5
             )
@@ -211,8 +209,7 @@ class RegressionScorer(BaseScorerPlugin):
         # ---------------------- COMPLETE NORM ----------------------------- #
         elif self.logr_method == "complete":
             variances = variances + 1.0 / (
-                self.store_select(key="/main/{}/counts".format(label), columns=c_n)
-                .sum(axis="index")
+                self.store_column_sums(key="/main/{}/counts".format(label), columns=c_n)
                 .values
                 + 0.5
             )
@@ -220,10 +217,9 @@ class RegressionScorer(BaseScorerPlugin):
         # ------------------------- FULL NORM ----------------------------- #
         elif self.logr_method == "full":
             variances = variances + 1.0 / (
-                self.store_select(
+                self.store_column_sums(
                     key="/main/{}/counts_unfiltered".format(label), columns=c_n
                 )
-                .sum(axis="index", skipna=True)
                 .values
                 + 0.5
             )
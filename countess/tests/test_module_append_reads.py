@@ -0,0 +1,209 @@
+import os
+import gzip
+import unittest
+import tempfile
+import pandas as pd
+
+from ..base.utils import compute_prefix_fingerprint
+from ..libraries.barcode import BarcodeSeqLib
+from ..libraries.basic import BasicSeqLib
+from ..sequence.fqread import read_fastq_range
+from .utilities import load_config_data, make_seqlib
+
+
+def fastq_records(sequences, start=0, quality="H"):
+    return "".join(
+        "@FQTEST:8:8:8:8:{}#0/1\n{}\n+\n{}\n".format(
+            start + i, seq, quality * len(seq)
+        )
+        for i, seq in enumerate(sequences)
+    )
+
+
+class TestAppendReads(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.reads = os.path.join(self._temp_dir.name, "growing.fq")
+        with open(self.reads, "w") as handle:
+            handle.write(fastq_records(["AAAA", "CCCC", "AAAA"]))
+        self.stores = list()
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self._temp_dir.cleanup()
+
+    def append(self, text):
+        with open(self.reads, "a") as handle:
+            handle.write(text)
+
+    def make_lib(self):
+        cfg = load_config_data("barcode.json", "data/config/barcode/")
+        cfg["fastq"]["reads"] = self.reads
+        cfg["fastq"]["filters"]["avg quality"] = 20
+        cfg["output directory"] = self._temp_dir.name
+
+        lib = make_seqlib(
+            BarcodeSeqLib, cfg, os.path.join(self._temp_dir.name, "lib.h5")
+        )
+        lib.append_reads = True
+        self.stores.append(lib.store)
+        return lib
+
+    def counts(self, lib):
+        return lib.store["/raw/barcodes/counts"]["count"].sort_index().to_dict()
+
+    def test_ledger(self):
+        lib = self.make_lib()
+        lib.counts_from_reads()
+        ledger = lib.load_reads_ledger()
+        self.assertEqual(ledger["end"], os.path.getsize(self.reads))
+        self.assertEqual(ledger["records"], 3)
+        self.assertEqual(ledger["reads"], os.path.abspath(self.reads))
+
+    def test_append(self):
+        lib = self.make_lib()
+        lib.counts_from_reads()
+        lib.save_filter_stats()
+        lib.store_put("/main/barcodes/counts", pd.DataFrame({"count": [1]}))
+
+        # the last record is still being written
+        added = fastq_records(["GGGG", "AAAA"], start=3)
+        added += fastq_records(["CCCC"], start=5, quality="#")
+        complete = os.path.getsize(self.reads) + len(added)
+        self.append(added + "@FQTEST:6\nTT")
+
+        lib = self.make_lib()
+        lib.update_appended_reads()
+        lib.save_filter_stats()
+        self.assertDictEqual(self.counts(lib), {"AAAA": 3, "CCCC": 1, "GGGG": 1})
+        self.assertEqual(lib.load_reads_ledger()["end"], complete)
+        self.assertNotIn("/main/barcodes/counts", lib.store)
+        self.assertDictEqual(
+            lib.store["/raw/filter"]["count"].to_dict(),
+            {"average quality": 1, "total": 1},
+        )
+
+        self.append("TT\n+\n####\n")
+        lib = self.make_lib()
+        lib.update_appended_reads()
+        lib.save_filter_stats()
+        self.assertDictEqual(self.counts(lib), {"AAAA": 3, "CCCC": 1, "GGGG": 1})
+        self.assertEqual(lib.load_reads_ledger()["records"], 7)
+        self.assertDictEqual(
+            lib.store["/raw/filter"]["count"].to_dict(),
+            {"average quality": 2, "total": 2},
+        )
+
+    def test_unchanged(self):
+        lib = self.make_lib()
+        lib.counts_from_reads()
+        lib.store_put("/main/barcodes/counts", pd.DataFrame({"count": [1]}))
+        lib.update_appended_reads()
+        self.assertIn("/main/barcodes/counts", lib.store)
+
+    def test_changed(self):
+        lib = self.make_lib()
+        lib.counts_from_reads()
+        with open(self.reads, "w") as handle:
+            handle.write(fastq_records(["TTTT", "CCCC", "AAAA", "GGGG"]))
+        lib.update_appended_reads()
+        self.assertNotIn("/raw/barcodes/counts", lib.store)
+        self.assertIsNone(lib.load_reads_ledger())
+
+    def test_compressed(self):
+        # compressed files are counted whole and recounted when they change
+        self.reads = os.path.join(self._temp_dir.name, "growing.fq.gz")
+        with gzip.open(self.reads, "wt") as handle:
+            handle.write(fastq_records(["AAAA", "CCCC", "AAAA"]))
+        lib = self.make_lib()
+        lib.counts_from_reads()
+        ledger = lib.load_reads_ledger()
+        self.assertEqual(ledger["end"], -1)
+        self.assertEqual(ledger["fingerprint"], compute_prefix_fingerprint(self.reads))
+        lib.store_put("/main/barcodes/counts", pd.DataFrame({"count": [1]}))
+        lib.update_appended_reads()
+        self.assertIn("/main/barcodes/counts", lib.store)
+
+        with gzip.open(self.reads, "at") as handle:
+            handle.write(fastq_records(["GGGG"], start=3))
+        lib.update_appended_reads()
+        self.assertNotIn("/raw/barcodes/counts", lib.store)
+        self.assertNotIn("/main/barcodes/counts", lib.store)
+
+    def test_metadata_ignores_reads_md5(self):
+        lib = self.make_lib()
+        lib.counts_from_reads()
+        lib.set_metadata("/raw/barcodes/counts", lib.metadata(), update=False)
+        self.append(fastq_records(["GGGG"], start=3))
+        self.assertTrue(lib.check_metadata("/raw/barcodes/counts"))
+        lib.append_reads = False
+        self.assertFalse(lib.check_metadata("/raw/barcodes/counts"))
+
+
+class TestAppendBasicReads(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.reads = os.path.join(self._temp_dir.name, "growing.fq")
+        with open(self.reads, "w") as handle:
+            handle.write(fastq_records(["AAAAAA", "AAAAAC"]))
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def make_lib(self):
+        cfg = load_config_data("basic_noncoding.json", "data/config/basic/")
+        cfg["fastq"]["reads"] = self.reads
+        cfg["output directory"] = self._temp_dir.name
+        lib = make_seqlib(
+            BasicSeqLib, cfg, os.path.join(self._temp_dir.name, "lib.h5")
+        )
+        lib.append_reads = True
+        return lib
+
+    def test_append(self):
+        lib = self.make_lib()
+        lib.counts_from_reads()
+        lib.set_metadata("/raw/variants/counts", lib.metadata(), update=False)
+        with open(self.reads, "a") as handle:
+            handle.write(fastq_records(["AAAAAA"], start=2))
+
+        lib = self.make_lib()
+        self.assertTrue(lib.check_metadata("/raw/variants/counts"))
+        lib.update_appended_reads()
+        counts = lib.store["/raw/variants/counts"]["count"].to_dict()
+        self.assertDictEqual(counts, {"_wt": 2, "n.6A>C": 1})
+        self.assertEqual(lib.load_reads_ledger()["records"], 3)
+        lib.store.close()
+
+
+class TestReadFastqRange(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.reads = os.path.join(self._temp_dir.name, "reads.fq")
+        self.text = fastq_records(["AAAA", "CCCC", "GGGG"])
+        with open(self.reads, "w") as handle:
+            handle.write(self.text + "@FQTEST:3\nTT")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_offsets(self):
+        records = list(read_fastq_range(self.reads, buffer_size=7))
+        self.assertListEqual(
+            [fq.sequence for fq, _ in records], ["AAAA", "CCCC", "GGGG"]
+        )
+        self.assertEqual(records[-1][1], len(self.text))
+
+        start = records[0][1]
+        records = list(read_fastq_range(self.reads, start=start, end=records[1][1]))
+        self.assertListEqual([fq.sequence for fq, _ in records], ["CCCC"])
+
+    def test_compressed(self):
+        path = os.path.join(self._temp_dir.name, "reads.fq.gz")
+        open(path, "w").close()
+        self.assertRaises(IOError, list, read_fastq_range(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import gzip
+import unittest
+import tempfile
+import pandas as pd
+
+from ..libraries.barcode import BarcodeSeqLib
+from .utilities import load_config_data, create_file_path, make_seqlib
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after_checkpoint(lib):
+    """Stops counting after the first checkpoint, as if the job was killed."""
+    save_checkpoint = lib.save_checkpoint
+
+    def interrupted(*args, **kwargs):
+        save_checkpoint(*args, **kwargs)
+        raise Interrupted()
+
+    lib.save_checkpoint = interrupted
+
+
+def interrupt_at_second_checkpoint(lib):
+    """Stops counting before the second checkpoint is saved."""
+    save_checkpoint = lib.save_checkpoint
+    saved = list()
+
+    def interrupted(*args, **kwargs):
+        if len(saved) > 0:
+            raise Interrupted()
+        save_checkpoint(*args, **kwargs)
+        saved.append(args)
+
+    lib.save_checkpoint = interrupted
+
+
+class TestCountsCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.cfg = load_config_data("barcode.json", "data/config/barcode/")
+        self.cfg["fastq"]["reads"] = "{}/integrated.fq".format(
+            create_file_path("barcode/", "data/reads/")
+        )
+        self.cfg["fastq"]["filters"]["avg quality"] = 38
+        self.cfg["output directory"] = self._temp_dir.name
+        self.stores = list()
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self._temp_dir.cleanup()
+
+    def make_lib(self, path):
+        lib = make_seqlib(BarcodeSeqLib, self.cfg, path)
+        lib.checkpoint_interval = 2
+        self.stores.append(lib.store)
+        return lib
+
+    def count(self, path):
+        lib = self.make_lib(path)
+        lib.counts_from_reads()
+        return lib
+
+    def test_resume(self):
+        expected = self.count(self._temp_dir.name + "/expected.h5")
+        path = self._temp_dir.name + "/resumed.h5"
+
+        interrupted = self.make_lib(path)
+        interrupt_after_checkpoint(interrupted)
+        self.assertRaises(Interrupted, interrupted.counts_from_reads)
+        self.assertIn("/checkpoint/barcodes/state", interrupted.store)
+        self.assertNotIn("/raw/barcodes/counts", interrupted.store)
+
+        resumed = self.make_lib(path)
+        counter = resumed.new_counter()
+        records, _ = resumed.load_checkpoint("barcodes", counter)
+        self.assertEqual(records, 2)
+        counter.close()
+
+        resumed = self.count(path)
+        pd.testing.assert_frame_equal(
+            resumed.store["/raw/barcodes/counts"].sort_index(),
+            expected.store["/raw/barcodes/counts"].sort_index(),
+        )
+        self.assertDictEqual(resumed.filter_stats, expected.filter_stats)
+        self.assertNotIn("/checkpoint/barcodes/state", resumed.store)
+        self.assertNotIn("/checkpoint/barcodes/counts", resumed.store)
+
+    def test_resume_filtered_reads(self):
+        self.cfg["report filtered reads"] = True
+        expected = self.count(self._temp_dir.name + "/expected.h5")
+        with gzip.open(expected.filtered_reads_path, "rt") as handle:
+            expected_rows = handle.read().splitlines()
+        os.remove(expected.filtered_reads_path)
+        path = self._temp_dir.name + "/resumed.h5"
+
+        # the filtered reads after the checkpoint are written before the crash
+        interrupted = self.make_lib(path)
+        interrupted.checkpoint_interval = 5
+        interrupted.filtered_sink().buffer_size = 1
+        interrupt_at_second_checkpoint(interrupted)
+        self.assertRaises(Interrupted, interrupted.counts_from_reads)
+        interrupted.close_filtered_sink()
+
+        self.count(path)
+        with gzip.open(expected.filtered_reads_path, "rt") as handle:
+            self.assertListEqual(handle.read().splitlines(), expected_rows)
+
+    def test_metadata_once_per_run(self):
+        lib = self.make_lib(self._temp_dir.name + "/test.h5")
+        lib.checkpoint_interval = 1
+        calls = list()
+        metadata = lib.metadata
+
+        def counted_metadata():
+            calls.append(1)
+            return metadata()
+
+        lib.metadata = counted_metadata
+        lib.counts_from_reads()
+        self.assertEqual(len(calls), 1)
+
+    def test_changed_settings_ignored(self):
+        path = self._temp_dir.name + "/resumed.h5"
+        interrupted = self.make_lib(path)
+        interrupt_after_checkpoint(interrupted)
+        self.assertRaises(Interrupted, interrupted.counts_from_reads)
+
+        self.cfg["fastq"]["filters"]["avg quality"] = 30
+        lib = self.make_lib(path)
+        counter = lib.new_counter()
+        self.assertEqual(lib.load_checkpoint("barcodes", counter), (0, {}))
+        self.assertEqual(len(counter), 0)
+        self.assertNotIn("/checkpoint/barcodes/state", lib.store)
+
+    def test_checkpoint_due(self):
+        lib = self.make_lib(self._temp_dir.name + "/test.h5")
+        self.assertFalse(lib.checkpoint_due(1))
+        self.assertTrue(lib.checkpoint_due(4))
+        self.assertTrue(lib.checkpoint_due(5, start=3))
+        self.assertFalse(lib.checkpoint_due(7, start=6))
+        self.assertEqual(lib.read_batch_size(), 2)
+        lib.checkpoint_interval = None
+        self.assertFalse(lib.checkpoint_due(4))
+        with self.assertRaises(ValueError):
+            lib.checkpoint_interval = 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from ..base.chunk_sizer import ChunkSizer
+from ..libraries.barcode import BarcodeSeqLib
+from ..selection.selection import Selection
+
+
+class TestChunkSizer(unittest.TestCase):
+    def test_no_budget(self):
+        sizer = ChunkSizer(None, row_bytes=100, tables=4, default=500)
+        self.assertEqual(sizer.rows, 500)
+        self.assertFalse(sizer.update(10 ** 9, 500))
+        self.assertEqual(sizer.rows, 500)
+
+    def test_rows_from_budget(self):
+        sizer = ChunkSizer(100 * 1024 ** 2, row_bytes=100, tables=4)
+        self.assertEqual(sizer.rows, int(25 * 1024 ** 2 // 400))
+
+    def test_more_tables_smaller_chunks(self):
+        few = ChunkSizer(100 * 1024 ** 2, row_bytes=100, tables=2)
+        many = ChunkSizer(100 * 1024 ** 2, row_bytes=100, tables=20)
+        self.assertLess(many.rows, few.rows)
+
+    def test_limits(self):
+        self.assertEqual(ChunkSizer(1024, row_bytes=100).rows, ChunkSizer.min_rows)
+        self.assertEqual(
+            ChunkSizer(1024 ** 4, row_bytes=10).rows, ChunkSizer.max_rows
+        )
+
+    def test_update(self):
+        sizer = ChunkSizer(400000, row_bytes=10)
+        self.assertEqual(sizer.rows, 10000)
+        # the chunk used four times the estimate
+        self.assertTrue(sizer.update(400000, 10000))
+        self.assertEqual(sizer.overruns, 1)
+        self.assertEqual(sizer.rows, 2500)
+        # and then half of its share
+        self.assertFalse(sizer.update(50000, 2500))
+        self.assertEqual(sizer.rows, 5000)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, ChunkSizer, 0, 100)
+        self.assertRaises(ValueError, ChunkSizer, None, 0)
+
+    def test_string_bytes(self):
+        self.assertEqual(
+            ChunkSizer.string_bytes(10), ChunkSizer.string_overhead + 10
+        )
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def test_root_option(self):
+        root = Selection()
+        lib = BarcodeSeqLib()
+        lib.parent = root
+        self.assertIsNone(lib.memory_budget)
+        self.assertEqual(lib.chunk_sizer(100).rows, lib.chunksize)
+        root.memory_budget = 64
+        self.assertEqual(lib.memory_budget, 64)
+        self.assertEqual(lib.chunk_sizer(100, tables=2).rows, 16 * 1024 ** 2 // 200)
+        with self.assertRaises(ValueError):
+            root.memory_budget = 0
+
+
+if __name__ == "__main__":
+    unittest.main()
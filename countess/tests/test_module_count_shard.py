@@ -0,0 +1,173 @@
+import os
+import json
+import unittest
+import tempfile
+import pandas as pd
+
+from ..base.count_shard import write_count_shard, read_count_shard_header
+from ..base.count_shard import iter_count_shard, merge_count_shards
+from ..libraries.barcode import BarcodeSeqLib
+from ..main import count_cmd, reduce_cmd
+from ..store.hdf import HdfStore
+from .test_module_append_reads import fastq_records
+from .utilities import load_config_data, make_seqlib
+
+
+class TestCountShardFormat(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self._temp_dir.name, name)
+
+    def write(self, name, counts):
+        df = pd.DataFrame({"count": list(counts.values())}, index=list(counts))
+        return write_count_shard(self.path(name), df, {"label": "barcodes"})
+
+    def test_round_trip(self):
+        header = self.write("a.parquet", {"CCC": 2, "AAAA": 5, "GG": 1})
+        self.assertListEqual(
+            list(iter_count_shard(self.path("a.parquet"))),
+            [("AAAA", 5), ("CCC", 2), ("GG", 1)],
+        )
+        self.assertDictEqual(read_count_shard_header(self.path("a.parquet")), header)
+        self.assertEqual(header["label"], "barcodes")
+        self.assertEqual(header["elements"], 3)
+        self.assertEqual(header["total"], 8)
+        self.assertEqual(header["max_key_length"], 4)
+        self.assertFalse(os.path.exists(self.path("a.parquet.tmp")))
+
+    def test_merge(self):
+        self.write("a.parquet", {"AA": 1, "CC": 2})
+        self.write("b.parquet", {"CC": 3, "GG": 4})
+        self.write("c.parquet", {"AA": 5})
+        merged = merge_count_shards(
+            [self.path(x) for x in ("a.parquet", "b.parquet", "c.parquet")]
+        )
+        self.assertListEqual(list(merged), [("AA", 6), ("CC", 5), ("GG", 4)])
+
+    def test_invalid_header(self):
+        df = pd.DataFrame({"count": [1]}, index=["AA"])
+        df.to_parquet(self.path("plain.parquet"))
+        self.assertRaises(
+            ValueError, read_count_shard_header, self.path("plain.parquet")
+        )
+        self.assertRaises(IOError, read_count_shard_header, self.path("missing"))
+
+
+class TestCountShards(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.shards = [
+            fastq_records(["AAAA", "CCCC", "AAAA"]),
+            fastq_records(["GGGG", "AAAA"], start=3)
+            + fastq_records(["CCCC"], start=5, quality="#"),
+        ]
+        self.reads = list()
+        for i, text in enumerate(self.shards):
+            self.reads.append(self.path("shard_{}.fq".format(i)))
+            with open(self.reads[-1], "w") as handle:
+                handle.write(text)
+        self.full = self.path("full.fq")
+        with open(self.full, "w") as handle:
+            handle.write("".join(self.shards))
+        self.stores = list()
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self._temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self._temp_dir.name, name)
+
+    def make_cfg(self, reads):
+        cfg = load_config_data("barcode.json", "data/config/barcode/")
+        cfg["fastq"]["reads"] = reads
+        cfg["fastq"]["filters"]["avg quality"] = 20
+        cfg["output directory"] = self.path("output")
+        return cfg
+
+    def make_lib(self, name, reads, min_quality=0):
+        cfg = self.make_cfg(reads)
+        cfg["fastq"]["filters"]["min quality"] = min_quality
+        lib = make_seqlib(BarcodeSeqLib, cfg, self.path(name + ".h5"))
+        self.stores.append(lib.store)
+        return lib
+
+    def counts(self, store):
+        return store["/raw/barcodes/counts"]["count"].sort_index().to_dict()
+
+    def count_shard(self, i, **kwargs):
+        lib = self.make_lib("shard_{}".format(i), self.reads[i], **kwargs)
+        lib.counts_from_reads()
+        return lib.save_count_shard(self.path("shard_{}.parquet".format(i)))
+
+    def test_counts_from_shards(self):
+        expected = self.make_lib("expected", self.full)
+        expected.counts_from_reads()
+        expected.save_filter_stats()
+
+        header = self.count_shard(0)
+        self.assertEqual(header["type"], "BarcodeSeqLib")
+        self.assertEqual(header["reads"], os.path.abspath(self.reads[0]))
+        self.count_shard(1)
+        lib = self.make_lib("merged", self.full)
+        lib.counts_from_shards(
+            [self.path("shard_0.parquet"), self.path("shard_1.parquet")]
+        )
+        self.assertDictEqual(self.counts(lib.store), self.counts(expected.store))
+        self.assertDictEqual(lib.filter_stats, expected.filter_stats)
+        self.assertDictEqual(
+            lib.store["/raw/filter"]["count"].to_dict(),
+            expected.store["/raw/filter"]["count"].to_dict(),
+        )
+        self.assertListEqual(
+            list(lib.store["/inputs/shards"]["reads"]),
+            [os.path.abspath(x) for x in self.reads],
+        )
+
+    def test_counts_from_shards_errors(self):
+        self.count_shard(0)
+        self.count_shard(1, min_quality=10)
+        lib = self.make_lib("merged", self.full)
+        self.assertRaises(ValueError, lib.counts_from_shards, [])
+        self.assertRaises(
+            ValueError,
+            lib.counts_from_shards,
+            [self.path("shard_0.parquet"), self.path("shard_0.parquet")],
+        )
+        self.assertRaises(
+            ValueError,
+            lib.counts_from_shards,
+            [self.path("shard_0.parquet"), self.path("shard_1.parquet")],
+        )
+
+    def test_count_reduce_commands(self):
+        expected = self.make_lib("expected", self.full)
+        expected.counts_from_reads()
+
+        config = self.path("config.json")
+        with open(config, "w") as handle:
+            json.dump(self.make_cfg(self.full), handle)
+        shards = [self.path("shard_{}.parquet".format(i)) for i in range(2)]
+        for reads, shard in zip(self.reads, shards):
+            count_cmd([config, reads, shard])
+        output_dir = self.path("reduced")
+        reduce_cmd([config] + shards + ["--output-dir", output_dir])
+
+        stores = [x for x in os.listdir(output_dir) if x.endswith(".h5")]
+        self.assertEqual(len(stores), 1)
+        store = HdfStore(os.path.join(output_dir, stores[0]))
+        self.assertDictEqual(self.counts(store), self.counts(expected.store))
+        self.assertEqual(
+            store.get_metadata("/raw/barcodes/counts")["cfg"]["name"],
+            expected.name,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
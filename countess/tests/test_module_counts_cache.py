@@ -0,0 +1,79 @@
+import os
+import unittest
+import tempfile
+import pandas as pd
+
+from ..base.counts_cache import CountsCache
+
+
+class TestCountsCache(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.cache = CountsCache(os.path.join(self._temp_dir.name, "cache"))
+        self.cfg = {
+            "type": "BasicSeqLib",
+            "fastq": {"read md5": "abc", "reverse": False, "filters": {}},
+        }
+        self.counts = pd.DataFrame(
+            {"count": [10, 5, 1]}, index=pd.Index(["_wt", "c.1A>G", "c.2C>T"])
+        )
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_creates_directory(self):
+        self.assertTrue(os.path.isdir(self.cache.path))
+
+    def test_key_ignores_option_order(self):
+        reordered = {
+            "fastq": {"filters": {}, "reverse": False, "read md5": "abc"},
+            "type": "BasicSeqLib",
+        }
+        self.assertEqual(
+            CountsCache.cache_key(self.cfg), CountsCache.cache_key(reordered)
+        )
+
+    def test_key_depends_on_options(self):
+        changed = {
+            "type": "BasicSeqLib",
+            "fastq": {"read md5": "abc", "reverse": True, "filters": {}},
+        }
+        self.assertNotEqual(
+            CountsCache.cache_key(self.cfg), CountsCache.cache_key(changed)
+        )
+
+    def test_load_missing(self):
+        key = CountsCache.cache_key(self.cfg)
+        self.assertIsNone(self.cache.load(key))
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_save_and_load(self):
+        key = CountsCache.cache_key(self.cfg)
+        filter_stats = {"min quality": 3, "total": 3}
+        self.cache.save(key, {"/raw/variants/counts": self.counts}, filter_stats)
+        self.assertTrue(self.cache.contains(key))
+
+        tables, result_stats = self.cache.load(key)
+        self.assertListEqual(list(tables.keys()), ["/raw/variants/counts"])
+        pd.testing.assert_frame_equal(tables["/raw/variants/counts"], self.counts)
+        self.assertDictEqual(result_stats, filter_stats)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_save_overwrites(self):
+        key = CountsCache.cache_key(self.cfg)
+        self.cache.save(key, {"/raw/variants/counts": self.counts}, {"total": 0})
+        self.cache.save(key, {"/raw/variants/counts": self.counts * 2}, {"total": 1})
+
+        tables, result_stats = self.cache.load(key)
+        pd.testing.assert_frame_equal(tables["/raw/variants/counts"], self.counts * 2)
+        self.assertDictEqual(result_stats, {"total": 1})
+        self.assertListEqual(os.listdir(self.cache.path), [key + ".h5"])
+
+    def test_save_empty(self):
+        key = CountsCache.cache_key(self.cfg)
+        self.assertRaises(ValueError, self.cache.save, key, {}, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
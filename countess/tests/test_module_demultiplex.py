@@ -0,0 +1,147 @@
+import os
+import unittest
+import tempfile
+
+from ..libraries.barcode import BarcodeSeqLib
+from ..libraries.demultiplex import Demultiplexer
+from ..config.types import DemultiplexConfiguration
+from .utilities import load_config_data, make_seqlib
+
+
+def write_fastq(path, sequences):
+    with open(path, "w") as handle:
+        for i, seq in enumerate(sequences):
+            handle.write(
+                "@FQTEST:8:8:8:8:{}#0/1\n{}\n+\n{}\n".format(i, seq, "H" * len(seq))
+            )
+
+
+class TestDemultiplexer(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.reads = os.path.join(self._temp_dir.name, "multiplexed.fq")
+        write_fastq(
+            self.reads,
+            [
+                "AAAAGGCC",
+                "AAAAGGCC",
+                "AAACTTTT",  # one mismatch from AAAA
+                "CCCCGGCC",
+                "CCCCACGT",
+                "GGGGGGCC",  # no library
+                "ACACGGCC",  # two mismatches from both libraries
+            ],
+        )
+        self.stores = list()
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self._temp_dir.cleanup()
+
+    def make_lib(self, name, index, mismatches=0, index_reads=None):
+        cfg = load_config_data("barcode.json", "data/config/barcode/")
+        cfg["name"] = name
+        cfg["fastq"]["reads"] = self.reads
+        cfg["fastq"]["start"] = 5
+        cfg["fastq"]["demultiplex"] = {"index": index, "mismatches": mismatches}
+        if index_reads is not None:
+            cfg["fastq"]["demultiplex"]["index reads"] = index_reads
+            cfg["fastq"]["start"] = 1
+        cfg["output directory"] = self._temp_dir.name
+
+        lib = make_seqlib(
+            BarcodeSeqLib, cfg, os.path.join(self._temp_dir.name, name + ".h5")
+        )
+        self.stores.append(lib.store)
+        return lib
+
+    def counts(self, lib):
+        return lib.store["/raw/barcodes/counts"]["count"].sort_index().to_dict()
+
+    def test_count(self):
+        first = self.make_lib("first", "AAAA", mismatches=1)
+        second = self.make_lib("second", "CCCC")
+        demux = Demultiplexer(self.reads, libraries=[first, second])
+        demux.count()
+        self.assertDictEqual(self.counts(first), {"GGCC": 2, "TTTT": 1})
+        self.assertDictEqual(self.counts(second), {"ACGT": 1, "GGCC": 1})
+        self.assertListEqual(demux.assigned, [3, 2])
+        self.assertEqual(demux.unassigned, 2)
+
+    def test_counts_from_reads(self):
+        lib = self.make_lib("first", "AAAA")
+        lib.counts_from_reads()
+        self.assertDictEqual(self.counts(lib), {"GGCC": 2})
+
+    def test_index_reads(self):
+        index_reads = os.path.join(self._temp_dir.name, "index.fq")
+        write_fastq(index_reads, ["TT", "GA", "TT", "GA", "GG", "TA", "TT"])
+        first = self.make_lib("first", "TT", index_reads=index_reads)
+        second = self.make_lib("second", "GA", index_reads=index_reads)
+        Demultiplexer(self.reads, index_reads, [first, second]).count()
+        self.assertDictEqual(
+            self.counts(first), {"AAAAGGCC": 1, "AAACTTTT": 1, "ACACGGCC": 1}
+        )
+        self.assertDictEqual(self.counts(second), {"AAAAGGCC": 1, "CCCCGGCC": 1})
+
+    def test_index_reads_length_mismatch(self):
+        index_reads = os.path.join(self._temp_dir.name, "index.fq")
+        write_fastq(index_reads, ["TT", "GA"])
+        lib = self.make_lib("first", "TT", index_reads=index_reads)
+        self.assertRaises(ValueError, lib.counts_from_reads)
+
+    def test_ambiguous(self):
+        first = self.make_lib("first", "AAAA", mismatches=2)
+        second = self.make_lib("second", "AACC", mismatches=2)
+        demux = Demultiplexer(self.reads, libraries=[first, second])
+        self.assertIs(demux.assign("AAACGGCC"), None)
+        self.assertEqual(demux.ambiguous, 1)
+        self.assertIs(demux.assign("AAAAGGCC"), first)
+        self.assertIs(demux.assign("aaccggcc"), second)
+        self.assertIs(demux.assign("GGGGGGCC"), None)
+        self.assertEqual(demux.unassigned, 1)
+
+    def test_add_library_errors(self):
+        first = self.make_lib("first", "AAAA")
+        demux = Demultiplexer(self.reads, libraries=[first])
+        self.assertRaises(ValueError, demux.add_library, first)
+        self.assertRaises(ValueError, demux.add_library, self.make_lib("x", "CCC"))
+        other = self.make_lib("other", "CCCC")
+        other.reads = os.path.join(self._temp_dir.name, "other.fq")
+        self.assertRaises(ValueError, demux.add_library, other)
+
+    def test_serialize(self):
+        lib = self.make_lib("first", "AAAA", mismatches=1)
+        self.assertDictEqual(
+            lib.serialize()["fastq"]["demultiplex"], {"index": "AAAA", "mismatches": 1}
+        )
+
+
+class TestDemultiplexConfiguration(unittest.TestCase):
+    def test_defaults(self):
+        cfg = DemultiplexConfiguration({"index": "ACGT"})
+        self.assertEqual(cfg.mismatches, 0)
+        self.assertIsNone(cfg.index_reads)
+        self.assertDictEqual(cfg.to_dict(), {"index": "ACGT", "mismatches": 0})
+
+    def test_missing_index(self):
+        self.assertRaises(KeyError, DemultiplexConfiguration, {})
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, DemultiplexConfiguration, {"index": "ACXT"})
+        self.assertRaises(
+            ValueError, DemultiplexConfiguration, {"index": "ACGT", "mismatches": 4}
+        )
+        self.assertRaises(
+            TypeError, DemultiplexConfiguration, {"index": "ACGT", "mismatches": "1"}
+        )
+        self.assertRaises(
+            IOError,
+            DemultiplexConfiguration,
+            {"index": "ACGT", "index reads": "missing.fq"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
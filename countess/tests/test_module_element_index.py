@@ -0,0 +1,223 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+
+from ..base.element_index import ElementIndex
+from ..base.storemanager import StoreManager
+from ..store.hdf import HdfStore
+
+
+class TestElementIndex(unittest.TestCase):
+    def setUp(self):
+        self.elements = ElementIndex(["_wt", "c.1A>G"])
+
+    def test_encode_existing(self):
+        ids = self.elements.encode(["c.1A>G", "_wt", "c.1A>G"])
+        np.testing.assert_array_equal(ids, [1, 0, 1])
+        self.assertEqual(ids.dtype, np.int64)
+
+    def test_encode_adds_dense_ids(self):
+        ids = self.elements.encode(["c.2C>T", "_wt", "c.3G>A", "c.2C>T"])
+        np.testing.assert_array_equal(ids, [2, 0, 3, 2])
+        self.assertEqual(len(self.elements), 4)
+
+    def test_encode_without_adding(self):
+        ids = self.elements.encode(["c.2C>T", "_wt"], add=False)
+        np.testing.assert_array_equal(ids, [-1, 0])
+        self.assertEqual(len(self.elements), 2)
+
+    def test_decode(self):
+        self.elements.encode(["c.2C>T"])
+        self.assertListEqual(
+            list(self.elements.decode([2, 0, 1])), ["c.2C>T", "_wt", "c.1A>G"]
+        )
+
+    def test_decode_unknown(self):
+        self.assertRaises(IndexError, self.elements.decode, [2])
+        self.assertRaises(IndexError, self.elements.decode, [-1])
+
+    def test_duplicates(self):
+        self.assertRaises(ValueError, ElementIndex, ["_wt", "_wt"])
+
+    def test_frame_round_trip(self):
+        self.elements.encode(["c.2C>T"])
+        result = ElementIndex.from_frame(self.elements.to_frame())
+        self.assertListEqual(
+            list(result.decode([0, 1, 2])), ["_wt", "c.1A>G", "c.2C>T"]
+        )
+        self.assertEqual(result.saved, 3)
+
+    def test_to_frame_start(self):
+        df = self.elements.to_frame(start=1)
+        self.assertListEqual(list(df.index), [1])
+        self.assertListEqual(list(df[ElementIndex.column]), ["c.1A>G"])
+
+    def test_translate_where(self):
+        self.assertEqual(self.elements.translate_where("index='_wt'"), "index=0")
+        self.assertEqual(self.elements.translate_where("index!=_wt"), "index!=0")
+        self.assertEqual(
+            self.elements.translate_where("index=['c.1A>G', '_wt', 'c.9A>T']"),
+            "index=[1, 0, -1]",
+        )
+        self.assertEqual(self.elements.translate_where("count >= 10"), "count >= 10")
+
+    def test_translate_where_unsupported(self):
+        for where in (
+            "index > '_wt'",
+            "index in ['_wt']",
+            "index='_wt' & count > 3",
+            "index=_wt | index=c.1A>G",
+            "count > 3 & index='_wt'",
+            "index=('_wt', 'c.1A>G')",
+        ):
+            self.assertRaises(ValueError, self.elements.translate_where, where)
+
+
+class TestStoreManagerInterning(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.manager = StoreManager()
+        self.manager.store_path = os.path.join(self._temp_dir.name, "test.h5")
+        self.manager.store = HdfStore(self.manager.store_path)
+        self.manager.table_cache.clear()
+        self.counts = pd.DataFrame(
+            {"count": [10, 5, 1]}, index=pd.Index(["_wt", "c.1A>G", "c.2C>T"])
+        )
+
+    def tearDown(self):
+        self.manager.store.close()
+        self.manager.table_cache.clear()
+        self._temp_dir.cleanup()
+
+    def test_main_tables_stored_as_ids(self):
+        self.manager.store_put("/main/variants/counts", self.counts, format="table")
+        stored = self.manager.store["/main/variants/counts"]
+        np.testing.assert_array_equal(stored.index.values, [0, 1, 2])
+        pd.testing.assert_frame_equal(
+            self.manager.store_select("/main/variants/counts"), self.counts
+        )
+
+    def test_raw_tables_not_interned(self):
+        self.manager.store_put("/raw/variants/counts", self.counts, format="table")
+        pd.testing.assert_frame_equal(
+            self.manager.store["/raw/variants/counts"], self.counts
+        )
+
+    def test_disabled(self):
+        self.manager.intern_index = False
+        self.manager.store_put("/main/variants/counts", self.counts, format="table")
+        pd.testing.assert_frame_equal(
+            self.manager.store["/main/variants/counts"], self.counts
+        )
+
+    def test_append_and_where(self):
+        self.manager.store_append(
+            "/main/variants/counts",
+            self.counts.iloc[:2],
+            min_itemsize={"index": 20},
+            data_columns=["count"],
+        )
+        self.manager.store_append("/main/variants/counts", self.counts.iloc[2:])
+        pd.testing.assert_frame_equal(
+            self.manager.store_select(
+                "/main/variants/counts", where="index=['c.2C>T', '_wt']"
+            ),
+            self.counts.iloc[[0, 2]],
+        )
+        pd.testing.assert_frame_equal(
+            self.manager.store_select("/main/variants/counts", where="index!=_wt"),
+            self.counts.iloc[1:],
+        )
+
+    def test_append_encoded_min_itemsize(self):
+        self.manager.store_append("/main/variants/counts", self.counts.iloc[:2])
+        encoded = self.counts.iloc[2:].copy()
+        encoded.index = self.manager.element_index.encode(encoded.index)
+        self.manager.store_append(
+            "/main/variants/counts", encoded, min_itemsize={"index": 20}
+        )
+        pd.testing.assert_frame_equal(
+            self.manager.store_select("/main/variants/counts"), self.counts
+        )
+
+    def test_unsupported_where(self):
+        self.manager.store_put("/main/variants/counts", self.counts)
+        self.assertRaises(
+            ValueError,
+            self.manager.store_select,
+            "/main/variants/counts",
+            where="index > '_wt'",
+        )
+
+    def test_select_as_multiple(self):
+        self.manager.store_put(
+            "/main/variants/counts", self.counts, data_columns=["count"]
+        )
+        self.manager.store_put(
+            "/main/variants/scores", self.counts.rename(columns={"count": "score"})
+        )
+        keys = ["/main/variants/counts", "/main/variants/scores"]
+        expected = self.counts.assign(score=self.counts["count"])
+        pd.testing.assert_frame_equal(
+            self.manager.store_select_as_multiple(keys), expected
+        )
+        pd.testing.assert_frame_equal(
+            self.manager.store_select_as_multiple(keys, where="index!=_wt"),
+            expected.iloc[1:],
+        )
+        self.manager.chunksize = 2
+        chunks = list(
+            self.manager.store_select_as_multiple(keys, where="count < 10", chunk=True)
+        )
+        self.assertListEqual([len(c) for c in chunks], [1, 1])
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected.iloc[1:])
+
+    def test_map_table(self):
+        self.manager.store_put(
+            "/raw/variants/counts", self.counts, data_columns=["count"]
+        )
+        self.manager.map_table(
+            "/raw/variants/counts", "/main/variants/counts", source_query="count > 1"
+        )
+        np.testing.assert_array_equal(
+            self.manager.store["/main/variants/counts"].index.values, [0, 1]
+        )
+        pd.testing.assert_frame_equal(
+            self.manager.store_select("/main/variants/counts"), self.counts.iloc[:2]
+        )
+
+    def test_element_index_reloaded(self):
+        self.manager.store_put("/main/variants/counts", self.counts, format="table")
+        self.manager._element_index = None
+        self.assertEqual(len(self.manager.element_index), 3)
+        self.manager.store_put(
+            "/main/variants/scores", self.counts.iloc[::-1], format="table"
+        )
+        stored = self.manager.store["/main/variants/scores"]
+        np.testing.assert_array_equal(stored.index.values, [2, 1, 0])
+
+    def test_elements_appended(self):
+        self.manager.store_append("/main/variants/counts", self.counts.iloc[:1])
+        nrows = self.manager.store.nrows
+        self.assertEqual(nrows(ElementIndex.table_key), 1)
+        self.manager.store_append("/main/variants/counts", self.counts.iloc[1:2])
+        self.assertEqual(nrows(ElementIndex.table_key), 2)
+        longer = pd.DataFrame({"count": [7]}, index=pd.Index(["c.[3A>G;4C>T]"]))
+        self.manager.store_append("/main/variants/counts", longer)
+        self.manager.store_append("/main/variants/counts", self.counts.iloc[2:])
+
+        self.manager._element_index = None
+        self.assertEqual(
+            list(self.manager.element_index.decode(range(4))),
+            ["_wt", "c.1A>G", "c.[3A>G;4C>T]", "c.2C>T"],
+        )
+        pd.testing.assert_frame_equal(
+            self.manager.store_select("/main/variants/counts"),
+            pd.concat([self.counts.iloc[:2], longer, self.counts.iloc[2:]]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import gzip
+import unittest
+import tempfile
+import pandas as pd
+
+from ..base.filtered_sink import FilteredReadSink
+from ..libraries.barcode import BarcodeSeqLib
+from .test_module_append_reads import fastq_records
+from .utilities import load_config_data, make_seqlib
+
+
+class TestFilteredReadSink(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._temp_dir.name, "lib.filtered.tsv.gz")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_buffered_write(self):
+        sink = FilteredReadSink(self.path, ["min quality", "max N"], buffer_size=2)
+        sink.add("ACGT", ["max N"], read="@r1", quality="IIII")
+        self.assertFalse(os.path.exists(self.path))
+        sink.add("AAAA", ["min quality", "max N"], read="@r2", quality="#III")
+        self.assertTrue(os.path.exists(self.path))
+        sink.add("CCCC", ["max N"], count=3)
+        sink.close()
+        df = pd.read_csv(self.path, sep="\t", keep_default_na=False)
+        self.assertListEqual(
+            list(df.columns),
+            ["read", "sequence", "quality", "count", "min quality", "max N"],
+        )
+        self.assertListEqual(list(df["sequence"]), ["ACGT", "AAAA", "CCCC"])
+        self.assertListEqual(list(df["min quality"]), [0, 1, 0])
+        self.assertListEqual(list(df["count"]), [1, 1, 3])
+        self.assertEqual(sink.rows, 3)
+        self.assertDictEqual(dict(sink.reason_counts), {"min quality": 1, "max N": 3})
+
+    def test_append(self):
+        sink = FilteredReadSink(self.path, ["max N"])
+        sink.add("ACGT", ["max N"])
+        sink.close()
+        sink = FilteredReadSink(self.path, ["max N"])
+        sink.add("AAAA", ["max N"])
+        sink.close()
+        with gzip.open(self.path, "rt") as handle:
+            lines = handle.read().splitlines()
+        self.assertEqual(len(lines), 3)
+
+    def test_truncate(self):
+        sink = FilteredReadSink(self.path, ["max N"], buffer_size=1)
+        sink.add("ACGT", ["max N"])
+        end = sink.checkpoint()
+        sink.add("AAAA", ["max N"])
+        sink.truncate(end)
+        sink.add("CCCC", ["max N"])
+        sink.close()
+        df = pd.read_csv(self.path, sep="\t")
+        self.assertListEqual(list(df["sequence"]), ["ACGT", "CCCC"])
+        sink.truncate(0)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_unknown_reason(self):
+        sink = FilteredReadSink(self.path, ["max N"])
+        self.assertRaises(ValueError, sink.add, "ACGT", ["chastity"])
+
+
+class TestReportFilteredReads(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        reads = os.path.join(self._temp_dir.name, "reads.fq")
+        with open(reads, "w") as handle:
+            handle.write(
+                fastq_records(["AAAA", "CCCC"])
+                + fastq_records(["GGGG"], start=2, quality="#")
+            )
+        cfg = load_config_data("barcode.json", "data/config/barcode/")
+        cfg["fastq"]["reads"] = reads
+        cfg["fastq"]["filters"]["avg quality"] = 20
+        cfg["output directory"] = self._temp_dir.name
+        self.lib = make_seqlib(
+            BarcodeSeqLib, cfg, os.path.join(self._temp_dir.name, "lib.h5")
+        )
+        self.lib.report_filtered = True
+
+    def tearDown(self):
+        self.lib.store.close()
+        self._temp_dir.cleanup()
+
+    def test_counts_from_reads(self):
+        self.lib.counts_from_reads()
+        # counting again replaces the file
+        self.lib.counts_from_reads()
+        df = pd.read_csv(self.lib.filtered_reads_path, sep="\t")
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df["sequence"][0], "GGGG")
+        self.assertEqual(df["avg quality"][0], 1)
+        self.assertEqual(df["max mutations"][0], 0)
+        self.assertIsNone(self.lib._filtered_sink)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from ..sequence.fqread import read_fastq
+from ..sequence.fqread import FQRead, read_fastq
 from .utilities import create_file_path
 
 
@@ -49,6 +49,15 @@ class TestFQReaderFormatting(unittest.TestCase):
         empty = create_file_path("empty.fq", direc)
         self.assertEqual(self.run_read_fq(empty), [])
 
+    def test_copy(self):
+        fq = FQRead("@FQTEST:8:8:8:8:1#0/1", "AACGTT", "+", "HHHIII")
+        copy = fq.copy()
+        copy.trim_length(3, start=2)
+        copy.revcomp()
+        self.assertEqual(copy.sequence, "CGT")
+        self.assertListEqual(copy.quality, [40, 39, 39])
+        self.assertEqual(str(fq), "@FQTEST:8:8:8:8:1#0/1\nAACGTT\n+\nHHHIII")
+
 
 # --------------------------------------------------------------------------- #
 #
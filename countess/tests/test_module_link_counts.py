@@ -0,0 +1,81 @@
+import os
+import unittest
+import tempfile
+import pandas as pd
+
+from ..libraries.barcode import BarcodeSeqLib
+from ..store.hdf import HdfStore
+from .utilities import load_config_data, create_file_path
+
+
+class TestLinkCounts(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.cfg = load_config_data("barcode.json", "data/config/barcode/")
+        self.cfg["fastq"]["reads"] = "{}/integrated.fq".format(
+            create_file_path("barcode/", "data/reads/")
+        )
+        self.cfg["output directory"] = self._temp_dir.name
+        self.counts = pd.DataFrame(
+            {"count": [10, 5, 1]}, index=pd.Index(["AAAA", "CCCC", "GGGG"])
+        )
+        self.source = os.path.join(self._temp_dir.name, "source.h5")
+        source = HdfStore(self.source)
+        source.put("/raw/barcodes/counts", self.counts, data_columns=["count"])
+        source.set_metadata("/raw/barcodes/counts", {"test": 1})
+        source.put("/main/barcodes/counts", self.counts)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def make_lib(self, link_counts):
+        lib = BarcodeSeqLib()
+        lib.force_recalculate = False
+        lib.component_outliers = False
+        lib.tsv_requested = False
+        lib.output_dir_override = False
+        lib.configure(self.cfg)
+        lib.link_counts = link_counts
+        lib.counts_file = self.source
+        lib.store_open()
+        return lib
+
+    def test_link(self):
+        lib = self.make_lib(link_counts=True)
+        try:
+            lib.counts_from_file(lib.counts_file)
+            self.assertListEqual(lib.store.keys(), ["raw/barcodes/counts"])
+            self.assertTrue(lib.store.is_link("/raw/barcodes/counts"))
+            pd.testing.assert_frame_equal(
+                lib.store_select("/raw/barcodes/counts"), self.counts
+            )
+            self.assertDictEqual(lib.get_metadata("/raw/barcodes/counts"), {"test": 1})
+        finally:
+            lib.store_close()
+        self.assertDictEqual(
+            HdfStore(self.source).get_metadata("raw/barcodes/counts"), {"test": 1}
+        )
+
+    def test_copy(self):
+        lib = self.make_lib(link_counts=False)
+        try:
+            lib.counts_from_file(lib.counts_file)
+            self.assertListEqual(lib.store.keys(), ["raw/barcodes/counts"])
+            self.assertFalse(lib.store.is_link("/raw/barcodes/counts"))
+            pd.testing.assert_frame_equal(
+                lib.store_select("/raw/barcodes/counts"), self.counts
+            )
+        finally:
+            lib.store_close()
+
+    def test_no_raw_counts(self):
+        HdfStore(self.source).remove("/raw")
+        lib = self.make_lib(link_counts=True)
+        try:
+            self.assertRaises(ValueError, lib.counts_from_file, lib.counts_file)
+        finally:
+            lib.store_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
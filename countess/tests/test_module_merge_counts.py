@@ -0,0 +1,87 @@
+import os
+import unittest
+import tempfile
+from copy import deepcopy
+
+import numpy as np
+import pandas as pd
+
+from ..selection.selection import Selection
+from .utilities import DEFAULT_STORE_PARAMS
+from .utilities import load_config_data, update_cfg_file, create_file_path
+
+try:
+    import duckdb
+except ImportError:  # duckdb is an optional dependency
+    duckdb = None
+
+
+class TestMergeCountsByIndex(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        cfg = load_config_data("barcode_selection.json", "data/config/selection/")
+        cfg = update_cfg_file(cfg, "WLS", "complete")
+        extra = deepcopy(cfg["libraries"][0])
+        extra["name"] = "polyA_t0_repeat"
+        cfg["libraries"].append(extra)
+        for lib_cfg in cfg["libraries"]:
+            lib_cfg["fastq"]["reads"] = create_file_path(
+                os.path.basename(lib_cfg["fastq"]["reads"]), "data/reads/selection/"
+            )
+        cfg["output directory"] = self._temp_dir.name
+        self.cfg = cfg
+        self.counts = {
+            "polyA_t0": pd.DataFrame({"count": [1, 2]}, index=["AAAA", "CCCC"]),
+            "polyA_t0_repeat": pd.DataFrame({"count": [10]}, index=["CCCC"]),
+            "polyA_t1": pd.DataFrame({"count": [3, 4]}, index=["AAAA", "GGGG"]),
+            "polyA_t2": pd.DataFrame({"count": [5]}, index=["TTTT"]),
+        }
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def merge(self, backend):
+        self.cfg["store options"] = {"backend": backend}
+        obj = Selection()
+        obj.force_recalculate = DEFAULT_STORE_PARAMS["force_recalculate"]
+        obj.component_outliers = DEFAULT_STORE_PARAMS["component_outliers"]
+        obj.tsv_requested = DEFAULT_STORE_PARAMS["tsv_requested"]
+        obj.output_dir_override = DEFAULT_STORE_PARAMS["output_dir_override"]
+        obj.configure(self.cfg)
+        obj.validate()
+        obj.store_open(children=True)
+        try:
+            for lib in obj.children:
+                lib.store_put("/main/barcodes/counts", self.counts[lib.name])
+            obj.merge_counts_by_index("barcodes", "/main/barcodes/counts")
+            self.assertNotIn("/merge", obj.store)
+            return obj.store_select("/main/barcodes/counts_unfiltered")
+        finally:
+            obj.store_close(children=True)
+
+    def check_merge(self, backend):
+        expected = pd.DataFrame(
+            {
+                "c_0": [1.0, 12.0, np.nan, np.nan],
+                "c_1": [3.0, np.nan, 4.0, np.nan],
+                "c_2": [np.nan, np.nan, np.nan, 5.0],
+            },
+            index=["AAAA", "CCCC", "GGGG", "TTTT"],
+        )
+        pd.testing.assert_frame_equal(
+            self.merge(backend), expected, check_index_type=False, check_names=False
+        )
+
+    def test_hdf5(self):
+        self.check_merge("hdf5")
+
+    def test_feather(self):
+        self.check_merge("feather")
+
+    @unittest.skipIf(duckdb is None, "duckdb is not installed")
+    def test_duckdb(self):
+        self.check_merge("duckdb")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import unittest
+import tempfile
+
+from ..config.config_check import seqlib_type
+from ..config.types import OverlapConfiguration
+from ..libraries.overlap import OverlapSeqLib
+from ..libraries.read_pass import schedule_read_passes
+from ..sequence.fqread import FQRead, dna_trans, read_fastq_batches
+from ..sequence.read_filter import ReadBlock
+from .utilities import make_seqlib
+
+
+WILD_TYPE = "ACGTACGTAC"
+
+
+def revcomp(seq):
+    return seq.translate(dna_trans)[::-1]
+
+
+def read_pair(variant):
+    """
+    Returns the forward read of the first 8 bases of *variant* and the
+    reverse read of the last 7 bases, which overlap at bases 4 to 8.
+    """
+    return variant[:8], "I" * 8, revcomp(variant[3:]), "I" * 7
+
+
+def fastq_text(records):
+    return "".join(
+        "@FQTEST:8:8:8:{}:1#0/1\n{}\n+\n{}\n".format(i, seq, quality)
+        for i, (seq, quality) in enumerate(records)
+    )
+
+
+def overlap_cfg(forward, reverse, output_dir):
+    return {
+        "fastq": {
+            "filters": {"remove unresolvable": True},
+            "forward reads": forward,
+            "reverse reads": reverse,
+        },
+        "name": "overlap_test",
+        "output directory": output_dir,
+        "report filtered reads": False,
+        "timepoint": 0,
+        "overlap": {
+            "forward start": 4,
+            "reverse start": 3,
+            "length": 5,
+            "max mismatches": 1,
+        },
+        "variants": {
+            "use aligner": False,
+            "wild type": {"coding": False, "sequence": WILD_TYPE},
+        },
+    }
+
+
+class TestOverlapSeqLib(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.forward = self.path("forward.fq")
+        self.reverse = self.path("reverse.fq")
+        self.write_reads(
+            [
+                read_pair(WILD_TYPE),
+                # mismatch at base 5, forward base has the higher quality
+                read_pair(WILD_TYPE)[:2] + (revcomp("TTCGTAC"), "IIIII#I"),
+                # mismatch at base 5 with equal quality is unresolvable
+                read_pair(WILD_TYPE)[:2] + (revcomp("TTCGTAC"), "IIIIIII"),
+                # too many mismatches in the overlap
+                read_pair(WILD_TYPE)[:2] + (revcomp("TTTTTAC"), "IIIIIII"),
+                # variant in the reverse read after the overlap
+                read_pair("ACGTACGTAA"),
+            ]
+        )
+        self.lib = self.make_lib()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def make_lib(self, store_path=None):
+        cfg = overlap_cfg(self.forward, self.reverse, self._temp_dir.name)
+        return make_seqlib(OverlapSeqLib, cfg, store_path)
+
+    def path(self, name):
+        return os.path.join(self._temp_dir.name, name)
+
+    def write_reads(self, pairs):
+        with open(self.forward, "w") as handle:
+            handle.write(fastq_text([(f, fq) for f, fq, _, _ in pairs]))
+        with open(self.reverse, "w") as handle:
+            handle.write(fastq_text([(r, rq) for _, _, r, rq in pairs]))
+
+    def merge(self, pairs, **options):
+        for key, value in options.items():
+            setattr(self.lib, key, value)
+        forward = ReadBlock.from_strings([p[0] for p in pairs], [p[1] for p in pairs])
+        reverse = ReadBlock.from_strings([p[2] for p in pairs], [p[3] for p in pairs])
+        merged, block = self.lib.merge_block(forward, reverse)
+        sequences = [row.tobytes().decode("ascii") for row in block.sequences]
+        return merged.tolist(), sequences, block
+
+    def test_seqlib_type(self):
+        cfg = overlap_cfg(self.forward, self.reverse, self._temp_dir.name)
+        self.assertEqual(seqlib_type(cfg), "OverlapSeqLib")
+        self.assertEqual(self.lib.filters["remove unresolvable"], True)
+        self.assertEqual(self.lib.serialize()["overlap"]["reverse start"], 3)
+
+    def test_invalid_overlap(self):
+        cfg = overlap_cfg(self.forward, self.reverse, self._temp_dir.name)
+        invalid = dict(cfg["overlap"], length=0)
+        self.assertRaises(ValueError, OverlapConfiguration, invalid)
+        del cfg["overlap"]["length"]
+        self.assertRaises(KeyError, OverlapConfiguration, cfg["overlap"])
+
+    def test_merge_block(self):
+        fwd, _, rev, _ = read_pair(WILD_TYPE)
+        pairs = [
+            read_pair(WILD_TYPE),
+            (fwd, "IIII#III", revcomp("TTCGTAC"), "IIIIIII"),
+            (fwd, "IIIIIIII", revcomp("TTCGTAC"), "IIIII5I"),
+            (fwd, "IIIIIIII", revcomp("TTCGTAC"), "IIIIIII"),
+            (fwd, "IIIIIIII", revcomp("TTTTTAC"), "IIIIIII"),
+            (fwd[:6], "IIIIII", rev, "IIIIIII"),
+        ]
+        merged, sequences, block = self.merge(pairs)
+        self.assertListEqual(merged, [True, True, True, True, False, False])
+        self.assertListEqual(
+            sequences, ["ACGTACGTAC", "ACGTTCGTAC", "ACGTACGTAC", "ACGTXCGTAC"]
+        )
+        # the merged base has the higher quality
+        self.assertListEqual(block.qualities[1].tolist(), [40] * 10)
+        self.assertListEqual(block.lengths.tolist(), [10] * 4)
+
+    def test_overlap_only(self):
+        merged, sequences, _ = self.merge([read_pair(WILD_TYPE)], overlap_only=True)
+        self.assertListEqual(merged, [True])
+        self.assertListEqual(sequences, ["TACGT"])
+
+    def test_no_pairs_merged(self):
+        pairs = [("ACG", "III", "ACG", "III")]
+        merged, sequences, block = self.merge(pairs)
+        self.assertListEqual(merged, [False])
+        self.assertEqual(len(block), 0)
+
+    def test_counts_from_reads(self):
+        self.lib = self.make_lib(self.path("lib.h5"))
+        try:
+            self.lib.counts_from_reads()
+            counts = self.lib.store["/raw/variants/counts"]
+        finally:
+            self.lib.store.close()
+        self.assertDictEqual(counts["count"].to_dict(), {"_wt": 2, "n.10C>A": 1})
+        self.assertEqual(self.lib.filter_stats["merge failure"], 1)
+        self.assertEqual(self.lib.filter_stats["remove unresolvable"], 1)
+        self.assertEqual(self.lib.filter_stats["total"], 2)
+
+    def test_not_shared(self):
+        libs = [self.lib, self.make_lib()]
+        self.assertListEqual(schedule_read_passes(libs), [])
+
+
+class TestReadFastqBatches(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.first = os.path.join(self._temp_dir.name, "first.fq")
+        self.second = os.path.join(self._temp_dir.name, "second.fq")
+        with open(self.first, "w") as handle:
+            handle.write(fastq_text([("ACGT", "IIII")] * 5))
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_batches(self):
+        with open(self.second, "w") as handle:
+            handle.write(fastq_text([("TTTT", "IIII")] * 5))
+        batches = list(read_fastq_batches([self.first, self.second], batch_size=2))
+        self.assertListEqual([len(a) for a, b in batches], [2, 2, 1])
+        self.assertTrue(all(len(a) == len(b) for a, b in batches))
+        self.assertIsInstance(batches[0][1][0], FQRead)
+        self.assertEqual(batches[0][1][0].sequence, "TTTT")
+
+    def test_mismatched_lengths(self):
+        with open(self.second, "w") as handle:
+            handle.write(fastq_text([("TTTT", "IIII")] * 6))
+        with self.assertRaises(ValueError):
+            list(read_fastq_batches([self.first, self.second], batch_size=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
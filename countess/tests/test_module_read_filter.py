@@ -0,0 +1,185 @@
+import random
+import unittest
+import numpy as np
+
+from ..libraries.barcode import BarcodeSeqLib
+from ..selection.selection import Selection
+from ..sequence.fqread import FQRead
+from ..sequence.read_filter import ReadFilter, ReadBlock, fast_is_chaste
+
+
+def make_read(sequence, quality, chastity=1):
+    header = "@FQTEST:8:8:8:8:{}#0/1".format(chastity)
+    return FQRead(header, sequence, "+", quality)
+
+
+FILTERS = {"chastity": True, "max N": 0, "min quality": 20, "avg quality": 30}
+
+
+class TestReadFilter(unittest.TestCase):
+    def setUp(self):
+        self.reads = [
+            make_read("ACGT", "IIII"),
+            make_read("ACNT", "#III", chastity=0),
+            make_read("ACGT", "5555"),
+            make_read("ACnT", "IIII"),
+            make_read("ACGT", "+III"),
+        ]
+
+    def test_fast_is_chaste(self):
+        for fq in self.reads:
+            self.assertEqual(fast_is_chaste(fq), fq.is_chaste())
+        fq = FQRead("@read1", "ACGT", "+", "IIII")
+        self.assertRaises(ValueError, fast_is_chaste, fq)
+
+    def test_stage_order(self):
+        read_filter = ReadFilter(dict(FILTERS, **{"remove unresolvable": True}))
+        self.assertListEqual(
+            [key for key, _ in read_filter.stages],
+            ["chastity", "remove unresolvable", "max N", "min quality", "avg quality"],
+        )
+
+    def test_disabled_filters(self):
+        read_filter = ReadFilter(
+            {"chastity": False, "max N": 2 ** 63 - 1, "min quality": 0}
+        )
+        self.assertListEqual(read_filter.stages, [])
+        self.assertListEqual(read_filter.check(self.reads[1]), [])
+
+    def test_check(self):
+        short = ReadFilter(FILTERS)
+        exhaustive = ReadFilter(FILTERS, exhaustive=True)
+        self.assertListEqual(short.check(self.reads[0]), [])
+        self.assertListEqual(short.check(self.reads[1]), ["chastity"])
+        self.assertListEqual(
+            exhaustive.check(self.reads[1]), ["chastity", "max N", "min quality"]
+        )
+        self.assertListEqual(short.check(self.reads[2]), ["avg quality"])
+        self.assertListEqual(short.check(self.reads[3]), ["max N"])
+
+    def test_mask(self):
+        for exhaustive in (False, True):
+            read_filter = ReadFilter(FILTERS, exhaustive=exhaustive)
+            keep, counts = read_filter.mask(self.reads)
+            self.assertListEqual(list(keep), [True, False, False, False, False])
+            expected = dict.fromkeys(counts, 0)
+            for fq in self.reads:
+                for key in read_filter.check(fq):
+                    expected[key] += 1
+            expected["total"] = 4
+            self.assertDictEqual(dict(counts), expected)
+
+
+class TestReadBlock(unittest.TestCase):
+    def test_equal_lengths(self):
+        reads = [make_read("ACGT", "IIII"), make_read("NNGX", "#+5I")]
+        block = ReadBlock.from_reads(reads)
+        self.assertEqual(block.sequences.dtype, np.uint8)
+        self.assertEqual(block.qualities.dtype, np.uint8)
+        self.assertListEqual(block.qualities[1].tolist(), [2, 10, 20, 40])
+        self.assertListEqual(block.count_bases("N").tolist(), [0, 2])
+        self.assertListEqual(block.count_bases("X").tolist(), [0, 1])
+        self.assertListEqual(block.min_quality().tolist(), [40, 2])
+        self.assertListEqual(block.mean_quality().tolist(), [40.0, 18.0])
+
+    def test_padding(self):
+        reads = [make_read("AC", "#I"), make_read("ACGTN", "IIIII")]
+        block = ReadBlock.from_reads(reads)
+        self.assertEqual(block.width, 5)
+        self.assertListEqual(block.lengths.tolist(), [2, 5])
+        self.assertListEqual(block.count_bases("N", "A").tolist(), [1, 2])
+        self.assertListEqual(block.min_quality().tolist(), [2, 40])
+        self.assertListEqual(block.mean_quality().tolist(), [21.0, 40.0])
+
+    def test_from_strings(self):
+        reads = [make_read("AC", "#I"), make_read("ACGTN", "I5III")]
+        block = ReadBlock.from_strings(["AC", "ACGTN"], ["#I", "I5III"])
+        expected = ReadBlock.from_reads(reads)
+        np.testing.assert_array_equal(block.sequences, expected.sequences)
+        np.testing.assert_array_equal(block.qualities, expected.qualities)
+        self.assertRaises(ValueError, ReadBlock.from_strings, ["AC"], ["#"])
+
+    def test_negative_quality(self):
+        fq = FQRead("@FQTEST:8:8:8:8:1#0/1", "ACGT", "+", "5555", qbase=64)
+        block = ReadBlock.from_reads([fq])
+        self.assertEqual(block.qualities.dtype, np.int16)
+        self.assertEqual(block.min_quality()[0], -11)
+
+    def test_matches_single_reads(self):
+        rng = random.Random(7)
+        reads = list()
+        for i in range(300):
+            length = rng.randint(5, 12)
+            sequence = "".join(rng.choice("ACGTNnX") for _ in range(length))
+            quality = "".join(rng.choice("#+5?I") for _ in range(length))
+            reads.append(make_read(sequence, quality, chastity=rng.randint(0, 1)))
+        filters = dict(FILTERS, **{"remove unresolvable": True, "max N": 1})
+        for exhaustive in (False, True):
+            read_filter = ReadFilter(filters, exhaustive=exhaustive)
+            keep, counts = read_filter.mask(reads)
+            expected = dict.fromkeys(counts, 0)
+            for i, fq in enumerate(reads):
+                failed = read_filter.check(fq)
+                self.assertEqual(keep[i], len(failed) == 0)
+                for key in failed:
+                    expected[key] += 1
+                expected["total"] += len(failed) > 0
+            self.assertDictEqual(dict(counts), expected)
+
+
+class TestSeqLibReadFilter(unittest.TestCase):
+    def setUp(self):
+        self.root = Selection()
+        self.lib = BarcodeSeqLib()
+        self.lib.parent = self.root
+        self.lib.filters = FILTERS
+        self.reads = [
+            make_read("ACGT", "IIII"),
+            make_read("ACNT", "#III", chastity=0),
+        ]
+
+    def filter_stats(self):
+        for fq in self.reads:
+            self.lib.read_quality_filter(fq)
+        return dict(self.lib.filter_stats)
+
+    def test_short_circuit(self):
+        stats = self.filter_stats()
+        self.assertEqual(stats["chastity"], 1)
+        self.assertEqual(stats["min quality"], 0)
+        self.assertEqual(stats["total"], 1)
+
+    def test_exact_filter_stats(self):
+        self.root.exact_filter_stats = True
+        self.assertTrue(self.lib.exact_filter_stats)
+        stats = self.filter_stats()
+        self.assertEqual(stats["chastity"], 1)
+        self.assertEqual(stats["max N"], 1)
+        self.assertEqual(stats["min quality"], 1)
+        self.assertEqual(stats["total"], 1)
+        with self.assertRaises(ValueError):
+            self.root.exact_filter_stats = "yes"
+
+    def test_batch(self):
+        self.root.exact_filter_stats = True
+        keep = self.lib.read_quality_filter_batch(self.reads)
+        self.assertListEqual(list(keep), [True, False])
+        batch_stats = dict(self.lib.filter_stats)
+        self.lib.filters = FILTERS
+        self.assertDictEqual(self.filter_stats(), batch_stats)
+
+    def test_count_reads(self):
+        self.lib.trim_start = 1
+        self.lib.trim_length = 3
+        self.lib.revcomp_reads = False
+        self.reads.append(make_read("ACGA", "IIII"))
+        self.lib._read_counter = self.lib.new_counter()
+        self.lib.count_reads(self.reads)
+        counts = next(self.lib._read_counter.iter_chunks(10))
+        self.assertDictEqual(counts["count"].to_dict(), {"ACG": 2})
+        self.assertEqual(self.lib.filter_stats["total"], 1)
+        self.lib._read_counter.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import shutil
+import unittest
+import tempfile
+
+from ..libraries.barcode import BarcodeSeqLib
+from ..libraries.demultiplex import Demultiplexer
+from ..libraries.read_pass import SharedReadPass, schedule_read_passes
+from .utilities import load_config_data, create_file_path, make_seqlib
+
+
+class TestSharedReadPass(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.reads = "{}/integrated.fq".format(
+            create_file_path("barcode/", "data/reads/")
+        )
+        self.stores = list()
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self._temp_dir.cleanup()
+
+    def make_lib(self, name, start=1, length=None, reads=None, demux=None):
+        cfg = load_config_data("barcode.json", "data/config/barcode/")
+        cfg["name"] = name
+        cfg["fastq"]["reads"] = reads if reads is not None else self.reads
+        cfg["fastq"]["start"] = start
+        if length is not None:
+            cfg["fastq"]["length"] = length
+        if demux is not None:
+            cfg["fastq"]["demultiplex"] = {"index": demux}
+        cfg["output directory"] = self._temp_dir.name
+
+        lib = make_seqlib(
+            BarcodeSeqLib, cfg, os.path.join(self._temp_dir.name, name + ".h5")
+        )
+        lib.checkpoint_interval = None
+        self.stores.append(lib.store)
+        return lib
+
+    def counts(self, lib):
+        return lib.store["/raw/barcodes/counts"]["count"].sort_index().to_dict()
+
+    def test_count_matches_separate_passes(self):
+        windows = [("full", 1, None), ("left", 1, 3), ("right", 4, 3)]
+        expected = dict()
+        for name, start, length in windows:
+            lib = self.make_lib("expected_" + name, start, length)
+            lib.counts_from_reads()
+            expected[name] = (self.counts(lib), dict(lib.filter_stats))
+
+        libs = [self.make_lib(name, start, length) for name, start, length in windows]
+        SharedReadPass(self.reads, libs).count()
+        for lib in libs:
+            self.assertDictEqual(self.counts(lib), expected[lib.name][0])
+            self.assertDictEqual(lib.filter_stats, expected[lib.name][1])
+
+    def test_add_library_errors(self):
+        lib = self.make_lib("full")
+        read_pass = SharedReadPass(self.reads, [lib])
+        self.assertRaises(ValueError, read_pass.add_library, lib)
+        demux = self.make_lib("demux", demux="AA")
+        self.assertRaises(ValueError, read_pass.add_library, demux)
+        other = self.make_lib(
+            "other", reads=create_file_path("empty.fq", "data/reads/fqreader/")
+        )
+        self.assertRaises(ValueError, read_pass.add_library, other)
+
+    def test_add_library_copy(self):
+        copy = os.path.join(self._temp_dir.name, "copy.fq")
+        shutil.copyfile(self.reads, copy)
+        read_pass = SharedReadPass(self.reads, [self.make_lib("full")])
+        read_pass.add_library(self.make_lib("copy", reads=copy))
+        self.assertEqual(len(read_pass.libraries), 2)
+
+    def test_schedule(self):
+        left = self.make_lib("left", 1, 3)
+        right = self.make_lib("right", 4, 3)
+        alone = self.make_lib(
+            "alone", reads=create_file_path("empty.fq", "data/reads/fqreader/")
+        )
+        first = self.make_lib("first", demux="AA")
+        second = self.make_lib("second", demux="NA")
+        passes = schedule_read_passes([left, alone, first, right, second])
+        self.assertEqual(len(passes), 2)
+        self.assertIsInstance(passes[0], SharedReadPass)
+        self.assertListEqual(passes[0].libraries, [left, right])
+        self.assertIsInstance(passes[1], Demultiplexer)
+        self.assertListEqual(passes[1].libraries, [first, second])
+
+    def test_schedule_copies(self):
+        copy = os.path.join(self._temp_dir.name, "copy.fq")
+        shutil.copyfile(self.reads, copy)
+        left = self.make_lib("left", 1, 3)
+        right = self.make_lib("right", 4, 3, reads=copy)
+        passes = schedule_read_passes([left, right])
+        self.assertEqual(len(passes), 1)
+        self.assertListEqual(passes[0].libraries, [left, right])
+
+    def test_needs_read_counts_cached(self):
+        cache = os.path.join(self._temp_dir.name, "cache")
+        counted = self.make_lib("counted", 1, 3)
+        counted.counts_cache = cache
+        counted.counts_from_reads()
+        counted.save_counts_to_cache()
+
+        lib = self.make_lib("cached", 1, 3)
+        lib.counts_cache = cache
+        self.assertTrue(lib.needs_read_counts())
+        self.assertNotIn("/raw/barcodes/counts", lib.store)
+        self.assertListEqual(schedule_read_passes([lib, self.make_lib("x", 4, 3)]), [])
+        self.assertDictEqual(self.counts(lib), self.counts(counted))
+
+    def test_schedule_skips_counted(self):
+        left = self.make_lib("left", 1, 3)
+        right = self.make_lib("right", 4, 3)
+        right.counts_from_reads()
+        self.assertListEqual(schedule_read_passes([left, right]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
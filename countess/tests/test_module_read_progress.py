@@ -0,0 +1,94 @@
+import os
+import gzip
+import unittest
+import tempfile
+
+from ..base.read_progress import ReadProgress
+from ..libraries.barcode import BarcodeSeqLib
+from ..sequence.fqread import read_fastq
+from .test_module_append_reads import fastq_records
+from .utilities import load_config_data, make_seqlib
+
+
+class TestReadProgress(unittest.TestCase):
+    def test_rate_limit(self):
+        events = list()
+        progress = ReadProgress("lib", 1000, interval=3600, callback=events.append)
+        self.assertFalse(progress.update(100, 10, 1))
+        progress.finish(1000, 100, 10)
+        self.assertEqual(progress.events, 1)
+        event = events[0]
+        self.assertTrue(event["done"])
+        self.assertEqual(event["reads"], 100)
+        self.assertEqual(event["fraction"], 1.0)
+        self.assertEqual(event["eta_seconds"], 0.0)
+        self.assertAlmostEqual(event["pass_rate"], 0.9)
+
+    def test_update(self):
+        events = list()
+        progress = ReadProgress("lib", 1000, interval=0, callback=events.append)
+        self.assertTrue(progress.update(250, 10, 0))
+        event = events[0]
+        self.assertFalse(event["done"])
+        self.assertEqual(event["fraction"], 0.25)
+        self.assertAlmostEqual(
+            event["eta_seconds"], 3 * event["elapsed_seconds"], places=6
+        )
+        self.assertEqual(event["pass_rate"], 1.0)
+
+    def test_no_reads(self):
+        events = list()
+        ReadProgress("lib", 0, callback=events.append).finish(0, 0, 0)
+        self.assertIsNone(events[0]["fraction"])
+        self.assertIsNone(events[0]["pass_rate"])
+
+
+class TestCountingProgress(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.text = fastq_records(["AAAA", "CCCC"]) + fastq_records(
+            ["GGGG"], start=2, quality="#"
+        )
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self._temp_dir.name, name)
+
+    def test_read_fastq_progress(self):
+        with gzip.open(self.path("reads.fq.gz"), "wt") as handle:
+            handle.write(self.text)
+        positions = list()
+        reads = list(read_fastq(self.path("reads.fq.gz"), progress=positions.append))
+        self.assertEqual(len(reads), 3)
+        self.assertEqual(positions[-1], os.path.getsize(self.path("reads.fq.gz")))
+
+    def test_counts_from_reads(self):
+        with open(self.path("reads.fq"), "w") as handle:
+            handle.write(self.text)
+        cfg = load_config_data("barcode.json", "data/config/barcode/")
+        cfg["fastq"]["reads"] = self.path("reads.fq")
+        cfg["fastq"]["filters"]["avg quality"] = 20
+        cfg["output directory"] = self._temp_dir.name
+        lib = make_seqlib(BarcodeSeqLib, cfg, self.path("lib.h5"))
+
+        events = list()
+        lib.read_progress = lambda: ReadProgress(
+            lib.name,
+            os.path.getsize(lib.reads),
+            interval=0,
+            callback=events.append,
+        )
+        try:
+            lib.counts_from_reads()
+        finally:
+            lib.store.close()
+        self.assertTrue(events[-1]["done"])
+        self.assertEqual(events[-1]["reads"], 3)
+        self.assertAlmostEqual(events[-1]["pass_rate"], 2 / 3)
+        self.assertTrue(all(not event["done"] for event in events[:-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import json
+import unittest
+import tempfile
+import tracemalloc
+
+from ..base.run_report import RunReport, REPORT_COLUMNS, timed_stage
+from ..libraries.barcode import BarcodeSeqLib
+from .test_module_append_reads import fastq_records
+from .utilities import load_config_data, make_seqlib
+
+
+class Stages(object):
+    name = "stages"
+
+    def __init__(self, report):
+        self.run_report = report
+
+    @timed_stage("outer")
+    def outer(self):
+        self.inner("a")
+        self.inner("b")
+        self.run_report.add(rows_out=5)
+
+    @timed_stage("inner", label_arg=True)
+    def inner(self, label):
+        self.run_report.add(rows_in=10)
+        return label
+
+
+class TestRunReport(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_nested_spans(self):
+        report = RunReport()
+        Stages(report).outer()
+        self.assertListEqual(
+            [(s.stage, s.detail, s.depth, s.parent) for s in report.spans],
+            [("outer", None, 0, None), ("inner", "a", 1, 0), ("inner", "b", 1, 0)],
+        )
+        outer = report.spans[0]
+        self.assertEqual(outer.rows_in, 20)
+        self.assertEqual(outer.rows_out, 5)
+        self.assertEqual(report.spans[1].rows_in, 10)
+        self.assertGreaterEqual(outer.wall_seconds, report.spans[1].wall_seconds)
+        self.assertIsNone(report.current)
+
+    def test_summary(self):
+        report = RunReport()
+        stages = Stages(report)
+        stages.outer()
+        with report.span("inner", "stages"):
+            stages.inner("c")
+        summary = {entry["stage"]: entry for entry in report.summary()}
+        self.assertEqual(summary["outer"]["calls"], 1)
+        self.assertEqual(summary["inner"]["calls"], 4)
+        # the nested call of the same stage is not counted twice
+        self.assertEqual(summary["inner"]["rows_in"], 30)
+
+    def test_span_error(self):
+        report = RunReport()
+        with self.assertRaises(KeyError):
+            with report.span("failed", "stages"):
+                raise KeyError("failed")
+        self.assertIsNotNone(report.spans[0].wall_seconds)
+        self.assertIsNone(report.current)
+
+    def test_trace_memory(self):
+        report = RunReport(trace_memory=True)
+        with report.span("outer", "stages"):
+            with report.span("inner", "stages"):
+                data = [0] * 1000000
+            del data
+        outer, inner = report.spans
+        self.assertGreater(inner.traced_peak_mb, 5)
+        self.assertGreaterEqual(outer.traced_peak_mb, inner.traced_peak_mb)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_write(self):
+        report = RunReport()
+        Stages(report).outer()
+        json_path, tsv_path = report.write(os.path.join(self._temp_dir.name, "out"))
+        with open(json_path) as handle:
+            data = json.load(handle)
+        self.assertEqual(len(data["stages"]), 3)
+        self.assertListEqual(list(data["stages"][0]), REPORT_COLUMNS)
+        self.assertEqual(data["summary"][0]["stage"], "outer")
+        with open(tsv_path) as handle:
+            lines = handle.read().splitlines()
+        self.assertEqual(lines[0].split("\t"), REPORT_COLUMNS)
+        self.assertEqual(len(lines), 4)
+
+
+class TestSeqLibRunReport(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        reads = os.path.join(self._temp_dir.name, "reads.fq")
+        with open(reads, "w") as handle:
+            handle.write(fastq_records(["AAAA", "CCCC", "AAAA"]))
+        cfg = load_config_data("barcode.json", "data/config/barcode/")
+        cfg["fastq"]["reads"] = reads
+        cfg["output directory"] = self._temp_dir.name
+        self.lib = make_seqlib(
+            BarcodeSeqLib, cfg, os.path.join(self._temp_dir.name, "lib.h5")
+        )
+        self.lib.run_report.clear()
+
+    def tearDown(self):
+        self.lib.store.close()
+        self.lib.run_report.clear()
+        self._temp_dir.cleanup()
+
+    def test_counts_from_reads(self):
+        self.lib.counts_from_reads()
+        stages = [(s.stage, s.detail) for s in self.lib.run_report.spans]
+        self.assertListEqual(
+            stages, [("counts_from_reads", None), ("save_counts", "barcodes")]
+        )
+        counts, save = self.lib.run_report.spans
+        self.assertEqual(counts.rows_in, 3)
+        self.assertEqual(save.rows_out, 2)
+        self.assertEqual(counts.rows_out, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+
+from ..base.spilling_counter import SpillingCounter
+
+
+class TestSpillingCounter(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.reads = ["ACGT"[i % 4] * (1 + i % 7) + str(i % 50) for i in range(500)]
+        rng.shuffle(self.reads)
+        self.expected = pd.Series(self.reads).value_counts().sort_index()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def count(self, counter):
+        for read in self.reads:
+            counter.add(read)
+        return pd.concat(list(counter.iter_chunks(chunksize=7)))
+
+    def test_in_memory(self):
+        counter = SpillingCounter()
+        result = self.count(counter)
+        self.assertFalse(counter.spilled)
+        np.testing.assert_array_equal(result.index, self.expected.index)
+        np.testing.assert_array_equal(result["count"], self.expected.values)
+
+    def test_spills_and_merges(self):
+        counter = SpillingCounter(max_bytes=2000, spill_dir=self._temp_dir.name)
+        result = self.count(counter)
+        self.assertTrue(counter.spilled)
+        self.assertGreater(len(counter.runs), 1)
+        self.assertLessEqual(counter.nbytes, 2000)
+        self.assertTrue(result.index.is_unique)
+        np.testing.assert_array_equal(result.index, self.expected.index)
+        np.testing.assert_array_equal(result["count"], self.expected.values)
+        self.assertEqual(result["count"].dtype, np.int32)
+
+    def test_max_runs(self):
+        counter = SpillingCounter(max_bytes=2000, spill_dir=self._temp_dir.name)
+        counter.max_runs = 3
+        result = self.count(counter)
+        self.assertTrue(counter.spilled)
+        self.assertLess(len(counter.runs), 3)
+        self.assertEqual(len(os.listdir(counter._run_dir)), len(counter.runs))
+        np.testing.assert_array_equal(result.index, self.expected.index)
+        np.testing.assert_array_equal(result["count"], self.expected.values)
+
+    def test_batch_rows(self):
+        counter = SpillingCounter(max_bytes=20000, spill_dir=self._temp_dir.name)
+        self.assertEqual(counter.batch_rows(), SpillingCounter.run_row_group_size)
+        for read in self.reads:
+            counter.add(read)
+        self.assertGreater(len(counter.runs), 1)
+        row_bytes = counter.max_key_length + SpillingCounter.entry_overhead
+        batch_bytes = counter.batch_rows() * len(counter.runs) * row_bytes
+        self.assertLessEqual(batch_bytes, 20000)
+        self.assertGreater(counter.batch_rows(), 1)
+        counter.close()
+
+    def test_chunksize(self):
+        counter = SpillingCounter(max_bytes=2000, spill_dir=self._temp_dir.name)
+        for read in self.reads:
+            counter.add(read)
+        sizes = [len(chunk) for chunk in counter.iter_chunks(chunksize=100)]
+        self.assertTrue(all(size == 100 for size in sizes[:-1]))
+        self.assertEqual(sum(sizes), len(self.expected))
+        self.assertRaises(ValueError, next, counter.iter_chunks(chunksize=0))
+
+    def test_add_count(self):
+        counter = SpillingCounter(max_bytes=130)
+        counter.add("AAA", 5)
+        counter.add("CCC", 2)
+        counter.add("AAA", 1)
+        result = next(counter.iter_chunks(chunksize=10))
+        self.assertListEqual(list(result.index), ["AAA", "CCC"])
+        self.assertListEqual(list(result["count"]), [6, 2])
+        self.assertEqual(counter.max_key_length, 3)
+        counter.close()
+
+    def test_close_removes_runs(self):
+        counter = SpillingCounter(max_bytes=2000, spill_dir=self._temp_dir.name)
+        for read in self.reads:
+            counter.add(read)
+        self.assertGreater(len(os.listdir(self._temp_dir.name)), 0)
+        counter.close()
+        self.assertListEqual(os.listdir(self._temp_dir.name), [])
+        self.assertFalse(counter.spilled)
+
+    def test_empty(self):
+        self.assertListEqual(list(SpillingCounter().iter_chunks(chunksize=10)), [])
+
+    def test_invalid_max_bytes(self):
+        self.assertRaises(ValueError, SpillingCounter, max_bytes=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import pstats
+import cProfile
+import unittest
+import tempfile
+
+from ..base.run_report import RunReport
+from ..base.stage_profiler import StageProfiler, collapsed_stacks
+from .test_module_run_report import Stages
+
+
+def leaf(n):
+    return sum(i * i for i in range(n))
+
+
+def branch():
+    return leaf(20000) + leaf(40000)
+
+
+class TestCollapsedStacks(unittest.TestCase):
+    def test_stacks(self):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        branch()
+        profiler.disable()
+        lines = collapsed_stacks(pstats.Stats(profiler), prefix="stage")
+        self.assertGreater(len(lines), 0)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith("stage;"))
+            self.assertGreater(int(count), 0)
+        leaf_lines = [x for x in lines if x.rsplit(" ", 1)[0].endswith("(leaf)")]
+        self.assertEqual(len(leaf_lines), 1)
+        self.assertIn("(branch);", leaf_lines[0])
+
+
+class TestStageProfiler(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self._temp_dir.name, "profile")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_profile_stages(self):
+        report = RunReport()
+        report.profiler = StageProfiler(self.directory, stages=["inner"])
+        Stages(report).outer()
+        self.assertListEqual(
+            [os.path.basename(x) for x in report.profiler.paths],
+            ["001_inner_stages_a.pstats", "002_inner_stages_b.pstats"],
+        )
+        stats = pstats.Stats(report.profiler.paths[0])
+        self.assertTrue(any(func[2] == "inner" for func in stats.stats))
+        with open(report.profiler.collapsed_path) as handle:
+            prefixes = {line.split(";", 1)[0] for line in handle}
+        self.assertSetEqual(prefixes, {"inner:stages:a", "inner:stages:b"})
+
+    def test_nested_stages(self):
+        report = RunReport()
+        report.profiler = StageProfiler(self.directory, stages=["outer", "inner"])
+        Stages(report).outer()
+        # the inner stages are part of the outer profile
+        self.assertEqual(len(report.profiler.paths), 1)
+        stats = pstats.Stats(report.profiler.paths[0])
+        self.assertTrue(any(func[2] == "inner" for func in stats.stats))
+
+    def test_unprofiled_stage(self):
+        report = RunReport()
+        report.profiler = StageProfiler(self.directory)
+        Stages(report).outer()
+        self.assertListEqual(report.profiler.paths, [])
+        self.assertFalse(os.path.exists(self.directory))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+
+from ..libraries.barcode import BarcodeSeqLib
+from ..store.hdf import HdfStore
+from ..store.managed import ManagedStore
+from ..store.feather import FeatherStore
+from .utilities import load_config_data, create_file_path
+
+
+class TestStoreOpen(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.cfg = load_config_data("barcode.json", "data/config/barcode/")
+        self.cfg["fastq"]["reads"] = "{}/integrated.fq".format(
+            create_file_path("barcode/", "data/reads/")
+        )
+        self.cfg["output directory"] = self._temp_dir.name
+        self.cfg["store options"] = {"compression": "blosc:lz4", "compression level": 1}
+        self.counts = pd.DataFrame(
+            {"count": [10, 5, 1]}, index=pd.Index(["AAAA", "CCCC", "GGGG"])
+        )
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def make_lib(self):
+        lib = BarcodeSeqLib()
+        lib.force_recalculate = False
+        lib.component_outliers = False
+        lib.tsv_requested = False
+        lib.output_dir_override = False
+        lib.configure(self.cfg)
+        return lib
+
+    def test_open_put_close(self):
+        lib = self.make_lib()
+        lib.store_open()
+        self.assertIsInstance(lib.store, HdfStore)
+        self.assertTrue(lib.store.is_open())
+        self.assertEqual(lib.store.complib, "blosc:lz4")
+        lib.store_put("/raw/barcodes/counts", self.counts, data_columns=["count"])
+        pd.testing.assert_frame_equal(
+            lib.store_select("/raw/barcodes/counts", where="count > 1"),
+            self.counts.iloc[:2],
+        )
+        self.assertTrue(lib.check_store("/raw/barcodes/counts"))
+        path = lib.store_path
+        lib.store_close()
+        self.assertIsNone(lib.store)
+
+        with pd.HDFStore(path, mode="r") as h5:
+            table = h5.get_storer("/raw/barcodes/counts").table
+            self.assertEqual(table.filters.complib, "blosc:lz4")
+            self.assertTrue(table.colindexes["index"].is_csi)
+
+    def test_reopen_matching_metadata(self):
+        lib = self.make_lib()
+        lib.store_open()
+        lib.store_put("/raw/barcodes/counts", self.counts)
+        lib.store_close()
+
+        lib = self.make_lib()
+        lib.store_open()
+        pd.testing.assert_frame_equal(
+            lib.store_select("/raw/barcodes/counts"), self.counts
+        )
+        lib.store_close()
+
+    def test_reopen_changed_metadata(self):
+        lib = self.make_lib()
+        lib.store_open()
+        lib.store_put("/raw/barcodes/counts", self.counts)
+        lib.store_close()
+
+        self.cfg["fastq"]["filters"]["avg quality"] = 38
+        lib = self.make_lib()
+        lib.store_open()
+        self.assertTrue(lib.store.is_empty())
+        lib.store_close()
+
+    def test_reopen_changed_store_options(self):
+        lib = self.make_lib()
+        lib.store_open()
+        lib.store_put("/raw/barcodes/counts", self.counts)
+        lib.store_close()
+
+        self.cfg["store options"] = {"compression": "zlib", "compression level": 5}
+        lib = self.make_lib()
+        lib.store_open()
+        pd.testing.assert_frame_equal(
+            lib.store_select("/raw/barcodes/counts"), self.counts
+        )
+        lib.store_close()
+
+    def test_feather_backend(self):
+        self.cfg["store options"] = {"backend": "feather"}
+        lib = self.make_lib()
+        lib.store_open()
+        self.assertIsInstance(lib.store, ManagedStore)
+        self.assertIsInstance(lib.store.store, FeatherStore)
+        self.assertTrue(lib.store_path.endswith(".feather"))
+        lib.store_put("/raw/barcodes/counts", self.counts, data_columns=["count"])
+        pd.testing.assert_frame_equal(
+            lib.store_select("/raw/barcodes/counts", where="count > 1"),
+            self.counts.iloc[:2],
+        )
+        lib.store_close()
+
+        lib = self.make_lib()
+        lib.store_open()
+        pd.testing.assert_frame_equal(
+            lib.store_select("/raw/barcodes/counts"), self.counts
+        )
+        lib.store_close()
+
+        self.cfg["fastq"]["filters"]["avg quality"] = 38
+        lib = self.make_lib()
+        lib.store_open()
+        self.assertTrue(lib.store.is_empty())
+        lib.store_close()
+
+    def test_store_column_sums(self):
+        for backend in ("hdf5", "feather"):
+            self.cfg["store options"] = {"backend": backend}
+            lib = self.make_lib()
+            lib.store_open()
+            lib.store_put("/main/barcodes/counts", self.counts)
+            sums = lib.store_column_sums("/main/barcodes/counts", columns=["count"])
+            self.assertEqual(sums["count"], 16)
+            lib.store_close()
+
+    def test_force_delete(self):
+        lib = self.make_lib()
+        lib.store_open()
+        lib.store_put("/raw/barcodes/counts", self.counts)
+        lib.store_put("/main/barcodes/counts", self.counts)
+        lib.store_close()
+
+        lib = self.make_lib()
+        lib.store_open(force_delete=True)
+        self.assertNotIn("/main", lib.store)
+        self.assertIn("/raw/barcodes/counts", lib.store)
+        lib.store_close()
+
+    def test_compact_on_close(self):
+        lib = self.make_lib()
+        lib.compact_stores = True
+        lib.store_open()
+        lib.store.compact_threshold = None
+        # random scores do not compress, so the removed table dominates the
+        # file rather than the element table that is kept
+        large = pd.DataFrame(
+            {"count": range(50000), "score": np.random.rand(50000)},
+            index=pd.Index(["{:08d}".format(i) for i in range(50000)]),
+        )
+        lib.store_put("/main/barcodes/counts", large)
+        lib.store_put("/main/barcodes/counts", self.counts)
+        path = lib.store_path
+        size = os.path.getsize(path)
+        lib.store_close()
+        self.assertLess(os.path.getsize(path), size / 2)
+
+    def test_compact_unsupported(self):
+        lib = self.make_lib()
+        lib.store_path = os.path.join(self._temp_dir.name, "pandas.h5")
+        lib.store = pd.HDFStore(lib.store_path, mode="a")
+        try:
+            self.assertEqual(lib.store_compact(force=True), 0)
+            self.assertEqual(lib.store_compact(), 0)
+        finally:
+            lib.store.close()
+
+
+class TestStoreSelect(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.cfg = load_config_data("barcode.json", "data/config/barcode/")
+        self.cfg["fastq"]["reads"] = "{}/integrated.fq".format(
+            create_file_path("barcode/", "data/reads/")
+        )
+        self.cfg["output directory"] = self._temp_dir.name
+        self.lib = BarcodeSeqLib()
+        self.lib.force_recalculate = False
+        self.lib.component_outliers = False
+        self.lib.tsv_requested = False
+        self.lib.output_dir_override = False
+        self.lib.configure(self.cfg)
+        self.lib.store_open()
+        self.counts = pd.DataFrame(
+            {"count": [10, 5, 1, 7, 3]},
+            index=pd.Index(["_wt", "c.1A>G", "c.2C>T", "c.3G>A", "c.4T>C"]),
+        )
+        self.lib.store_put("/main/variants/counts", self.counts, data_columns=["count"])
+
+    def tearDown(self):
+        self.lib.store_close()
+        self._temp_dir.cleanup()
+
+    def test_chunks(self):
+        chunks = list(self.lib.store_select("/main/variants/counts", chunksize=2))
+        self.assertListEqual([len(c) for c in chunks], [2, 2, 1])
+        pd.testing.assert_frame_equal(pd.concat(chunks), self.counts)
+
+    def test_chunks_where(self):
+        chunks = self.lib.store_select(
+            "/main/variants/counts", where="count > 4", chunksize=2
+        )
+        pd.testing.assert_frame_equal(pd.concat(chunks), self.counts.iloc[[0, 1, 3]])
+
+    def test_chunks_invalid(self):
+        self.assertRaises(
+            ValueError,
+            self.lib.store_select,
+            "/main/variants/counts",
+            chunksize=2,
+            start=1,
+        )
+
+    def test_start_stop(self):
+        pd.testing.assert_frame_equal(
+            self.lib.store_select("/main/variants/counts", start=1, stop=3),
+            self.counts.iloc[1:3],
+        )
+
+    def test_select_rows(self):
+        pd.testing.assert_frame_equal(
+            self.lib.store_select_rows("/main/variants/counts", np.array([1, 3])),
+            self.counts.iloc[[1, 3]],
+        )
+        empty = self.lib.store_select_rows("/main/variants/counts", np.array([]))
+        self.assertEqual(len(empty), 0)
+        self.assertListEqual(list(empty.columns), ["count"])
+
+    def test_load_raw_read_counts(self):
+        self.lib.store_put("/raw/barcodes/counts", self.counts)
+        filters = pd.DataFrame(
+            {"count": [4]}, index=[BarcodeSeqLib.filter_messages["avg quality"]]
+        )
+        self.lib.store_put("/raw/filter", filters)
+        self.lib._read_counter = self.lib.new_counter()
+        self.lib.load_raw_read_counts()
+        self.assertEqual(self.lib.filter_stats["avg quality"], 4)
+        counts = pd.concat(self.lib._read_counter.iter_chunks(10))
+        self.assertDictEqual(
+            counts["count"].to_dict(), self.counts["count"].sort_index().to_dict()
+        )
+        self.lib._read_counter.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import pandas as pd
+
+from ..base.table_cache import TableCache
+
+
+class TestTableCache(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {"c_0": [10.0, 5.0, 1.0], "c_1": [4.0, 2.0, 8.0]},
+            index=pd.Index(["_wt", "c.1A>G", "c.2C>T"]),
+        )
+        self.nbytes = int(self.df.memory_usage(index=True, deep=True).sum())
+        self.cache = TableCache(max_bytes=self.nbytes * 2)
+
+    def entry(self, key, columns=None, where=None):
+        return TableCache.entry_key("/tmp/exp.h5", key, columns, where)
+
+    def test_entry_key(self):
+        self.assertEqual(
+            TableCache.entry_key("/tmp/exp.h5", "main/counts", "c_0"),
+            TableCache.entry_key("/tmp/exp.h5", "/main/counts", ["c_0"]),
+        )
+        self.assertNotEqual(
+            TableCache.entry_key("/tmp/exp.h5", "/main/counts", where="index=_wt"),
+            TableCache.entry_key("/tmp/exp.h5", "/main/counts"),
+        )
+
+    def test_miss_then_hit(self):
+        key = self.entry("/main/variants/counts")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, self.df)
+        pd.testing.assert_frame_equal(self.cache.get(key), self.df)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertAlmostEqual(self.cache.hit_rate(), 0.5)
+
+    def test_returns_copy(self):
+        key = self.entry("/main/variants/counts")
+        self.cache.put(key, self.df)
+        result = self.cache.get(key)
+        result.dropna(inplace=True)
+        result["c_0"] = 0.0
+        pd.testing.assert_frame_equal(self.cache.get(key), self.df)
+
+    def test_evicts_least_recently_used(self):
+        first = self.entry("/main/variants/counts")
+        second = self.entry("/main/variants/scores")
+        third = self.entry("/main/variants/log_ratios")
+        self.cache.put(first, self.df)
+        self.cache.put(second, self.df)
+        self.cache.get(first)
+        self.cache.put(third, self.df)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(second))
+        self.assertIsNotNone(self.cache.get(first))
+        self.assertLessEqual(self.cache.nbytes, self.cache.max_bytes)
+
+    def test_too_large(self):
+        cache = TableCache(max_bytes=self.nbytes - 1)
+        key = self.entry("/main/variants/counts")
+        cache.put(key, self.df)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.nbytes, 0)
+
+    def test_invalidate_key(self):
+        counts = self.entry("/main/variants/counts")
+        counts_wt = self.entry("/main/variants/counts", where="index=_wt")
+        scores = self.entry("/main/variants/scores")
+        self.cache.max_bytes = self.nbytes * 3
+        for key in (counts, counts_wt, scores):
+            self.cache.put(key, self.df)
+        self.cache.invalidate("/tmp/exp.h5", "/main/variants/counts")
+        self.assertIsNone(self.cache.get(counts))
+        self.assertIsNone(self.cache.get(counts_wt))
+        self.assertIsNotNone(self.cache.get(scores))
+        self.assertEqual(self.cache.nbytes, self.nbytes)
+
+    def test_invalidate_prefix(self):
+        counts = self.entry("/main/variants/counts")
+        raw = self.entry("/raw/variants/counts")
+        self.cache.put(counts, self.df)
+        self.cache.put(raw, self.df)
+        self.cache.invalidate("/tmp/exp.h5", "/main")
+        self.assertIsNone(self.cache.get(counts))
+        self.assertIsNotNone(self.cache.get(raw))
+
+    def test_invalidate_path(self):
+        counts = self.entry("/main/variants/counts")
+        other = TableCache.entry_key("/tmp/other.h5", "/main/variants/counts")
+        self.cache.put(counts, self.df)
+        self.cache.put(other, self.df)
+        self.cache.invalidate("/tmp/exp.h5")
+        self.assertIsNone(self.cache.get(counts))
+        self.assertIsNotNone(self.cache.get(other))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -94,6 +94,115 @@ class StoreConfigTest(TestCase):
         self.assertEqual(store_cfg.output_dir, self.output_dir)
         self.assertEqual(store_cfg.store_path, self.store_path)
 
+    def test_store_options_default(self):
+        cfg = {SCORER: self.scorer_cfg, NAME: "test"}
+        store_cfg = StoreConfiguration(cfg).validate()
+        self.assertEqual(store_cfg.has_store_options, False)
+        self.assertIsNone(store_cfg.store_options_cfg)
+
+    def test_store_options_correct(self):
+        cfg = {
+            SCORER: self.scorer_cfg,
+            NAME: "test",
+            STORE_OPTIONS: {
+                STORE_COMPRESSION: "blosc:lz4",
+                STORE_COMPLEVEL: 1,
+                STORE_CHUNKSHAPE: 4096,
+            },
+        }
+        store_cfg = StoreConfiguration(cfg).validate()
+        self.assertEqual(store_cfg.has_store_options, True)
+        self.assertDictEqual(
+            store_cfg.store_options_cfg.store_kwargs(),
+            {
+                "backend": "hdf5",
+                "complib": "blosc:lz4",
+                "complevel": 1,
+                "expectedrows": None,
+                "chunkshape": 4096,
+                "compact_threshold": 0.5,
+            },
+        )
+
+    def test_store_options_backend(self):
+        cfg = {
+            SCORER: self.scorer_cfg,
+            NAME: "test",
+            STORE_OPTIONS: {STORE_BACKEND: "feather"},
+        }
+        store_cfg = StoreConfiguration(cfg).validate()
+        options_cfg = store_cfg.store_options_cfg
+        self.assertEqual(options_cfg.backend, "feather")
+        self.assertEqual(options_cfg.store_kwargs()["backend"], "feather")
+        self.assertEqual(options_cfg.to_dict()[STORE_BACKEND], "feather")
+
+    def test_store_path_backend_extension(self):
+        path = os.path.join(self.output_dir, "store.feather")
+        os.makedirs(path, exist_ok=True)
+        try:
+            cfg = {SCORER: self.scorer_cfg, NAME: "test", STORE: path}
+            self.assertEqual(StoreConfiguration(cfg).validate().store_path, path)
+        finally:
+            os.rmdir(path)
+
+    def test_error_store_options_invalid(self):
+        cfg = {SCORER: self.scorer_cfg, NAME: "test", STORE_OPTIONS: []}
+        with self.assertRaises(TypeError):
+            StoreConfiguration(cfg).validate()
+
+        for options, error in (
+            ({STORE_COMPRESSION: "gzip"}, ValueError),
+            ({STORE_COMPLEVEL: 10}, ValueError),
+            ({STORE_COMPLEVEL: "9"}, TypeError),
+            ({STORE_EXPECTED_ROWS: 0}, ValueError),
+            ({STORE_CHUNKSHAPE: 1.5}, TypeError),
+            ({STORE_COMPACT_THRESHOLD: 1.0}, ValueError),
+            ({STORE_COMPACT_THRESHOLD: "0.5"}, TypeError),
+            ({STORE_BACKEND: "sqlite"}, ValueError),
+            ({STORE_BACKEND: None}, TypeError),
+        ):
+            cfg = {SCORER: self.scorer_cfg, NAME: "test", STORE_OPTIONS: options}
+            with self.assertRaises(error):
+                StoreConfiguration(cfg).validate()
+
+    def test_execution_default(self):
+        cfg = {SCORER: self.scorer_cfg, NAME: "test"}
+        store_cfg = StoreConfiguration(cfg).validate()
+        self.assertEqual(store_cfg.has_execution, False)
+        self.assertIsNone(store_cfg.execution_cfg)
+
+    def test_execution_correct(self):
+        cfg = {
+            SCORER: self.scorer_cfg,
+            NAME: "test",
+            EXECUTION: {
+                EXECUTION_SCHEDULER: "local-cluster",
+                EXECUTION_WORKERS: 4,
+                EXECUTION_MEMORY_LIMIT: 2048,
+                EXECUTION_MEMORY_BUDGET: 8192,
+            },
+        }
+        store_cfg = StoreConfiguration(cfg).validate()
+        self.assertEqual(store_cfg.has_execution, True)
+        execution = store_cfg.execution_cfg.execution()
+        self.assertEqual(execution.scheduler, "local-cluster")
+        self.assertEqual(execution.workers, 4)
+        self.assertEqual(execution.memory_limit, 2048)
+        self.assertEqual(store_cfg.execution_cfg.memory_budget, 8192)
+
+    def test_error_execution_invalid(self):
+        for options, error in (
+            ([], TypeError),
+            ({EXECUTION_SCHEDULER: "cluster"}, ValueError),
+            ({EXECUTION_WORKERS: 0}, ValueError),
+            ({EXECUTION_WORKERS: "4"}, TypeError),
+            ({EXECUTION_MEMORY_LIMIT: 512}, ValueError),
+            ({EXECUTION_MEMORY_BUDGET: 0}, ValueError),
+        ):
+            cfg = {SCORER: self.scorer_cfg, NAME: "test", EXECUTION: options}
+            with self.assertRaises(error):
+                StoreConfiguration(cfg).validate()
+
 
 class SelectionConfigurationTest(TestCase):
     def setUp(self):
@@ -13,6 +13,7 @@ from ..base.config_constants import SCORER, SCORER_OPTIONS, SCORER_PATH
 from ..base.config_constants import FORCE_RECALCULATE, COMPONENT_OUTLIERS
 from ..base.config_constants import TSV_REQUESTED, OUTPUT_DIR_OVERRIDE
 from ..base.utils import multi_index_tsv_to_dataframe
+from ..store.hdf import HdfStore
 
 
 TOP_LEVEL = os.path.dirname(__file__)
@@ -33,6 +34,7 @@ __all__ = [
     "load_df_from_txt",
     "dispatch_loader",
     "update_cfg_file",
+    "make_seqlib",
     "save_result_to_pkl",
     "save_result_to_txt",
     "print_test_comparison",
@@ -277,6 +279,36 @@ def update_cfg_file(cfg, scoring, logr):
     return cfg
 
 
+def make_seqlib(seqlib_class, cfg, store_path=None):
+    """
+    Utility function to configure a SeqLib with the default store parameters
+    and optionally give it an open :py:class:`~enrich2.store.hdf.HdfStore`.
+
+    Parameters
+    ----------
+    seqlib_class : `type`
+        The :py:class:`~enrich2.libraries.seqlib.SeqLib` subclass to create.
+    cfg : `dict`
+        Dictionary that can initialize a *seqlib_class* object.
+    store_path : `str`, optional
+        Path of the HDF5 store to open for the library.
+
+    Returns
+    -------
+    :py:class:`~enrich2.libraries.seqlib.SeqLib`
+        The configured library.
+    """
+    lib = seqlib_class()
+    for attr, value in DEFAULT_STORE_PARAMS.items():
+        setattr(lib, attr, value)
+    lib.configure(cfg)
+    if store_path is not None:
+        lib.store_path = store_path
+        lib.store = HdfStore(store_path)
+        lib.table_cache.clear()
+    return lib
+
+
 SCORING_PATHS = {
     "counts": create_file_path("counts_scorer.py", "data/plugins"),
     "ratios": create_file_path("ratios_scorer.py", "data/plugins"),
@@ -18,6 +18,7 @@ requirements = [
     "tables >= 3.2.0",
     "dask[dataframe]",
     "fastparquet",
+    "pyarrow",
 ]
 
 # Copy script files
@@ -52,5 +53,6 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     install_requires=requirements,
+    extras_require={"duckdb": ["duckdb"]},
     test_suite="tests",
 )
@@ -0,0 +1,179 @@
+#  Copyright 2016-2017 Alan F Rubin, Daniel C Esposito
+#
+#  This file is part of Enrich2.
+#
+#  Enrich2 is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Enrich2 is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Enrich2.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Timings for the StoreInterface implementations.
+
+Not collected by the test runner. Run from the repository root with::
+
+    python -m tests.test_store.benchmark_store [--rows N] [--repeat N]
+
+For each backend, the pandas paths (``select`` and ``iter_chunks``) are timed
+alongside the Dask path (``get(...).compute()``) that they replace, so the
+overhead of building and running a Dask graph is visible.
+
+The HdfStore compression settings are then compared by file size and by the
+latency of reading the whole table and of an index query.
+
+"""
+
+import argparse
+import pathlib
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import dask.dataframe as dd
+import numpy as np
+import pandas as pd
+
+from countess.store.csv import CsvStore
+from countess.store.feather import FeatherStore
+from countess.store.hdf import HdfStore
+from countess.store.parquet import ParquetStore
+
+
+BACKENDS = (HdfStore, ParquetStore, FeatherStore, CsvStore)
+
+HDF_OPTIONS = (
+    {"complib": None, "complevel": 0},
+    {"complib": "blosc:lz4", "complevel": 1},
+    {"complib": "blosc:zstd", "complevel": 5},
+    {"complib": "blosc:zstd", "complevel": 9},
+    {"complib": "blosc:zstd", "complevel": 5, "chunkshape": 1024},
+)
+
+try:
+    from countess.store.duckdb import DuckDbStore
+except ImportError:  # duckdb is an optional dependency
+    pass
+else:
+    BACKENDS += (DuckDbStore,)
+
+
+def make_counts(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Returns a counts table shaped like a SeqLib variant counts table."""
+    rng = np.random.default_rng(seed)
+    index = pd.Index([f"c.{i}A>G" for i in range(rows)], name="index")
+    return pd.DataFrame(
+        {
+            "count": rng.integers(0, 1000, size=rows),
+            "score": rng.normal(size=rows),
+            "SE": rng.random(size=rows),
+        },
+        index=index,
+    )
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """Returns the fastest of repeat runs of func in seconds."""
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_backend(
+    store_class: type, data: pd.DataFrame, repeat: int
+) -> List[Tuple[str, float]]:
+    """Returns the timings for each operation on one backend."""
+    subset = data.index[:: max(1, len(data) // 100)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = pathlib.Path(temp_dir, f"bench{store_class.file_extensions[0]}")
+        store = store_class(path)
+        ddf = dd.from_pandas(data, npartitions=4)
+        small = data.iloc[:100]
+        return [
+            ("put", best_time(lambda: store.put("counts", ddf), repeat)),
+            ("get().compute()", best_time(lambda: store.get("counts").compute(), repeat)),
+            ("select()", best_time(lambda: store.select("counts"), repeat)),
+            (
+                "get_column()",
+                best_time(lambda: store.get_column("counts", "score"), repeat),
+            ),
+            (
+                "select(columns)",
+                best_time(lambda: store.select("counts", columns=["score"]), repeat),
+            ),
+            (
+                "select(index)",
+                best_time(lambda: store.select("counts", index=subset), repeat),
+            ),
+            (
+                "iter_chunks()",
+                best_time(
+                    lambda: sum(len(c) for c in store.iter_chunks("counts", 10000)),
+                    repeat,
+                ),
+            ),
+            (
+                "append(100 rows)",
+                best_time(lambda: store.append("small", small), repeat),
+            ),
+        ]
+
+
+def benchmark_hdf_options(
+    options: Dict[str, Any], data: pd.DataFrame, repeat: int
+) -> Tuple[int, float, float, float]:
+    """Returns the file size in bytes and the put, select() and
+    select(index) timings for one set of HdfStore options."""
+    subset = data.index[:: max(1, len(data) // 100)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = pathlib.Path(temp_dir, "bench.h5")
+        store = HdfStore(path, **options)
+        ddf = dd.from_pandas(data, npartitions=4)
+        put = best_time(lambda: store.put("counts", ddf), repeat)
+        return (
+            path.stat().st_size,
+            put,
+            best_time(lambda: store.select("counts"), repeat),
+            best_time(lambda: store.select("counts", index=subset), repeat),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000, help="table size")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing")
+    args = parser.parse_args()
+
+    data = make_counts(args.rows)
+    print(f"{'backend':<14}{'operation':<20}{'seconds':>10}")
+    for store_class in BACKENDS:
+        for name, seconds in benchmark_backend(store_class, data, args.repeat):
+            print(f"{store_class.__name__:<14}{name:<20}{seconds:>10.4f}")
+
+    print()
+    print(
+        f"{'HdfStore options':<52}{'MB':>8}{'put':>10}{'select':>10}"
+        f"{'index':>10}"
+    )
+    for options in HDF_OPTIONS:
+        size, put, select, select_index = benchmark_hdf_options(
+            options, data, args.repeat
+        )
+        label = ", ".join(f"{k}={v}" for k, v in options.items())
+        print(
+            f"{label:<52}{size / 1024 ** 2:>8.2f}{put:>10.4f}{select:>10.4f}"
+            f"{select_index:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -379,6 +379,108 @@ def create_test_classes(store_interface):
 
             self.assertRaises(KeyError, self.store.get_metadata, "missing_table")
 
+    class TestStoreSelect(StoreInterfaceTest):
+        def setUp(self) -> None:
+            super().setUp()
+            index = pd.Index(["AAA", "AAC", "AAG", "AAT"], name="index")
+            self.data = pd.DataFrame(
+                {"count": [1, 2, 3, 4], "score": [0.1, 0.2, 0.3, 0.4]}, index=index
+            )
+            self.store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+
+        def test_select(self) -> None:
+            result = self.store.select("test_table")
+            self.assertIsInstance(result, pd.DataFrame)
+            pd.testing.assert_frame_equal(result, self.data)
+
+        def test_select_columns(self) -> None:
+            result = self.store.select("test_table", columns=["score"])
+            pd.testing.assert_frame_equal(result, self.data[["score"]])
+
+        def test_select_index(self) -> None:
+            result = self.store.select("test_table", index=["AAC", "AAT"])
+            pd.testing.assert_frame_equal(result, self.data.loc[["AAC", "AAT"]])
+
+        def test_select_index_and_columns(self) -> None:
+            result = self.store.select("test_table", index=["AAG"], columns=["count"])
+            pd.testing.assert_frame_equal(result, self.data.loc[["AAG"], ["count"]])
+
+        def test_select_index_missing_values(self) -> None:
+            result = self.store.select("test_table", index=["AAC", "CCC"])
+            pd.testing.assert_frame_equal(result, self.data.loc[["AAC"]])
+
+        def test_select_missing_key(self) -> None:
+            self.assertRaises(KeyError, self.store.select, "missing")
+
+    class TestStoreAppend(StoreInterfaceTest):
+        def setUp(self) -> None:
+            super().setUp()
+            index1 = pd.Index(["AAA", "AAC"], name="index")
+            index2 = pd.Index(["AAG", "AAT"], name="index")
+            self.data1 = pd.DataFrame({"count": [1, 2]}, index=index1)
+            self.data2 = pd.DataFrame({"count": [3, 4]}, index=index2)
+
+        def test_append_new(self) -> None:
+            self.store.append("test_table", self.data1)
+            self.assertListEqual(self.store.keys(), ["test_table"])
+            pd.testing.assert_frame_equal(self.store.select("test_table"), self.data1)
+
+        def test_append_pandas(self) -> None:
+            self.store.append("test_table", self.data1)
+            self.store.append("test_table", self.data2)
+            expected = pd.concat([self.data1, self.data2])
+            pd.testing.assert_frame_equal(self.store.select("test_table"), expected)
+            pd.testing.assert_frame_equal(
+                self.store.get("test_table").compute(), expected
+            )
+
+        def test_append_dask(self) -> None:
+            self.store.put("test_table", dd.from_pandas(self.data1, npartitions=1))
+            self.store.append("test_table", dd.from_pandas(self.data2, npartitions=2))
+            expected = pd.concat([self.data1, self.data2])
+            pd.testing.assert_frame_equal(self.store.select("test_table"), expected)
+
+        def test_append_reopen(self) -> None:
+            self.store.append("test_table", self.data1)
+            self.store.append("test_table", self.data2)
+            store_2 = self.StoreInterface(self.path)
+            self.assertListEqual(store_2.keys(), ["test_table"])
+            pd.testing.assert_frame_equal(
+                store_2.select("test_table"), pd.concat([self.data1, self.data2])
+            )
+
+    class TestStoreIterChunks(StoreInterfaceTest):
+        def setUp(self) -> None:
+            super().setUp()
+            index = pd.Index([f"V{i:03d}" for i in range(25)], name="index")
+            self.data = pd.DataFrame(
+                {"count": np.arange(25), "score": np.linspace(0, 1, 25)}, index=index
+            )
+            self.store.put("test_table", dd.from_pandas(self.data, npartitions=3))
+
+        def test_iter_chunks(self) -> None:
+            chunks = list(self.store.iter_chunks("test_table", chunksize=10))
+            self.assertListEqual([len(c) for c in chunks], [10, 10, 5])
+            pd.testing.assert_frame_equal(pd.concat(chunks), self.data)
+
+        def test_iter_chunks_columns(self) -> None:
+            chunks = list(
+                self.store.iter_chunks("test_table", chunksize=7, columns=["score"])
+            )
+            self.assertListEqual([len(c) for c in chunks], [7, 7, 7, 4])
+            pd.testing.assert_frame_equal(pd.concat(chunks), self.data[["score"]])
+
+        def test_iter_chunks_large_chunksize(self) -> None:
+            chunks = list(self.store.iter_chunks("test_table", chunksize=1000))
+            self.assertEqual(len(chunks), 1)
+            pd.testing.assert_frame_equal(chunks[0], self.data)
+
+        def test_iter_chunks_missing_key(self) -> None:
+            self.assertRaises(KeyError, self.store.iter_chunks, "missing", 10)
+
+        def test_iter_chunks_bad_chunksize(self) -> None:
+            self.assertRaises(ValueError, self.store.iter_chunks, "test_table", 0)
+
     class TestStoreLooseFiles(StoreInterfaceTest):
         def test_missing_key_file(self) -> None:
             if hasattr(self.store, "_key_file"):
@@ -406,5 +508,8 @@ def create_test_classes(store_interface):
         TestStoreDrop,
         TestStoreGet,
         TestStoreMetadata,
+        TestStoreSelect,
+        TestStoreAppend,
+        TestStoreIterChunks,
         TestStoreLooseFiles,
     )
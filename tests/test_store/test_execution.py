@@ -0,0 +1,67 @@
+import importlib.util
+import unittest
+
+import dask
+import dask.dataframe as dd
+import pandas as pd
+
+from countess.store.execution import Execution
+
+
+HAS_DISTRIBUTED = importlib.util.find_spec("distributed") is not None
+
+
+class TestExecution(unittest.TestCase):
+    def test_defaults(self) -> None:
+        execution = Execution()
+        self.assertEqual(execution.scheduler, "threads")
+        self.assertDictEqual(execution.dask_config(), {"scheduler": "threads"})
+
+    def test_dask_config(self) -> None:
+        self.assertDictEqual(
+            Execution("processes", workers=4).dask_config(),
+            {"scheduler": "processes", "num_workers": 4},
+        )
+        self.assertDictEqual(
+            Execution("synchronous", workers=4).dask_config(),
+            {"scheduler": "synchronous"},
+        )
+        with self.assertRaises(ValueError):
+            Execution("local-cluster").dask_config()
+
+    def test_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            Execution("cluster")
+        with self.assertRaises(ValueError):
+            Execution(workers=0)
+        with self.assertRaises(ValueError):
+            Execution("threads", memory_limit=512)
+        with self.assertRaises(ValueError):
+            Execution("local-cluster", memory_limit=0)
+
+    def test_activate(self) -> None:
+        ddf = dd.from_pandas(pd.DataFrame({"a": range(10)}), npartitions=2)
+        with Execution("synchronous").activate():
+            self.assertEqual(dask.config.get("scheduler"), "synchronous")
+            self.assertEqual(ddf["a"].sum().compute(), 45)
+        self.assertNotEqual(dask.config.get("scheduler", None), "synchronous")
+
+    def test_equal(self) -> None:
+        self.assertEqual(Execution("processes", 2), Execution("processes", 2))
+        self.assertNotEqual(Execution("processes", 2), Execution("processes", 3))
+
+    @unittest.skipIf(HAS_DISTRIBUTED, "distributed is installed")
+    def test_local_cluster_requires_distributed(self) -> None:
+        with self.assertRaises(ImportError):
+            with Execution("local-cluster").activate():
+                pass  # pragma: no cover
+
+    @unittest.skipUnless(HAS_DISTRIBUTED, "distributed is not installed")
+    def test_local_cluster(self) -> None:
+        ddf = dd.from_pandas(pd.DataFrame({"a": range(10)}), npartitions=2)
+        with Execution("local-cluster", workers=1, memory_limit=256).activate():
+            self.assertEqual(ddf["a"].sum().compute(), 45)
+
+
+if __name__ == "__main__":
+    unittest.main()
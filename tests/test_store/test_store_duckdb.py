@@ -0,0 +1,93 @@
+import pathlib
+import pickle
+import tempfile
+import unittest
+
+import dask
+import dask.dataframe as dd
+import pandas as pd
+
+try:
+    from countess.store.duckdb import DuckDbStore
+except ImportError:  # duckdb is an optional dependency
+    DuckDbStore = None
+from tests.test_store.store_interface_tests import create_test_classes
+
+
+@unittest.skipIf(DuckDbStore is None, "duckdb is not installed")
+class TestDuckDbPushdown(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.store = DuckDbStore(
+            pathlib.Path(self._temp_dir.name, "temp.duckdb"), threads=2
+        )
+        self.lib1 = pd.DataFrame(
+            {"count": [1, 2, 3]}, index=pd.Index(["AAA", "AAC", "AAG"], name="index")
+        )
+        self.lib2 = pd.DataFrame(
+            {"count": [10, 20]}, index=pd.Index(["AAC", "CCC"], name="index")
+        )
+        self.store.put("lib1", dd.from_pandas(self.lib1, npartitions=2))
+        self.store.put("lib2", dd.from_pandas(self.lib2, npartitions=1))
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._temp_dir.cleanup()
+
+    def test_sum_by_index(self) -> None:
+        result = self.store.sum_by_index(["lib1", "lib2"])
+        expected = self.lib1.add(self.lib2, fill_value=0)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_sum_by_index_missing_key(self) -> None:
+        self.assertRaises(KeyError, self.store.sum_by_index, ["lib1", "missing"])
+
+    def test_column_sums(self) -> None:
+        result = self.store.column_sums("lib1")
+        self.assertEqual(result["count"], 6)
+
+    def test_get_with_merge_labels(self) -> None:
+        # three tables sharing a column name are labelled as pandas would
+        self.store.put("lib3", dd.from_pandas(self.lib1 * 2, npartitions=1))
+        result = self.store.get_with_merge(["lib1", "lib2", "lib3"]).compute()
+        expected = self.lib1.merge(
+            self.lib2, how="inner", left_index=True, right_index=True
+        ).merge(self.lib1 * 2, how="inner", left_index=True, right_index=True)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_get_with_merge_partitions(self) -> None:
+        # each partition joins one row of the first table
+        self.store.chunksize = 1
+        result = self.store.get_with_merge(["lib1", "lib2"])
+        self.assertEqual(result.npartitions, 3)
+        pd.testing.assert_frame_equal(
+            result.compute(),
+            self.lib1.merge(self.lib2, how="inner", left_index=True, right_index=True),
+        )
+
+    def test_partitions_pickle(self) -> None:
+        # partitions can be sent to the workers of the processes scheduler
+        self.store.chunksize = 2
+        for ddf in (self.store.get("lib1"), self.store.get_with_merge(["lib1"])):
+            partitions = pickle.loads(pickle.dumps(ddf.to_delayed()))
+            pd.testing.assert_frame_equal(
+                pd.concat(dask.compute(*partitions)), self.lib1
+            )
+
+
+def load_tests(loader, tests, pattern) -> unittest.TestSuite:
+    suite = unittest.TestSuite()
+    if DuckDbStore is None:
+        return suite
+    test_classes = create_test_classes(DuckDbStore)
+    for tc in test_classes:
+        tc.__module__ = __name__
+        tc.__qualname__ = tc.__name__
+        tests = loader.loadTestsFromTestCase(tc)
+        suite.addTests(tests)
+    suite.addTests(loader.loadTestsFromTestCase(TestDuckDbPushdown))
+    return suite
+
+
+if __name__ == "__main__":
+    unittest.main()
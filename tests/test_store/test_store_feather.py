@@ -0,0 +1,93 @@
+import json
+import pathlib
+import pickle
+import tempfile
+import unittest
+
+import dask
+import dask.dataframe as dd
+import pandas as pd
+
+from countess.store.feather import FeatherStore
+from tests.test_store.store_interface_tests import create_test_classes
+
+
+class TestFeatherMerge(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.store = FeatherStore(pathlib.Path(self._temp_dir.name, "temp.feather"))
+        self.store.batch_size = 2
+        index = pd.Index([f"V{i}" for i in range(6)], name="index")
+        self.data1 = pd.DataFrame({"count": range(6)}, index=index)
+        self.data2 = pd.DataFrame({"score": [0.5, 1.5, 2.5]}, index=index[[4, 1, 0]])
+        self.store.put("counts", dd.from_pandas(self.data1, npartitions=1))
+        self.store.put("scores", dd.from_pandas(self.data2, npartitions=1))
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_get_with_merge_partitions(self) -> None:
+        ddf = self.store.get_with_merge(["counts", "scores"])
+        self.assertEqual(ddf.npartitions, 3)
+        expected = self.data1.merge(
+            self.data2, how="inner", left_index=True, right_index=True
+        )
+        pd.testing.assert_frame_equal(ddf.compute(), expected)
+
+    def test_partitions_pickle(self) -> None:
+        ddf = self.store.get_with_merge(["counts", "scores"])
+        partitions = pickle.loads(pickle.dumps(ddf.to_delayed()))
+        result = pd.concat(dask.compute(*partitions))
+        pd.testing.assert_frame_equal(result, ddf.compute())
+
+
+class TestFeatherKeyFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self._temp_dir.name, "temp.feather")
+        data = pd.DataFrame({"count": [1, 2, 3]}, index=["AAA", "AAC", "AAG"])
+        FeatherStore(self.path).put("test_table", dd.from_pandas(data, npartitions=1))
+        self.key_file = self.path.joinpath("dataset_keys.json")
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def write_keys(self, text: str) -> None:
+        self.key_file.write_text(text)
+
+    def test_reopen(self) -> None:
+        self.assertListEqual(FeatherStore(self.path).keys(), ["test_table"])
+
+    def test_invalid_json(self) -> None:
+        self.write_keys("test_table")
+        self.assertRaises(ValueError, FeatherStore, self.path)
+
+    def test_not_list_of_strings(self) -> None:
+        for keys in ({"test_table": 1}, "test_table", ["test_table", 1]):
+            self.write_keys(json.dumps(keys))
+            self.assertRaises(ValueError, FeatherStore, self.path)
+
+    def test_duplicate_keys(self) -> None:
+        self.write_keys(json.dumps(["test_table", "test_table"]))
+        self.assertRaises(ValueError, FeatherStore, self.path)
+
+    def test_missing_data(self) -> None:
+        self.write_keys(json.dumps(["test_table", "other_table"]))
+        self.assertRaises(ValueError, FeatherStore, self.path)
+
+
+def load_tests(loader, tests, pattern) -> unittest.TestSuite:
+    suite = unittest.TestSuite()
+    test_classes = create_test_classes(FeatherStore)
+    for tc in test_classes:
+        tc.__module__ = __name__
+        tc.__qualname__ = tc.__name__
+        tests = loader.loadTestsFromTestCase(tc)
+        suite.addTests(tests)
+    suite.addTests(loader.loadTestsFromTestCase(TestFeatherMerge))
+    suite.addTests(loader.loadTestsFromTestCase(TestFeatherKeyFile))
+    return suite
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,276 @@
+import pathlib
+import tempfile
 import unittest
 
+import dask.dataframe as dd
+import numpy as np
+import pandas as pd
+
 from countess.store.hdf import HdfStore
 from tests.test_store.store_interface_tests import create_test_classes
 
 
+class TestHdfStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self._temp_dir.name, "temp.h5")
+        index = pd.Index([f"V{i:03d}" for i in range(200)], name="index")
+        self.data = pd.DataFrame(
+            {"c_0": np.arange(200), "c_1": np.ones(200)}, index=index
+        )
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def table(self, store: pd.HDFStore, key: str):
+        return store.get_storer(key).table
+
+    def test_compressed_by_default(self) -> None:
+        HdfStore(self.path).put("test_table", dd.from_pandas(self.data, npartitions=2))
+        with pd.HDFStore(self.path, mode="r") as store:
+            filters = self.table(store, "test_table").filters
+        self.assertEqual(filters.complib, "blosc:zstd")
+        self.assertEqual(filters.complevel, 5)
+
+    def test_uncompressed(self) -> None:
+        store = HdfStore(self.path, complib=None, complevel=0)
+        store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+        with pd.HDFStore(self.path, mode="r") as store:
+            self.assertEqual(self.table(store, "test_table").filters.complevel, 0)
+
+    def test_compression_options(self) -> None:
+        store = HdfStore(self.path, complib="blosc:lz4", complevel=1)
+        store.append("test_table", self.data)
+        with pd.HDFStore(self.path, mode="r") as store:
+            filters = self.table(store, "test_table").filters
+        self.assertEqual(filters.complib, "blosc:lz4")
+        self.assertEqual(filters.complevel, 1)
+
+    def test_invalid_options(self) -> None:
+        self.assertRaises(ValueError, HdfStore, self.path, complib="gzip")
+        self.assertRaises(ValueError, HdfStore, self.path, complevel=10)
+        self.assertRaises(ValueError, HdfStore, self.path, expectedrows=0)
+        self.assertRaises(ValueError, HdfStore, self.path, chunkshape=0)
+
+    def test_chunkshape(self) -> None:
+        store = HdfStore(self.path, chunkshape=16)
+        store.put("test_table", dd.from_pandas(self.data, npartitions=3))
+        extra = self.data.iloc[:10].rename(index=lambda x: "W" + x[1:])
+        store.append("test_table", extra)
+        with pd.HDFStore(self.path, mode="r") as h5:
+            self.assertTupleEqual(self.table(h5, "test_table").chunkshape, (16,))
+        self.assertEqual(len(store.select("test_table")), 210)
+        self.assertDictEqual(store.get_metadata("test_table"), {})
+
+    def test_full_index(self) -> None:
+        store = HdfStore(self.path)
+        store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+        extra = self.data.iloc[:10].rename(index=lambda x: "W" + x[1:])
+        store.append("test_table", extra)
+        store.append("test_table", extra.rename(index=lambda x: "X" + x[1:]))
+        with pd.HDFStore(self.path, mode="r") as h5:
+            # appends do not rebuild the index
+            index = self.table(h5, "test_table").colindexes["index"]
+            self.assertEqual(index.nelements, 200)
+        store.close()
+        self.assertFalse(store.is_open())
+        with pd.HDFStore(self.path, mode="r") as h5:
+            table = self.table(h5, "test_table")
+            self.assertTrue(table.colindexes["index"].is_csi)
+            self.assertEqual(table.colindexes["index"].nelements, 220)
+        pd.testing.assert_frame_equal(
+            store.select("test_table", index=["W007", "V150"]),
+            pd.concat(
+                [
+                    self.data.loc[["V150"]],
+                    self.data.loc[["V007"]].rename(index=lambda x: "W" + x[1:]),
+                ]
+            ),
+        )
+
+    def test_pandas_keys(self) -> None:
+        store = HdfStore(self.path)
+        store.put("/main/variants/counts", self.data, data_columns=["c_0"])
+        store.append("/main/variants/scores", self.data)
+        self.assertListEqual(
+            store.keys(), ["main/variants/counts", "main/variants/scores"]
+        )
+        self.assertIn("/main/variants/counts", store)
+        self.assertIn("main/variants", store)
+        self.assertIn("/main", store)
+        self.assertNotIn("/main/var", store)
+        pd.testing.assert_frame_equal(store["/main/variants/counts"], self.data)
+        store.remove("/main")
+        self.assertTrue(store.is_empty())
+        with pd.HDFStore(self.path, mode="r") as h5:
+            self.assertListEqual(h5.keys(), [])
+
+    def test_select_where(self) -> None:
+        store = HdfStore(self.path)
+        store.put("/test_table", self.data, data_columns=["c_0"])
+        self.assertEqual(store.nrows("/test_table"), 200)
+        pd.testing.assert_frame_equal(
+            store.select("/test_table", where="c_0 < 3"), self.data.iloc[:3]
+        )
+        pd.testing.assert_frame_equal(
+            store.select("test_table", where="c_0 < 3", index=["V001", "V150"]),
+            self.data.iloc[1:2],
+        )
+        pd.testing.assert_frame_equal(
+            store.select("test_table", start=10, stop=20), self.data.iloc[10:20]
+        )
+
+    def test_select_as_multiple(self) -> None:
+        store = HdfStore(self.path)
+        store.put("/first", self.data[["c_0"]], data_columns=["c_0"])
+        store.put("/second", self.data[["c_1"]])
+        pd.testing.assert_frame_equal(
+            store.select_as_multiple(["/first", "/second"], where="c_0 >= 195"),
+            self.data.iloc[195:],
+        )
+        pd.testing.assert_frame_equal(
+            store.select_as_multiple(["first", "second"], start=5, stop=8),
+            self.data.iloc[5:8],
+        )
+        store.put("/short", self.data.iloc[:10])
+        self.assertRaises(ValueError, store.select_as_multiple, ["first", "short"])
+
+    def test_invalid_compact_threshold(self) -> None:
+        self.assertRaises(ValueError, HdfStore, self.path, compact_threshold=1.0)
+        self.assertRaises(ValueError, HdfStore, self.path, compact_threshold=-0.1)
+
+    def test_compact(self) -> None:
+        store = HdfStore(self.path, compact_threshold=None)
+        store.put("first", dd.from_pandas(self.data, npartitions=2))
+        store.put("second", dd.from_pandas(self.data, npartitions=2))
+        store.set_metadata("second", {"test": 1})
+        store.drop("first")
+        self.assertGreater(store.free_space_ratio(), 0.25)
+        size = self.path.stat().st_size
+        reclaimed = store.compact()
+        self.assertGreater(reclaimed, 0)
+        self.assertEqual(self.path.stat().st_size, size - reclaimed)
+        self.assertListEqual(list(self.path.parent.iterdir()), [self.path])
+        pd.testing.assert_frame_equal(store.select("second"), self.data)
+        self.assertDictEqual(store.get_metadata("second"), {"test": 1})
+        with pd.HDFStore(self.path, mode="r") as h5:
+            self.assertListEqual(h5.keys(), ["/second"])
+            self.assertTrue(self.table(h5, "second").colindexes["index"].is_csi)
+
+    def test_compact_missing_file(self) -> None:
+        self.assertEqual(HdfStore(self.path).compact(), 0)
+        self.assertEqual(HdfStore(self.path).free_space_ratio(), 0.0)
+
+    def test_drop_compacts(self) -> None:
+        store = HdfStore(self.path, compact_threshold=0.25)
+        store.compact_min_bytes = 0
+        store.put("first", dd.from_pandas(self.data, npartitions=2))
+        store.put("second", dd.from_pandas(self.data, npartitions=2))
+        size = self.path.stat().st_size
+        store.drop("first")
+        self.assertLess(self.path.stat().st_size, size)
+        pd.testing.assert_frame_equal(store.select("second"), self.data)
+
+    def test_drop_below_threshold(self) -> None:
+        store = HdfStore(self.path, compact_threshold=0.25)
+        store.put("first", dd.from_pandas(self.data, npartitions=2))
+        store.put("second", dd.from_pandas(self.data, npartitions=2))
+        size = self.path.stat().st_size
+        # the free space is less than compact_min_bytes
+        store.drop("first")
+        self.assertEqual(self.path.stat().st_size, size)
+        self.assertEqual(store.compact_if_needed(), 0)
+
+
+class TestHdfLinks(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        index = pd.Index([f"V{i:03d}" for i in range(20)], name="index")
+        self.data = pd.DataFrame({"count": np.arange(20)}, index=index)
+        self.source = HdfStore(pathlib.Path(self._temp_dir.name, "source.h5"))
+        self.source.put("raw/counts", dd.from_pandas(self.data, npartitions=2))
+        self.source.set_metadata("raw/counts", {"test": 1})
+        self.store = HdfStore(pathlib.Path(self._temp_dir.name, "temp.h5"))
+        self.store.link("counts", self.source.path, "raw/counts")
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def assertSourceUnchanged(self) -> None:
+        pd.testing.assert_frame_equal(self.source.select("raw/counts"), self.data)
+        self.assertDictEqual(self.source.get_metadata("raw/counts"), {"test": 1})
+
+    def test_link_reads(self) -> None:
+        self.assertListEqual(self.store.keys(), ["counts"])
+        self.assertTrue(self.store.is_link("counts"))
+        pd.testing.assert_frame_equal(self.store.get("counts").compute(), self.data)
+        pd.testing.assert_frame_equal(
+            self.store.select("counts", index=["V003"]), self.data.loc[["V003"]]
+        )
+        np.testing.assert_array_equal(
+            self.store.get_column("counts", "count"), np.arange(20)
+        )
+        self.assertEqual(
+            sum(len(chunk) for chunk in self.store.iter_chunks("counts", 7)), 20
+        )
+        self.assertDictEqual(self.store.get_metadata("counts"), {"test": 1})
+
+    def test_link_persists(self) -> None:
+        store = HdfStore(self.store.path)
+        self.assertListEqual(store.keys(), ["counts"])
+        pd.testing.assert_frame_equal(store.select("counts"), self.data)
+
+    def test_link_missing_key(self) -> None:
+        self.assertRaises(KeyError, self.store.link, "other", self.source.path)
+
+    def test_set_metadata(self) -> None:
+        self.store.set_metadata("counts", {"test": 2})
+        self.assertDictEqual(self.store.get_metadata("counts"), {"test": 2})
+        self.assertTrue(self.store.is_link("counts"))
+        self.assertSourceUnchanged()
+
+    def test_append_copies(self) -> None:
+        extra = self.data.iloc[:2].rename(index=lambda x: "W" + x[1:])
+        self.store.append("counts", extra)
+        self.assertFalse(self.store.is_link("counts"))
+        pd.testing.assert_frame_equal(
+            self.store.select("counts"), pd.concat([self.data, extra])
+        )
+        self.assertDictEqual(self.store.get_metadata("counts"), {"test": 1})
+        self.assertSourceUnchanged()
+
+    def test_put_replaces_link(self) -> None:
+        self.store.put("counts", dd.from_pandas(self.data.iloc[:5], npartitions=1))
+        self.assertFalse(self.store.is_link("counts"))
+        pd.testing.assert_frame_equal(self.store.select("counts"), self.data.iloc[:5])
+        self.assertSourceUnchanged()
+
+    def test_drop_removes_link(self) -> None:
+        self.store.drop("counts")
+        self.assertListEqual(self.store.keys(), [])
+        self.assertDictEqual(self.store.links(), {})
+        self.assertSourceUnchanged()
+
+    def test_pandas_keys(self) -> None:
+        self.store.link("/raw/counts", self.source.path, "/raw/counts")
+        self.assertListEqual(self.store.keys(), ["counts", "raw/counts"])
+        self.assertTrue(self.store.is_link("/raw/counts"))
+        self.assertDictEqual(self.store.get_metadata("/raw/counts"), {"test": 1})
+        pd.testing.assert_frame_equal(self.store["/raw/counts"], self.data)
+        self.store.remove("/raw")
+        self.assertListEqual(self.store.keys(), ["counts"])
+        self.assertListEqual(list(self.store.links()), ["counts"])
+        self.assertSourceUnchanged()
+
+    def test_compact_keeps_links(self) -> None:
+        self.store.put("other", dd.from_pandas(self.data, npartitions=1))
+        self.store.compact()
+        self.assertTrue(self.store.is_link("counts"))
+        self.assertListEqual(
+            sorted(HdfStore(self.store.path).keys()), ["counts", "other"]
+        )
+
+
 def load_tests(loader, tests, pattern) -> unittest.TestSuite:
     suite = unittest.TestSuite()
     test_classes = create_test_classes(HdfStore)
@@ -12,6 +279,8 @@ def load_tests(loader, tests, pattern) -> unittest.TestSuite:
         tc.__qualname__ = tc.__name__
         tests = loader.loadTestsFromTestCase(tc)
         suite.addTests(tests)
+    suite.addTests(loader.loadTestsFromTestCase(TestHdfStorage))
+    suite.addTests(loader.loadTestsFromTestCase(TestHdfLinks))
     return suite
 
 
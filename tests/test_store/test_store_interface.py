@@ -0,0 +1,40 @@
+import unittest
+
+import dask
+import dask.dataframe as dd
+import pandas as pd
+
+from countess.store.interface import has_rows, rechunk
+
+
+def fail() -> pd.DataFrame:
+    raise AssertionError("partition should not be computed")
+
+
+class TestHasRows(unittest.TestCase):
+    def setUp(self) -> None:
+        self.meta = pd.DataFrame({"count": pd.Series([], dtype="int64")})
+
+    def test_stops_at_first_row(self) -> None:
+        first = pd.DataFrame({"count": [1]})
+        ddf = dd.from_delayed(
+            [dask.delayed(first), dask.delayed(fail)()], meta=self.meta
+        )
+        self.assertTrue(has_rows(ddf))
+
+    def test_empty(self) -> None:
+        ddf = dd.from_delayed(
+            [dask.delayed(self.meta), dask.delayed(self.meta)], meta=self.meta
+        )
+        self.assertFalse(has_rows(ddf))
+
+
+class TestRechunk(unittest.TestCase):
+    def test_sizes(self) -> None:
+        frames = [pd.DataFrame({"count": range(n)}) for n in (3, 1, 4)]
+        self.assertListEqual([len(df) for df in rechunk(frames, 3)], [3, 3, 2])
+        self.assertRaises(ValueError, rechunk, frames, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from countess.store.hdf import HdfStore
+from countess.store.feather import FeatherStore
+from countess.store.managed import (
+    ManagedStore,
+    open_store,
+    path_backend,
+    query_mask,
+    store_class,
+)
+
+try:
+    import duckdb
+except ImportError:  # duckdb is an optional dependency
+    duckdb = None
+
+
+class TestQueryMask(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = pd.DataFrame(
+            {"count": [1, 5, 10]}, index=pd.Index(["_wt", "AAA", "CCC"])
+        )
+
+    def test_comparison(self) -> None:
+        np.testing.assert_array_equal(
+            query_mask(self.data, "count >= 5"), [False, True, True]
+        )
+
+    def test_unquoted_index(self) -> None:
+        np.testing.assert_array_equal(
+            query_mask(self.data, "index!=_wt"), [False, True, True]
+        )
+        np.testing.assert_array_equal(
+            query_mask(self.data, "index=_wt"), [True, False, False]
+        )
+
+    def test_index_list(self) -> None:
+        np.testing.assert_array_equal(
+            query_mask(self.data, "index=['AAA', 'CCC']"), [False, True, True]
+        )
+
+    def test_terms(self) -> None:
+        np.testing.assert_array_equal(
+            query_mask(self.data, ["count > 1", "index!=CCC"]), [False, True, False]
+        )
+
+
+class TestStoreClass(unittest.TestCase):
+    def test_store_class(self) -> None:
+        self.assertIs(store_class("hdf5"), HdfStore)
+        self.assertIs(store_class("feather"), FeatherStore)
+        self.assertRaises(ValueError, store_class, "sqlite")
+
+    def test_path_backend(self) -> None:
+        self.assertEqual(path_backend("store.h5"), "hdf5")
+        self.assertEqual(path_backend("store.feather"), "feather")
+        self.assertIsNone(path_backend("store.txt"))
+
+    def test_open_store(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir, "temp.h5")
+            self.assertIsInstance(open_store("hdf5", path, complevel=1), HdfStore)
+            path = pathlib.Path(temp_dir, "temp.feather")
+            store = open_store("feather", path, complevel=1)
+            self.assertIsInstance(store, ManagedStore)
+            self.assertIsInstance(store.store, FeatherStore)
+
+
+class TestManagedFeatherStore(unittest.TestCase):
+    backend = "feather"
+    extension = ".feather"
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        path = pathlib.Path(self._temp_dir.name, "temp" + self.extension)
+        self.store = open_store(self.backend, path)
+        self.store.chunksize = 4
+        self.counts = pd.DataFrame(
+            {"count": np.arange(10)},
+            index=pd.Index(["_wt"] + [f"V{i}" for i in range(1, 10)]),
+        )
+        self.store.put("/main/barcodes/counts", self.counts)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._temp_dir.cleanup()
+
+    def test_keys(self) -> None:
+        self.assertIn("/main/barcodes/counts", self.store)
+        self.assertIn("/main", self.store)
+        self.assertNotIn("/main/bar", self.store)
+        self.assertEqual(self.store.nrows("/main/barcodes/counts"), 10)
+        pd.testing.assert_frame_equal(
+            self.store["/main/barcodes/counts"], self.counts, check_dtype=False
+        )
+
+    def test_select_where(self) -> None:
+        result = self.store.select("/main/barcodes/counts", where="count >= 8")
+        pd.testing.assert_frame_equal(result, self.counts.iloc[8:], check_dtype=False)
+        result = self.store.select(
+            "/main/barcodes/counts", where="index!=_wt", start=0, stop=6
+        )
+        pd.testing.assert_frame_equal(
+            result, self.counts.iloc[1:6], check_dtype=False
+        )
+
+    def test_select_empty(self) -> None:
+        result = self.store.select("/main/barcodes/counts", where="count > 100")
+        self.assertEqual(len(result), 0)
+        self.assertEqual(list(result.columns), ["count"])
+
+    def test_select_rows(self) -> None:
+        result = self.store.select("/main/barcodes/counts", where=np.array([7, 0, 5]))
+        pd.testing.assert_frame_equal(
+            result, self.counts.iloc[[0, 5, 7]], check_dtype=False
+        )
+
+    def test_select_index_column(self) -> None:
+        result = self.store.select("/main/barcodes/counts", columns=["index"])
+        self.assertListEqual(list(result.index), list(self.counts.index))
+        self.assertListEqual(list(result.columns), [])
+
+    def test_iter_chunks_where(self) -> None:
+        chunks = list(
+            self.store.iter_chunks("/main/barcodes/counts", 3, where="count > 2")
+        )
+        self.assertListEqual([len(df) for df in chunks], [3, 3, 1])
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks), self.counts.iloc[3:], check_dtype=False
+        )
+
+    def test_select_as_multiple(self) -> None:
+        scores = pd.DataFrame({"score": np.arange(10) / 10}, index=self.counts.index)
+        self.store.put("/main/barcodes/scores", scores)
+        result = self.store.select_as_multiple(
+            ["/main/barcodes/counts", "/main/barcodes/scores"], where="count < 2"
+        )
+        pd.testing.assert_frame_equal(
+            result,
+            pd.concat([self.counts, scores], axis=1).iloc[:2],
+            check_dtype=False,
+        )
+        self.store.put("/main/barcodes/short", scores.iloc[:5])
+        self.assertRaises(
+            ValueError,
+            self.store.select_as_multiple,
+            ["/main/barcodes/counts", "/main/barcodes/short"],
+        )
+
+    def test_get_column_index(self) -> None:
+        self.assertListEqual(
+            list(self.store.get_column("/main/barcodes/counts", "index")),
+            list(self.counts.index),
+        )
+
+    def test_remove_group(self) -> None:
+        self.store.put("/raw/barcodes/counts", self.counts)
+        self.store.remove("/main")
+        self.assertListEqual(self.store.keys(), ["raw/barcodes/counts"])
+        self.assertRaises(KeyError, self.store.remove, "/main")
+
+    def test_link(self) -> None:
+        source = pathlib.Path(self._temp_dir.name, "source.h5")
+        hdf = HdfStore(source)
+        hdf.put("/raw/barcodes/counts", self.counts)
+        hdf.set_metadata("/raw/barcodes/counts", {"name": "source"})
+        self.store.link("/raw/barcodes/counts", source)
+        self.assertFalse(self.store.is_link("/raw/barcodes/counts"))
+        pd.testing.assert_frame_equal(
+            self.store.select("/raw/barcodes/counts"), self.counts, check_dtype=False
+        )
+        self.assertDictEqual(
+            self.store.get_metadata("/raw/barcodes/counts"), {"name": "source"}
+        )
+
+    def test_column_sums(self) -> None:
+        self.assertEqual(self.store.column_sums("/main/barcodes/counts")["count"], 45)
+
+    def test_metadata(self) -> None:
+        self.store.set_metadata("/main/barcodes/counts", {"defaults": {"a": 1}})
+        self.assertDictEqual(
+            self.store.get_metadata("main/barcodes/counts"), {"defaults": {"a": 1}}
+        )
+
+    def test_close(self) -> None:
+        self.assertTrue(self.store.is_open())
+        self.store.close()
+        self.assertFalse(self.store.is_open())
+
+
+@unittest.skipIf(duckdb is None, "duckdb is not installed")
+class TestManagedDuckDbStore(TestManagedFeatherStore):
+    backend = "duckdb"
+    extension = ".duckdb"
+
+
+if __name__ == "__main__":
+    unittest.main()
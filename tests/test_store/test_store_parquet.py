@@ -1,9 +1,91 @@
+import pathlib
+import tempfile
 import unittest
 
+import dask.dataframe as dd
+import fastparquet
+import numpy as np
+import pandas as pd
+
 from countess.store.parquet import ParquetStore
 from tests.test_store.store_interface_tests import create_test_classes
 
 
+class TestParquetPushdown(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.store = ParquetStore(pathlib.Path(self._temp_dir.name, "temp.parquet"))
+        self.store.row_group_size = 10
+        index = pd.Index([f"V{i:03d}" for i in range(40)], name="index")
+        self.data = pd.DataFrame(
+            {"c_0": np.arange(40), "c_1": np.arange(40) * 2, "c_2": np.ones(40)},
+            index=index,
+        )
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_put_sorts_unknown_divisions(self) -> None:
+        shuffled = self.data.sample(frac=1, random_state=0)
+        ddf = dd.from_pandas(shuffled, npartitions=3, sort=False)
+        self.store.put("test_table", ddf)
+        result = self.store.get("test_table")
+        self.assertTrue(result.known_divisions)
+        pd.testing.assert_frame_equal(result.compute(), self.data)
+
+    def test_put_row_groups(self) -> None:
+        self.store.put("test_table", dd.from_pandas(self.data, npartitions=1))
+        parquet_file = fastparquet.ParquetFile(self.store._data_files("test_table"))
+        self.assertListEqual([rg.num_rows for rg in parquet_file.row_groups], [10] * 4)
+
+    def test_get_columns(self) -> None:
+        self.store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+        result = self.store.get("test_table", columns=["c_0", "c_2"])
+        self.assertListEqual(list(result.columns), ["c_0", "c_2"])
+        pd.testing.assert_frame_equal(result.compute(), self.data[["c_0", "c_2"]])
+
+    def test_get_filters(self) -> None:
+        self.store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+        result = self.store.get("test_table", filters=[("c_0", ">=", 25)])
+        # row groups entirely below the threshold are never read
+        self.assertEqual(result.npartitions, 2)
+        pd.testing.assert_frame_equal(
+            result.compute(), self.data.loc[self.data["c_0"] >= 25]
+        )
+
+    def test_get_filters_on_index(self) -> None:
+        self.store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+        result = self.store.get("test_table", filters=[("index", "in", ["V003"])])
+        self.assertEqual(result.npartitions, 1)
+        pd.testing.assert_frame_equal(result.compute(), self.data.loc[["V003"]])
+
+    def test_get_filters_or(self) -> None:
+        self.store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+        filters = [[("c_0", "<", 2)], [("c_0", ">", 37)]]
+        result = self.store.get("test_table", columns=["c_1"], filters=filters)
+        expected = self.data.loc[(self.data["c_0"] < 2) | (self.data["c_0"] > 37)]
+        pd.testing.assert_frame_equal(result.compute(), expected[["c_1"]])
+
+    def test_get_filters_bad_operator(self) -> None:
+        self.store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+        self.assertRaises(
+            ValueError, self.store.get, "test_table", filters=[("c_0", "~", 1)]
+        )
+
+    def test_append_after_gap(self) -> None:
+        # empty partitions are not written, so file numbers can have gaps
+        self.store.put("test_table", dd.from_pandas(self.data, npartitions=2))
+        pathlib.Path(self.store._data_files("test_table")[0]).rename(
+            self.store.path.joinpath("test_table", "part.5.parquet")
+        )
+        extra = pd.DataFrame(
+            {"c_0": [99], "c_1": [99], "c_2": [1.0]},
+            index=pd.Index(["W000"], name="index"),
+        )
+        self.store.append("test_table", extra)
+        self.assertEqual(len(self.store.select("test_table")), 41)
+
+
 def load_tests(loader, tests, pattern) -> unittest.TestSuite:
     suite = unittest.TestSuite()
     test_classes = create_test_classes(ParquetStore)
@@ -12,6 +94,7 @@ def load_tests(loader, tests, pattern) -> unittest.TestSuite:
         tc.__qualname__ = tc.__name__
         tests = loader.loadTestsFromTestCase(tc)
         suite.addTests(tests)
+    suite.addTests(loader.loadTestsFromTestCase(TestParquetPushdown))
     return suite
 
 